@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+# benchmark/bench_import.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Benchmark of the time to import the package modules.
+
+    Imports each module in a new Python interpreter with the
+    ``-X importtime`` option, and reports the median of the cumulative
+    import time over several runs. This includes the standard library
+    modules imported on behalf of the package, but not those the
+    interpreter imports at startup.
+
+    The interpreter must be able to write, or have already written,
+    cached bytecode; otherwise each run also compiles the package.
+
+    Exits with a failure status if any median exceeds the limit.
+
+    Usage: python -m benchmark.bench_import [LIMIT_MS [MODULE ...]]
+    """
+
+from __future__ import (absolute_import, print_function, unicode_literals)
+
+import os
+import subprocess
+import sys
+
+from .bench_sampler import median
+
+
+default_module_names = ["daemon", "daemon.runner"]
+
+
+def get_cumulative_import_time(module_name):
+    """ Get the time to import a module in a new interpreter.
+
+        :param module_name: The full name of the module to import.
+        :return: The cumulative import time, in seconds.
+
+        """
+    top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+            [
+                sys.executable, "-X", "importtime",
+                "-c", "import {name}".format(name=module_name)],
+            cwd=top_dir,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True)
+    (__, output) = process.communicate()
+    for line in output.splitlines():
+        fields = line.split(":", 1)[-1].split("|")
+        if len(fields) == 3 and fields[2].strip() == module_name:
+            return int(fields[1]) / 1e6
+
+    error = RuntimeError(
+            "No import time reported for {name!r}".format(name=module_name))
+    raise error
+
+
+def main(argv=None):
+    """ Run the benchmark, and report the import times.
+
+        :param argv: The command-line arguments.
+        :return: The exit status.
+
+        """
+    if argv is None:
+        argv = sys.argv
+    limit = float(argv[1]) if len(argv) > 1 else 10.0
+    module_names = argv[2:] or default_module_names
+    repeat = 15
+
+    if sys.flags.dont_write_bytecode:
+        print("warning: bytecode is not written; times include compiling")
+
+    exceeded = False
+    for module_name in module_names:
+        # The first run may compile and cache the bytecode.
+        get_cumulative_import_time(module_name)
+        times = [
+                get_cumulative_import_time(module_name)
+                for __ in range(repeat)]
+        import_time = median(times) * 1e3
+        print("import {name}: {time:.2f} ms (limit {limit:.2f} ms)".format(
+                name=module_name, time=import_time, limit=limit))
+        if import_time > limit:
+            exceeded = True
+
+    return 1 if exceeded else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+# benchmark/bench_sampler.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Benchmark of the overhead of the sampling profiler.
+
+    Runs a CPU-bound workload with and without `SamplingProfiler`
+    sampling, and reports the overhead two ways:
+
+    * The time spent taking samples, as a percentage of the elapsed
+      time; the sampling thread holds the interpreter lock for this
+      time, so it is the time taken from the workload.
+
+    * The change in the workload's time, from the median of
+      alternating runs; this includes the cost of switching threads,
+      but on a busy machine it is noisy.
+
+    Exits with a failure status if the sampling time exceeds the limit.
+
+    Usage: python -m benchmark.bench_sampler [RATE [LIMIT_PERCENT]]
+    """
+
+from __future__ import (absolute_import, print_function, unicode_literals)
+
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+from daemon.sampler import SamplingProfiler
+
+
+class TimedSamplingProfiler(SamplingProfiler):
+    """ Sampling profiler which records the time spent sampling. """
+
+    def __init__(self, *args, **kwargs):
+        super(TimedSamplingProfiler, self).__init__(*args, **kwargs)
+        self.sample_time = 0.0
+
+    def sample(self):
+        start_time = timeit.default_timer()
+        super(TimedSamplingProfiler, self).sample()
+        self.sample_time += timeit.default_timer() - start_time
+
+
+def fibonacci(n):
+    """ Compute a Fibonacci number, slowly and recursively. """
+    if n < 2:
+        return n
+    return fibonacci(n - 1) + fibonacci(n - 2)
+
+
+def workload():
+    """ A CPU-bound workload with a moderately deep stack. """
+    fibonacci(22)
+
+
+def time_workload(number):
+    """ Get the time of the workload, in seconds. """
+    return timeit.timeit(workload, number=number)
+
+
+def median(values):
+    """ Get the median of a sequence of numbers. """
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
+
+
+def main(argv=None):
+    """ Run the benchmark, and report the overhead.
+
+        :param argv: The command-line arguments.
+        :return: The exit status.
+
+        """
+    if argv is None:
+        argv = sys.argv
+    rate = int(argv[1]) if len(argv) > 1 else 100
+    limit = float(argv[2]) if len(argv) > 2 else 2.0
+    (number, repeat) = (20, 25)
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        profiler = TimedSamplingProfiler(
+                os.path.join(temp_dir, "profile-{pid}.txt"), rate=rate)
+        # Alternate the runs, so drift in the machine's speed affects
+        # both alike.
+        (ratios, samples, sample_time, profiled_time) = ([], 0, 0.0, 0.0)
+        for __ in range(repeat):
+            baseline = time_workload(number)
+            profiler.sample_time = 0.0
+            profiler.start()
+            try:
+                profiled = time_workload(number)
+            finally:
+                profiler.stop()
+            ratios.append(profiled / baseline)
+            samples += profiler.sample_count
+            sample_time += profiler.sample_time
+            profiled_time += profiled
+    finally:
+        shutil.rmtree(temp_dir)
+
+    sampling_overhead = sample_time / profiled_time * 100
+    workload_overhead = (median(ratios) - 1) * 100
+    print("samples: {samples:d} at {rate:d} Hz, {cost:.1f} us each".format(
+            samples=samples, rate=rate,
+            cost=(sample_time / max(samples, 1) * 1e6)))
+    print("sampling overhead: {overhead:.2f} % (limit {limit:.2f} %)"
+            .format(overhead=sampling_overhead, limit=limit))
+    print("workload overhead: {overhead:+.2f} % (median of {count:d})"
+            .format(overhead=workload_overhead, count=repeat))
+
+    return 0 if sampling_overhead <= limit else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,426 @@
+# -*- coding: utf-8 -*-
+
+# benchmark/hotpaths.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Benchmarks of the paths taken to become, and to manage, a daemon.
+
+    Each benchmark function takes the number of times to repeat its
+    measurement, and returns a mapping from result name to result; see
+    `make_result`. Every measurement that changes the process runs in
+    a forked child process, so the benchmarks need no privileges and
+    leave the benchmark process unchanged.
+
+    """
+
+from __future__ import (absolute_import, print_function, unicode_literals)
+
+import errno
+import io
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+import traceback
+
+from .bench_sampler import median
+
+
+clock = getattr(time, 'perf_counter', time.time)
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_result(samples, unit, better='lower', **detail):
+    """ Make the result of a benchmark from its samples.
+
+        :param samples: The sequence of measured values.
+        :param unit: The unit of the values, for example ``'s'``.
+        :param better: ``'lower'`` or ``'higher'``, whichever is the
+            better direction for the value.
+        :param detail: Further items to record with the result.
+        :return: A mapping with the median as ``'value'``, and the
+            ``'unit'``, ``'better'``, ``'samples'``, and `detail` items.
+
+        """
+    result = {
+            'value': median(samples),
+            'unit': unit,
+            'better': better,
+            'samples': list(samples),
+            }
+    result.update(detail)
+
+    return result
+
+
+def run_in_child(func):
+    """ Call a function in a forked child process, and get its result.
+
+        :param func: The function to call. It takes the file descriptor
+            to which the result is written, which it must keep open,
+            and returns a JSON-serialisable result.
+        :return: The result returned by `func`.
+        :raises RuntimeError: If the child process fails to return a
+            result.
+
+        The result is written by whichever process returns from
+        `func`; if `func` forks, as `DaemonContext.open` does, that is
+        a descendant of the child process.
+
+        """
+    return finish_child(*start_child(func))
+
+
+def run_in_children(count, func):
+    """ Call a function in several child processes at once.
+
+        :param count: The number of child processes.
+        :param func: The function to call, as for `run_in_child`.
+        :return: The list of the results from each child.
+
+        """
+    children = [start_child(func) for __ in range(count)]
+
+    return [finish_child(*child) for child in children]
+
+
+def start_child(func):
+    """ Start a child process calling a function, for `run_in_child`.
+
+        :param func: The function to call.
+        :return: A 2-tuple (`pid`, `read_fd`) of the child process ID
+            and the file descriptor from which to read its result.
+
+        """
+    (read_fd, write_fd) = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 0
+        try:
+            os.close(read_fd)
+            content = json.dumps({'result': func(write_fd)})
+        except BaseException:
+            content = json.dumps({'error': traceback.format_exc()})
+            status = 1
+        try:
+            os.write(write_fd, content.encode('utf-8'))
+        finally:
+            os._exit(status)
+
+    os.close(write_fd)
+
+    return (pid, read_fd)
+
+
+def finish_child(pid, read_fd):
+    """ Wait for a child process, and get its result.
+
+        :param pid: The child process ID.
+        :param read_fd: The file descriptor from which to read.
+        :return: The result returned by the function in the child.
+        :raises RuntimeError: If the child process fails to return a
+            result.
+
+        """
+    chunks = []
+    with io.open(read_fd, 'rb') as infile:
+        for chunk in iter(lambda: infile.read(65536), b""):
+            chunks.append(chunk)
+    os.waitpid(pid, 0)
+    try:
+        content = json.loads(b"".join(chunks).decode('utf-8'))
+    except ValueError:
+        raise RuntimeError("Child process returned no result")
+    if 'error' in content:
+        raise RuntimeError(
+                "Child process failed:\n{error}".format(
+                    error=content['error']))
+
+    return content['result']
+
+
+nofile_limits = [256, 1024, 4096, 16384, 65536, 262144]
+
+
+def bench_close_all_open_files(repeat):
+    """ Benchmark `close_all_open_files`, for each file descriptor limit.
+
+        :param repeat: The number of measurements for each limit.
+        :return: A mapping of result name to result.
+
+        Each limit in `nofile_limits` up to the current hard limit is
+        measured; unprivileged, a process cannot raise its hard limit.
+
+        """
+    import daemon.daemon
+
+    (__, hard_limit) = resource.getrlimit(resource.RLIMIT_NOFILE)
+
+    def close_files(result_fd, limit):
+        resource.setrlimit(resource.RLIMIT_NOFILE, (limit, limit))
+        for __ in range(16):
+            os.open(os.devnull, os.O_RDONLY)
+        start_time = clock()
+        daemon.daemon.close_all_open_files(exclude=set([result_fd]))
+        return clock() - start_time
+
+    results = {}
+    for limit in nofile_limits:
+        if hard_limit != resource.RLIM_INFINITY and limit > hard_limit:
+            continue
+        samples = [
+                run_in_child(lambda result_fd: close_files(result_fd, limit))
+                for __ in range(repeat)]
+        name = "close_all_open_files/nofile={limit:d}".format(limit=limit)
+        results[name] = make_result(samples, 's')
+
+    return results
+
+
+def bench_open_in_forked_child(repeat):
+    """ Benchmark a full `DaemonContext.open`, in a forked child.
+
+        :param repeat: The number of measurements.
+        :return: A mapping of result name to result.
+
+        The context detaches from the child, so the measurement
+        includes the forks and the exit of the intermediate process.
+        The result records the median duration of each open step.
+
+        """
+    import daemon
+
+    def open_context(result_fd):
+        context = daemon.DaemonContext(
+                detach_process=True, files_preserve=[result_fd])
+        start_time = clock()
+        context.open()
+        duration = clock() - start_time
+        return {
+                'duration': duration,
+                'steps': dict(
+                    (timing.name, timing.duration_ns / 1e9)
+                    for timing in context.open_timings),
+                }
+
+    runs = [run_in_child(open_context) for __ in range(repeat)]
+    step_names = sorted(set(
+            name for run in runs for name in run['steps']))
+    steps = dict(
+            (name, median([run['steps'].get(name, 0.0) for run in runs]))
+            for name in step_names)
+
+    return {
+            'open_in_forked_child': make_result(
+                [run['duration'] for run in runs], 's', steps=steps),
+            }
+
+
+runner_app_template = textwrap.dedent("""\
+        import os
+        import time
+
+        import daemon.runner
+
+
+        class App:
+
+            stdin_path = os.devnull
+            stdout_path = os.devnull
+            stderr_path = os.devnull
+            pidfile_path = {pidfile_path!r}
+            pidfile_timeout = 5
+
+            def run(self):
+                with open({ready_path!r}, 'w') as ready_file:
+                    ready_file.write(str(os.getpid()))
+                while True:
+                    time.sleep(60)
+
+
+        daemon.runner.DaemonRunner(App()).do_action()
+        """)
+
+
+def is_process_running(pid):
+    """ Determine whether a process is running, and not a zombie.
+
+        :param pid: The process ID.
+        :return: ``True`` if the process exists and has not exited.
+
+        A daemon's parent process is the init process; if that does
+        not reap its children, as in some containers, an exited daemon
+        remains a zombie.
+
+        """
+    try:
+        os.kill(pid, 0)
+    except OSError as exc:
+        if exc.errno == errno.ESRCH:
+            return False
+        raise
+    try:
+        with io.open("/proc/{pid:d}/stat".format(pid=pid), 'rb') as infile:
+            stat_fields = infile.read().rsplit(b")", 1)[-1].split()
+    except EnvironmentError:
+        return True
+
+    return stat_fields[0] != b"Z"
+
+
+def wait_until(predicate, timeout=10.0, interval=0.0005):
+    """ Wait until a predicate is true.
+
+        :param predicate: The function to call, without arguments.
+        :param timeout: Seconds to wait before giving up.
+        :param interval: Seconds to sleep between calls.
+        :return: ``None``.
+        :raises RuntimeError: If `timeout` passes first.
+
+        """
+    end_time = clock() + timeout
+    while not predicate():
+        if clock() > end_time:
+            raise RuntimeError("Timeout waiting for the daemon")
+        time.sleep(interval)
+
+
+def bench_runner_latency(repeat):
+    """ Benchmark the latency of runner ``start`` and ``stop`` commands.
+
+        :param repeat: The number of measurements.
+        :return: A mapping of result name to result.
+
+        The start latency is from running the ``start`` command until
+        the daemon application runs; the stop latency is from running
+        the ``stop`` command until the daemon process exits. Each
+        includes starting the Python interpreter for the command.
+
+        """
+    temp_dir = tempfile.mkdtemp()
+    try:
+        ready_path = os.path.join(temp_dir, "ready")
+        pidfile_path = os.path.join(temp_dir, "app.pid")
+        app_path = os.path.join(temp_dir, "app.py")
+        with io.open(app_path, 'w', encoding='utf-8') as outfile:
+            outfile.write(runner_app_template.format(
+                    pidfile_path=pidfile_path, ready_path=ready_path))
+        environment = dict(os.environ, PYTHONPATH=top_dir)
+
+        def run_command(action):
+            # A socket as standard input would look like a superserver,
+            # and the daemon would not detach.
+            with io.open(os.devnull, 'rb') as infile:
+                subprocess.check_call(
+                        [sys.executable, app_path, action],
+                        stdin=infile, env=environment)
+
+        (start_samples, stop_samples) = ([], [])
+        for __ in range(repeat):
+            start_time = clock()
+            run_command('start')
+            wait_until(lambda: os.path.exists(ready_path))
+            start_samples.append(clock() - start_time)
+
+            wait_until(lambda: os.path.getsize(ready_path) > 0)
+            with io.open(ready_path, 'r') as infile:
+                pid = int(infile.read())
+            start_time = clock()
+            run_command('stop')
+            wait_until(lambda: not is_process_running(pid))
+            stop_samples.append(clock() - start_time)
+            os.remove(ready_path)
+    finally:
+        shutil.rmtree(temp_dir)
+
+    return {
+            'runner_start_ready': make_result(start_samples, 's'),
+            'runner_stop_exit': make_result(stop_samples, 's'),
+            }
+
+
+pidfile_worker_counts = [1, 4]
+
+
+def bench_pidfile_contention(repeat, duration=0.5, acquire_timeout=0.1):
+    """ Benchmark PID file acquire and release, with contending workers.
+
+        :param repeat: The number of measurements for each worker count.
+        :param duration: Seconds for each measurement.
+        :param acquire_timeout: Seconds each acquire waits for the lock.
+        :return: A mapping of result name to result.
+
+        Each of the workers, in its own process, acquires and releases
+        the same PID file for `duration`. The throughput is the total
+        number of acquisitions each second; acquisitions which time out
+        are recorded separately.
+
+        """
+    import daemon.pidfile
+    import lockfile
+
+    def contend(result_fd, path, end_time):
+        lock = daemon.pidfile.TimeoutPIDLockFile(path, acquire_timeout)
+        (acquired, timeouts) = (0, 0)
+        while clock() < end_time:
+            try:
+                lock.acquire()
+            except lockfile.LockTimeout:
+                timeouts += 1
+                continue
+            lock.release()
+            acquired += 1
+        return (acquired, timeouts)
+
+    temp_dir = tempfile.mkdtemp()
+    results = {}
+    try:
+        path = os.path.join(temp_dir, "contended.pid")
+        for worker_count in pidfile_worker_counts:
+            (samples, total_timeouts) = ([], 0)
+            for __ in range(repeat):
+                end_time = clock() + duration
+                counts = run_in_children(
+                        worker_count,
+                        lambda result_fd: contend(result_fd, path, end_time))
+                samples.append(sum(count[0] for count in counts) / duration)
+                total_timeouts += sum(count[1] for count in counts)
+            name = "pidfile_contention/workers={count:d}".format(
+                    count=worker_count)
+            results[name] = make_result(
+                    samples, 'ops/s', better='higher',
+                    timeouts=total_timeouts)
+    finally:
+        shutil.rmtree(temp_dir)
+
+    return results
+
+
+# The name, function, and default repeat count of each benchmark.
+benchmarks = [
+        ('close_all_open_files', bench_close_all_open_files, 5),
+        ('open_in_forked_child', bench_open_in_forked_child, 10),
+        ('runner_latency', bench_runner_latency, 5),
+        ('pidfile_contention', bench_pidfile_contention, 3),
+        ]
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
+
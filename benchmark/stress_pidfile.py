@@ -0,0 +1,520 @@
+# -*- coding: utf-8 -*-
+
+# benchmark/stress_pidfile.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Stress test of PID file locking by concurrent runner commands.
+
+    Runs many concurrent DaemonRunner ``start``, ``stop``, and
+    ``restart`` commands of one application against the same PID file,
+    as an orchestrator retrying commands would, and checks:
+
+    * A storm of concurrent ``start`` commands leaves exactly one
+      daemon running.
+
+    * No two daemons run at once. A background thread watches the
+      daemons which have reached the application's ``run``.
+
+    * No daemon loses its PID file while running; breaking a stale
+      lock must never remove the PID file of a live daemon.
+
+    * Once the commands finish and a final ``stop`` runs, no daemon
+      process and no PID file remain.
+
+    Some operations instead kill the daemon with ``SIGKILL``, leaving a
+    stale PID file for a later command to break.
+
+    Reports the throughput of commands, the latency distribution of
+    each command, and each violation found. Exits with a failure
+    status if there are any violations.
+
+    Usage: python -m benchmark.stress_pidfile [--operations N]
+        [--concurrency N] [--kill-rate FRACTION]
+        [--pidfile {flock,lockfile}] [--seed N]
+    """
+
+from __future__ import (absolute_import, print_function, unicode_literals)
+
+import argparse
+import collections
+import io
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+
+from .hotpaths import (clock, is_process_running, top_dir, wait_until)
+
+
+stress_app_template = textwrap.dedent("""\
+        import io
+        import os
+        import time
+
+        import daemon.pidfile
+        import daemon.runner
+
+
+        class App:
+
+            stdin_path = os.devnull
+            stdout_path = os.devnull
+            stderr_path = os.devnull
+            pidfile_path = {pidfile_path!r}
+            pidfile_timeout = {pidfile_timeout!r}
+            pidfile_class = daemon.pidfile.{pidfile_class}
+
+            def run(self):
+                pid = os.getpid()
+                instance_path = os.path.join({instances_dir!r}, str(pid))
+                with io.open(instance_path, 'w') as outfile:
+                    outfile.write(str(pid))
+                try:
+                    while True:
+                        time.sleep(60)
+                finally:
+                    # Still running: the context releases the PID file
+                    # after this, on exit.
+                    pidfile_pid = runner.pidfile.read_pid()
+                    if pidfile_pid != pid:
+                        lost_path = os.path.join({lost_dir!r}, str(pid))
+                        with io.open(lost_path, 'w') as outfile:
+                            outfile.write(str(pidfile_pid))
+                    os.remove(instance_path)
+
+
+        runner = daemon.runner.DaemonRunner(App())
+        runner.do_action()
+        """)
+
+action_weights = [('start', 4), ('stop', 3), ('restart', 3)]
+
+pidfile_classes = {
+        'lockfile': 'TimeoutPIDLockFile',
+        'flock': 'FlockPIDLockFile',
+        }
+
+
+def get_percentile(values, percent):
+    """ Get a percentile of values, by the nearest-rank method.
+
+        :param values: The sequence of values; not empty.
+        :param percent: The percentile, from 0 to 100.
+        :return: The value at that percentile.
+
+        """
+    ordered = sorted(values)
+    rank = int(round(percent / 100.0 * (len(ordered) - 1)))
+
+    return ordered[rank]
+
+
+class StressTest:
+    """ Concurrent runner commands against one PID file. """
+
+    def __init__(
+            self, operations=300, concurrency=50, kill_rate=0.05,
+            pidfile_timeout=2.0, pidfile_kind='lockfile', seed=None):
+        """ Set up a new stress test.
+
+            :param operations: The number of commands to run, after
+                the initial storm of ``start`` commands.
+            :param concurrency: The number of commands running at once.
+            :param kill_rate: The fraction of operations which kill
+                the running daemon instead of running a command.
+            :param pidfile_timeout: Seconds each daemon waits to lock
+                the PID file.
+            :param pidfile_kind: The kind of PID file, a key of
+                `pidfile_classes`.
+            :param seed: The seed for choosing the operations, or
+                ``None`` for a random seed.
+            :return: ``None``.
+
+            """
+        self.operations = operations
+        self.concurrency = concurrency
+        self.kill_rate = kill_rate
+        self.pidfile_timeout = pidfile_timeout
+        self.pidfile_kind = pidfile_kind
+        self.random = random.Random(seed)
+
+        self.latencies = collections.defaultdict(list)
+        self.exit_statuses = collections.defaultdict(collections.Counter)
+        self.kill_count = 0
+        self.violations = []
+        self.max_live_count = 0
+        self.duration = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def set_up(self):
+        """ Make the working directory and the application script.
+
+            :return: ``None``.
+
+            """
+        self.temp_dir = tempfile.mkdtemp()
+        self.lock_dir = os.path.join(self.temp_dir, "run")
+        self.instances_dir = os.path.join(self.temp_dir, "instances")
+        self.lost_dir = os.path.join(self.temp_dir, "lost")
+        for path in [self.lock_dir, self.instances_dir, self.lost_dir]:
+            os.mkdir(path)
+        self.pidfile_path = os.path.join(self.lock_dir, "app.pid")
+        self.app_path = os.path.join(self.temp_dir, "app.py")
+        with io.open(self.app_path, 'w', encoding='utf-8') as outfile:
+            outfile.write(stress_app_template.format(
+                    pidfile_path=self.pidfile_path,
+                    pidfile_timeout=self.pidfile_timeout,
+                    pidfile_class=pidfile_classes[self.pidfile_kind],
+                    instances_dir=self.instances_dir,
+                    lost_dir=self.lost_dir))
+        self.environment = dict(os.environ, PYTHONPATH=top_dir)
+
+    def tear_down(self):
+        """ Kill any remaining processes, and remove the directory.
+
+            :return: ``None``.
+
+            """
+        for pid in self.get_app_pids():
+            self.kill(pid)
+        shutil.rmtree(self.temp_dir)
+
+    def run(self):
+        """ Run the stress test.
+
+            :return: ``None``.
+
+            """
+        self.set_up()
+        watcher = threading.Thread(target=self._watch_instances)
+        watcher.daemon = True
+        watcher.start()
+        try:
+            start_time = clock()
+            self.run_start_storm()
+            self.run_mixed_operations()
+            self.duration = clock() - start_time
+            self.check_final_state()
+        finally:
+            self._stop_event.set()
+            watcher.join()
+            self.tear_down()
+
+    def run_command(self, action):
+        """ Run a runner command, recording its latency and status.
+
+            :param action: The runner action, for example ``'start'``.
+            :return: ``None``.
+
+            """
+        # A socket as standard input would look like a superserver,
+        # and the daemon would not detach.
+        with io.open(os.devnull, 'r+b') as null_file:
+            start_time = clock()
+            exit_status = subprocess.call(
+                    [sys.executable, self.app_path, action],
+                    stdin=null_file, stdout=null_file, stderr=null_file,
+                    env=self.environment)
+            latency = clock() - start_time
+        with self._lock:
+            self.latencies[action].append(latency)
+            self.exit_statuses[action][exit_status] += 1
+
+    def run_concurrently(self, operations):
+        """ Run operations, `concurrency` at a time.
+
+            :param operations: The sequence of operations: a runner
+                action, or ``'kill'``.
+            :return: ``None``.
+
+            """
+        pending = collections.deque(operations)
+
+        def work():
+            while True:
+                try:
+                    operation = pending.popleft()
+                except IndexError:
+                    break
+                if operation == 'kill':
+                    self.kill_instance()
+                else:
+                    self.run_command(operation)
+
+        workers = [
+                threading.Thread(target=work)
+                for __ in range(self.concurrency)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def run_start_storm(self):
+        """ Run concurrent ``start`` commands, expecting one daemon.
+
+            :return: ``None``.
+
+            """
+        self.run_concurrently(['start'] * self.concurrency)
+        self.wait_for_settled()
+        instances = self.get_live_instances()
+        if len(instances) != 1:
+            self.add_violation(
+                    "{count:d} daemons running after {starts:d}"
+                    " concurrent starts: {pids}".format(
+                        count=len(instances), starts=self.concurrency,
+                        pids=sorted(instances)))
+
+    def run_mixed_operations(self):
+        """ Run a random mix of commands, and of killing the daemon.
+
+            :return: ``None``.
+
+            """
+        (actions, weights) = zip(*action_weights)
+        operations = []
+        for __ in range(self.operations):
+            if self.random.random() < self.kill_rate:
+                operations.append('kill')
+                continue
+            choice = self.random.uniform(0, sum(weights))
+            for (action, weight) in zip(actions, weights):
+                choice -= weight
+                if choice <= 0:
+                    break
+            operations.append(action)
+        self.run_concurrently(operations)
+
+    def check_final_state(self):
+        """ Stop the daemon, then check nothing remains.
+
+            :return: ``None``.
+
+            """
+        self.wait_for_settled()
+        for __ in range(3):
+            if not self.get_live_instances():
+                break
+            self.run_command('stop')
+            self.wait_for_settled()
+
+        app_pids = self.get_app_pids()
+        if app_pids:
+            self.add_violation(
+                    "Orphaned processes after final stop: {pids}".format(
+                        pids=sorted(app_pids)))
+        if os.path.exists(self.pidfile_path):
+            self.add_violation(
+                    "Orphaned PID file after final stop, PID {pid}".format(
+                        pid=read_text(self.pidfile_path)))
+        stray_names = set(os.listdir(self.lock_dir)) - set(["app.pid"])
+        if stray_names:
+            self.add_violation(
+                    "Orphaned lock files: {names}".format(
+                        names=sorted(stray_names)))
+        for name in sorted(os.listdir(self.lost_dir)):
+            self.add_violation(
+                    "Daemon {pid} lost its PID file while running;"
+                    " PID file named {other}".format(
+                        pid=name, other=read_text(
+                            os.path.join(self.lost_dir, name))))
+
+    def wait_for_settled(self):
+        """ Wait until each application process is a running daemon.
+
+            :return: ``None``.
+
+            Processes still waiting to lock the PID file give up after
+            the PID file timeout, so this waits for that and more.
+
+            """
+        try:
+            wait_until(
+                    lambda: self.get_app_pids() <= self.get_live_instances(),
+                    timeout=(self.pidfile_timeout + 5.0), interval=0.01)
+        except RuntimeError:
+            pass
+
+    def get_live_instances(self):
+        """ Get the daemons which are running the application.
+
+            :return: The set of process IDs.
+
+            """
+        pids = set(int(name) for name in os.listdir(self.instances_dir))
+
+        return set(pid for pid in pids if is_process_running(pid))
+
+    def get_app_pids(self):
+        """ Get the processes running the application script.
+
+            :return: The set of process IDs.
+
+            """
+        output = subprocess.check_output(
+                ["ps", "-A", "-o", "pid=", "-o", "args="],
+                universal_newlines=True)
+        pids = set()
+        for line in output.splitlines():
+            (pid, __, args) = line.strip().partition(" ")
+            if self.app_path in args and is_process_running(int(pid)):
+                pids.add(int(pid))
+
+        return pids
+
+    def kill_instance(self):
+        """ Kill the running daemon, leaving a stale PID file.
+
+            :return: ``None``.
+
+            """
+        for pid in self.get_live_instances():
+            self.kill(pid)
+            instance_path = os.path.join(self.instances_dir, str(pid))
+            if os.path.exists(instance_path):
+                os.remove(instance_path)
+            with self._lock:
+                self.kill_count += 1
+
+    def kill(self, pid):
+        """ Kill a process, and wait for it to exit.
+
+            :param pid: The process ID.
+            :return: ``None``.
+
+            """
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            return
+        wait_until(lambda: not is_process_running(pid))
+
+    def add_violation(self, message):
+        """ Record a violation.
+
+            :param message: The description of the violation.
+            :return: ``None``.
+
+            """
+        with self._lock:
+            self.violations.append(message)
+
+    def report(self):
+        """ Get the report of the stress test.
+
+            :return: The lines of text reporting the results.
+
+            """
+        command_count = sum(
+                len(latencies) for latencies in self.latencies.values())
+        lines = [
+                "{count:d} commands and {kills:d} kills"
+                " in {duration:.2f} s: {rate:.1f} commands/s".format(
+                    count=command_count, kills=self.kill_count,
+                    duration=self.duration,
+                    rate=(command_count / self.duration)),
+                "Most daemons running at once: {count:d}".format(
+                    count=self.max_live_count),
+                ]
+        for (action, latencies) in sorted(self.latencies.items()):
+            lines.append(
+                    "{action}: {count:d}, exit statuses {statuses};"
+                    " latency ms p50 {p50:.1f}, p90 {p90:.1f},"
+                    " p99 {p99:.1f}, max {max:.1f}".format(
+                        action=action, count=len(latencies),
+                        statuses=dict(self.exit_statuses[action]),
+                        p50=(get_percentile(latencies, 50) * 1e3),
+                        p90=(get_percentile(latencies, 90) * 1e3),
+                        p99=(get_percentile(latencies, 99) * 1e3),
+                        max=(max(latencies) * 1e3)))
+        lines.append("Violations: {count:d}".format(
+                count=len(self.violations)))
+        lines.extend("  " + message for message in self.violations)
+
+        return lines
+
+    def _watch_instances(self):
+        """ Check that at most one daemon runs, until stopped. """
+        while not self._stop_event.wait(0.001):
+            try:
+                instances = self.get_live_instances()
+            except (OSError, ValueError):
+                continue
+            self.max_live_count = max(self.max_live_count, len(instances))
+            if len(instances) > 1:
+                self.add_violation(
+                        "Daemons running at once: {pids}".format(
+                            pids=sorted(instances)))
+
+
+def read_text(path):
+    """ Read the text of a file, or ``None`` if it cannot be read. """
+    try:
+        with io.open(path, 'r') as infile:
+            return infile.read().strip()
+    except EnvironmentError:
+        return None
+
+
+def main(argv=None):
+    """ Run the stress test, and report the results.
+
+        :param argv: The command-line arguments.
+        :return: The exit status.
+
+        """
+    if argv is None:
+        argv = sys.argv
+    parser = argparse.ArgumentParser(
+            prog="python -m benchmark.stress_pidfile",
+            description="Stress test PID file locking by runner commands.")
+    parser.add_argument(
+            '--operations', type=int, default=300,
+            help="Number of operations after the start storm.")
+    parser.add_argument(
+            '--concurrency', type=int, default=50,
+            help="Number of commands running at once.")
+    parser.add_argument(
+            '--kill-rate', type=float, default=0.05,
+            help="Fraction of operations which kill the daemon.")
+    parser.add_argument(
+            '--pidfile', choices=sorted(pidfile_classes), default='lockfile',
+            help="Kind of PID file for the daemon.")
+    parser.add_argument(
+            '--seed', type=int, default=None,
+            help="Seed for choosing the operations.")
+    args = parser.parse_args(argv[1:])
+
+    stress_test = StressTest(
+            operations=args.operations, concurrency=args.concurrency,
+            kill_rate=args.kill_rate, pidfile_kind=args.pidfile,
+            seed=args.seed)
+    stress_test.run()
+    for line in stress_test.report():
+        print(line)
+
+    return 1 if stress_test.violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
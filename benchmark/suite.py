@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+# benchmark/suite.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Benchmark suite, with JSON baselines and regression comparison.
+
+    The ``run`` command runs the benchmarks of `benchmark.hotpaths`,
+    and writes the results to a JSON file; keep one as the baseline.
+    The ``compare`` command compares a results file against a baseline,
+    and exits with a failure status if any result is worse than the
+    baseline by more than the threshold percentage.
+
+    Usage:
+        python -m benchmark.suite run [--output PATH] [--repeat N]
+            [NAME ...]
+        python -m benchmark.suite compare BASELINE RESULTS
+            [--threshold PERCENT]
+    """
+
+from __future__ import (absolute_import, print_function, unicode_literals)
+
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import resource
+import sys
+
+from . import hotpaths
+
+
+results_format = 1
+
+
+def get_environment():
+    """ Get a description of the environment of the benchmark.
+
+        :return: A mapping of environment item name to value.
+
+        """
+    (soft_limit, hard_limit) = resource.getrlimit(resource.RLIMIT_NOFILE)
+
+    return {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count() if hasattr(os, 'cpu_count') else None,
+            'nofile_limits': [soft_limit, hard_limit],
+            'time': datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }
+
+
+def run_benchmarks(names=None, repeat=None):
+    """ Run benchmarks, and get the results.
+
+        :param names: The names of the benchmarks to run, or ``None``
+            for all.
+        :param repeat: The number of measurements for each benchmark,
+            or ``None`` for its default.
+        :return: A mapping with the ``'format'``, ``'environment'``,
+            and ``'results'`` items.
+        :raises ValueError: If a name is not a known benchmark.
+
+        """
+    known_names = [name for (name, __, __) in hotpaths.benchmarks]
+    for name in names or []:
+        if name not in known_names:
+            error = ValueError(
+                    "Unknown benchmark {name!r}".format(name=name))
+            raise error
+
+    results = {}
+    for (name, func, default_repeat) in hotpaths.benchmarks:
+        if names and name not in names:
+            continue
+        results.update(func(repeat or default_repeat))
+
+    return {
+            'format': results_format,
+            'environment': get_environment(),
+            'results': results,
+            }
+
+
+def compare_results(baseline, current, threshold):
+    """ Compare benchmark results against a baseline.
+
+        :param baseline: The baseline results mapping.
+        :param current: The current results mapping.
+        :param threshold: The percentage by which a result may be worse
+            than its baseline, before it is a regression.
+        :return: A list of 4-tuples (`name`, `change`, `status`,
+            `line`): the percentage `change` of the value, or ``None``
+            if not in both; the `status`, one of ``'ok'``,
+            ``'improved'``, ``'regressed'``, ``'missing'``, or
+            ``'new'``; and the `line` of text reporting it.
+
+        """
+    baseline_results = baseline['results']
+    current_results = current['results']
+    comparisons = []
+    for name in sorted(set(baseline_results) | set(current_results)):
+        if name not in current_results:
+            comparisons.append(
+                    (name, None, 'missing', "{name}: missing".format(
+                        name=name)))
+            continue
+        if name not in baseline_results:
+            comparisons.append(
+                    (name, None, 'new', "{name}: new".format(name=name)))
+            continue
+
+        (before, after) = (baseline_results[name], current_results[name])
+        change = (after['value'] - before['value']) / before['value'] * 100
+        worse = change if before['better'] == 'lower' else -change
+        status = 'ok'
+        if worse > threshold:
+            status = 'regressed'
+        elif worse < -threshold:
+            status = 'improved'
+        line = (
+                "{name}: {before:.6g} -> {after:.6g} {unit}"
+                " ({change:+.1f} %) {status}").format(
+                    name=name, before=before['value'], after=after['value'],
+                    unit=after['unit'], change=change, status=status)
+        comparisons.append((name, change, status, line))
+
+    return comparisons
+
+
+def read_results(path):
+    """ Read a results file.
+
+        :param path: Filesystem path of the JSON results file.
+        :return: The results mapping.
+        :raises ValueError: If the file is of an unknown format.
+
+        """
+    with io.open(path, 'r', encoding='utf-8') as infile:
+        content = json.load(infile)
+    if content.get('format') != results_format:
+        error = ValueError(
+                "Unknown results format in {path!r}".format(path=path))
+        raise error
+
+    return content
+
+
+def write_results(path, content):
+    """ Write a results file.
+
+        :param path: Filesystem path of the JSON results file.
+        :param content: The results mapping.
+        :return: ``None``.
+
+        """
+    with io.open(path, 'w', encoding='utf-8') as outfile:
+        outfile.write(json.dumps(content, indent=4, sort_keys=True))
+        outfile.write("\n")
+
+
+def make_argument_parser():
+    """ Make the parser for the command-line arguments. """
+    parser = argparse.ArgumentParser(
+            prog="python -m benchmark.suite",
+            description="Benchmark the daemon hot paths.")
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    run_parser = subparsers.add_parser(
+            'run', help="Run the benchmarks, and write the results.")
+    run_parser.add_argument(
+            '--output', default="benchmark-results.json",
+            help="Path of the results file to write.")
+    run_parser.add_argument(
+            '--repeat', type=int, default=None,
+            help="Number of measurements for each benchmark.")
+    run_parser.add_argument(
+            'names', nargs='*', metavar='NAME',
+            help="Benchmark to run; default all of: {names}.".format(
+                names=", ".join(
+                    name for (name, __, __) in hotpaths.benchmarks)))
+
+    compare_parser = subparsers.add_parser(
+            'compare', help="Compare results against a baseline.")
+    compare_parser.add_argument(
+            'baseline', help="Path of the baseline results file.")
+    compare_parser.add_argument(
+            'results', help="Path of the results file to compare.")
+    compare_parser.add_argument(
+            '--threshold', type=float, default=10.0,
+            help="Percentage worse than the baseline to flag.")
+
+    return parser
+
+
+def main(argv=None):
+    """ Run the command.
+
+        :param argv: The command-line arguments.
+        :return: The exit status.
+
+        """
+    if argv is None:
+        argv = sys.argv
+    args = make_argument_parser().parse_args(argv[1:])
+
+    if args.command == 'run':
+        content = run_benchmarks(args.names, args.repeat)
+        for (name, result) in sorted(content['results'].items()):
+            print("{name}: {value:.6g} {unit}".format(name=name, **result))
+        write_results(args.output, content)
+        return 0
+
+    comparisons = compare_results(
+            read_results(args.baseline), read_results(args.results),
+            args.threshold)
+    for (__, __, __, line) in comparisons:
+        print(line)
+    regressions = [
+            name for (name, __, status, __) in comparisons
+            if status == 'regressed']
+    if regressions:
+        print("{count:d} regressions past {threshold:.1f} %".format(
+                count=len(regressions), threshold=args.threshold))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+# daemon/_lazyimport.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Deferred import of modules, until first use. """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import sys
+
+__metaclass__ = type
+
+
+class LazyModule:
+    """ Stand-in for a module, imported on first attribute access.
+
+        Binding a `LazyModule` in place of an ``import`` statement
+        defers the cost of importing the module until a function
+        first uses it. Attribute access, assignment, and deletion pass
+        through to the module itself, so replacing an attribute of the
+        module also affects the stand-in.
+
+        Only attribute access is deferred; a module used at import
+        time, for example as a base class or decorator, gains nothing.
+
+        """
+
+    def __init__(self, name):
+        """ Set up a new stand-in.
+
+            :param name: The full name of the module to import.
+            :return: ``None``.
+
+            """
+        self.__dict__['_lazy_name'] = name
+        self.__dict__['_lazy_module'] = None
+
+    def _lazy_load(self):
+        """ Get the module, importing it if not yet imported.
+
+            :return: The module object.
+
+            """
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            name = self.__dict__['_lazy_name']
+            __import__(str(name))
+            module = sys.modules[name]
+            self.__dict__['_lazy_module'] = module
+
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._lazy_load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._lazy_load(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._lazy_load(), name)
+
+    def __repr__(self):
+        text = "<{class_name} {name!r}>".format(
+                class_name=type(self).__name__,
+                name=self.__dict__['_lazy_name'])
+        return text
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
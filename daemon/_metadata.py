@@ -18,8 +18,7 @@ import json
 import re
 import collections
 import datetime
-
-import pkg_resources
+import sys
 
 __metaclass__ = type
 
@@ -28,6 +27,50 @@ distribution_name = "python-daemon"
 version_info_filename = "version_info.json"
 
 
+def get_metadata_library():
+    """ Get the library for reading installed distribution metadata.
+
+        :return: The `importlib.metadata` module, or the
+            `importlib_metadata` backport where that is not available,
+            or ``None`` if neither is available.
+
+        The library is imported on first use, since importing it
+        costs more than the rest of this module. The backport may be
+        missing where ``setup.py`` runs before the install requirements
+        are installed.
+
+        """
+    try:
+        import importlib.metadata as library
+    except ImportError:
+        try:
+            import importlib_metadata as library
+        except ImportError:
+            library = None
+
+    return library
+
+
+def get_distribution_metadata_pkg_resources(filename):
+    """ Get a metadata resource of the distribution, with `pkg_resources`.
+
+        :param filename: Base filename of the metadata resource.
+        :return: The text of the resource, or ``None`` if the
+            distribution or the resource is not available.
+
+        """
+    import pkg_resources
+
+    try:
+        distribution = pkg_resources.get_distribution(distribution_name)
+    except pkg_resources.DistributionNotFound:
+        return None
+    if not distribution.has_metadata(filename):
+        return None
+
+    return distribution.get_metadata(filename)
+
+
 def get_distribution_version_info(filename=version_info_filename):
     """ Get the version info from the installed distribution.
 
@@ -45,22 +88,23 @@ def get_distribution_version_info(filename=version_info_filename):
             'maintainer': "UNKNOWN",
             }
 
-    try:
-        distribution = pkg_resources.get_distribution(distribution_name)
-    except pkg_resources.DistributionNotFound:
-        distribution = None
+    library = get_metadata_library()
+    if library is None:
+        content = get_distribution_metadata_pkg_resources(filename)
+    else:
+        try:
+            distribution = library.distribution(distribution_name)
+        except library.PackageNotFoundError:
+            distribution = None
+        content = None
+        if distribution is not None:
+            content = distribution.read_text(filename)
 
-    if distribution is not None:
-        if distribution.has_metadata(filename):
-            content = distribution.get_metadata(filename)
-            version_info = json.loads(content)
+    if content is not None:
+        version_info = json.loads(content)
 
     return version_info
 
-version_info = get_distribution_version_info()
-
-version_installed = version_info['version']
-
 
 rfc822_person_regex = re.compile(
         "^(?P<name>[^<]+) <(?P<email>[^>]+)>$")
@@ -139,14 +183,76 @@ def make_year_range(begin_year, end_date=None):
     return year_range
 
 copyright_year_begin = "2001"
-build_date = version_info['release_date']
-copyright_year_range = make_year_range(copyright_year_begin, build_date)
-
-copyright = "Copyright © {year_range} {author} and others".format(
-        year_range=copyright_year_range, author=author)
 license = "Apache-2"
 url = "https://alioth.debian.org/projects/python-daemon/"
 
+
+def _get_version_installed():
+    """ Get the version of the installed distribution. """
+    return _get_lazy_value('version_info')['version']
+
+
+def _get_build_date():
+    """ Get the release date of the installed distribution. """
+    return _get_lazy_value('version_info')['release_date']
+
+
+def _get_copyright_year_range():
+    """ Get the range of copyright years, ending at the build date. """
+    return make_year_range(
+            copyright_year_begin, _get_lazy_value('build_date'))
+
+
+def _get_copyright():
+    """ Get the copyright statement. """
+    return "Copyright © {year_range} {author} and others".format(
+            year_range=_get_lazy_value('copyright_year_range'),
+            author=author)
+
+
+# Reading the installed distribution metadata is slow, so these module
+# attributes are computed on first access, then cached as ordinary
+# module attributes.
+lazy_value_factories = {
+        'version_info': get_distribution_version_info,
+        'version_installed': _get_version_installed,
+        'build_date': _get_build_date,
+        'copyright_year_range': _get_copyright_year_range,
+        'copyright': _get_copyright,
+        }
+
+
+def _get_lazy_value(name):
+    """ Get the value of a lazy module attribute, computing it once. """
+    namespace = globals()
+    if name not in namespace:
+        namespace[name] = lazy_value_factories[name]()
+
+    return namespace[name]
+
+
+def __getattr__(name):
+    """ Get a module attribute not yet computed.
+
+        :param name: The name of the attribute.
+        :return: The value of the attribute.
+        :raises AttributeError: If `name` is not a lazy attribute.
+
+        """
+    if name not in lazy_value_factories:
+        error = AttributeError(
+                "module {module!r} has no attribute {name!r}".format(
+                    module=__name__, name=name))
+        raise error
+
+    return _get_lazy_value(name)
+
+
+if sys.version_info < (3, 7):
+    # Module ‘__getattr__’ is not supported (PEP 562); compute now.
+    for name in lazy_value_factories:
+        _get_lazy_value(name)
+
 
 # Local variables:
 # coding: utf-8
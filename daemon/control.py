@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+
+# daemon/control.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Local control socket for a running daemon process.
+
+    A `ControlServer` listens on a Unix domain stream socket, and answers
+    commands from a small thread in the daemon process. Each request is
+    a single line of text: either a bare command name, or a JSON object
+    with a ``command`` item and any arguments for the command. Each
+    response is a single line containing a JSON object.
+
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import sys
+import errno
+try:
+    # Python 2 has both ‘str’ (bytes) and ‘unicode’ (text).
+    basestring = basestring
+except NameError:
+    # Python 3 names the Unicode data type ‘str’.
+    basestring = str
+
+from ._lazyimport import LazyModule
+
+json = LazyModule('json')
+resource = LazyModule('resource')
+select = LazyModule('select')
+socket = LazyModule('socket')
+threading = LazyModule('threading')
+traceback = LazyModule('traceback')
+
+__metaclass__ = type
+
+
+class ControlError(Exception):
+    """ Base class for errors from the control socket. """
+
+
+class ControlCommandError(ControlError, RuntimeError):
+    """ Raised when the daemon reports failure of a control command. """
+
+
+class ControlSocketInUseError(ControlError, OSError):
+    """ Raised when another process is listening on the control socket. """
+
+
+class ControlServer:
+    """ Server answering commands on a local control socket.
+
+        Commands are registered by name with the `register` method.
+        Each command function is called with the keyword arguments from
+        the request, and returns a JSON-serialisable result.
+
+        A single thread serves every connection. A client which does
+        not read its responses is disconnected once sending to it has
+        blocked for `send_timeout` seconds, so it cannot stall the
+        other clients.
+
+        """
+
+    max_request_size = 64 * 1024
+    send_timeout = 2.0
+
+    def __init__(self, path, backlog=5):
+        """ Set up the parameters of a new control server.
+
+            :param path: Filesystem path of the Unix domain socket.
+            :param backlog: Maximum number of pending connections.
+            :return: ``None``.
+
+            """
+        self.path = path
+        self.backlog = backlog
+        self.commands = {}
+        self.socket = None
+        self.thread = None
+        self._wakeup_pipe = None
+        self._deferred = []
+
+    def register(self, name, func):
+        """ Register the function to answer a named command.
+
+            :param name: The command name, as text.
+            :param func: The callable to answer the command.
+            :return: ``None``.
+
+            """
+        self.commands[name] = func
+
+    def fileno(self):
+        """ Get the file descriptor of the listening socket. """
+        return self.socket.fileno()
+
+    def bind(self):
+        """ Create the listening socket at `path`.
+
+            :return: ``None``.
+            :raises ControlSocketInUseError: If another process is
+                already listening at `path`.
+
+            A leftover socket file with no listener is removed before
+            binding.
+
+            """
+        remove_stale_control_socket(self.path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            listener.bind(self.path)
+            listener.listen(self.backlog)
+        except socket.error:
+            listener.close()
+            raise
+        self.socket = listener
+
+    def start(self):
+        """ Start the thread serving the control socket.
+
+            :return: ``None``.
+
+            """
+        if self.socket is None:
+            self.bind()
+        self._wakeup_pipe = os.pipe()
+        self.thread = threading.Thread(
+                target=self._serve, name="daemon-control")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """ Stop serving, and remove the control socket.
+
+            :return: ``None``.
+
+            """
+        if self.thread is not None:
+            os.write(self._wakeup_pipe[1], b"x")
+            self.thread.join()
+            self.thread = None
+            for fd in self._wakeup_pipe:
+                os.close(fd)
+            self._wakeup_pipe = None
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def defer(self, func):
+        """ Call a function after the current response is sent.
+
+            :param func: A callable expecting no arguments.
+            :return: ``None``.
+
+            """
+        self._deferred.append(func)
+
+    def _serve(self):
+        """ Serve connections until woken by `stop`. """
+        wakeup_fd = self._wakeup_pipe[0]
+        buffers = {}
+        while True:
+            readers = [self.socket, wakeup_fd] + list(buffers)
+            (readable, __, __) = select.select(readers, [], [])
+            if wakeup_fd in readable:
+                break
+            for item in readable:
+                if item is self.socket:
+                    (connection, __) = self.socket.accept()
+                    connection.settimeout(self.send_timeout)
+                    buffers[connection] = b""
+                else:
+                    if not self._read_from_connection(item, buffers):
+                        del buffers[item]
+                        item.close()
+        for connection in buffers:
+            connection.close()
+
+    def _read_from_connection(self, connection, buffers):
+        """ Read requests from a connection, and answer each one.
+
+            :param connection: The client socket.
+            :param buffers: Mapping of client socket to pending input.
+            :return: ``True`` iff the connection remains open.
+
+            """
+        try:
+            data = connection.recv(4096)
+        except socket.error:
+            return False
+        if not data:
+            return False
+        pending = buffers[connection] + data
+        while b"\n" in pending:
+            (line, pending) = pending.split(b"\n", 1)
+            response = self.handle_request(line)
+            try:
+                connection.sendall(encode_message(response))
+            except socket.error:
+                return False
+            finally:
+                self._run_deferred()
+        if len(pending) > self.max_request_size:
+            return False
+        buffers[connection] = pending
+        return True
+
+    def _run_deferred(self):
+        """ Call each deferred function, in order. """
+        (deferred, self._deferred) = (self._deferred, [])
+        for func in deferred:
+            func()
+
+    def handle_request(self, line):
+        """ Answer a single request line.
+
+            :param line: The request, as bytes without the line ending.
+            :return: The response, as a mapping.
+
+            """
+        try:
+            request = decode_request(line)
+        except ValueError as exc:
+            return {'ok': False, 'error': "Invalid request ({exc})".format(
+                    exc=exc)}
+
+        name = request.pop('command')
+        response = {'command': name}
+        try:
+            func = self.commands[name]
+        except (KeyError, TypeError):
+            response.update(ok=False, error="Unknown command: {name!r}".format(
+                    name=name))
+            return response
+
+        try:
+            result = func(**request)
+        except Exception as exc:
+            response.update(ok=False, error="{name}: {exc}".format(
+                    name=type(exc).__name__, exc=exc))
+        else:
+            response.update(ok=True, result=result)
+
+        return response
+
+
+def decode_request(line):
+    """ Decode a request line into a mapping.
+
+        :param line: The request, as bytes.
+        :return: A mapping with a ``command`` item, and any arguments.
+        :raises ValueError: If the request is not understood.
+
+        """
+    text = line.decode('utf-8').strip()
+    if text.startswith("{"):
+        request = json.loads(text)
+        if not isinstance(request, dict) or 'command' not in request:
+            raise ValueError("no command specified")
+        if not isinstance(request['command'], basestring):
+            raise ValueError("command is not a string")
+        request = dict(
+                (str(key), value) for (key, value) in request.items())
+    else:
+        if not text:
+            raise ValueError("no command specified")
+        request = {'command': text}
+
+    return request
+
+
+def encode_message(message):
+    """ Encode a message as a line of JSON, in bytes. """
+    text = json.dumps(message, sort_keys=True, default=repr)
+    return text.encode('utf-8') + b"\n"
+
+
+def remove_stale_control_socket(path):
+    """ Remove a control socket file that has no listening process.
+
+        :param path: Filesystem path of the Unix domain socket.
+        :return: ``None``.
+        :raises ControlSocketInUseError: If a process is listening at
+            `path`.
+
+        """
+    if not os.path.exists(path):
+        return
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except socket.error as exc:
+        if exc.errno not in [errno.ECONNREFUSED, errno.ENOTSOCK]:
+            raise
+    else:
+        error = ControlSocketInUseError(
+                "Control socket {path!r} is in use".format(path=path))
+        raise error
+    finally:
+        probe.close()
+
+    os.unlink(path)
+
+
+def format_thread_stacks():
+    """ Format the current stack of every thread in this process.
+
+        :return: A mapping from thread description to a list of text
+            lines for the thread's stack.
+
+        """
+    thread_names = dict(
+            (thread.ident, thread.name) for thread in threading.enumerate())
+    stacks = {}
+    for (thread_id, frame) in sys._current_frames().items():
+        description = "{name} ({ident:d})".format(
+                name=thread_names.get(thread_id, "unknown"), ident=thread_id)
+        stacks[description] = [
+                line.rstrip("\n") for line in traceback.format_stack(frame)]
+
+    return stacks
+
+
+def get_process_metrics():
+    """ Get resource usage metrics for this process.
+
+        :return: A mapping of metric name to value.
+
+        """
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    metrics = {
+            'pid': os.getpid(),
+            'cpu_user_seconds': usage.ru_utime,
+            'cpu_system_seconds': usage.ru_stime,
+            'max_rss_kib': usage.ru_maxrss,
+            'threads': threading.active_count(),
+            }
+    try:
+        with open("/proc/self/statm", 'rb') as statm:
+            resident_pages = int(statm.read().split()[1])
+        metrics['rss_bytes'] = resident_pages * resource.getpagesize()
+        metrics['open_fds'] = len(os.listdir("/proc/self/fd"))
+    except (IOError, OSError):
+        # No ‘/proc’ filesystem on this system.
+        pass
+
+    return metrics
+
+
+def send_control_command(path, command, timeout=5.0, **kwargs):
+    """ Send a command to a control socket, and get the result.
+
+        :param path: Filesystem path of the Unix domain socket.
+        :param command: The command name, as text.
+        :param timeout: Seconds to wait for the connection and response.
+        :param kwargs: Arguments for the command.
+        :return: The result from the command.
+        :raises ControlCommandError: If the daemon reports failure.
+
+        """
+    request = dict(kwargs, command=command)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(path)
+        client.sendall(encode_message(request))
+        received = b""
+        while b"\n" not in received:
+            data = client.recv(4096)
+            if not data:
+                break
+            received += data
+    finally:
+        client.close()
+
+    if b"\n" not in received:
+        error = ControlCommandError(
+                "No response to {command!r} from {path!r}".format(
+                    command=command, path=path))
+        raise error
+    response = json.loads(received.split(b"\n", 1)[0].decode('utf-8'))
+    if not response.get('ok'):
+        error = ControlCommandError(response.get('error'))
+        raise error
+
+    return response.get('result')
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+
+# daemon/coredump.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Bounded core dumps, as an alternative to preventing them entirely.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import errno
+import resource
+import time
+
+from .daemon import (DaemonOSEnvironmentError, get_os_backend)
+
+__metaclass__ = type
+
+
+coredump_filter_path = "/proc/self/coredump_filter"
+
+# Mapping types in a core dump: anonymous private memory, ELF headers,
+# and private huge pages; not file-backed or shared memory.
+default_coredump_filter = 0x31
+
+marker_started_format = "Core dumps enabled at {time:.0f}\n"
+marker_unclean_stop_format = "Unclean stop detected at {time:.0f}\n"
+
+
+class CoreDumpPolicy:
+    """ Policy for the size and frequency of core dumps.
+
+        A `CoreDumpPolicy` instance is the value for the
+        `core_dump_policy` option of `DaemonContext`, applied instead
+        of preventing core dumps entirely. When started, it:
+
+        * Sets the soft resource limit for core dump size to
+          `max_size`, or to the hard limit if that is lower.
+
+        * Writes `coredump_filter` to the process's
+          ``/proc/self/coredump_filter``, where that file exists, to
+          choose which types of memory mapping a core dump includes.
+          The default omits file-backed and shared mappings, which
+          for a large process are often most of its address space.
+
+        * If `marker_path` is not ``None``, limits core dumps to one
+          per `min_interval` seconds. The marker file records that a
+          process with core dumps enabled is running, and is emptied
+          when the policy stops. A process which finds the marker of
+          one which did not stop cleanly, and so which may have dumped
+          core, records the time of the unclean stop in the marker
+          file. If a process starts within `min_interval` seconds
+          after the recorded unclean stop, it runs with core dumps
+          disabled.
+
+        The marker file is opened when the policy is created, and the
+        policy is started before the daemon changes its root directory,
+        so both the marker file and ``/proc/self/coredump_filter`` are
+        found outside the new root. A failure to write the filter is
+        counted in `stats`.
+
+        On Linux, changing the process owner also disables core dumps,
+        unless the ``fs.suid_dumpable`` system setting allows them.
+
+        """
+
+    def __init__(
+            self, max_size, coredump_filter=default_coredump_filter,
+            marker_path=None, min_interval=600):
+        """ Set up a new core dump policy.
+
+            :param max_size: Maximum size, in bytes, of a core dump.
+            :param coredump_filter: The bit mask of mapping types to
+                include in a core dump, or ``None`` to leave the
+                process's filter unchanged.
+            :param marker_path: Filesystem path of the marker file, or
+                ``None`` to not limit how often core dumps occur. The
+                file is opened immediately, so it is resolved before
+                the daemon changes its root directory.
+            :param min_interval: Minimum seconds after an unclean stop
+                before a process has core dumps enabled.
+            :return: ``None``.
+
+            """
+        self.max_size = max_size
+        self.coredump_filter = coredump_filter
+        self.marker_path = marker_path
+        self.min_interval = min_interval
+
+        self.marker_fd = None
+        if marker_path is not None:
+            self.marker_fd = os.open(
+                    marker_path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.enabled = None
+        self.filter_errors = 0
+
+    @property
+    def files_preserve(self):
+        """ The file descriptors to keep open for the policy. """
+        result = []
+        if self.marker_fd is not None:
+            result.append(self.marker_fd)
+
+        return result
+
+    def start(self):
+        """ Apply the policy to the current process.
+
+            :return: ``None``.
+
+            """
+        self.enabled = True
+        if self.marker_fd is not None:
+            if is_marker_started(self.marker_fd):
+                # The previous process, with core dumps enabled, did not
+                # stop cleanly; it stopped no later than now.
+                write_marker(
+                        self.marker_fd,
+                        marker_unclean_stop_format.format(time=time.time()))
+            if is_marker_recent(self.marker_fd, self.min_interval):
+                self.enabled = False
+
+        if not self.enabled:
+            set_core_dump_size_limit(0)
+            return
+
+        set_core_dump_size_limit(self.max_size)
+        if self.coredump_filter is not None:
+            if not set_coredump_filter(self.coredump_filter):
+                self.filter_errors += 1
+        if self.marker_fd is not None:
+            write_marker(
+                    self.marker_fd,
+                    marker_started_format.format(time=time.time()))
+
+    def stop(self):
+        """ Mark the marker file clean, if any.
+
+            :return: ``None``.
+
+            """
+        if self.marker_fd is None:
+            return
+        if self.enabled:
+            os.ftruncate(self.marker_fd, 0)
+        os.close(self.marker_fd)
+        self.marker_fd = None
+
+    def stats(self):
+        """ Get the metrics of the core dump policy.
+
+            :return: A mapping of metric name to value.
+
+            """
+        return {
+                'enabled': self.enabled,
+                'filter_errors': self.filter_errors,
+                }
+
+
+def set_core_dump_size_limit(size):
+    """ Set the soft resource limit for core dump size.
+
+        :param size: Maximum size, in bytes, of a core dump.
+        :return: ``None``.
+        :raise DaemonOSEnvironmentError: If the system does not support
+            the resource limit, or the limit cannot be set.
+
+        The hard limit is unchanged, so a later policy may raise the
+        soft limit again; a `size` above the hard limit is reduced to
+        the hard limit.
+
+        """
+    try:
+        os_backend = get_os_backend()
+        (__, hard_limit) = os_backend.getrlimit(resource.RLIMIT_CORE)
+        if hard_limit != resource.RLIM_INFINITY:
+            size = min(size, hard_limit)
+        os_backend.setrlimit(resource.RLIMIT_CORE, (size, hard_limit))
+    except (ValueError, resource.error) as exc:
+        error = DaemonOSEnvironmentError(
+                "Unable to set RLIMIT_CORE resource limit"
+                " ({exc})".format(exc=exc))
+        raise error
+
+
+def set_coredump_filter(mask):
+    """ Set which types of mapping are included in a core dump.
+
+        :param mask: The bit mask of mapping types.
+        :return: ``False`` if writing the filter failed, otherwise
+            ``True``.
+
+        Where the system has no ``/proc/self/coredump_filter``, the
+        filter is not set, and this is not a failure.
+
+        """
+    try:
+        with open(coredump_filter_path, 'w') as filter_file:
+            filter_file.write("{mask:#x}\n".format(mask=mask))
+    except (IOError, OSError) as exc:
+        if exc.errno != errno.ENOENT:
+            return False
+
+    return True
+
+
+def write_marker(fd, text):
+    """ Replace the content of a marker file.
+
+        :param fd: File descriptor of the marker file.
+        :param text: The text to write to the marker file.
+        :return: ``None``.
+
+        """
+    os.ftruncate(fd, 0)
+    os.lseek(fd, 0, os.SEEK_SET)
+    os.write(fd, text.encode('ascii'))
+
+
+def is_marker_started(fd):
+    """ Determine whether a marker file records a started process.
+
+        :param fd: File descriptor of the marker file.
+        :return: ``True`` iff the marker file records a process which
+            started with core dumps enabled, and has not stopped
+            cleanly.
+
+        """
+    os.lseek(fd, 0, os.SEEK_SET)
+    content = os.read(fd, 100)
+    prefix = marker_started_format.split("{", 1)[0]
+
+    return content.startswith(prefix.encode('ascii'))
+
+
+def is_marker_recent(fd, min_interval):
+    """ Determine whether a marker file records a recent unclean stop.
+
+        :param fd: File descriptor of the marker file.
+        :param min_interval: Seconds for which the marker is recent.
+        :return: ``True`` iff the marker file is not empty and was
+            modified less than `min_interval` seconds ago.
+
+        The marker file is modified when a process starts with core
+        dumps enabled, and when a later process records its unclean
+        stop.
+
+        """
+    status = os.fstat(fd)
+    if not status.st_size:
+        return False
+
+    return (time.time() - status.st_mtime) < min_interval
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,429 @@
+# -*- coding: utf-8 -*-
+
+# daemon/crashbuffer.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Ring buffer of recent output, kept for examination after a crash.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import sys
+import logging
+import mmap
+import signal
+import struct
+import threading
+import time
+import traceback
+
+from .daemon import close_all_open_files
+from .logshipper import reap_process
+
+__metaclass__ = type
+
+
+header_format = str("=8sQQQ")
+header_size = struct.calcsize(header_format)
+header_magic = b"PYDCRASH"
+
+# Maximum seconds to wait for the watcher process to exit.
+watcher_stop_timeout = 5.0
+
+
+class CrashBuffer:
+    """ Fixed-size ring buffer of the most recent output.
+
+        A `CrashBuffer` instance is the value for the `crash_buffer`
+        option of `DaemonContext`. When started, it mirrors everything
+        written to `sys.stdout` and `sys.stderr` into a buffer of `size`
+        bytes, overwriting the oldest content; a `CrashBufferHandler`
+        mirrors log records the same way. The buffer is allocated once,
+        so mirroring output does not allocate further memory.
+
+        If `path` is not ``None``, the buffer is a memory-mapped file at
+        that path, so its content survives even a crash that gives the
+        process no chance to run any code, such as a fatal signal. The
+        file is marked clean when the buffer stops; a buffer file left
+        unclean by a previous process is dumped when the buffer is
+        next created.
+
+        On an uncaught exception, the traceback is added to the buffer
+        and the buffer is dumped. A fatal signal, such as ``SIGSEGV``
+        or ``SIGABRT``, gives the process no chance to run any Python
+        code; so while started, the buffer is watched by a small
+        watcher process which shares the buffer memory. When the
+        process ends without stopping the buffer, the watcher dumps
+        the buffer.
+
+        Each dump is appended to `dump_path`, with a header line giving
+        the reason, the time, and the process ID; an earlier dump, such
+        as one recovered from a previous process, is kept.
+
+        """
+
+    def __init__(self, size=64 * 1024, path=None, dump_path=None):
+        """ Set up a new crash buffer.
+
+            :param size: Capacity, in bytes, of the buffer.
+            :param path: Filesystem path of the file to map for the
+                buffer, or ``None`` for a buffer only in memory. The
+                buffer survives a crash by a fatal signal only if this
+                is not ``None``. The file is opened immediately, so it
+                is resolved before the daemon changes its root
+                directory.
+            :param dump_path: Filesystem path at which to dump the
+                buffer, or ``None`` to not dump it.
+            :return: ``None``.
+
+            """
+        self.size = size
+        self.path = path
+        self.dump_path = dump_path
+
+        self._lock = threading.RLock()
+        self._previous_excepthook = None
+        self._watcher_pid = None
+        self._watcher_fd = None
+        self._mirrored_streams = {}
+        self.map = self._make_map()
+
+    def _make_map(self):
+        """ Make the memory map for the buffer.
+
+            :return: The new `mmap.mmap` instance.
+
+            If a buffer file left unclean is at `path`, it is dumped
+            before the file is reused.
+
+            """
+        map_size = header_size + self.size
+        if self.path is None:
+            buffer_map = mmap.mmap(-1, map_size)
+        else:
+            if self.dump_path is not None:
+                recover_crash_buffer(self.path, self.dump_path)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                os.ftruncate(fd, map_size)
+                buffer_map = mmap.mmap(fd, map_size)
+            finally:
+                os.close(fd)
+        buffer_map[:map_size] = b"\0" * map_size
+        struct.pack_into(
+                header_format, buffer_map, 0, header_magic, self.size, 0, 0)
+
+        return buffer_map
+
+    @property
+    def position(self):
+        """ The total number of bytes written to the buffer. """
+        (__, __, position, __) = struct.unpack_from(header_format, self.map)
+        return position
+
+    def write(self, data):
+        """ Write data to the buffer, overwriting the oldest content.
+
+            :param data: The data, as a text or byte string.
+            :return: ``None``.
+
+            """
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8', 'replace')
+        view = memoryview(data)
+        with self._lock:
+            position = self.position
+            if len(view) > self.size:
+                position += len(view) - self.size
+                view = view[-self.size:]
+            start = position % self.size
+            first_size = min(len(view), self.size - start)
+            self.map[header_size + start:header_size + start + first_size] = (
+                    view[:first_size])
+            rest_size = len(view) - first_size
+            self.map[header_size:header_size + rest_size] = view[first_size:]
+            struct.pack_into(
+                    str("=Q"), self.map, 16, position + len(view))
+
+    def read(self):
+        """ Read the content of the buffer, oldest first.
+
+            :return: The content, as a byte string.
+
+            """
+        with self._lock:
+            return read_ring(self.map, self.size, self.position)
+
+    def dump(self, reason):
+        """ Dump the content of the buffer to `dump_path`.
+
+            :param reason: Text describing why the buffer is dumped.
+            :return: ``None``.
+
+            """
+        if self.dump_path is None:
+            return
+        write_dump(self.dump_path, reason, self.read())
+
+    def start(self):
+        """ Start mirroring the output streams and uncaught exceptions.
+
+            :return: ``None``.
+
+            The file of the buffer, if any, is marked unclean until the
+            buffer stops. If `dump_path` is not ``None``, the watcher
+            process is started.
+
+            """
+        self._set_clean(False)
+        if self.dump_path is not None and self._watcher_pid is None:
+            self._start_watcher()
+
+        for name in ['stdout', 'stderr']:
+            stream = getattr(sys, name)
+            mirrored_stream = MirrorStream(stream, self)
+            self._mirrored_streams[name] = (stream, mirrored_stream)
+            setattr(sys, name, mirrored_stream)
+
+        if self._previous_excepthook is None:
+            self._previous_excepthook = sys.excepthook
+            sys.excepthook = self._handle_exception
+
+    def stop(self):
+        """ Stop mirroring the output streams, and mark the buffer clean.
+
+            :return: ``None``.
+
+            The hook for uncaught exceptions remains in place, since an
+            exception which stops the daemon reaches the hook only
+            after the daemon context has closed.
+
+            """
+        for (name, (stream, mirrored_stream)) in (
+                self._mirrored_streams.items()):
+            if getattr(sys, name) is mirrored_stream:
+                setattr(sys, name, stream)
+        self._mirrored_streams.clear()
+        self._set_clean(True)
+        self._stop_watcher()
+
+    def _set_clean(self, clean):
+        """ Set the mark of whether the buffer stopped cleanly. """
+        struct.pack_into(str("=Q"), self.map, 24, int(clean))
+
+    def _start_watcher(self):
+        """ Start the watcher process for the buffer.
+
+            :return: ``None``.
+
+            The watcher process holds the read end of a pipe, and the
+            current process holds the write end. The watcher process
+            reaches end of file on the pipe when the current process
+            ends, for whatever reason, or when the buffer stops.
+
+            """
+        watched_pid = os.getpid()
+        (read_fd, write_fd) = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                os.close(write_fd)
+                run_watcher(
+                        read_fd, self.map, self.size, self.dump_path,
+                        watched_pid)
+            except BaseException:
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+
+        os.close(read_fd)
+        self._watcher_pid = pid
+        self._watcher_fd = write_fd
+
+    def _stop_watcher(self):
+        """ Stop the watcher process, and wait for it to exit. """
+        if self._watcher_pid is None:
+            return
+        os.close(self._watcher_fd)
+        reap_process(self._watcher_pid, watcher_stop_timeout)
+        self._watcher_pid = None
+        self._watcher_fd = None
+
+    def _handle_exception(self, exc_type, exc_value, exc_traceback):
+        """ Add an uncaught exception to the buffer, and dump it. """
+        try:
+            self.write("".join(traceback.format_exception(
+                    exc_type, exc_value, exc_traceback)))
+            self.dump("uncaught exception {name}".format(
+                    name=exc_type.__name__))
+            self._set_clean(True)
+        finally:
+            self._previous_excepthook(exc_type, exc_value, exc_traceback)
+
+
+class MirrorStream:
+    """ Text stream which mirrors its output to a `CrashBuffer`.
+
+        Each write goes to the wrapped stream and to the buffer; every
+        other attribute is that of the wrapped stream.
+
+        """
+
+    def __init__(self, stream, crash_buffer):
+        """ Set up a new mirror stream.
+
+            :param stream: The stream to wrap.
+            :param crash_buffer: The `CrashBuffer` for the output.
+            :return: ``None``.
+
+            """
+        self.stream = stream
+        self.crash_buffer = crash_buffer
+
+    def write(self, text):
+        """ Write text to the stream and to the buffer. """
+        self.crash_buffer.write(text)
+        return self.stream.write(text)
+
+    def writelines(self, lines):
+        """ Write each of the lines to the stream and to the buffer. """
+        for line in lines:
+            self.write(line)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class CrashBufferHandler(logging.Handler):
+    """ Logging handler which writes each record to a `CrashBuffer`. """
+
+    def __init__(self, crash_buffer, level=logging.NOTSET):
+        """ Set up a new handler.
+
+            :param crash_buffer: The `CrashBuffer` for the log records.
+            :param level: The threshold level for the handler.
+            :return: ``None``.
+
+            """
+        super(CrashBufferHandler, self).__init__(level)
+        self.crash_buffer = crash_buffer
+
+    def emit(self, record):
+        """ Write a log record to the buffer. """
+        try:
+            self.crash_buffer.write(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+
+def read_ring(buffer_map, size, position):
+    """ Read the content of a ring buffer, oldest first.
+
+        :param buffer_map: The memory map of the buffer.
+        :param size: Capacity, in bytes, of the buffer.
+        :param position: Total number of bytes written to the buffer.
+        :return: The content, as a byte string.
+
+        """
+    if position <= size:
+        return buffer_map[header_size:header_size + position]
+    start = position % size
+    return (
+            buffer_map[header_size + start:header_size + size]
+            + buffer_map[header_size:header_size + start])
+
+
+def run_watcher(read_fd, buffer_map, size, dump_path, pid):
+    """ Run the watcher of a crash buffer, in the watcher process.
+
+        :param read_fd: File descriptor for the read end of the pipe.
+        :param buffer_map: The memory map of the buffer, shared with
+            the watched process.
+        :param size: Capacity, in bytes, of the buffer.
+        :param dump_path: Filesystem path of the dump file.
+        :param pid: The process ID of the watched process.
+        :return: ``None``, when the pipe reaches end of file.
+
+        If the buffer is then not marked clean, it is dumped, and
+        marked clean so that it is not dumped again when recovered.
+
+        """
+    for name in ['SIGHUP', 'SIGINT', 'SIGTERM']:
+        signal.signal(getattr(signal, name), signal.SIG_IGN)
+    close_all_open_files(exclude=set([read_fd]))
+
+    while os.read(read_fd, 4096):
+        pass
+    (__, __, position, clean) = struct.unpack_from(header_format, buffer_map)
+    if clean or not position:
+        return
+    write_dump(
+            dump_path, "process ended without stopping the buffer",
+            read_ring(buffer_map, size, position), pid=pid)
+    struct.pack_into(str("=Q"), buffer_map, 24, 1)
+
+
+def write_dump(dump_path, reason, content, pid=None):
+    """ Append a dump of buffer content to a file.
+
+        :param dump_path: Filesystem path of the dump file.
+        :param reason: Text describing why the buffer is dumped.
+        :param content: The buffer content, as a byte string.
+        :param pid: The process ID of the process which wrote the
+            content, or ``None`` for the current process.
+        :return: ``None``.
+
+        """
+    if pid is None:
+        pid = os.getpid()
+    header = "Crash buffer dump: {reason}, at {time}, process {pid:d}\n"
+    header = header.format(
+            reason=reason,
+            time=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            pid=pid)
+    with open(dump_path, 'ab') as dump_file:
+        dump_file.write(header.encode('utf-8'))
+        dump_file.write(content)
+
+
+def recover_crash_buffer(path, dump_path):
+    """ Dump the buffer file left unclean by a previous process.
+
+        :param path: Filesystem path of the buffer file.
+        :param dump_path: Filesystem path of the dump file.
+        :return: ``True`` if a buffer was dumped, ``False`` otherwise.
+
+        """
+    try:
+        with open(path, 'rb') as buffer_file:
+            data = buffer_file.read()
+    except (IOError, OSError):
+        return False
+    if len(data) < header_size:
+        return False
+    (magic, size, position, clean) = struct.unpack_from(header_format, data)
+    if magic != header_magic or clean or not position:
+        return False
+    if len(data) < header_size + size:
+        return False
+    write_dump(
+            dump_path, "recovered from previous process",
+            read_ring(data, size, position))
+
+    return True
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+# daemon/crashlog.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Report of fatal errors, such as a crash in an extension module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import faulthandler
+import threading
+import time
+
+from .control import get_process_metrics
+
+__metaclass__ = type
+
+
+header_size = 200
+
+
+class CrashLog:
+    """ Log file for the tracebacks of all threads on a fatal error.
+
+        A `CrashLog` instance is the value for the `crash_log` option of
+        `DaemonContext`. When started, it enables `faulthandler` to
+        write the traceback of every thread to the log file when the
+        process receives a fatal signal, such as ``SIGSEGV`` from a
+        crash in an extension module. This works even when core dumps
+        are prevented.
+
+        Each traceback follows a header line giving the process ID, the
+        time the log started, and, as of at most `refresh_interval`
+        seconds before the crash, the uptime and resident memory size
+        of the process. The header is written when the log starts, and
+        removed again when the log stops without a crash, so the file
+        accumulates only the reports of crashes.
+
+        """
+
+    def __init__(self, path, refresh_interval=1.0):
+        """ Set up a new crash log.
+
+            :param path: Filesystem path of the log file. The file is
+                opened immediately, so it is resolved before the daemon
+                changes its root directory or process owner.
+            :param refresh_interval: Seconds between updates of the
+                header.
+            :return: ``None``.
+
+            """
+        self.path = path
+        self.refresh_interval = refresh_interval
+
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+        self.header_offset = None
+        self.start_time = None
+        self.thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def files_preserve(self):
+        """ The file descriptors to keep open for the log. """
+        return [self.fd]
+
+    def fileno(self):
+        """ Get the file descriptor of the log file. """
+        return self.fd
+
+    def flush(self):
+        """ Flush the log file; it has no buffer, so do nothing. """
+
+    def start(self):
+        """ Write the header, and enable the fatal error handler.
+
+            :return: ``None``.
+
+            """
+        self.start_time = time.time()
+        self.header_offset = os.lseek(self.fd, 0, os.SEEK_END)
+        os.write(self.fd, self.make_header())
+        faulthandler.enable(file=self, all_threads=True)
+
+        self._stop_event.clear()
+        self.thread = threading.Thread(
+                target=self._refresh_periodically, name="daemon-crash-log")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """ Disable the fatal error handler, and remove the header.
+
+            :return: ``None``.
+
+            """
+        if self.thread is None:
+            return
+        self._stop_event.set()
+        self.thread.join()
+        self.thread = None
+        faulthandler.disable()
+        os.ftruncate(self.fd, self.header_offset)
+        os.lseek(self.fd, self.header_offset, os.SEEK_SET)
+
+    def make_header(self):
+        """ Make the header for a crash report, as of the current time.
+
+            :return: The header, as a byte string of `header_size`
+                bytes, ending with a newline.
+
+            """
+        metrics = get_process_metrics()
+        rss_bytes = metrics.get('rss_bytes', metrics['max_rss_kib'] * 1024)
+        text = (
+                "Crash report for process {pid:d}: started {started},"
+                " uptime {uptime:.0f} s, RSS {rss:d} bytes").format(
+                    pid=metrics['pid'],
+                    started=time.strftime(
+                        "%Y-%m-%dT%H:%M:%S%z",
+                        time.localtime(self.start_time)),
+                    uptime=time.time() - self.start_time,
+                    rss=rss_bytes)
+        header = text.encode('utf-8')[:header_size - 1]
+
+        return header.ljust(header_size - 1) + b"\n"
+
+    def _refresh_periodically(self):
+        """ Update the header in place each interval, until stopped. """
+        while not self._stop_event.wait(self.refresh_interval):
+            os.pwrite(self.fd, self.make_header(), self.header_offset)
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
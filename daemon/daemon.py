@@ -22,12 +22,9 @@ from __future__ import (absolute_import, unicode_literals)
 
 import os
 import sys
-import pwd
-import resource
 import errno
-import signal
-import socket
-import atexit
+import time
+import collections
 try:
     # Python 2 has both ‘str’ (bytes) and ‘unicode’ (text).
     basestring = basestring
@@ -37,8 +34,54 @@ except NameError:
     basestring = str
     unicode = str
 
+from ._lazyimport import LazyModule
+from .osbackend import SystemBackend
+
+# Only a started daemon needs most of these; import each on first use.
+control = LazyModule('daemon.control')
+resource = LazyModule('resource')
+signal = LazyModule('signal')
+socket = LazyModule('socket')
+
 __metaclass__ = type
 
+
+os_backend = SystemBackend()
+""" The `daemon.osbackend.OSBackend` used by the functions of this module. """
+
+
+def get_os_backend():
+    """ Get the operating system backend used by this module.
+
+        :return: The `daemon.osbackend.OSBackend` instance in use.
+
+        """
+    return os_backend
+
+
+def set_os_backend(backend):
+    """ Set the operating system backend used by this module.
+
+        :param backend: The `daemon.osbackend.OSBackend` instance to use.
+        :return: The backend previously used.
+
+        """
+    global os_backend
+    (previous, os_backend) = (os_backend, backend)
+
+    return previous
+
+
+try:
+    perf_counter_ns = time.perf_counter_ns
+except AttributeError:
+    # Python before 3.7 has no integer performance counter.
+    _perf_counter = getattr(
+            time, 'perf_counter', getattr(time, 'monotonic', time.time))
+
+    def perf_counter_ns():
+        return int(_perf_counter() * 1e9)
+
 
 class DaemonError(Exception):
     """ Base exception class for errors from this module. """
@@ -60,6 +103,39 @@ class DaemonProcessDetachError(DaemonError, OSError):
     """ Exception raised when process detach fails. """
 
 
+StepTiming = collections.namedtuple('StepTiming', ['name', 'duration_ns'])
+StepTiming.__doc__ = """ Timing of a step of `DaemonContext.open`.
+
+    :param name: The name of the step.
+    :param duration_ns: The duration of the step, in nanoseconds.
+
+    """
+
+
+class StepTimer:
+    """ Context manager to time a step, recording its `StepTiming`. """
+
+    def __init__(self, timings, name):
+        """ Set up a new step timer.
+
+            :param timings: The list to append the `StepTiming` to.
+            :param name: The name of the step.
+            :return: ``None``.
+
+            """
+        self.timings = timings
+        self.name = name
+        self.start_time = None
+
+    def __enter__(self):
+        self.start_time = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.timings.append(
+                StepTiming(self.name, perf_counter_ns() - self.start_time))
+
+
 class DaemonContext:
     """ Context for turning the current program into a daemon process.
 
@@ -212,7 +288,24 @@ class DaemonContext:
             :Default: ``True``
 
             If true, prevents the generation of core files, in order to avoid
-            leaking sensitive information from daemons run as `root`.
+            leaking sensitive information from daemons run as `root`. Use
+            the `crash_log` option to diagnose crashes without core files.
+            Ignored if `core_dump_policy` is not ``None``.
+
+        `core_dump_policy`
+            :Default: ``None``
+
+            A `daemon.coredump.CoreDumpPolicy` instance, to allow core
+            dumps bounded in size and frequency, instead of the
+            all-or-nothing `prevent_core` option.
+
+        `crash_log`
+            :Default: ``None``
+
+            A `daemon.crashlog.CrashLog` instance, to write the traceback
+            of every thread to its log file when the daemon process
+            receives a fatal signal. If ``None``, no such report is
+            written.
 
         `stdin`
             :Default: ``None``
@@ -238,6 +331,159 @@ class DaemonContext:
             If ``None``, the corresponding system stream is re-bound to the
             file named by `os.devnull`.
 
+            If the object has a `start` method, it is called when the
+            daemon context opens, after detaching the process and before
+            closing open files; if it also has a `stop` method, that is
+            called when the daemon context closes. This allows a stream
+            object such as `daemon.logshipper.LogShipper` to run a helper
+            process or thread in the daemon. A stream object can have a
+            `files_preserve` attribute, listing file descriptors of its
+            own to be preserved when closing open files.
+
+            The `daemon.syslogsink.SyslogStream` stream object sends
+            each line of output to the system log, or with a
+            `daemon.journal.JournalSink` to the systemd journal.
+
+        `output_buffering`
+            :Default: ``None``
+
+            A `daemon.outputbuffer.OutputBuffering` instance, to rebuild
+            `sys.stdout` and `sys.stderr` with block buffering after
+            redirecting them, and flush them periodically from a
+            background thread. If ``None``, the system streams keep
+            their existing buffering.
+
+        `crash_buffer`
+            :Default: ``None``
+
+            A `daemon.crashbuffer.CrashBuffer` instance, to keep the
+            most recent output of `sys.stdout` and `sys.stderr` in a
+            fixed-size ring buffer, dumped for examination when the
+            daemon crashes. If ``None``, no such buffer is kept.
+
+        `log_rotation`
+            :Default: ``None``
+
+            A `daemon.logrotation.LogRotation` instance, to rotate the
+            files of the `stdout` and `stderr` streams by size or by
+            age. If ``None``, the files are not rotated by the daemon.
+
+            Independent of this option, the `reopen_streams` method
+            reopens those files at their paths; map a signal to
+            ``'reopen_streams'`` in `signal_map` to allow an external
+            tool such as `logrotate` to rotate the files.
+
+        `watchdog`
+            :Default: ``None``
+
+            A `daemon.watchdog.StallWatchdog` instance, to dump the
+            stacks of all threads when the daemon's main work stops
+            making progress, and to report stalls in `get_metrics`. If
+            ``None``, stalls are not detected.
+
+        `gc_monitor`
+            :Default: ``None``
+
+            A `daemon.gcmonitor.GCMonitor` instance, to tune the
+            garbage collector after startup, and to measure each
+            collection for `get_metrics`. If ``None``, the collector is
+            not changed.
+
+        `fd_audit`
+            :Default: ``None``
+
+            A `daemon.fdaudit.FdAudit` instance, to record the open file
+            descriptors before and after closing the open files, report
+            which were closed, preserved, or unexpectedly left open,
+            and track the growth of open file descriptors while the
+            daemon runs. If ``None``, file descriptors are not audited.
+
+        `profiler`
+            :Default: ``None``
+
+            A `daemon.sampler.SamplingProfiler` instance, to be switched
+            on and off while the daemon runs: by a signal mapped to
+            ``'toggle_profiler'`` in `signal_map`, or by the control
+            socket. If running when the daemon context closes, it is
+            stopped, writing its output.
+
+        `profile_window`
+            :Default: ``None``
+
+            A `daemon.profilewindow.ProfileWindow` instance, to profile
+            a thread with `cProfile` for a time on request: by its
+            `signal_number` signal, which is added to the signal map,
+            or by the control socket.
+
+        `memory_snapshots`
+            :Default: ``None``
+
+            A `daemon.memtrace.MemorySnapshots` instance, to trace
+            memory allocations and report the top allocation sites on
+            request: by its `signal_number` signal, which is added to
+            the signal map, or by the control socket.
+
+        `open_stages`
+            :Default: ``None``
+
+            The sequence of `OpenStage` items performed by `open`, or
+            ``None`` for the stages of the ``'classic'`` preset. Use
+            `make_open_stages` to get the stages of a preset as an
+            `OpenStages` list, which can then be changed: stages
+            inserted, removed, replaced, or moved.
+
+        `open_timing_callback`
+            :Default: ``None``
+
+            A callable to export the timing of the steps of `open`. It
+            is called, once the context is open, with the sequence of
+            `StepTiming` items also available as the `open_timings`
+            attribute. If ``None``, the timings are only recorded.
+
+        `control_socket_path`
+            :Default: ``None``
+
+            Filesystem path for a Unix domain control socket. If not
+            ``None``, the socket is created when the daemon context
+            opens (before changing the root directory or the process
+            owner), preserved when closing open files, and served by a
+            thread in the daemon process until the context closes.
+
+            The control socket answers these commands, each with a
+            single line of JSON (see the `daemon.control` module):
+
+            * ``status``: The process ID, uptime, and PID file path.
+
+            * ``metrics``: The result of `get_metrics`.
+
+            * ``reload``: Send ``signal.SIGHUP`` to the daemon process,
+              if `signal_map` has a handler for that signal.
+
+            * ``dump-stacks``: The current stack of every thread.
+
+            * ``shutdown``: Send ``signal.SIGTERM`` to the daemon
+              process, after responding.
+
+            If `profiler` is not ``None``, the control socket also
+            answers these commands:
+
+            * ``profile-start``: Start the profiler.
+
+            * ``profile-stop``: Stop the profiler, responding with the
+              path of the file written.
+
+            If `profile_window` is not ``None``, the control socket also
+            answers the ``profile-window`` command, to request a profile
+            window.
+
+            If `memory_snapshots` is not ``None``, the control socket
+            also answers these commands:
+
+            * ``memory-snapshot``: Arm the memory tracing, or write a
+              report, responding with the path of the file written.
+
+            * ``memory-disarm``: Stop the memory tracing.
+
         """
 
     def __init__(
@@ -249,6 +495,7 @@ class DaemonContext:
             gid=None,
             initgroups=False,
             prevent_core=True,
+            core_dump_policy=None,
             detach_process=None,
             files_preserve=None,
             pidfile=None,
@@ -256,12 +503,26 @@ class DaemonContext:
             stdout=None,
             stderr=None,
             signal_map=None,
+            output_buffering=None,
+            crash_log=None,
+            crash_buffer=None,
+            log_rotation=None,
+            watchdog=None,
+            gc_monitor=None,
+            fd_audit=None,
+            profiler=None,
+            profile_window=None,
+            memory_snapshots=None,
+            open_stages=None,
+            open_timing_callback=None,
+            control_socket_path=None,
             ):
         """ Set up a new instance. """
         self.chroot_directory = chroot_directory
         self.working_directory = working_directory
         self.umask = umask
         self.prevent_core = prevent_core
+        self.core_dump_policy = core_dump_policy
         self.files_preserve = files_preserve
         self.pidfile = pidfile
         self.stdin = stdin
@@ -269,10 +530,10 @@ class DaemonContext:
         self.stderr = stderr
 
         if uid is None:
-            uid = os.getuid()
+            uid = os_backend.getuid()
         self.uid = uid
         if gid is None:
-            gid = os.getgid()
+            gid = os_backend.getgid()
         self.gid = gid
         self.initgroups = initgroups
 
@@ -284,7 +545,30 @@ class DaemonContext:
             signal_map = make_default_signal_map()
         self.signal_map = signal_map
 
+        self.output_buffering = output_buffering
+        self.crash_log = crash_log
+        self.crash_buffer = crash_buffer
+        self.log_rotation = log_rotation
+        self.watchdog = watchdog
+        self.gc_monitor = gc_monitor
+        self.fd_audit = fd_audit
+        self.profiler = profiler
+        self.profile_window = profile_window
+        self.memory_snapshots = memory_snapshots
+
+        self.control_socket_path = control_socket_path
+        self._control_server = None
+
+        self._services = []
+
+        if open_stages is None:
+            open_stages = make_open_stages()
+        self.open_stages = open_stages
+        self.open_timing_callback = open_timing_callback
+        self.open_timings = []
+
         self._is_open = False
+        self._open_time = None
 
     @property
     def is_open(self):
@@ -297,14 +581,19 @@ class DaemonContext:
             :return: ``None``.
 
             Open the daemon context, turning the current program into a daemon
-            process. This performs the following steps:
+            process. This performs each required stage of the
+            `open_stages` attribute in sequence, timing each stage. The
+            default stages perform the following steps:
 
             * If this instance's `is_open` property is true, return
               immediately. This makes it safe to call `open` multiple times on
               an instance.
 
-            * If the `prevent_core` attribute is true, set the resource limits
-              for the process to prevent any core dump from the process.
+            * If the `control_socket_path` attribute is not ``None``,
+              create the control socket at that path.
+
+            * If the `core_dump_policy` attribute is not ``None``, start
+              it, applying its limits to core dumps from the process.
 
             * If the `chroot_directory` attribute is not ``None``, set the
               effective root directory of the process to that directory (via
@@ -315,6 +604,16 @@ class DaemonContext:
               by the process. Note that the specified directory needs to
               already be set up for this purpose.
 
+            * If the `core_dump_policy` attribute is ``None`` and the
+              `prevent_core` attribute is true, set the resource limits
+              for the process to prevent any core dump from the process.
+
+            * Reset the file access creation mask to the value specified by
+              the `umask` attribute.
+
+            * Change current working directory to the path specified by the
+              `working_directory` attribute.
+
             * Set the process owner (UID and GID) to the `uid` and `gid`
               attribute values.
 
@@ -323,22 +622,21 @@ class DaemonContext:
               groups whose membership includes the username corresponding
               to `uid`).
 
-            * Close all open file descriptors. This excludes those listed in
-              the `files_preserve` attribute, and those that correspond to the
-              `stdin`, `stdout`, or `stderr` attributes.
-
-            * Change current working directory to the path specified by the
-              `working_directory` attribute.
-
-            * Reset the file access creation mask to the value specified by
-              the `umask` attribute.
-
             * If the `detach_process` option is true, detach the current
               process into its own process group, and disassociate from any
               controlling terminal.
 
             * Set signal handlers as specified by the `signal_map` attribute.
 
+            * If the `crash_log` attribute is not ``None``, start it.
+
+            * Start each of the `stdin`, `stdout`, `stderr` objects that
+              has a `start` method.
+
+            * Close all open file descriptors. This excludes those listed in
+              the `files_preserve` attribute, and those that correspond to the
+              `stdin`, `stdout`, or `stderr` attributes.
+
             * If any of the attributes `stdin`, `stdout`, `stderr` are not
               ``None``, bind the system streams `sys.stdin`, `sys.stdout`,
               and/or `sys.stderr` to the files represented by the
@@ -346,12 +644,35 @@ class DaemonContext:
               descriptor, the descriptor is duplicated (instead of re-binding
               the name).
 
+            * If the `output_buffering` attribute is not ``None``, start
+              it, rebuilding the `sys.stdout` and `sys.stderr` streams.
+
+            * If the `crash_buffer` attribute is not ``None``, start it
+              mirroring the `sys.stdout` and `sys.stderr` streams.
+
             * If the `pidfile` attribute is not ``None``, enter its context
               manager.
 
+            * If the `log_rotation` attribute is not ``None``, start it
+              watching the files of the redirected `stdout` and `stderr`
+              streams.
+
+            * If the `watchdog` attribute is not ``None``, start it.
+
+            * If the `gc_monitor` attribute is not ``None``, start it.
+
+            * If the `fd_audit` attribute is not ``None``, start it,
+              reporting the file descriptors recorded before and after
+              closing the open files.
+
+            * If the control socket was created, start serving it.
+
             * Mark this instance as open (for the purpose of future `open` and
               `close` calls).
 
+            * If the `open_timing_callback` attribute is not ``None``,
+              call it with the timings of the steps.
+
             * Register the `close` method to be called during Python's exit
               processing.
 
@@ -362,33 +683,17 @@ class DaemonContext:
         if self.is_open:
             return
 
-        if self.chroot_directory is not None:
-            change_root_directory(self.chroot_directory)
-
-        if self.prevent_core:
-            prevent_core_dump()
-
-        change_file_creation_mask(self.umask)
-        change_working_directory(self.working_directory)
-        change_process_owner(self.uid, self.gid, self.initgroups)
-
-        if self.detach_process:
-            detach_process_context()
-
-        signal_handler_map = self._make_signal_handler_map()
-        set_signal_handlers(signal_handler_map)
-
-        exclude_fds = self._get_exclude_file_descriptors()
-        close_all_open_files(exclude=exclude_fds)
-
-        redirect_stream(sys.stdin, self.stdin)
-        redirect_stream(sys.stdout, self.stdout)
-        redirect_stream(sys.stderr, self.stderr)
-
-        if self.pidfile is not None:
-            self.pidfile.__enter__()
+        self.open_timings = []
+        for stage in self.open_stages:
+            if stage.is_required(self):
+                with self._time_step(stage.name):
+                    stage.run(self)
 
         self._is_open = True
+        self._open_time = time.time()
+
+        if self.open_timing_callback is not None:
+            self.open_timing_callback(list(self.open_timings))
 
         register_atexit_function(self.close)
 
@@ -408,6 +713,22 @@ class DaemonContext:
               immediately. This makes it safe to call `close` multiple times
               on an instance.
 
+            * If the control socket is being served, stop serving it and
+              remove the socket.
+
+            * If the `profiler` attribute is not ``None``, stop it.
+
+            * If the `profile_window` attribute is not ``None``, stop
+              it.
+
+            * If the `memory_snapshots` attribute is not ``None``,
+              disarm it.
+
+            * Stop each started stream object that has a `stop` method,
+              and the `core_dump_policy`, `crash_log`,
+              `output_buffering`, `crash_buffer`, `log_rotation`,
+              `watchdog`, `gc_monitor`, and `fd_audit`, if started.
+
             * If the `pidfile` attribute is not ``None``, exit its context
               manager.
 
@@ -418,6 +739,19 @@ class DaemonContext:
         if not self.is_open:
             return
 
+        if self._control_server is not None:
+            self._control_server.stop()
+            self._control_server = None
+
+        if self.profiler is not None:
+            self.profiler.stop()
+        if self.profile_window is not None:
+            self.profile_window.stop()
+        if self.memory_snapshots is not None:
+            self.memory_snapshots.disarm()
+
+        self._stop_services()
+
         if self.pidfile is not None:
             # Follow the interface for telling a context manager to exit,
             # <URL:http://docs.python.org/library/stdtypes.html#typecontextmanager>.
@@ -448,6 +782,257 @@ class DaemonContext:
                     signal_number=signal_number))
         raise exception
 
+    def reopen_streams(self, signal_number=None, stack_frame=None):
+        """ Signal handler to reopen the redirected output files.
+
+            :param signal_number: The OS signal number received.
+            :param stack_frame: The frame object at the point the
+                signal was received.
+            :return: ``None``.
+
+            For each of the `stdout` and `stderr` attributes that is a
+            file with a filesystem path, open the path again (in append
+            mode, creating the file if needed), and duplicate the new
+            file descriptor over both the standard stream and the file
+            object's own descriptor. Output written after this goes to
+            the file now at the path, typically after an external tool
+            has renamed the previous file.
+
+            """
+        reopen_stream(sys.stdout, self.stdout)
+        reopen_stream(sys.stderr, self.stderr)
+
+    def toggle_profiler(self, signal_number=None, stack_frame=None):
+        """ Signal handler to start or stop the `profiler`.
+
+            :param signal_number: The OS signal number received.
+            :param stack_frame: The frame object at the point the
+                signal was received.
+            :return: ``None``.
+
+            If the `profiler` attribute is not ``None``, start it if it
+            is stopped, or stop it if it is running.
+
+            """
+        if self.profiler is not None:
+            self.profiler.toggle()
+
+    def request_profile_window(self, signal_number=None, stack_frame=None):
+        """ Signal handler to request a `profile_window`.
+
+            :param signal_number: The OS signal number received.
+            :param stack_frame: The frame object at the point the
+                signal was received.
+            :return: ``None``.
+
+            If the `profile_window` attribute is not ``None``, pass the
+            signal to its handler.
+
+            """
+        if self.profile_window is not None:
+            self.profile_window.handle_signal(signal_number, stack_frame)
+
+    def take_memory_snapshot(self, signal_number=None, stack_frame=None):
+        """ Signal handler to request `memory_snapshots`.
+
+            :param signal_number: The OS signal number received.
+            :param stack_frame: The frame object at the point the
+                signal was received.
+            :return: ``None``.
+
+            If the `memory_snapshots` attribute is not ``None``, pass
+            the signal to its handler.
+
+            """
+        if self.memory_snapshots is not None:
+            self.memory_snapshots.handle_signal(signal_number, stack_frame)
+
+    def get_metrics(self):
+        """ Get the current metrics for the daemon process.
+
+            :return: A mapping of metric name to value.
+
+            """
+        metrics = control.get_process_metrics()
+        if self._open_time is not None:
+            metrics['uptime_seconds'] = time.time() - self._open_time
+        for name in ['stdout', 'stderr']:
+            stream = getattr(self, name)
+            if hasattr(stream, 'stats'):
+                metrics[name] = stream.stats()
+        if self.open_timings:
+            metrics['open_steps_ns'] = dict(self.open_timings)
+        if self.watchdog is not None:
+            metrics['watchdog'] = self.watchdog.stats()
+        if self.gc_monitor is not None:
+            metrics['gc'] = self.gc_monitor.stats()
+        if self.fd_audit is not None:
+            metrics['fd_audit'] = self.fd_audit.stats()
+        if self.profiler is not None:
+            metrics['profiler'] = self.profiler.stats()
+        if self.profile_window is not None:
+            metrics['profile_window'] = self.profile_window.stats()
+        if self.memory_snapshots is not None:
+            metrics['memory_snapshots'] = self.memory_snapshots.stats()
+        if self.core_dump_policy is not None:
+            metrics['core_dump_policy'] = self.core_dump_policy.stats()
+
+        return metrics
+
+    def _time_step(self, name):
+        """ Context manager to time a step of `open`.
+
+            :param name: The name of the step.
+            :return: A context manager which, on exit, appends a
+                `StepTiming` for the step to `open_timings`.
+
+            """
+        return StepTimer(self.open_timings, name)
+
+    def _start_stream_services(self):
+        """ Start each standard stream object that has a `start` method.
+
+            :return: ``None``.
+
+            Each stream object is started once, even if it is specified
+            for more than one stream.
+
+            """
+        for stream in [self.stdin, self.stdout, self.stderr]:
+            if not hasattr(stream, 'start'):
+                continue
+            if any(stream is service for service in self._services):
+                continue
+            self._start_service(stream)
+
+    def _start_log_rotation(self):
+        """ Start the log rotation for the redirected output streams.
+
+            :return: ``None``.
+
+            """
+        self.log_rotation.add_stream(sys.stdout, self.stdout)
+        self.log_rotation.add_stream(sys.stderr, self.stderr)
+        self._start_service(self.log_rotation)
+
+    def _start_service(self, service):
+        """ Start a service, and record it for stopping on close.
+
+            :param service: The service object, which has a `start`
+                method and may have a `stop` method.
+            :return: ``None``.
+
+            """
+        service.start()
+        self._services.append(service)
+
+    def _stop_services(self):
+        """ Stop each started service, in reverse order of starting.
+
+            :return: ``None``.
+
+            """
+        while self._services:
+            service = self._services.pop()
+            if hasattr(service, 'stop'):
+                service.stop()
+
+    def _make_control_server(self):
+        """ Make the control server answering commands for this instance.
+
+            :return: A new `ControlServer` instance.
+
+            """
+        server = control.ControlServer(self.control_socket_path)
+        server.register('status', self._get_status)
+        server.register('metrics', self.get_metrics)
+        server.register('reload', self._request_reload)
+        server.register('dump-stacks', control.format_thread_stacks)
+        server.register('shutdown', self._request_shutdown)
+        if self.profiler is not None:
+            server.register('profile-start', self._start_profiler)
+            server.register('profile-stop', self._stop_profiler)
+        if self.profile_window is not None:
+            server.register(
+                    'profile-window', self._request_profile_window)
+        if self.memory_snapshots is not None:
+            server.register(
+                    'memory-snapshot', self._request_memory_snapshot)
+            server.register(
+                    'memory-disarm', self._disarm_memory_snapshots)
+
+        return server
+
+    def _get_status(self):
+        """ Get the status of the daemon process, for the control socket. """
+        status = {
+                'pid': os.getpid(),
+                'is_open': self.is_open,
+                'uptime_seconds': None,
+                'pidfile': getattr(self.pidfile, 'path', None),
+                }
+        if self._open_time is not None:
+            status['uptime_seconds'] = time.time() - self._open_time
+
+        return status
+
+    def _request_reload(self):
+        """ Send the reload signal to this process, for the control socket.
+
+            :raises ValueError: If no handler is mapped for the
+                ``signal.SIGHUP`` signal.
+
+            """
+        signal_number = getattr(signal, 'SIGHUP', None)
+        if signal_number not in self.signal_map:
+            error = ValueError("No handler in signal map for SIGHUP")
+            raise error
+        os.kill(os.getpid(), signal_number)
+
+        return {'signal': signal_number}
+
+    def _start_profiler(self):
+        """ Start the profiler, for the control socket. """
+        self.profiler.start()
+
+        return self.profiler.stats()
+
+    def _stop_profiler(self):
+        """ Stop the profiler, for the control socket. """
+        path = self.profiler.stop()
+
+        return {'path': path}
+
+    def _request_profile_window(self):
+        """ Request a profile window, for the control socket. """
+        self.profile_window.request()
+
+        return {
+                'directory': self.profile_window.directory,
+                'duration': self.profile_window.duration,
+                }
+
+    def _request_memory_snapshot(self):
+        """ Request memory snapshots, for the control socket. """
+        path = self.memory_snapshots.request()
+
+        return {'path': path}
+
+    def _disarm_memory_snapshots(self):
+        """ Disarm memory snapshots, for the control socket. """
+        self.memory_snapshots.disarm()
+
+        return self.memory_snapshots.stats()
+
+    def _request_shutdown(self):
+        """ Terminate this process after responding, for the control socket.
+            """
+        pid = os.getpid()
+        self._control_server.defer(
+                lambda: os.kill(pid, signal.SIGTERM))
+
+        return {'signal': signal.SIGTERM}
+
     def _get_exclude_file_descriptors(self):
         """ Get the set of file descriptors to exclude closing.
 
@@ -466,6 +1051,11 @@ class DaemonContext:
 
             * Otherwise, the item is in the return set verbatim.
 
+            The control socket, if created, is also in the return set,
+            as are the items of the `files_preserve` attribute of each
+            started stream object that has one, of the `fd_audit`, and
+            of the `pidfile` if it has one.
+
             """
         files_preserve = self.files_preserve
         if files_preserve is None:
@@ -484,6 +1074,14 @@ class DaemonContext:
             else:
                 exclude_descriptors.add(item)
 
+        if self._control_server is not None:
+            exclude_descriptors.add(self._control_server.fileno())
+        for service in self._services:
+            exclude_descriptors.update(getattr(service, 'files_preserve', []))
+        if self.fd_audit is not None:
+            exclude_descriptors.update(self.fd_audit.files_preserve)
+        exclude_descriptors.update(getattr(self.pidfile, 'files_preserve', []))
+
         return exclude_descriptors
 
     def _make_signal_handler(self, target):
@@ -517,13 +1115,305 @@ class DaemonContext:
             context instance, suitable for passing to
             `set_signal_handlers`.
 
+            If the `profile_window` or `memory_snapshots` attribute has
+            a `signal_number` not in `signal_map`, map that signal to
+            the `request_profile_window` or `take_memory_snapshot`
+            method respectively.
+
             """
+        signal_map = dict(self.signal_map)
+        for (requestee, target) in [
+                (self.profile_window, 'request_profile_window'),
+                (self.memory_snapshots, 'take_memory_snapshot'),
+                ]:
+            signal_number = getattr(requestee, 'signal_number', None)
+            if signal_number is not None:
+                signal_map.setdefault(signal_number, target)
         signal_handler_map = dict(
                 (signal_number, self._make_signal_handler(target))
-                for (signal_number, target) in self.signal_map.items())
+                for (signal_number, target) in signal_map.items())
         return signal_handler_map
 
 
+class OpenStage:
+    """ A stage of opening a `DaemonContext`. """
+
+    def __init__(self, name, action, condition=None):
+        """ Set up a new stage.
+
+            :param name: The name of the stage, unique in its sequence.
+            :param action: The callable performing the stage, called
+                with the `DaemonContext` instance.
+            :param condition: A callable, called with the
+                `DaemonContext` instance, returning true if the stage
+                is required; or ``None`` if the stage is always
+                required.
+            :return: ``None``.
+
+            """
+        self.name = name
+        self.action = action
+        self.condition = condition
+
+    def __repr__(self):
+        return "<{class_name} {name!r}>".format(
+                class_name=self.__class__.__name__, name=self.name)
+
+    def is_required(self, context):
+        """ Determine whether the stage is required for a context.
+
+            :param context: The `DaemonContext` instance.
+            :return: ``True`` if the stage is required, else ``False``.
+
+            """
+        if self.condition is None:
+            return True
+
+        return bool(self.condition(context))
+
+    def run(self, context):
+        """ Perform the stage for a context.
+
+            :param context: The `DaemonContext` instance.
+            :return: ``None``.
+
+            """
+        self.action(context)
+
+
+class OpenStages(list):
+    """ Sequence of `OpenStage` items, changed by stage name. """
+
+    def index_of(self, name):
+        """ Get the index of the stage named `name`.
+
+            :param name: The name of the stage.
+            :return: The index of the stage in the sequence.
+            :raises KeyError: If there is no stage named `name`.
+
+            """
+        for (index, stage) in enumerate(self):
+            if stage.name == name:
+                return index
+        error = KeyError("No stage named {name!r}".format(name=name))
+        raise error
+
+    def get_stage(self, name):
+        """ Get the stage named `name`.
+
+            :param name: The name of the stage.
+            :return: The `OpenStage` named `name`.
+            :raises KeyError: If there is no stage named `name`.
+
+            """
+        return self[self.index_of(name)]
+
+    def insert_before(self, name, stage):
+        """ Insert a stage before the stage named `name`. """
+        self.insert(self.index_of(name), stage)
+
+    def insert_after(self, name, stage):
+        """ Insert a stage after the stage named `name`. """
+        self.insert(self.index_of(name) + 1, stage)
+
+    def remove_stage(self, name):
+        """ Remove the stage named `name`.
+
+            :return: The `OpenStage` removed.
+
+            """
+        return self.pop(self.index_of(name))
+
+    def replace_stage(self, name, stage):
+        """ Replace the stage named `name` with `stage`. """
+        self[self.index_of(name)] = stage
+
+    def move_before(self, name, other_name):
+        """ Move the stage named `name` to before `other_name`. """
+        self.insert_before(other_name, self.remove_stage(name))
+
+    def move_after(self, name, other_name):
+        """ Move the stage named `name` to after `other_name`. """
+        self.insert_after(other_name, self.remove_stage(name))
+
+
+def _bind_control_socket(context):
+    """ Create the control socket of a context, and bind it. """
+    context._control_server = context._make_control_server()
+    context._control_server.bind()
+
+
+def _set_signal_handlers(context):
+    """ Set the signal handlers for a context. """
+    signal_handler_map = context._make_signal_handler_map()
+    set_signal_handlers(signal_handler_map)
+
+
+def _close_all_open_files(context):
+    """ Close the open files, except those excluded for a context.
+
+        If the context has an `fd_audit`, record the open files before
+        and after closing them.
+
+        """
+    exclude_fds = context._get_exclude_file_descriptors()
+    if context.fd_audit is not None:
+        context.fd_audit.record_before_close(exclude_fds)
+    close_all_open_files(exclude=exclude_fds)
+    if context.fd_audit is not None:
+        context.fd_audit.record_after_close()
+
+
+def _redirect_streams(context):
+    """ Redirect the system streams to those of a context. """
+    redirect_stream(sys.stdin, context.stdin)
+    redirect_stream(sys.stdout, context.stdout)
+    redirect_stream(sys.stderr, context.stderr)
+
+
+def _make_service_stage(name, attribute):
+    """ Make a stage which starts the service of a context attribute.
+
+        :param name: The name of the stage.
+        :param attribute: The name of the `DaemonContext` attribute.
+        :return: The `OpenStage`, required if the attribute is not
+            ``None``.
+
+        """
+    stage = OpenStage(
+            name,
+            (lambda context: context._start_service(
+                getattr(context, attribute))),
+            (lambda context: getattr(context, attribute) is not None))
+
+    return stage
+
+
+def _make_classic_open_stages():
+    """ Make the stages of the ``'classic'`` preset. """
+    stages = OpenStages([
+            OpenStage(
+                'bind_control_socket', _bind_control_socket,
+                (lambda context: context.control_socket_path is not None)),
+            _make_service_stage(
+                'start_core_dump_policy', 'core_dump_policy'),
+            OpenStage(
+                'change_root_directory',
+                (lambda context: change_root_directory(
+                    context.chroot_directory)),
+                (lambda context: context.chroot_directory is not None)),
+            OpenStage(
+                'prevent_core_dump',
+                (lambda context: prevent_core_dump()),
+                (lambda context: (
+                    context.core_dump_policy is None
+                    and context.prevent_core))),
+            OpenStage(
+                'change_file_creation_mask',
+                (lambda context: change_file_creation_mask(context.umask))),
+            OpenStage(
+                'change_working_directory',
+                (lambda context: change_working_directory(
+                    context.working_directory))),
+            OpenStage(
+                'change_process_owner',
+                (lambda context: change_process_owner(
+                    context.uid, context.gid, context.initgroups))),
+            OpenStage(
+                'detach_process_context',
+                (lambda context: detach_process_context()),
+                (lambda context: context.detach_process)),
+            OpenStage('set_signal_handlers', _set_signal_handlers),
+            _make_service_stage('start_crash_log', 'crash_log'),
+            OpenStage(
+                'start_stream_services',
+                (lambda context: context._start_stream_services())),
+            OpenStage('close_all_open_files', _close_all_open_files),
+            OpenStage('redirect_stream', _redirect_streams),
+            _make_service_stage(
+                'start_output_buffering', 'output_buffering'),
+            _make_service_stage('start_crash_buffer', 'crash_buffer'),
+            OpenStage(
+                'enter_pidfile',
+                (lambda context: context.pidfile.__enter__()),
+                (lambda context: context.pidfile is not None)),
+            OpenStage(
+                'start_log_rotation',
+                (lambda context: context._start_log_rotation()),
+                (lambda context: context.log_rotation is not None)),
+            _make_service_stage('start_watchdog', 'watchdog'),
+            _make_service_stage('start_gc_monitor', 'gc_monitor'),
+            _make_service_stage('start_fd_audit', 'fd_audit'),
+            OpenStage(
+                'start_control_server',
+                (lambda context: context._control_server.start()),
+                (lambda context: context._control_server is not None)),
+            ])
+
+    return stages
+
+
+def _make_container_open_stages():
+    """ Make the stages of the ``'container'`` preset. """
+    stages = _make_classic_open_stages()
+    stages.remove_stage('detach_process_context')
+    stages.remove_stage('close_all_open_files')
+    stages.move_before('enter_pidfile', 'change_process_owner')
+
+    return stages
+
+
+def _make_service_manager_open_stages():
+    """ Make the stages of the ``'service-manager'`` preset. """
+    stages = _make_classic_open_stages()
+    stages.remove_stage('detach_process_context')
+    stages.remove_stage('close_all_open_files')
+
+    return stages
+
+
+open_stage_presets = {
+        'classic': _make_classic_open_stages,
+        'container': _make_container_open_stages,
+        'service-manager': _make_service_manager_open_stages,
+        }
+
+
+def make_open_stages(preset='classic'):
+    """ Make the stages for opening a `DaemonContext`, from a preset.
+
+        :param preset: The name of the preset; see below.
+        :return: A new `OpenStages` list of the preset's stages.
+        :raises ValueError: If `preset` is not a known preset name.
+
+        The presets are:
+
+        * ``'classic'``: The steps of a traditional Unix daemon,
+          described for `DaemonContext.open`.
+
+        * ``'container'``: For the main process of a container. The
+          process is not detached, since the container runtime
+          supervises it; open files are not closed, since the runtime
+          starts it with only the files it should have. The PID file
+          is entered before the process owner is changed, since it may
+          need privilege; the owner is still changed before any
+          service starts a thread or child process.
+
+        * ``'service-manager'``: For a service started by a service
+          manager such as systemd, which supervises the process and
+          starts it with only the files it should have. The process
+          is not detached, and open files are not closed.
+
+        """
+    if preset not in open_stage_presets:
+        error = ValueError(
+                "Unknown open stage preset: {preset!r}".format(
+                    preset=preset))
+        raise error
+
+    return open_stage_presets[preset]()
+
+
 def _get_file_descriptor(obj):
     """ Get the file descriptor, if the object has one.
 
@@ -555,7 +1445,7 @@ def change_working_directory(directory):
 
         """
     try:
-        os.chdir(directory)
+        os_backend.chdir(directory)
     except Exception as exc:
         error = DaemonOSEnvironmentError(
                 "Unable to change working directory ({exc})".format(exc=exc))
@@ -574,8 +1464,8 @@ def change_root_directory(directory):
 
         """
     try:
-        os.chdir(directory)
-        os.chroot(directory)
+        os_backend.chdir(directory)
+        os_backend.chroot(directory)
     except Exception as exc:
         error = DaemonOSEnvironmentError(
                 "Unable to change root directory ({exc})".format(exc=exc))
@@ -590,7 +1480,7 @@ def change_file_creation_mask(mask):
 
         """
     try:
-        os.umask(mask)
+        os_backend.umask(mask)
     except Exception as exc:
         error = DaemonOSEnvironmentError(
                 "Unable to change file creation mask ({exc})".format(exc=exc))
@@ -599,7 +1489,7 @@ def change_file_creation_mask(mask):
 
 def get_username_for_uid(uid):
     """ Get the username for the specified UID. """
-    passwd_entry = pwd.getpwuid(uid)
+    passwd_entry = os_backend.getpwuid(uid)
     username = passwd_entry.pw_name
 
     return username
@@ -635,10 +1525,10 @@ def change_process_owner(uid, gid, initgroups=False):
 
     try:
         if initgroups:
-            os.initgroups(username, gid)
+            os_backend.initgroups(username, gid)
         else:
-            os.setgid(gid)
-        os.setuid(uid)
+            os_backend.setgid(gid)
+        os_backend.setuid(uid)
     except Exception as exc:
         error = DaemonOSEnvironmentError(
                 "Unable to change process owner ({exc})".format(exc=exc))
@@ -659,7 +1549,7 @@ def prevent_core_dump():
     try:
         # Ensure the resource limit exists on this platform, by requesting
         # its current value.
-        core_limit_prev = resource.getrlimit(core_resource)
+        core_limit_prev = os_backend.getrlimit(core_resource)
     except ValueError as exc:
         error = DaemonOSEnvironmentError(
                 "System does not support RLIMIT_CORE resource limit"
@@ -668,7 +1558,7 @@ def prevent_core_dump():
 
     # Set hard and soft limits to zero, i.e. no core dump at all.
     core_limit = (0, 0)
-    resource.setrlimit(core_resource, core_limit)
+    os_backend.setrlimit(core_resource, core_limit)
 
 
 def detach_process_context():
@@ -695,9 +1585,9 @@ def detach_process_context():
 
             """
         try:
-            pid = os.fork()
+            pid = os_backend.fork()
             if pid > 0:
-                os._exit(0)
+                os_backend._exit(0)
         except OSError as exc:
             error = DaemonProcessDetachError(
                     "{message}: [{exc.errno:d}] {exc.strerror}".format(
@@ -705,7 +1595,7 @@ def detach_process_context():
             raise error
 
     fork_then_exit_parent(error_message="Failed first fork")
-    os.setsid()
+    os_backend.setsid()
     fork_then_exit_parent(error_message="Failed second fork")
 
 
@@ -721,7 +1611,7 @@ def is_process_started_by_init():
     result = False
 
     init_pid = 1
-    if os.getppid() == init_pid:
+    if os_backend.getppid() == init_pid:
         result = True
 
     return result
@@ -740,9 +1630,10 @@ def is_socket(fd):
         """
     result = False
 
-    file_socket = socket.fromfd(fd, socket.AF_INET, socket.SOCK_RAW)
-
     try:
+        # Python 3.7 and later query the socket when making the object,
+        # so this raises the error for a non-socket.
+        file_socket = os_backend.fromfd(fd, socket.AF_INET, socket.SOCK_RAW)
         socket_type = file_socket.getsockopt(
                 socket.SOL_SOCKET, socket.SO_TYPE)
     except socket.error as exc:
@@ -815,7 +1706,7 @@ def close_file_descriptor_if_open(fd):
 
         """
     try:
-        os.close(fd)
+        os_backend.close(fd)
     except EnvironmentError as exc:
         if exc.errno == errno.EBADF:
             # File descriptor was not open.
@@ -840,7 +1731,7 @@ def get_maximum_file_descriptors():
         of ``MAXFD`` is returned.
 
         """
-    (__, hard_limit) = resource.getrlimit(resource.RLIMIT_NOFILE)
+    (__, hard_limit) = os_backend.getrlimit(resource.RLIMIT_NOFILE)
 
     result = hard_limit
     if hard_limit == resource.RLIM_INFINITY:
@@ -887,12 +1778,44 @@ def redirect_stream(system_stream, target_stream):
 
         """
     if target_stream is None:
-        target_fd = os.open(os.devnull, os.O_RDWR)
+        target_fd = os_backend.open(os_backend.devnull, os.O_RDWR)
     else:
         target_fd = target_stream.fileno()
-    os.dup2(target_fd, system_stream.fileno())
+    os_backend.dup2(target_fd, system_stream.fileno())
 
 
+def reopen_stream(system_stream, target_stream):
+    """ Reopen the file of a redirected stream at its filesystem path.
+
+        :param system_stream: A file object representing a standard I/O
+            stream.
+        :param target_stream: The file object redirected to the system
+            stream.
+        :return: ``True`` if the file was reopened; ``False`` if the
+            target has no filesystem path.
+
+        The path is opened for writing in append mode, created if it
+        does not exist. Its file descriptor is duplicated over the file
+        descriptors of both `target_stream` and `system_stream`; each
+        duplication atomically replaces the open file, so no write is
+        lost between the two files.
+
+        """
+    path = getattr(target_stream, 'name', None)
+    if not isinstance(path, basestring):
+        return False
+
+    new_fd = os_backend.open(
+            path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+    try:
+        os_backend.dup2(new_fd, target_stream.fileno())
+        os_backend.dup2(new_fd, system_stream.fileno())
+    finally:
+        os_backend.close(new_fd)
+
+    return True
+
+
 def make_default_signal_map():
     """ Make the default signal map for this system.
 
@@ -928,7 +1851,7 @@ def set_signal_handlers(signal_handler_map):
 
         """
     for (signal_number, handler) in signal_handler_map.items():
-        signal.signal(signal_number, handler)
+        os_backend.signal(signal_number, handler)
 
 
 def register_atexit_function(func):
@@ -941,7 +1864,7 @@ def register_atexit_function(func):
         at program exit.
 
         """
-    atexit.register(func)
+    os_backend.register(func)
 
 
 def _chain_exception_from_existing_exception_context(exc, as_cause=False):
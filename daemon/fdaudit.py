@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+
+# daemon/fdaudit.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Inventory and audit of the open file descriptors of a daemon.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import collections
+import errno
+import fcntl
+import os
+import stat
+import sys
+import threading
+
+__metaclass__ = type
+
+
+fd_directory_paths = ["/proc/self/fd", "/dev/fd"]
+
+FdInfo = collections.namedtuple(
+        'FdInfo', ['fd', 'target', 'type', 'flags', 'cloexec'])
+FdInfo.__doc__ = """ Description of an open file descriptor.
+
+    :param fd: The file descriptor number.
+    :param target: The path or description of the open file, or
+        ``None`` if unknown.
+    :param type: The type of the open file: one of ``'file'``,
+        ``'directory'``, ``'pipe'``, ``'socket'``, ``'character'``,
+        ``'block'``, ``'symlink'``, or ``'unknown'``.
+    :param flags: The file status flags, from ``F_GETFL``.
+    :param cloexec: ``True`` if the descriptor closes on `exec`.
+
+    """
+
+file_types = [
+        (stat.S_ISREG, 'file'),
+        (stat.S_ISDIR, 'directory'),
+        (stat.S_ISFIFO, 'pipe'),
+        (stat.S_ISSOCK, 'socket'),
+        (stat.S_ISCHR, 'character'),
+        (stat.S_ISBLK, 'block'),
+        (stat.S_ISLNK, 'symlink'),
+        ]
+
+flag_names = [
+        (getattr(os, name, 0), name)
+        for name in ['O_APPEND', 'O_NONBLOCK', 'O_SYNC', 'O_DIRECT']]
+
+
+def describe_fd(fd):
+    """ Describe an open file descriptor.
+
+        :param fd: The file descriptor number.
+        :return: The `FdInfo` for the file descriptor, or ``None`` if
+            it is not open.
+
+        """
+    try:
+        status = os.fstat(fd)
+        flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+        fd_flags = fcntl.fcntl(fd, fcntl.F_GETFD)
+    except EnvironmentError as exc:
+        if exc.errno == errno.EBADF:
+            return None
+        raise
+
+    file_type = 'unknown'
+    for (predicate, name) in file_types:
+        if predicate(status.st_mode):
+            file_type = name
+            break
+
+    target = None
+    for directory in fd_directory_paths:
+        try:
+            target = os.readlink(os.path.join(directory, str(fd)))
+        except EnvironmentError:
+            continue
+        break
+
+    return FdInfo(
+            fd=fd, target=target, type=file_type, flags=flags,
+            cloexec=bool(fd_flags & fcntl.FD_CLOEXEC))
+
+
+def list_open_fds():
+    """ List the open file descriptors of this process.
+
+        :return: A sorted list of the open file descriptor numbers.
+
+        The list comes from the first of `fd_directory_paths` which
+        exists; listing the directory itself opens a descriptor, which
+        is omitted.
+
+        """
+    for directory in fd_directory_paths:
+        try:
+            names = os.listdir(directory)
+        except EnvironmentError:
+            continue
+        fds = [int(name) for name in names if name.isdigit()]
+        return sorted(fd for fd in fds if is_fd_open(fd))
+
+    return []
+
+
+def is_fd_open(fd):
+    """ Determine whether a file descriptor is open.
+
+        :param fd: The file descriptor number.
+        :return: ``True`` if `fd` is open, otherwise ``False``.
+
+        """
+    try:
+        fcntl.fcntl(fd, fcntl.F_GETFD)
+    except EnvironmentError:
+        return False
+
+    return True
+
+
+def get_fd_inventory():
+    """ Get the inventory of the open file descriptors of this process.
+
+        :return: A mapping from file descriptor number to `FdInfo`.
+
+        """
+    inventory = {}
+    for fd in list_open_fds():
+        info = describe_fd(fd)
+        if info is not None:
+            inventory[fd] = info
+
+    return inventory
+
+
+def format_fd_info(info):
+    """ Format the description of an open file descriptor as text.
+
+        :param info: The `FdInfo` to format.
+        :return: The text describing the file descriptor.
+
+        """
+    access_mode = {
+            os.O_RDONLY: 'O_RDONLY',
+            os.O_WRONLY: 'O_WRONLY',
+            os.O_RDWR: 'O_RDWR',
+            }.get(info.flags & os.O_ACCMODE, 'unknown')
+    flags = [access_mode] + [
+            name for (value, name) in flag_names
+            if value and info.flags & value]
+    if info.cloexec:
+        flags.append('FD_CLOEXEC')
+
+    return "{fd:d} -> {target} ({type}, {flags})".format(
+            fd=info.fd, target=info.target, type=info.type,
+            flags="|".join(flags))
+
+
+class FdAudit:
+    """ Audit of the file descriptors of a daemon, and of their growth.
+
+        An `FdAudit` instance is the value for the `fd_audit` option
+        of `DaemonContext`. Opening the context records the inventory
+        of open file descriptors before and after closing the open
+        files, then starts the audit, which writes a report to
+        `output`: which file descriptors were closed, which were
+        preserved, and which unexpectedly remained open.
+
+        If `interval` is not ``None``, a background thread counts the
+        open file descriptors every `interval` seconds, tracking the
+        growth since the audit started. Each time the count exceeds its
+        previous maximum, the audit writes the file descriptors opened
+        since it started to `output`.
+
+        """
+
+    def __init__(self, output=None, interval=None, report_limit=20):
+        """ Set up a new file descriptor audit.
+
+            :param output: The stream for reports, or ``None`` for the
+                current `sys.stderr`.
+            :param interval: Seconds between counts of the open file
+                descriptors, or ``None`` to not count periodically.
+            :param report_limit: The maximum number of new file
+                descriptors to describe in each growth report.
+            :return: ``None``.
+
+            """
+        self.output = output
+        self.interval = interval
+        self.report_limit = report_limit
+
+        self.before = None
+        self.after = None
+        self.exclude = set()
+        self.baseline = None
+        self.fd_count = None
+        self.fd_count_max = 0
+        self.audit_count = 0
+        self.thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def files_preserve(self):
+        """ The file descriptors to keep open for the audit. """
+        result = []
+        if self.output is not None and hasattr(self.output, 'fileno'):
+            result.append(self.output.fileno())
+
+        return result
+
+    def record_before_close(self, exclude):
+        """ Record the inventory before closing the open files.
+
+            :param exclude: The file descriptors to be preserved.
+            :return: ``None``.
+
+            """
+        self.exclude = set(exclude)
+        self.before = get_fd_inventory()
+
+    def record_after_close(self):
+        """ Record the inventory after closing the open files.
+
+            :return: ``None``.
+
+            """
+        self.after = get_fd_inventory()
+
+    def get_close_report(self):
+        """ Get the report of closing the open files.
+
+            :return: A mapping with the keys ``'closed'``,
+                ``'preserved'``, and ``'unexpected'``, each to a sorted
+                list of `FdInfo`; or ``None`` if the inventories were
+                not recorded.
+
+            """
+        if self.before is None or self.after is None:
+            return None
+
+        before = self.before
+        after = self.after
+        return {
+                'closed': [
+                    before[fd] for fd in sorted(set(before) - set(after))],
+                'preserved': [
+                    after[fd] for fd in sorted(set(after) & self.exclude)],
+                'unexpected': [
+                    after[fd] for fd in sorted(set(after) - self.exclude)],
+                }
+
+    def start(self):
+        """ Write the close report, then start auditing.
+
+            :return: ``None``.
+
+            """
+        report = self.get_close_report()
+        if report is not None:
+            lines = []
+            for name in ['closed', 'preserved', 'unexpected']:
+                lines.append("File descriptors {name}: {count:d}".format(
+                        name=name, count=len(report[name])))
+                lines.extend(
+                        "  " + format_fd_info(info) for info in report[name])
+            self._write(lines)
+
+        self.baseline = get_fd_inventory()
+        self.fd_count = self.fd_count_max = len(self.baseline)
+        if self.interval is not None:
+            self._stop_event.clear()
+            self.thread = threading.Thread(
+                    target=self._audit_periodically, name="daemon-fd-audit")
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self):
+        """ Stop auditing.
+
+            :return: ``None``.
+
+            """
+        if self.thread is None:
+            return
+        self._stop_event.set()
+        self.thread.join()
+        self.thread = None
+
+    def audit(self):
+        """ Count the open file descriptors, reporting a new maximum.
+
+            :return: ``None``.
+
+            """
+        fds = list_open_fds()
+        self.fd_count = len(fds)
+        self.audit_count += 1
+        if self.fd_count <= self.fd_count_max:
+            return
+        self.fd_count_max = self.fd_count
+
+        baseline = self.baseline or {}
+        new_fds = [fd for fd in fds if fd not in baseline]
+        lines = [
+                "File descriptors open: {count:d},"
+                " {growth:+d} since start; new:".format(
+                    count=self.fd_count,
+                    growth=(self.fd_count - len(baseline)))]
+        for fd in new_fds[:self.report_limit]:
+            info = describe_fd(fd)
+            if info is not None:
+                lines.append("  " + format_fd_info(info))
+        self._write(lines)
+
+    def stats(self):
+        """ Get the metrics of the audit.
+
+            :return: A mapping of metric name to value.
+
+            """
+        result = {
+                'fd_count': self.fd_count,
+                'fd_count_max': self.fd_count_max,
+                'audits': self.audit_count,
+                }
+        if self.baseline is not None and self.fd_count is not None:
+            result['fd_growth'] = self.fd_count - len(self.baseline)
+        report = self.get_close_report()
+        if report is not None:
+            for (name, infos) in report.items():
+                result['fds_{name}'.format(name=name)] = len(infos)
+
+        return result
+
+    def _write(self, lines):
+        """ Write lines of a report to the output stream. """
+        output = self.output
+        if output is None:
+            output = sys.stderr
+        try:
+            output.write("\n".join(lines) + "\n")
+            output.flush()
+        except (IOError, OSError, ValueError):
+            pass
+
+    def _audit_periodically(self):
+        """ Audit at each interval, until stopped. """
+        while not self._stop_event.wait(self.interval):
+            self.audit()
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
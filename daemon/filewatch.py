@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+# daemon/filewatch.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Waiting for a file to change or be removed.
+
+    Where the Linux ‘inotify’ interface is available, through the C
+    library by `ctypes`, the wait blocks until the kernel reports an
+    event on the file. Elsewhere, the wait polls the file's status,
+    with an interval doubling up to a maximum.
+
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import errno
+import os
+import select
+import sys
+import time
+
+from ._lazyimport import LazyModule
+
+ctypes = LazyModule('ctypes')
+
+
+clock = getattr(time, 'monotonic', time.time)
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_CLOEXEC = 0o2000000
+
+# Removing a file still open elsewhere reports ‘IN_DELETE_SELF’ only
+# once it is closed, but reports the change of link count at once, as
+# ‘IN_ATTRIB’.
+inotify_change_mask = (
+        IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE
+        | IN_DELETE_SELF | IN_MOVE_SELF)
+
+poll_interval_min = 0.001
+poll_interval_max = 0.1
+
+_inotify_library = None
+
+
+def get_inotify_library():
+    """ Get the C library providing the ‘inotify’ functions.
+
+        :return: The `ctypes.CDLL` library, or ``None`` if ‘inotify’
+            is not available.
+
+        The library is loaded on first use.
+
+        """
+    global _inotify_library
+    if _inotify_library is None:
+        _inotify_library = False
+        try:
+            library = ctypes.CDLL(None, use_errno=True)
+            library.inotify_init1.argtypes = [ctypes.c_int]
+            library.inotify_add_watch.argtypes = [
+                    ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        except (OSError, AttributeError):
+            pass
+        else:
+            _inotify_library = library
+
+    return _inotify_library or None
+
+
+def get_file_identity(path):
+    """ Get the identity and version of a file, to detect changes.
+
+        :param path: Filesystem path of the file.
+        :return: A tuple which differs when the file is replaced or
+            modified, or ``None`` if the file does not exist.
+
+        """
+    try:
+        status = os.stat(path)
+    except EnvironmentError as exc:
+        if exc.errno == errno.ENOENT:
+            return None
+        raise
+
+    return (
+            status.st_dev, status.st_ino, status.st_nlink,
+            status.st_size, status.st_mtime)
+
+
+def wait_for_change_inotify(path, timeout=None):
+    """ Wait for a file to change, using ‘inotify’.
+
+        :param path: Filesystem path of the file.
+        :param timeout: Seconds to wait, or ``None`` to wait until
+            the file changes.
+        :return: ``True`` if the file changed or does not exist,
+            ``False`` if `timeout` passed.
+        :raises OSError: If ‘inotify’ fails.
+
+        """
+    library = get_inotify_library()
+    if not isinstance(path, bytes):
+        path = path.encode(sys.getfilesystemencoding())
+
+    fd = library.inotify_init1(IN_CLOEXEC)
+    if fd < 0:
+        error_number = ctypes.get_errno()
+        raise OSError(error_number, os.strerror(error_number))
+    try:
+        watch = library.inotify_add_watch(fd, path, inotify_change_mask)
+        if watch < 0:
+            error_number = ctypes.get_errno()
+            if error_number == errno.ENOENT:
+                return True
+            raise OSError(error_number, os.strerror(error_number), path)
+        poller = select.poll()
+        poller.register(fd, select.POLLIN)
+        events = poller.poll(None if timeout is None else timeout * 1000)
+    finally:
+        os.close(fd)
+
+    return bool(events)
+
+
+def wait_for_change_polling(
+        path, timeout=None,
+        interval_min=poll_interval_min, interval_max=poll_interval_max):
+    """ Wait for a file to change, by polling its status.
+
+        :param path: Filesystem path of the file.
+        :param timeout: Seconds to wait, or ``None`` to wait until
+            the file changes.
+        :param interval_min: Seconds of the first polling interval.
+        :param interval_max: Seconds of the longest polling interval.
+        :return: ``True`` if the file changed or does not exist,
+            ``False`` if `timeout` passed.
+
+        The interval doubles after each poll, from `interval_min` to
+        `interval_max`.
+
+        """
+    identity = get_file_identity(path)
+    if identity is None:
+        return True
+
+    end_time = None if timeout is None else clock() + timeout
+    interval = interval_min
+    while True:
+        delay = interval
+        if end_time is not None:
+            remaining = end_time - clock()
+            if remaining <= 0:
+                return False
+            delay = min(delay, remaining)
+        time.sleep(delay)
+        if get_file_identity(path) != identity:
+            return True
+        interval = min(interval * 2, interval_max)
+
+
+def wait_for_change(path, timeout=None):
+    """ Wait for a file to change or be removed.
+
+        :param path: Filesystem path of the file.
+        :param timeout: Seconds to wait, or ``None`` to wait until
+            the file changes.
+        :return: ``True`` if the file changed or does not exist,
+            ``False`` if `timeout` passed.
+
+        Uses ‘inotify’ where it is available, otherwise polls.
+
+        """
+    if get_inotify_library() is not None:
+        try:
+            return wait_for_change_inotify(path, timeout)
+        except OSError as exc:
+            if exc.errno not in [errno.EMFILE, errno.ENOSPC, errno.ENOSYS]:
+                raise
+
+    return wait_for_change_polling(path, timeout)
+
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+
+# daemon/gcmonitor.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Measurement and tuning of garbage collection in a daemon.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import bisect
+import gc
+import time
+
+__metaclass__ = type
+
+
+clock = getattr(time, 'perf_counter', time.time)
+
+
+class PauseHistogram:
+    """ Histogram of pause durations, in buckets of doubling width.
+
+        The bucket upper bounds double from `smallest` seconds, for
+        `count` buckets; a pause longer than the largest bound counts
+        in a final bucket bounded by the longest pause seen. Each
+        percentile is the upper bound of its bucket, so it
+        overestimates by at most a factor of two.
+
+        """
+
+    def __init__(self, smallest=1e-6, count=24):
+        """ Set up a new histogram.
+
+            :param smallest: The upper bound, in seconds, of the first
+                bucket.
+            :param count: The number of buckets of doubling width.
+            :return: ``None``.
+
+            """
+        self.bounds = [smallest * 2 ** index for index in range(count)]
+        self.counts = [0] * (count + 1)
+        self.total_count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, duration):
+        """ Count a pause in the histogram.
+
+            :param duration: The pause duration, in seconds.
+            :return: ``None``.
+
+            """
+        self.counts[bisect.bisect_left(self.bounds, duration)] += 1
+        self.total_count += 1
+        self.total += duration
+        self.maximum = max(self.maximum, duration)
+
+    def percentile(self, percent):
+        """ Get a percentile of the pause durations.
+
+            :param percent: The percentile to get, from 0 to 100.
+            :return: The upper bound, in seconds, of the bucket
+                containing the percentile, or ``None`` if there are no
+                pauses.
+
+            """
+        if not self.total_count:
+            return None
+        rank = percent / 100.0 * self.total_count
+        cumulative = 0
+        for (index, count) in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                break
+        if index < len(self.bounds):
+            result = min(self.bounds[index], self.maximum)
+        else:
+            result = self.maximum
+
+        return result
+
+
+class GCMonitor:
+    """ Monitor of garbage collections, with tuning of the collector.
+
+        A `GCMonitor` instance is the value for the `gc_monitor`
+        option of `DaemonContext`. When started, it:
+
+        * If `thresholds` is not ``None``, sets the collection
+          thresholds with `gc.set_threshold`, restoring the previous
+          thresholds when stopped.
+
+        * If `freeze` is true, moves every object tracked by the
+          collector to the permanent generation with `gc.freeze`, so
+          later collections do not examine the objects created during
+          startup.
+
+        * Measures every collection through `gc.callbacks`: its
+          generation, pause duration, and objects collected. The
+          metrics for each generation include a histogram of pause
+          durations, with the 50th and 99th percentiles.
+
+        """
+
+    def __init__(self, thresholds=None, freeze=False):
+        """ Set up a new garbage collection monitor.
+
+            :param thresholds: A sequence of up to three collection
+                thresholds for `gc.set_threshold`, or ``None`` to leave
+                the thresholds unchanged.
+            :param freeze: If true, freeze the tracked objects when
+                started.
+            :return: ``None``.
+
+            """
+        self.thresholds = thresholds
+        self.freeze = freeze
+
+        self.generations = [GenerationStats() for __ in range(3)]
+        self._previous_thresholds = None
+        self._start_time = None
+
+    def start(self):
+        """ Start measuring, after applying the tuning.
+
+            :return: ``None``.
+
+            """
+        if self.thresholds is not None:
+            self._previous_thresholds = gc.get_threshold()
+            gc.set_threshold(*self.thresholds)
+        if self.freeze and hasattr(gc, 'freeze'):
+            gc.freeze()
+        if self.callback not in gc.callbacks:
+            gc.callbacks.append(self.callback)
+
+    def stop(self):
+        """ Stop measuring, and restore the thresholds.
+
+            :return: ``None``.
+
+            Frozen objects stay in the permanent generation.
+
+            """
+        if self.callback in gc.callbacks:
+            gc.callbacks.remove(self.callback)
+        if self._previous_thresholds is not None:
+            gc.set_threshold(*self._previous_thresholds)
+            self._previous_thresholds = None
+
+    def callback(self, phase, info):
+        """ Measure a collection, as a `gc.callbacks` function.
+
+            :param phase: The phase of the collection, ``'start'`` or
+                ``'stop'``.
+            :param info: A mapping of information about the collection.
+            :return: ``None``.
+
+            """
+        if phase == 'start':
+            self._start_time = clock()
+        elif self._start_time is not None:
+            duration = clock() - self._start_time
+            self._start_time = None
+            self.generations[info['generation']].add(
+                    duration, info['collected'], info['uncollectable'])
+
+    def stats(self):
+        """ Get the metrics of garbage collection.
+
+            :return: A mapping of metric name to value.
+
+            """
+        result = {
+                'thresholds': list(gc.get_threshold()),
+                'generations': [
+                    generation.stats() for generation in self.generations],
+                }
+        if hasattr(gc, 'get_freeze_count'):
+            result['frozen'] = gc.get_freeze_count()
+
+        return result
+
+
+class GenerationStats:
+    """ Metrics of the collections of one generation. """
+
+    def __init__(self):
+        """ Set up new metrics. """
+        self.collected = 0
+        self.uncollectable = 0
+        self.pauses = PauseHistogram()
+
+    def add(self, duration, collected, uncollectable):
+        """ Count a collection.
+
+            :param duration: The pause duration, in seconds.
+            :param collected: Number of objects collected.
+            :param uncollectable: Number of uncollectable objects found.
+            :return: ``None``.
+
+            """
+        self.collected += collected
+        self.uncollectable += uncollectable
+        self.pauses.add(duration)
+
+    def stats(self):
+        """ Get the metrics of the generation.
+
+            :return: A mapping of metric name to value.
+
+            """
+        return {
+                'collections': self.pauses.total_count,
+                'collected': self.collected,
+                'uncollectable': self.uncollectable,
+                'pause_seconds_total': self.pauses.total,
+                'pause_seconds_max': self.pauses.maximum,
+                'pause_seconds_p50': self.pauses.percentile(50),
+                'pause_seconds_p99': self.pauses.percentile(99),
+                }
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
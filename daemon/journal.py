@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+# daemon/journal.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Structured output to the systemd journal, by its native protocol.
+
+    A `JournalSink` is a `daemon.syslogsink.SyslogSink` which sends
+    each message as a set of ``KEY=value`` fields to the journal's
+    native datagram socket. Fields such as ``PRIORITY``,
+    ``SYSLOG_PID``, and ``CODE_FILE`` arrive in the journal as
+    separate fields, with no need to parse them out of text.
+
+    A message too large for a single datagram is written to a sealed
+    memory file, whose file descriptor is passed over the socket
+    instead.
+
+    The `daemon.syslogsink.SyslogStream` stream object sends each line
+    of output to a `JournalSink`; a `JournalHandler` sends each log
+    record, with the record's source location.
+
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import array
+import errno
+import fcntl
+import re
+import socket
+import struct
+
+from .syslogsink import (
+        SyslogSink, SyslogHandler, default_priority, get_priority_for_level)
+
+__metaclass__ = type
+
+
+default_address = "/run/systemd/journal/socket"
+
+field_name_pattern = re.compile(r"^[A-Z][A-Z0-9_]*$")
+
+large_payload_errors = [errno.EMSGSIZE, errno.ENOBUFS]
+
+
+class JournalSink(SyslogSink):
+    """ Queue of messages sent in batches to the systemd journal.
+
+        Each message is sent with the fields ``MESSAGE``,
+        ``PRIORITY``, ``SYSLOG_FACILITY``, ``SYSLOG_IDENTIFIER``, and
+        ``SYSLOG_PID``, and any extra fields submitted with it.
+
+        """
+
+    def __init__(self, address=default_address, **kwargs):
+        """ Set up the parameters of a new journal sink.
+
+            :param address: Filesystem path of the journal's native
+                datagram socket.
+
+            The other parameters are as for `SyslogSink`, except
+            `max_message_size`, which does not apply.
+
+            """
+        super(JournalSink, self).__init__(address=address, **kwargs)
+        self.counters['large_messages'] = 0
+
+    def submit(self, message, priority=default_priority, fields=None):
+        """ Submit a message to be sent to the journal.
+
+            :param message: The message text, as a text or byte string.
+            :param priority: The syslog priority number.
+            :param fields: A mapping of extra field names to values, or
+                ``None``. Each name must consist of uppercase letters,
+                digits, and underscores, beginning with a letter.
+            :return: ``True`` if the message was queued, ``False`` if
+                it was dropped because the queue is full.
+            :raise ValueError: If a field name is invalid.
+
+            """
+        if fields:
+            for name in fields:
+                if not field_name_pattern.match(name):
+                    error = ValueError(
+                            "Invalid journal field name: {name!r}".format(
+                                name=name))
+                    raise error
+
+        return self._enqueue((priority, None, message, fields))
+
+    def format_message(self, priority, timestamp, message, fields=None):
+        """ Format a message as a journal datagram.
+
+            :param priority: The syslog priority number.
+            :param timestamp: Ignored; the journal records the time it
+                receives the message.
+            :param message: The message text, as a text or byte string.
+            :param fields: A mapping of extra field names to values, or
+                ``None``.
+            :return: The datagram, as a byte string.
+
+            """
+        if isinstance(message, bytes):
+            message = message.rstrip(b"\n")
+        else:
+            message = message.rstrip("\n")
+        items = [
+                ("MESSAGE", message),
+                ("PRIORITY", priority),
+                ("SYSLOG_FACILITY", self.facility),
+                ("SYSLOG_IDENTIFIER", self.ident),
+                ("SYSLOG_PID", os.getpid()),
+                ]
+        if fields:
+            items.extend(sorted(fields.items()))
+
+        return encode_fields(items)
+
+    def _send_datagram(self, datagram):
+        """ Send a datagram to the connected journal socket.
+
+            :param datagram: The datagram, as a byte string.
+            :return: ``None``.
+
+            A datagram too large for the socket is sent by passing a
+            sealed memory file containing it.
+
+            """
+        try:
+            self.socket.send(datagram)
+        except socket.error as exc:
+            if exc.errno not in large_payload_errors:
+                raise
+            send_with_memory_file(self.socket, datagram)
+            self._count('large_messages')
+
+
+class JournalHandler(SyslogHandler):
+    """ Logging handler which submits each record to a `JournalSink`.
+
+        The fields sent with each record include its source location,
+        as ``CODE_FILE``, ``CODE_LINE``, and ``CODE_FUNC``, and the
+        logger name, as ``LOGGER``.
+
+        """
+
+    def emit(self, record):
+        """ Submit a log record to the sink. """
+        try:
+            message = self.format(record)
+            fields = {
+                    'CODE_FILE': record.pathname,
+                    'CODE_LINE': record.lineno,
+                    'CODE_FUNC': record.funcName,
+                    'LOGGER': record.name,
+                    }
+            self.sink.submit(
+                    message, get_priority_for_level(record.levelno), fields)
+        except Exception:
+            self.handleError(record)
+
+
+def encode_fields(items):
+    """ Encode fields in the journal's native protocol.
+
+        :param items: Sequence of (name, value) pairs. Each value is a
+            byte string, a text string, or an object converted to text.
+        :return: The encoded fields, as a byte string.
+
+        A value with no newline is encoded as ``NAME=value``; a value
+        with a newline is encoded as the name, a newline, the length of
+        the value as a little-endian 64-bit integer, and the value.
+        Each field ends with a newline.
+
+        """
+    parts = []
+    for (name, value) in items:
+        if not isinstance(value, bytes):
+            if not isinstance(value, type("")):
+                value = "{value}".format(value=value)
+            value = value.encode('utf-8', 'replace')
+        name = name.encode('ascii')
+        if b"\n" in value:
+            parts.append(name + b"\n" + struct.pack(str("<Q"), len(value)))
+        else:
+            parts.append(name + b"=")
+        parts.append(value + b"\n")
+
+    return b"".join(parts)
+
+
+def make_sealed_memory_file(data):
+    """ Make a sealed in-memory file containing the data.
+
+        :param data: The content for the file, as a byte string.
+        :return: The file descriptor of the file.
+        :raise OSError: If the system does not support sealed memory
+            files.
+
+        The file is sealed against any change to its content or size,
+        as the journal requires of a passed file, and positioned at
+        its start.
+
+        """
+    if not hasattr(os, 'memfd_create'):
+        error = OSError(
+                errno.ENOSYS, "Sealed memory files are not supported")
+        raise error
+
+    fd = os.memfd_create("daemon-journal", os.MFD_ALLOW_SEALING)
+    try:
+        view = memoryview(data)
+        while len(view):
+            written = os.write(fd, view)
+            view = view[written:]
+        fcntl.fcntl(
+                fd, fcntl.F_ADD_SEALS,
+                fcntl.F_SEAL_SHRINK | fcntl.F_SEAL_GROW
+                | fcntl.F_SEAL_WRITE | fcntl.F_SEAL_SEAL)
+        os.lseek(fd, 0, os.SEEK_SET)
+    except BaseException:
+        os.close(fd)
+        raise
+
+    return fd
+
+
+def send_with_memory_file(sock, data):
+    """ Send data by passing a sealed memory file over a socket.
+
+        :param sock: The connected journal socket.
+        :param data: The data, as a byte string.
+        :return: ``None``.
+
+        """
+    fd = make_sealed_memory_file(data)
+    try:
+        rights = array.array(str("i"), [fd])
+        sock.sendmsg([], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, rights)])
+    finally:
+        os.close(fd)
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+
+# daemon/logrotation.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Built-in rotation of the daemon's redirected output files.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import gzip
+import shutil
+import threading
+import time
+
+from .daemon import (basestring, reopen_stream)
+
+__metaclass__ = type
+
+
+compressed_suffix = ".gz"
+
+
+class LogRotation:
+    """ Rotation of redirected output files by size or by age.
+
+        A `LogRotation` instance is the value for the `log_rotation`
+        option of `DaemonContext`. It watches the files of the
+        redirected `stdout` and `stderr` streams from a background
+        thread. When a file reaches `max_bytes` in size, or when
+        `interval` seconds have passed since the file was started, the
+        file is renamed with the suffix “.1” (shifting any earlier
+        backups to “.2”, “.3”, and so on, up to `backup_count`), and a
+        new file is opened at the original path in place of the
+        redirected streams.
+
+        If `compress` is true, each newly rotated file is compressed
+        with gzip by a separate background thread, so the watching
+        thread does not wait for the compression. The compression runs
+        within the daemon process, since forking a process with
+        several threads is unsafe.
+
+        An error rotating or compressing a file is counted in `stats`,
+        and the files continue to be watched.
+
+        """
+
+    def __init__(
+            self, max_bytes=None, interval=None, backup_count=5,
+            compress=False, check_interval=1.0):
+        """ Set up the parameters of a new log rotation.
+
+            :param max_bytes: Size, in bytes, at which to rotate a file,
+                or ``None`` to not rotate by size.
+            :param interval: Age, in seconds, at which to rotate a file,
+                or ``None`` to not rotate by age.
+            :param backup_count: Number of rotated files to keep.
+            :param compress: If true, compress each rotated file.
+            :param check_interval: Seconds between checks of the files.
+            :return: ``None``.
+
+            """
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.check_interval = check_interval
+
+        self.streams_by_path = {}
+        self.started_times = {}
+        self.compressor_threads = []
+        self.thread = None
+        self._stop_event = threading.Event()
+
+        self._lock = threading.Lock()
+        self.counters = {
+                'rotations': 0,
+                'rotation_errors': 0,
+                'compress_errors': 0,
+                }
+
+    def add_stream(self, system_stream, target_stream):
+        """ Add a redirected stream to be rotated.
+
+            :param system_stream: The standard system stream, such as
+                ``sys.stdout``.
+            :param target_stream: The file object redirected to the
+                system stream. Streams whose file has no path are
+                ignored.
+            :return: ``None``.
+
+            """
+        path = getattr(target_stream, 'name', None)
+        if not isinstance(path, basestring):
+            return
+        streams = self.streams_by_path.setdefault(path, [])
+        streams.append((system_stream, target_stream))
+        self.started_times[path] = time.time()
+
+    def start(self):
+        """ Start the thread watching the files for rotation. """
+        self._stop_event.clear()
+        self.thread = threading.Thread(
+                target=self._watch, name="daemon-log-rotation")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """ Stop watching the files, and wait for any compression. """
+        if self.thread is not None:
+            self._stop_event.set()
+            self.thread.join()
+            self.thread = None
+        self.wait_for_compressors()
+
+    def stats(self):
+        """ Get the counters of the rotation.
+
+            :return: A mapping of counter name to value.
+
+            """
+        with self._lock:
+            result = dict(self.counters)
+
+        return result
+
+    def _count(self, name, amount=1):
+        """ Add an amount to one of the counters. """
+        with self._lock:
+            self.counters[name] += amount
+
+    def _watch(self):
+        """ Check the files for rotation until stopped. """
+        while not self._stop_event.wait(self.check_interval):
+            self.check_rotation()
+
+    def check_rotation(self):
+        """ Rotate each of the files which is due for rotation.
+
+            :return: ``None``.
+
+            An error rotating a file is counted, and does not prevent
+            checking the other files.
+
+            """
+        self.reap_compressors()
+        for path in list(self.streams_by_path):
+            try:
+                if self.is_rotation_due(path):
+                    self.rotate(path)
+            except EnvironmentError:
+                self._count('rotation_errors')
+
+    def is_rotation_due(self, path):
+        """ Determine whether the file at a path is due for rotation.
+
+            :param path: Filesystem path of the file.
+            :return: ``True`` iff the file is due for rotation.
+
+            """
+        if self.interval is not None:
+            if time.time() - self.started_times[path] >= self.interval:
+                return True
+        if self.max_bytes is not None:
+            (system_stream, __) = self.streams_by_path[path][0]
+            size = os.fstat(system_stream.fileno()).st_size
+            if size >= self.max_bytes:
+                return True
+
+        return False
+
+    def rotate(self, path):
+        """ Rotate the file at a path, and reopen its streams.
+
+            :param path: Filesystem path of the file.
+            :return: ``None``.
+
+            """
+        self.wait_for_compressors()
+        shift_backup_files(path, self.backup_count)
+        backup_path = make_backup_path(path, 1)
+        if self.backup_count > 0:
+            os.rename(path, backup_path)
+        else:
+            os.unlink(path)
+        for (system_stream, target_stream) in self.streams_by_path[path]:
+            reopen_stream(system_stream, target_stream)
+        self.started_times[path] = time.time()
+        self._count('rotations')
+
+        if self.compress and self.backup_count > 0:
+            self.compressor_threads.append(
+                    start_compressor(backup_path, self._compress))
+
+    def _compress(self, path):
+        """ Compress a rotated file, counting any error. """
+        try:
+            compress_file(path)
+        except EnvironmentError:
+            self._count('compress_errors')
+
+    def reap_compressors(self):
+        """ Forget the compressor threads which have finished. """
+        self.compressor_threads = [
+                thread for thread in self.compressor_threads
+                if thread.is_alive()]
+
+    def wait_for_compressors(self):
+        """ Wait for all compressor threads to finish. """
+        while self.compressor_threads:
+            thread = self.compressor_threads.pop()
+            thread.join()
+
+
+def make_backup_path(path, number):
+    """ Make the path of a numbered backup file. """
+    return "{path}.{number:d}".format(path=path, number=number)
+
+
+def shift_backup_files(path, backup_count):
+    """ Shift the numbered backups of a file, to make room for a new one.
+
+        :param path: Filesystem path of the file.
+        :param backup_count: Number of backup files to keep.
+        :return: ``None``.
+
+        Backup number `backup_count` is removed, and each lower numbered
+        backup (compressed or not) is renamed to the next number.
+
+        """
+    for suffix in ["", compressed_suffix]:
+        oldest_path = make_backup_path(path, backup_count) + suffix
+        if backup_count > 0 and os.path.exists(oldest_path):
+            os.unlink(oldest_path)
+    for number in reversed(range(1, backup_count)):
+        for suffix in ["", compressed_suffix]:
+            source_path = make_backup_path(path, number) + suffix
+            if os.path.exists(source_path):
+                os.rename(
+                        source_path,
+                        make_backup_path(path, number + 1) + suffix)
+
+
+def compress_file(path):
+    """ Compress a file with gzip, replacing the original file.
+
+        :param path: Filesystem path of the file.
+        :return: ``None``.
+
+        """
+    compressed_path = path + compressed_suffix
+    with open(path, 'rb') as source_file:
+        with gzip.open(compressed_path, 'wb') as compressed_file:
+            shutil.copyfileobj(source_file, compressed_file)
+    os.unlink(path)
+
+
+def start_compressor(path, compress=compress_file):
+    """ Start a background thread to compress a file.
+
+        :param path: Filesystem path of the file.
+        :param compress: The function to call with `path` to compress
+            the file.
+        :return: The started `threading.Thread` instance.
+
+        """
+    thread = threading.Thread(
+            target=compress, args=(path,), name="daemon-log-compression")
+    thread.daemon = True
+    thread.start()
+
+    return thread
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
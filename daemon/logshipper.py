@@ -0,0 +1,448 @@
+# -*- coding: utf-8 -*-
+
+# daemon/logshipper.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Non-blocking shipping of redirected output to a slow target file.
+
+    A `LogShipper` is a stream object for the `stdout` or `stderr`
+    option of `DaemonContext`. The daemon's standard stream is
+    redirected into a pipe, and a small dedicated shipper process
+    drains the pipe to the target file. A stall writing the target
+    (for example, a slow disk or an unresponsive network filesystem)
+    then stalls only the shipper, not the daemon's own writes.
+
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import errno
+import fcntl
+import mmap
+import select
+import signal
+import struct
+import sys
+import termios
+import threading
+import time
+
+from .daemon import (basestring, close_all_open_files)
+
+__metaclass__ = type
+
+
+overflow_policies = ['block', 'drop']
+
+counters_format = str("=QQQQ")
+counter_names = ['bytes_written', 'bytes_dropped', 'writes', 'bytes_spliced']
+
+clock = getattr(time, 'monotonic', time.time)
+
+# Seconds between checks of the pipe while a batch accumulates.
+batch_poll_interval = 0.005
+
+# Serialises updates of the counters by the threads of the shipper.
+_counters_lock = threading.Lock()
+
+
+class LogShipper:
+    """ Stream object that ships output to a target through a pipe.
+
+        The shipper process writes to the target in batches: it waits
+        up to `batch_interval` seconds for more output to accumulate
+        before each write.
+
+        The `overflow` policy determines what happens when the daemon
+        writes output faster than the target accepts it:
+
+        * ``'block'``: The pipe itself is the buffer, enlarged to
+          `buffer_size` where the system allows. When it is full, the
+          daemon's writes block until the shipper catches up. The
+          shipper moves data from the pipe to the target with
+          `os.splice`, without copying through user space, where the
+          system supports it; the ``bytes_spliced`` counter reports
+          how much output was moved this way.
+
+        * ``'drop'``: The shipper keeps reading the pipe into a buffer
+          of `buffer_size` bytes. When the buffer is full, further
+          output is discarded and counted as dropped, so the daemon's
+          writes never block on the target.
+
+        When stopped, the shipper detaches the daemon's standard
+        streams from the pipe, so that the shipper process reaches the
+        end of the output, and waits up to `stop_timeout` seconds for
+        it to ship the remaining output and exit. A shipper process
+        still running after that, for example on a stalled target, is
+        killed.
+
+        """
+
+    def __init__(
+            self, target, buffer_size=1024 * 1024, overflow='block',
+            batch_interval=0.05, stop_timeout=5.0):
+        """ Set up the parameters of a new log shipper.
+
+            :param target: The target file, as a filesystem path or as a
+                file object with a file descriptor. A path is opened
+                immediately, so it is resolved before the daemon changes
+                its root directory or process owner.
+            :param buffer_size: Capacity, in bytes, for output pending
+                write to the target.
+            :param overflow: The policy when the buffer is full; one of
+                ``'block'`` or ``'drop'``.
+            :param batch_interval: Maximum seconds to wait for output to
+                accumulate before writing a batch.
+            :param stop_timeout: Maximum seconds to wait, when stopped,
+                for the shipper process to exit.
+            :return: ``None``.
+
+            """
+        if overflow not in overflow_policies:
+            error = ValueError("Unknown overflow policy: {policy!r}".format(
+                    policy=overflow))
+            raise error
+
+        if isinstance(target, basestring):
+            # Not opened for appending, since Linux refuses to splice
+            # to such a file.
+            target_fd = os.open(target, os.O_WRONLY | os.O_CREAT, 0o666)
+            os.lseek(target_fd, 0, os.SEEK_END)
+        else:
+            target_fd = os.dup(target.fileno())
+        self.target_fd = target_fd
+
+        self.buffer_size = buffer_size
+        self.overflow = overflow
+        self.batch_interval = batch_interval
+        self.stop_timeout = stop_timeout
+        self.pid = None
+        self.exit_status = None
+
+        (self.read_fd, self.write_fd) = os.pipe()
+        self.counters = mmap.mmap(-1, struct.calcsize(counters_format))
+
+    def fileno(self):
+        """ Get the file descriptor for writing to the shipper. """
+        return self.write_fd
+
+    def start(self):
+        """ Start the shipper process.
+
+            :return: ``None``.
+
+            The shipper process is a child of the current process. The
+            current process keeps only the write end of the pipe.
+
+            """
+        if self.pid is not None:
+            return
+
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                os.close(self.write_fd)
+                run_shipper(
+                        self.read_fd, self.target_fd, self.counters,
+                        self.buffer_size, self.overflow, self.batch_interval)
+            except BaseException:
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+
+        self.pid = pid
+        os.close(self.read_fd)
+        os.close(self.target_fd)
+
+    def stop(self):
+        """ Stop writing to the shipper, and wait for it to exit.
+
+            :return: ``None``.
+
+            The standard streams redirected to the pipe are flushed,
+            then redirected to the null device. The shipper process
+            drains the pipe until every write end is closed; if it has
+            not exited after `stop_timeout` seconds, it is killed. The
+            exit status of the shipper process is then in
+            `exit_status`.
+
+            """
+        if self.write_fd is None:
+            return
+        detach_standard_streams(self.write_fd)
+        os.close(self.write_fd)
+        self.write_fd = None
+        if self.pid is not None:
+            self.exit_status = reap_process(self.pid, self.stop_timeout)
+
+    def stats(self):
+        """ Get the counters reported by the shipper process.
+
+            :return: A mapping of counter name to value.
+
+            """
+        values = struct.unpack_from(counters_format, self.counters)
+        return dict(zip(counter_names, values))
+
+
+def detach_standard_streams(write_fd):
+    """ Redirect the standard streams writing to a pipe to the null device.
+
+        :param write_fd: File descriptor for the write end of the pipe.
+        :return: ``None``.
+
+        """
+    pipe_status = os.fstat(write_fd)
+    for (fd, stream) in [(1, sys.stdout), (2, sys.stderr)]:
+        try:
+            status = os.fstat(fd)
+        except OSError:
+            continue
+        if (status.st_dev, status.st_ino) != (
+                pipe_status.st_dev, pipe_status.st_ino):
+            continue
+        try:
+            stream.flush()
+        except (IOError, OSError, ValueError, AttributeError):
+            pass
+        null_fd = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(null_fd, fd)
+        os.close(null_fd)
+
+
+def reap_process(pid, timeout):
+    """ Wait for a child process to exit, killing it after a timeout.
+
+        :param pid: The process ID of the child process.
+        :param timeout: Maximum seconds to wait before killing it.
+        :return: The exit status of the process, as from `os.waitpid`,
+            or ``None`` if it was already reaped.
+
+        """
+    end_time = clock() + timeout
+    try:
+        while True:
+            (exited_pid, status) = os.waitpid(pid, os.WNOHANG)
+            if exited_pid:
+                return status
+            if clock() >= end_time:
+                break
+            time.sleep(batch_poll_interval)
+        os.kill(pid, signal.SIGKILL)
+        (__, status) = os.waitpid(pid, 0)
+    except OSError as exc:
+        if exc.errno != errno.ECHILD:
+            raise
+        return None
+
+    return status
+
+
+def _add_to_counters(
+        counters, bytes_written=0, bytes_dropped=0, writes=0,
+        bytes_spliced=0):
+    """ Add the specified amounts to the shared counters. """
+    with _counters_lock:
+        values = struct.unpack_from(counters_format, counters)
+        struct.pack_into(
+                counters_format, counters, 0,
+                values[0] + bytes_written,
+                values[1] + bytes_dropped,
+                values[2] + writes,
+                values[3] + bytes_spliced)
+
+
+def run_shipper(
+        read_fd, target_fd, counters, buffer_size, overflow,
+        batch_interval):
+    """ Run the shipper, in the shipper process.
+
+        :param read_fd: File descriptor for the read end of the pipe.
+        :param target_fd: File descriptor for the target file.
+        :param counters: Shared memory for the shipper's counters.
+        :param buffer_size: Capacity, in bytes, for pending output.
+        :param overflow: The policy when the buffer is full.
+        :param batch_interval: Maximum seconds to wait for output to
+            accumulate before writing a batch.
+        :return: ``None``, when the pipe reaches end of file.
+
+        The shipper ignores the usual termination signals, so that it
+        drains all output from the daemon before it exits.
+
+        """
+    for name in ['SIGHUP', 'SIGINT', 'SIGTERM']:
+        signal.signal(getattr(signal, name), signal.SIG_IGN)
+    close_all_open_files(exclude=set([read_fd, target_fd]))
+
+    if overflow == 'block':
+        ship_blocking(
+                read_fd, target_fd, counters, buffer_size, batch_interval)
+    else:
+        ship_dropping(
+                read_fd, target_fd, counters, buffer_size, batch_interval)
+
+
+def set_pipe_size(fd, size):
+    """ Request the capacity of a pipe, where the system allows.
+
+        :param fd: File descriptor for the pipe.
+        :param size: Requested capacity, in bytes.
+        :return: ``None``.
+
+        """
+    set_size_command = getattr(fcntl, 'F_SETPIPE_SZ', None)
+    if set_size_command is None:
+        return
+    try:
+        fcntl.fcntl(fd, set_size_command, size)
+    except (IOError, OSError):
+        # Larger than permitted for this process; keep the default.
+        pass
+
+
+def get_pipe_capacity(fd, default=65536):
+    """ Get the capacity of a pipe, where the system reports it.
+
+        :param fd: File descriptor for the pipe.
+        :param default: Capacity, in bytes, to assume otherwise.
+        :return: The capacity, in bytes.
+
+        """
+    get_size_command = getattr(fcntl, 'F_GETPIPE_SZ', None)
+    if get_size_command is None:
+        return default
+    try:
+        return fcntl.fcntl(fd, get_size_command)
+    except (IOError, OSError):
+        return default
+
+
+def get_pending_size(fd):
+    """ Get the number of bytes ready for reading from a pipe. """
+    pending = bytearray(struct.calcsize(str("i")))
+    fcntl.ioctl(fd, termios.FIONREAD, pending)
+    (size,) = struct.unpack(str("i"), bytes(pending))
+
+    return size
+
+
+def wait_for_batch(read_fd, buffer_size, batch_interval):
+    """ Wait for a batch of output to accumulate in the pipe.
+
+        :return: The number of bytes ready for reading.
+
+        Wait until the pipe is readable, then until either the pipe
+        holds `buffer_size` bytes, or as many as it can hold, or
+        `batch_interval` seconds have passed. A full pipe blocks the
+        writer, so waiting longer would only delay it.
+
+        """
+    select.select([read_fd], [], [])
+    batch_size = min(buffer_size, get_pipe_capacity(read_fd))
+    end_time = clock() + batch_interval
+    pending = get_pending_size(read_fd)
+    while pending < batch_size:
+        remaining = end_time - clock()
+        if remaining <= 0:
+            break
+        # The pipe stays readable, so wait out a slice of the interval.
+        select.select([], [], [], min(batch_poll_interval, remaining))
+        pending = get_pending_size(read_fd)
+
+    return pending
+
+
+def write_all(fd, data):
+    """ Write all the data to a file descriptor.
+
+        :return: The number of ``write`` calls made.
+
+        """
+    view = memoryview(data)
+    writes = 0
+    while len(view):
+        written = os.write(fd, view)
+        view = view[written:]
+        writes += 1
+
+    return writes
+
+
+def ship_blocking(read_fd, target_fd, counters, buffer_size, batch_interval):
+    """ Ship output, blocking the writer when the pipe is full. """
+    set_pipe_size(read_fd, buffer_size)
+    use_splice = hasattr(os, 'splice')
+    while True:
+        pending = wait_for_batch(read_fd, buffer_size, batch_interval)
+        if use_splice and pending:
+            try:
+                while pending:
+                    moved = os.splice(read_fd, target_fd, pending)
+                    pending -= moved
+                    _add_to_counters(
+                            counters, bytes_written=moved, writes=1,
+                            bytes_spliced=moved)
+                continue
+            except OSError as exc:
+                if exc.errno not in [errno.EINVAL, errno.ENOSYS]:
+                    raise
+                # Target does not support splice; copy instead.
+                use_splice = False
+        data = os.read(read_fd, max(pending, 1))
+        if not data:
+            break
+        writes = write_all(target_fd, data)
+        _add_to_counters(counters, bytes_written=len(data), writes=writes)
+
+
+def ship_dropping(read_fd, target_fd, counters, buffer_size, batch_interval):
+    """ Ship output, dropping output when the buffer is full. """
+    buffer = bytearray()
+    condition = threading.Condition()
+    state = {'eof': False}
+
+    def write_batches():
+        while True:
+            with condition:
+                while not buffer and not state['eof']:
+                    condition.wait()
+                if not buffer:
+                    return
+                batch = bytes(buffer)
+                del buffer[:]
+            writes = write_all(target_fd, batch)
+            _add_to_counters(counters, bytes_written=len(batch), writes=writes)
+            time.sleep(batch_interval)
+
+    writer = threading.Thread(target=write_batches)
+    writer.start()
+    while True:
+        data = os.read(read_fd, 64 * 1024)
+        with condition:
+            if not data:
+                state['eof'] = True
+                condition.notify()
+                break
+            room = buffer_size - len(buffer)
+            if len(data) > room:
+                _add_to_counters(counters, bytes_dropped=len(data) - room)
+                data = data[:room]
+            buffer.extend(data)
+            condition.notify()
+    writer.join()
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
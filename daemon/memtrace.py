@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+# daemon/memtrace.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Memory allocation snapshots of a running daemon, on demand.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import io
+import os
+import os.path
+import time
+import tracemalloc
+
+__metaclass__ = type
+
+
+class MemorySnapshots:
+    """ Snapshots of memory allocation sites, with the changes between.
+
+        A `MemorySnapshots` instance is the value for the
+        `memory_snapshots` option of `DaemonContext`. On request, by
+        the signal `signal_number` or by the ``memory-snapshot``
+        command of the control socket, it takes a `tracemalloc`
+        snapshot and writes a report to a file in `directory`, named
+        with the process ID, the time, and the sequence number of the
+        snapshot.
+
+        Tracing allocations slows the process and uses memory, so it
+        happens only while armed. The first request arms the tracing,
+        taking the baseline snapshot; `disarm`, or the
+        ``memory-disarm`` command, stops it. Each later request writes
+        the `limit` allocation sites with the most memory, and the
+        `limit` sites with the largest change since the snapshot
+        named by `compare_to`: ``'previous'`` or ``'baseline'``.
+        Sites with no change are omitted.
+
+        """
+
+    def __init__(
+            self, directory, limit=25, frames=1, compare_to='previous',
+            signal_number=None):
+        """ Set up new memory snapshots.
+
+            :param directory: Filesystem path of the directory for the
+                report files.
+            :param limit: Number of allocation sites in each list.
+            :param frames: Number of stack frames recorded for each
+                allocation; an allocation site is a distinct stack.
+            :param compare_to: The snapshot to compare against:
+                ``'previous'`` or ``'baseline'``.
+            :param signal_number: The signal number which requests a
+                snapshot, or ``None`` for none.
+            :return: ``None``.
+            :raises ValueError: If `compare_to` is not a valid choice.
+
+            """
+        if compare_to not in ['previous', 'baseline']:
+            error = ValueError(
+                    "Unknown snapshot to compare: {name!r}".format(
+                        name=compare_to))
+            raise error
+        self.directory = directory
+        self.limit = limit
+        self.frames = frames
+        self.compare_to = compare_to
+        self.signal_number = signal_number
+
+        self.baseline = None
+        self.previous = None
+        self.snapshot_count = 0
+        self.last_path = None
+        self._started_tracing = False
+
+    @property
+    def is_armed(self):
+        """ ``True`` if allocations are being traced. """
+        return self.baseline is not None
+
+    def arm(self):
+        """ Start tracing allocations, and take the baseline snapshot.
+
+            :return: ``None``.
+
+            """
+        if self.is_armed:
+            return
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(self.frames)
+        self.baseline = self.previous = self.take_snapshot()
+
+    def disarm(self):
+        """ Stop tracing allocations, discarding the snapshots.
+
+            :return: ``None``.
+
+            Tracing started by other code, before `arm`, continues.
+
+            """
+        if not self.is_armed:
+            return
+        self.baseline = self.previous = None
+        if self._started_tracing:
+            self._started_tracing = False
+            tracemalloc.stop()
+
+    def request(self):
+        """ Arm the tracing if disarmed, otherwise write a report.
+
+            :return: The filesystem path of the report written, or
+                ``None`` if the tracing was armed instead.
+
+            """
+        if not self.is_armed:
+            self.arm()
+            return None
+
+        snapshot = self.take_snapshot()
+        if self.compare_to == 'baseline':
+            reference = self.baseline
+        else:
+            reference = self.previous
+        self.previous = snapshot
+
+        self.snapshot_count += 1
+        file_name = "memory-{pid:d}-{time}-{count:d}.txt".format(
+                pid=os.getpid(),
+                time=time.strftime("%Y%m%dT%H%M%S", time.gmtime()),
+                count=self.snapshot_count)
+        path = os.path.join(self.directory, file_name)
+        with io.open(path, 'w', encoding='utf-8') as outfile:
+            outfile.write(self.format_report(snapshot, reference))
+        self.last_path = path
+
+        return path
+
+    def handle_signal(self, signal_number, stack_frame):
+        """ Signal handler to perform a request.
+
+            :param signal_number: The OS signal number received.
+            :param stack_frame: The frame object at the point the
+                signal was received.
+            :return: ``None``.
+
+            """
+        self.request()
+
+    def take_snapshot(self):
+        """ Take a snapshot of the traced allocations.
+
+            :return: The `tracemalloc.Snapshot`, omitting the
+                allocations by `tracemalloc` itself.
+
+            """
+        snapshot = tracemalloc.take_snapshot()
+
+        return snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<unknown>"),
+                ])
+
+    def format_report(self, snapshot, reference):
+        """ Format the report of a snapshot.
+
+            :param snapshot: The `tracemalloc.Snapshot` to report.
+            :param reference: The earlier snapshot to compare against.
+            :return: The text of the report.
+
+            """
+        key_type = 'traceback' if self.frames > 1 else 'lineno'
+        (current, peak) = tracemalloc.get_traced_memory()
+        lines = [
+                "Memory snapshot of process {pid:d} at {time}".format(
+                    pid=os.getpid(),
+                    time=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())),
+                "Traced memory: {current:d} bytes, peak {peak:d} bytes"
+                .format(current=current, peak=peak),
+                "",
+                "Top {limit:d} allocation sites:".format(limit=self.limit),
+                ]
+        for statistic in snapshot.statistics(key_type)[:self.limit]:
+            lines.extend(self._format_statistic(statistic))
+        lines.extend([
+                "",
+                "Top {limit:d} changes since {name} snapshot:".format(
+                    limit=self.limit, name=self.compare_to),
+                ])
+        differences = [
+                statistic
+                for statistic in snapshot.compare_to(reference, key_type)
+                if statistic.size_diff or statistic.count_diff]
+        for statistic in differences[:self.limit]:
+            lines.extend(self._format_statistic(statistic))
+
+        return "\n".join(lines) + "\n"
+
+    def stats(self):
+        """ Get the metrics of the memory snapshots.
+
+            :return: A mapping of metric name to value.
+
+            """
+        result = {
+                'armed': self.is_armed,
+                'snapshots': self.snapshot_count,
+                'last_path': self.last_path,
+                }
+        if self.is_armed:
+            (current, peak) = tracemalloc.get_traced_memory()
+            result['traced_bytes'] = current
+            result['traced_bytes_peak'] = peak
+
+        return result
+
+    def _format_statistic(self, statistic):
+        """ Format the lines for a statistic, with its traceback. """
+        lines = ["* {statistic}".format(statistic=statistic)]
+        if self.frames > 1:
+            lines.extend(
+                    "    " + line
+                    for line in statistic.traceback.format())
+
+        return lines
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
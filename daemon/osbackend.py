@@ -0,0 +1,451 @@
+# -*- coding: utf-8 -*-
+
+# daemon/osbackend.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Operating system interfaces used to become a daemon.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import abc
+import collections
+import errno
+import os
+
+from ._lazyimport import LazyModule
+
+atexit = LazyModule('atexit')
+pwd = LazyModule('pwd')
+resource = LazyModule('resource')
+signal = LazyModule('signal')
+socket = LazyModule('socket')
+
+__metaclass__ = type
+
+# Python 2 and Python 3 specify the metaclass of a class with different
+# syntax; a base class made by the metaclass serves both.
+_AbstractBase = abc.ABCMeta(str("_AbstractBase"), (object,), {})
+
+
+class OSBackend(_AbstractBase):
+    """ Interface to the operating system services of a process.
+
+        The helper functions of `daemon.daemon`, and the core dump
+        policy of `daemon.coredump`, make their requests to change the
+        process context through the backend `daemon.daemon.os_backend`:
+        working directory, root directory, file mode mask, process
+        owner, resource limits, forking and the session, the standard
+        file descriptors, signal handlers, and functions to call at
+        exit. Each method has the signature and behaviour of the
+        standard library function of the same name, in the module named
+        in its description.
+
+        Files which services of the daemon open for their own use, and
+        the Python objects of the standard streams, are used directly.
+
+        """
+
+    devnull = os.devnull
+
+    @abc.abstractmethod
+    def chdir(self, path):
+        """ `os.chdir`. """
+
+    @abc.abstractmethod
+    def chroot(self, path):
+        """ `os.chroot`. """
+
+    @abc.abstractmethod
+    def umask(self, mask):
+        """ `os.umask`. """
+
+    @abc.abstractmethod
+    def getuid(self):
+        """ `os.getuid`. """
+
+    @abc.abstractmethod
+    def getgid(self):
+        """ `os.getgid`. """
+
+    @abc.abstractmethod
+    def getpwuid(self, uid):
+        """ `pwd.getpwuid`. """
+
+    @abc.abstractmethod
+    def initgroups(self, username, gid):
+        """ `os.initgroups`. """
+
+    @abc.abstractmethod
+    def setgid(self, gid):
+        """ `os.setgid`. """
+
+    @abc.abstractmethod
+    def setuid(self, uid):
+        """ `os.setuid`. """
+
+    @abc.abstractmethod
+    def getrlimit(self, resource_number):
+        """ `resource.getrlimit`. """
+
+    @abc.abstractmethod
+    def setrlimit(self, resource_number, limits):
+        """ `resource.setrlimit`. """
+
+    @abc.abstractmethod
+    def fork(self):
+        """ `os.fork`. """
+
+    @abc.abstractmethod
+    def _exit(self, status):
+        """ `os._exit`. """
+
+    @abc.abstractmethod
+    def setsid(self):
+        """ `os.setsid`. """
+
+    @abc.abstractmethod
+    def getppid(self):
+        """ `os.getppid`. """
+
+    @abc.abstractmethod
+    def fromfd(self, fd, family, type):
+        """ `socket.fromfd`. """
+
+    @abc.abstractmethod
+    def open(self, path, flags, mode=0o777):
+        """ `os.open`. """
+
+    @abc.abstractmethod
+    def close(self, fd):
+        """ `os.close`. """
+
+    @abc.abstractmethod
+    def dup2(self, fd, fd2):
+        """ `os.dup2`. """
+
+    @abc.abstractmethod
+    def signal(self, signal_number, handler):
+        """ `signal.signal`. """
+
+    @abc.abstractmethod
+    def register(self, func):
+        """ `atexit.register`. """
+
+
+class SystemBackend(OSBackend):
+    """ Backend making requests of the running operating system.
+
+        Each method looks up the standard library function when
+        called, so replacing that function also affects the backend.
+
+        """
+
+    def chdir(self, path):
+        return os.chdir(path)
+
+    def chroot(self, path):
+        return os.chroot(path)
+
+    def umask(self, mask):
+        return os.umask(mask)
+
+    def getuid(self):
+        return os.getuid()
+
+    def getgid(self):
+        return os.getgid()
+
+    def getpwuid(self, uid):
+        return pwd.getpwuid(uid)
+
+    def initgroups(self, username, gid):
+        return os.initgroups(username, gid)
+
+    def setgid(self, gid):
+        return os.setgid(gid)
+
+    def setuid(self, uid):
+        return os.setuid(uid)
+
+    def getrlimit(self, resource_number):
+        return resource.getrlimit(resource_number)
+
+    def setrlimit(self, resource_number, limits):
+        return resource.setrlimit(resource_number, limits)
+
+    def fork(self):
+        return os.fork()
+
+    def _exit(self, status):
+        return os._exit(status)
+
+    def setsid(self):
+        return os.setsid()
+
+    def getppid(self):
+        return os.getppid()
+
+    def fromfd(self, fd, family, type):
+        return socket.fromfd(fd, family, type)
+
+    def open(self, path, flags, *args):
+        return os.open(path, flags, *args)
+
+    def close(self, fd):
+        return os.close(fd)
+
+    def dup2(self, fd, fd2):
+        return os.dup2(fd, fd2)
+
+    def signal(self, signal_number, handler):
+        return signal.signal(signal_number, handler)
+
+    def register(self, func):
+        return atexit.register(func)
+
+
+FakeFile = collections.namedtuple('FakeFile', ['path', 'flags', 'is_socket'])
+FakeFile.__doc__ = """ An open file description of a `FakeKernel`.
+
+    :param path: The filesystem path opened, or ``None``.
+    :param flags: The flags of the open file.
+    :param is_socket: ``True`` if the file is a socket.
+
+    """
+
+FakePasswd = collections.namedtuple(
+        'FakePasswd', ['pw_name', 'pw_uid', 'pw_gid', 'pw_dir'])
+FakePasswd.__doc__ = """ A user database entry of a `FakeKernel`. """
+
+
+def _make_os_error(error_number):
+    """ Make an `OSError` for an error number. """
+    return OSError(error_number, os.strerror(error_number))
+
+
+class FakeKernel(OSBackend):
+    """ Backend modelling the operating system, in memory.
+
+        A `FakeKernel` keeps the state a daemon changes: the file
+        descriptor table, resource limits, user and group IDs,
+        signal handlers, functions to call at exit, and process IDs,
+        with the permission rules
+        of a Unix system. Replacing `daemon.daemon.os_backend` with an
+        instance lets `DaemonContext.open` run within the current
+        process, changing nothing outside it.
+
+        `fork` models only the child: it returns 0, and the process
+        takes a new process ID with the old one as its parent. The
+        `fork_count` attribute counts the forks.
+
+        """
+
+    def __init__(
+            self, uid=0, gid=0, users=None, open_fds=(0, 1, 2),
+            rlimits=None, pid=1000, ppid=999):
+        """ Set up a new fake kernel.
+
+            :param uid: The initial user ID of the process.
+            :param gid: The initial group ID of the process.
+            :param users: A mapping from user ID to `(name, gid,
+                groups)` for the user database, or ``None`` for only
+                ``root``.
+            :param open_fds: The file descriptors initially open.
+            :param rlimits: A mapping from resource number to
+                `(soft, hard)` limits, for those differing from the
+                defaults.
+            :param pid: The initial process ID.
+            :param ppid: The initial parent process ID.
+            :return: ``None``.
+
+            """
+        if users is None:
+            users = {0: ("root", 0, [0])}
+        self.users = dict(users)
+        self.uid = uid
+        self.gid = gid
+        self.groups = [gid]
+        self.files = dict(
+                (fd, FakeFile(path=None, flags=os.O_RDWR, is_socket=False))
+                for fd in open_fds)
+        self.rlimits = {
+                resource.RLIMIT_CORE: (
+                    resource.RLIM_INFINITY, resource.RLIM_INFINITY),
+                resource.RLIMIT_NOFILE: (1024, 4096),
+                }
+        if rlimits is not None:
+            self.rlimits.update(rlimits)
+        self.signal_handlers = {}
+        self.exit_functions = []
+        self.pid = pid
+        self.ppid = ppid
+        self.pgid = self.sid = ppid
+        self.cwd = "/"
+        self.root = "/"
+        self.mask = 0o022
+        self.fork_count = 0
+        self.exit_status = None
+
+    def _check_privileged(self):
+        """ Raise `OSError` EPERM unless the process is privileged. """
+        if self.uid != 0:
+            raise _make_os_error(errno.EPERM)
+
+    def _check_open(self, fd):
+        """ Raise `OSError` EBADF unless `fd` is open. """
+        if fd not in self.files:
+            raise _make_os_error(errno.EBADF)
+
+    def chdir(self, path):
+        self.cwd = os.path.join(self.cwd, path)
+
+    def chroot(self, path):
+        self._check_privileged()
+        self.root = os.path.join(self.cwd, path)
+
+    def umask(self, mask):
+        (previous, self.mask) = (self.mask, mask)
+        return previous
+
+    def getuid(self):
+        return self.uid
+
+    def getgid(self):
+        return self.gid
+
+    def getpwuid(self, uid):
+        if uid not in self.users:
+            error = KeyError(
+                    "getpwuid(): uid not found: {uid:d}".format(uid=uid))
+            raise error
+        (name, gid, groups) = self.users[uid]
+        return FakePasswd(
+                pw_name=name, pw_uid=uid, pw_gid=gid,
+                pw_dir="/home/{name}".format(name=name))
+
+    def initgroups(self, username, gid):
+        self._check_privileged()
+        groups = set([gid])
+        for (name, user_gid, user_groups) in self.users.values():
+            if name == username:
+                groups.update(user_groups)
+        self.gid = gid
+        self.groups = sorted(groups)
+
+    def setgid(self, gid):
+        if gid != self.gid:
+            self._check_privileged()
+        self.gid = gid
+
+    def setuid(self, uid):
+        if uid != self.uid:
+            self._check_privileged()
+        self.uid = uid
+
+    def getrlimit(self, resource_number):
+        if resource_number not in self.rlimits:
+            raise ValueError("invalid resource specified")
+        return self.rlimits[resource_number]
+
+    def setrlimit(self, resource_number, limits):
+        (soft, hard) = limits
+        (__, current_hard) = self.getrlimit(resource_number)
+        infinity = resource.RLIM_INFINITY
+        if hard != infinity and (soft == infinity or soft > hard):
+            raise ValueError("current limit exceeds maximum limit")
+        raising = (
+                current_hard != infinity
+                and (hard == infinity or hard > current_hard))
+        if raising and self.uid != 0:
+            raise ValueError("not allowed to raise maximum limit")
+        self.rlimits[resource_number] = (soft, hard)
+
+    def fork(self):
+        self.fork_count += 1
+        (self.ppid, self.pid) = (self.pid, self.pid + 1)
+        return 0
+
+    def _exit(self, status):
+        self.exit_status = status
+        raise SystemExit(status)
+
+    def setsid(self):
+        if self.pgid == self.pid:
+            raise _make_os_error(errno.EPERM)
+        self.pgid = self.sid = self.pid
+
+    def getppid(self):
+        return self.ppid
+
+    def fromfd(self, fd, family, type):
+        self._check_open(fd)
+        return FakeSocket(self.files[fd])
+
+    def open(self, path, flags, mode=0o777):
+        fd = 0
+        while fd in self.files:
+            fd += 1
+        (soft_limit, __) = self.rlimits[resource.RLIMIT_NOFILE]
+        if fd >= soft_limit:
+            raise _make_os_error(errno.EMFILE)
+        self.files[fd] = FakeFile(path=path, flags=flags, is_socket=False)
+        return fd
+
+    def close(self, fd):
+        self._check_open(fd)
+        del self.files[fd]
+
+    def dup2(self, fd, fd2):
+        self._check_open(fd)
+        self.files[fd2] = self.files[fd]
+        return fd2
+
+    def signal(self, signal_number, handler):
+        previous = self.signal_handlers.get(signal_number, signal.SIG_DFL)
+        self.signal_handlers[signal_number] = handler
+        return previous
+
+    def register(self, func):
+        self.exit_functions.append(func)
+        return func
+
+    def send_signal(self, signal_number):
+        """ Deliver a signal to the process's handler.
+
+            :param signal_number: The signal number to deliver.
+            :return: ``None``.
+
+            Only a handler which is callable is called; the default
+            and ignore dispositions do nothing.
+
+            """
+        handler = self.signal_handlers.get(signal_number, signal.SIG_DFL)
+        if callable(handler):
+            handler(signal_number, None)
+
+
+class FakeSocket:
+    """ Socket object for a file of a `FakeKernel`. """
+
+    def __init__(self, fake_file):
+        self.fake_file = fake_file
+
+    def getsockopt(self, level, option):
+        if not self.fake_file.is_socket:
+            raise socket.error(errno.ENOTSOCK, os.strerror(errno.ENOTSOCK))
+        return socket.SOCK_STREAM
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
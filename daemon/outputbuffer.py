@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+# daemon/outputbuffer.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Block buffering of the daemon's redirected output streams.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import io
+import sys
+import threading
+
+__metaclass__ = type
+
+
+default_buffer_size = 64 * 1024
+
+
+class OutputBuffering:
+    """ Block buffering, with periodic flushing, of the output streams.
+
+        An `OutputBuffering` instance is the value for the
+        `output_buffering` option of `DaemonContext`.
+
+        Redirecting a standard stream replaces only the file underneath
+        it: the existing `sys.stdout` and `sys.stderr` objects keep the
+        buffering they chose when the interpreter started, often line
+        buffering, which costs a ``write`` system call for every line.
+        When started, this rebuilds `sys.stdout` and `sys.stderr` on the
+        same file descriptors with a buffer of the specified size, and
+        flushes both streams from a background thread every
+        `flush_interval` seconds. When stopped, it flushes the streams
+        and restores the original `sys.stdout` and `sys.stderr`.
+
+        Each rebuilt text stream passes every write straight through to
+        its binary buffer, whose own lock makes it safe to flush from
+        the background thread while other threads write.
+
+        Output can thus wait up to `flush_interval` seconds before it
+        reaches the file.
+
+        """
+
+    def __init__(
+            self,
+            stdout_buffer_size=default_buffer_size,
+            stderr_buffer_size=default_buffer_size,
+            flush_interval=0.1):
+        """ Set up the parameters of a new output buffering.
+
+            :param stdout_buffer_size: Size, in bytes, of the buffer
+                for `sys.stdout`, or ``None`` to leave the stream as is.
+            :param stderr_buffer_size: Size, in bytes, of the buffer
+                for `sys.stderr`, or ``None`` to leave the stream as is.
+            :param flush_interval: Seconds between flushes of the
+                streams.
+            :return: ``None``.
+
+            """
+        self.stdout_buffer_size = stdout_buffer_size
+        self.stderr_buffer_size = stderr_buffer_size
+        self.flush_interval = flush_interval
+
+        self.thread = None
+        self._stop_event = threading.Event()
+        self._rebuilt_streams = {}
+
+    def start(self):
+        """ Rebuild the output streams, and start the flushing thread. """
+        for (name, buffer_size) in [
+                ('stdout', self.stdout_buffer_size),
+                ('stderr', self.stderr_buffer_size)]:
+            if buffer_size is None:
+                continue
+            stream = getattr(sys, name)
+            rebuilt_stream = rebuild_stream(stream, buffer_size)
+            self._rebuilt_streams[name] = (stream, rebuilt_stream)
+            setattr(sys, name, rebuilt_stream)
+
+        self._stop_event.clear()
+        self.thread = threading.Thread(
+                target=self._flush_periodically, name="daemon-output-flush")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """ Stop the flushing thread, flush the output streams, and
+            restore the original output streams.
+            """
+        if self.thread is not None:
+            self._stop_event.set()
+            self.thread.join()
+            self.thread = None
+        self.flush()
+        for (name, (stream, rebuilt_stream)) in (
+                self._rebuilt_streams.items()):
+            if getattr(sys, name) is rebuilt_stream:
+                setattr(sys, name, stream)
+        self._rebuilt_streams.clear()
+
+    def flush(self):
+        """ Flush the rebuilt output streams.
+
+            :return: ``None``.
+
+            Only the binary buffer of each stream is flushed, which is
+            safe while other threads write to the stream.
+
+            Errors from flushing a stream (for example, a closed pipe)
+            are ignored, so that one stream cannot prevent flushing the
+            other.
+
+            """
+        for (__, rebuilt_stream) in self._rebuilt_streams.values():
+            try:
+                rebuilt_stream.buffer.flush()
+            except (IOError, OSError, ValueError):
+                pass
+
+    def _flush_periodically(self):
+        """ Flush the output streams every interval, until stopped. """
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+
+def rebuild_stream(stream, buffer_size):
+    """ Make a block-buffered text stream on the file of a stream.
+
+        :param stream: The existing text stream, such as `sys.stdout`.
+        :param buffer_size: Size, in bytes, of the new buffer.
+        :return: The new text stream.
+
+        The existing stream is flushed first. The new stream writes to
+        the same file descriptor, without closing it when the new
+        stream is closed, with the same encoding and error handling.
+        Its text layer keeps no pending output: each write passes
+        through to the block-buffered binary stream underneath.
+
+        """
+    stream.flush()
+    buffered_stream = io.open(
+            stream.fileno(), 'wb', buffering=buffer_size, closefd=False)
+    new_stream = io.TextIOWrapper(
+            buffered_stream,
+            encoding=getattr(stream, 'encoding', None),
+            errors=getattr(stream, 'errors', None),
+            write_through=True)
+
+    return new_stream
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -15,7 +15,19 @@
 
 from __future__ import (absolute_import, unicode_literals)
 
-from lockfile.pidlockfile import PIDLockFile
+import errno
+import fcntl
+import os
+import signal
+import time
+
+import lockfile
+from lockfile.pidlockfile import (PIDLockFile, read_pid_from_pidfile)
+
+from . import filewatch
+
+
+clock = getattr(time, 'monotonic', time.time)
 
 
 class TimeoutPIDLockFile(PIDLockFile, object):
@@ -28,6 +40,10 @@ class TimeoutPIDLockFile(PIDLockFile, object):
           used as the default `timeout` parameter for the `acquire`
           method.
 
+        * With a positive timeout, the `acquire` method first waits for
+          an existing PID file to change, instead of sleeping for an
+          interval; see `daemon.filewatch.wait_for_change`.
+
         """
 
     def __init__(self, path, acquire_timeout=None, *args, **kwargs):
@@ -54,11 +70,396 @@ class TimeoutPIDLockFile(PIDLockFile, object):
             passed to `PIDLockFile.acquire`; see that method for
             details.
 
+            If `timeout` is positive, first wait for an existing PID
+            file to be removed; the remaining time is then passed to
+            `PIDLockFile.acquire`.
+
             """
         if timeout is None:
             timeout = self.acquire_timeout
+        if timeout is not None and timeout > 0:
+            timeout = self._wait_for_release(timeout)
         super(TimeoutPIDLockFile, self).acquire(timeout, *args, **kwargs)
 
+    def _wait_for_release(self, timeout):
+        """ Wait for the PID file to be removed, until a timeout.
+
+            :param timeout: Seconds to wait; positive.
+            :return: The timeout remaining, or `timeout` unchanged if
+                there is no PID file.
+            :raises lockfile.LockTimeout: If the PID file remains until
+                `timeout` seconds pass.
+
+            """
+        if not os.path.exists(self.path):
+            return timeout
+
+        end_time = clock() + timeout
+        while os.path.exists(self.path):
+            remaining = end_time - clock()
+            if remaining <= 0:
+                error = lockfile.LockTimeout(
+                        "Timeout waiting to acquire lock for {path!r}".format(
+                            path=self.path))
+                raise error
+            filewatch.wait_for_change(self.path, remaining)
+
+        return max(end_time - clock(), filewatch.poll_interval_min)
+
+
+class _LockWaitTimeout(Exception):
+    """ The time to wait for a lock has passed. """
+
+
+class FlockPIDLockFile(object):
+    """ PID file locked by the kernel, with ``flock`` on an open file.
+
+        This has the interface of `TimeoutPIDLockFile`, but the lock is
+        not the existence of the file: it is an exclusive ``flock``
+        lock held on an open file descriptor of the PID file, while
+        the file contains the PID of the process.
+
+        * The kernel releases the lock when the process exits, however
+          it exits; a PID file left after a crash is not locked, and
+          the next `acquire` takes it over.
+
+        * With a positive `timeout`, `acquire` blocks in the kernel
+          until the lock is released, interrupted by a timer signal
+          when the timeout passes. Where the timer cannot be used, it
+          polls with an increasing interval. As for
+          `TimeoutPIDLockFile`, a `timeout` of ``None``, zero, or less
+          does not wait.
+
+        * `break_lock` removes the PID file only when it is not locked,
+          so it cannot remove the PID file of a running process.
+
+        The lock belongs to the open file description, so a child
+        process forked while the lock is held shares it.
+
+        """
+
+    poll_interval_min = 0.001
+    poll_interval_max = 0.1
+
+    def __init__(self, path, acquire_timeout=None):
+        """ Set up the parameters of a FlockPIDLockFile.
+
+            :param path: Filesystem path to the PID file.
+            :param acquire_timeout: Value to use by default for the
+                `acquire` call.
+            :return: ``None``.
+
+            """
+        self.path = path
+        self.acquire_timeout = acquire_timeout
+        self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    @property
+    def files_preserve(self):
+        """ The file descriptors to keep open while locked. """
+        result = []
+        if self._fd is not None:
+            result.append(self._fd)
+
+        return result
+
+    def acquire(self, timeout=None):
+        """ Acquire the lock, and write the PID of this process.
+
+            :param timeout: Specifies the timeout; see below for valid
+                values.
+            :return: ``None``.
+            :raises lockfile.AlreadyLocked: If `timeout` is ``None``,
+                zero, or negative, and the lock is held.
+            :raises lockfile.LockTimeout: If the lock is held until
+                `timeout` seconds pass.
+            :raises lockfile.LockFailed: If the PID file cannot be
+                opened or written.
+
+            The `timeout` defaults to the value set during
+            initialisation with the `acquire_timeout` parameter.
+
+            """
+        if timeout is None:
+            timeout = self.acquire_timeout
+        if self._fd is not None:
+            error = lockfile.AlreadyLocked(
+                    "{path!r} is already locked by this object".format(
+                        path=self.path))
+            raise error
+
+        end_time = None
+        if timeout is not None and timeout > 0:
+            end_time = clock() + timeout
+        while True:
+            fd = self._open_pidfile()
+            try:
+                self._lock(fd, end_time)
+                is_current = self._is_current(fd)
+            except Exception:
+                os.close(fd)
+                raise
+            if is_current:
+                break
+            # The file was removed while this waited for the lock.
+            os.close(fd)
+
+        try:
+            os.ftruncate(fd, 0)
+            os.write(fd, "{pid:d}\n".format(pid=os.getpid()).encode('ascii'))
+        except EnvironmentError as exc:
+            os.close(fd)
+            error = lockfile.LockFailed(
+                    "Cannot write PID file {path!r}: {exc}".format(
+                        path=self.path, exc=exc))
+            raise error
+        self._fd = fd
+
+    def release(self):
+        """ Remove the PID file, and release the lock.
+
+            :return: ``None``.
+            :raises lockfile.NotLocked: If this object does not hold
+                the lock.
+            :raises lockfile.NotMyLock: If the PID file was replaced
+                while this object held the lock.
+
+            The PID file is removed before the lock is released, so no
+            other process can lock the file being removed.
+
+            """
+        if self._fd is None:
+            error = lockfile.NotLocked(
+                    "{path!r} is not locked by this object".format(
+                        path=self.path))
+            raise error
+
+        (fd, self._fd) = (self._fd, None)
+        try:
+            if not self._is_current(fd):
+                error = lockfile.NotMyLock(
+                        "{path!r} was replaced while locked".format(
+                            path=self.path))
+                raise error
+            os.remove(self.path)
+        finally:
+            os.close(fd)
+
+    def is_locked(self):
+        """ Determine whether any process holds the lock.
+
+            :return: ``True`` if the lock is held, otherwise ``False``.
+
+            """
+        if self._fd is not None:
+            return True
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except EnvironmentError as exc:
+            if exc.errno == errno.ENOENT:
+                return False
+            raise
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except EnvironmentError as exc:
+            if exc.errno in [errno.EAGAIN, errno.EWOULDBLOCK]:
+                return True
+            raise
+        finally:
+            os.close(fd)
+
+        return False
+
+    def i_am_locking(self):
+        """ Determine whether this object holds the lock.
+
+            :return: ``True`` if this object holds the lock on the
+                current PID file, otherwise ``False``.
+
+            """
+        return self._fd is not None and self._is_current(self._fd)
+
+    def read_pid(self):
+        """ Get the PID from the PID file.
+
+            :return: The PID, or ``None`` if there is no valid PID file.
+
+            """
+        return read_pid_from_pidfile(self.path)
+
+    def break_lock(self):
+        """ Remove the PID file, if no process holds the lock.
+
+            :return: ``None``.
+
+            A PID file locked by a running process is left in place.
+
+            """
+        try:
+            fd = os.open(self.path, os.O_RDWR)
+        except EnvironmentError as exc:
+            if exc.errno == errno.ENOENT:
+                return
+            raise
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except EnvironmentError as exc:
+                if exc.errno in [errno.EAGAIN, errno.EWOULDBLOCK]:
+                    return
+                raise
+            if self._is_current(fd):
+                os.remove(self.path)
+        finally:
+            os.close(fd)
+
+    def _open_pidfile(self):
+        """ Open the PID file, creating it if it does not exist.
+
+            :return: The file descriptor of the open PID file.
+            :raises lockfile.LockFailed: If the file cannot be opened.
+
+            """
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, 'O_CLOEXEC', 0)
+        try:
+            fd = os.open(self.path, flags, 0o644)
+        except EnvironmentError as exc:
+            error = lockfile.LockFailed(
+                    "Cannot open PID file {path!r}: {exc}".format(
+                        path=self.path, exc=exc))
+            raise error
+
+        return fd
+
+    def _is_current(self, fd):
+        """ Determine whether a file descriptor is of the PID file.
+
+            :param fd: The file descriptor.
+            :return: ``True`` if `fd` refers to the file now at `path`.
+
+            """
+        fd_status = os.fstat(fd)
+        try:
+            path_status = os.stat(self.path)
+        except EnvironmentError as exc:
+            if exc.errno == errno.ENOENT:
+                return False
+            raise
+
+        return (
+                (fd_status.st_dev, fd_status.st_ino)
+                == (path_status.st_dev, path_status.st_ino))
+
+    def _lock(self, fd, end_time):
+        """ Lock an open file, waiting until a time.
+
+            :param fd: The file descriptor of the open PID file.
+            :param end_time: The `clock` time at which a positive
+                timeout passes, or ``None`` to not wait.
+            :return: ``None``.
+
+            """
+        locked = False
+        if end_time is not None:
+            remaining = end_time - clock()
+            if remaining > 0:
+                locked = wait_for_flock(
+                        fd, remaining, self.poll_interval_min,
+                        self.poll_interval_max)
+        if not locked:
+            locked = try_flock(fd)
+        if not locked:
+            if end_time is None:
+                error = lockfile.AlreadyLocked(
+                        "{path!r} is already locked".format(path=self.path))
+            else:
+                error = lockfile.LockTimeout(
+                        "Timeout waiting to acquire lock for {path!r}".format(
+                            path=self.path))
+            raise error
+
+
+def try_flock(fd):
+    """ Try to lock a file, without waiting.
+
+        :param fd: The file descriptor of the open file.
+        :return: ``True`` if locked, ``False`` if another holds the lock.
+
+        """
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except EnvironmentError as exc:
+        if exc.errno in [errno.EAGAIN, errno.EWOULDBLOCK]:
+            return False
+        raise
+
+    return True
+
+
+def wait_for_flock(fd, timeout, poll_interval_min, poll_interval_max):
+    """ Wait to lock a file, until a timeout.
+
+        :param fd: The file descriptor of the open file.
+        :param timeout: Seconds to wait.
+        :param poll_interval_min: Seconds of the first interval, when
+            polling.
+        :param poll_interval_max: Seconds of the longest interval, when
+            polling.
+        :return: ``True`` if locked, ``False`` if the timeout passed.
+
+        The wait blocks in ``flock``, interrupted by ``SIGALRM`` from
+        the real-time interval timer; afterward, the previous signal
+        handler and timer are restored. This is done only in the main
+        thread, where the signal handler can be set, and only if
+        neither the timer nor a ``SIGALRM`` handler is in use;
+        otherwise, this polls with an interval doubling from
+        `poll_interval_min` to `poll_interval_max`.
+
+        """
+    previous_timer = signal.getitimer(signal.ITIMER_REAL)
+    if (
+            previous_timer == (0.0, 0.0)
+            and signal.getsignal(signal.SIGALRM) in [
+                signal.SIG_DFL, signal.SIG_IGN]):
+        def handle_alarm(signal_number, stack_frame):
+            raise _LockWaitTimeout()
+
+        try:
+            previous_handler = signal.signal(signal.SIGALRM, handle_alarm)
+        except ValueError:
+            # Not in the main thread.
+            pass
+        else:
+            try:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, *previous_timer)
+            except _LockWaitTimeout:
+                return False
+            finally:
+                signal.signal(signal.SIGALRM, previous_handler)
+            return True
+
+    end_time = clock() + timeout
+    interval = poll_interval_min
+    while not try_flock(fd):
+        remaining = end_time - clock()
+        if remaining <= 0:
+            return False
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, poll_interval_max)
+
+    return True
+
 
 # Local variables:
 # coding: utf-8
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+
+# daemon/profilewindow.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Timed deterministic profiling of a running daemon.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import cProfile
+import os
+import os.path
+import threading
+import time
+
+__metaclass__ = type
+
+
+class ProfileWindow:
+    """ Window of deterministic profiling, on demand, of one thread.
+
+        A `ProfileWindow` instance is the value for the
+        `profile_window` option of `DaemonContext`. On request, by the
+        signal `signal_number` or by the ``profile-window`` command of
+        the control socket, it profiles the target thread with
+        `cProfile` for `duration` seconds, then writes the statistics
+        to a file in `directory`, named with the process ID, the time,
+        and the sequence number of the window. A further request while
+        profiling ends the window early.
+
+        The `cProfile` profiler must be switched on and off from within
+        the thread it profiles. The target thread is one of:
+
+        * The main thread, by default. The Python signal handlers run
+          in the main thread, so a request from another thread is
+          passed by sending `signal_number` to the process. Without a
+          `signal_number`, a request from another thread is rejected,
+          and a window opened by the main thread closes at its next
+          call of `checkpoint` after the duration.
+
+        * The thread running the `asyncio` event loop given to
+          `attach_event_loop`. A request is passed through the loop.
+
+        * The thread `thread`, which must call `checkpoint`
+          periodically. A request is performed at its next call.
+
+        """
+
+    def __init__(
+            self, directory, duration=10.0, signal_number=None,
+            thread=None):
+        """ Set up a new profile window.
+
+            :param directory: Filesystem path of the directory for the
+                statistics files.
+            :param duration: Seconds to profile for each request.
+            :param signal_number: The signal number which requests a
+                window, or ``None`` for none.
+            :param thread: The `threading.Thread` to profile, or
+                ``None`` for the main thread.
+            :return: ``None``.
+
+            """
+        self.directory = directory
+        self.duration = duration
+        self.signal_number = signal_number
+        self.thread = thread
+
+        self.profile = None
+        self.event_loop = None
+        self.event_loop_thread_ident = None
+        self.window_count = 0
+        self.last_path = None
+        self._pending = None
+        self._timer = None
+
+    @property
+    def is_active(self):
+        """ ``True`` if the window is open, profiling the thread. """
+        return self.profile is not None
+
+    def attach_event_loop(self, loop):
+        """ Profile the thread running an event loop.
+
+            :param loop: The `asyncio` event loop to pass requests
+                through.
+            :return: ``None``.
+
+            The thread running the loop is recorded by a callback
+            scheduled on the loop, so this may be called from any
+            thread, before or after the loop starts running.
+
+            """
+        self.event_loop = loop
+        self.event_loop_thread_ident = None
+        loop.call_soon_threadsafe(self._record_event_loop_thread)
+
+    def _record_event_loop_thread(self):
+        """ Record the current thread as the one running the loop. """
+        self.event_loop_thread_ident = threading.current_thread().ident
+
+    def request(self):
+        """ Request to open the window, or to close it if open.
+
+            :return: ``None``.
+            :raises RuntimeError: If the request cannot be passed to
+                the target thread.
+
+            This may be called from any thread.
+
+            """
+        if self.is_active:
+            self._dispatch(self._close_window)
+        else:
+            self._dispatch(self._open_window)
+
+    def handle_signal(self, signal_number, stack_frame):
+        """ Signal handler to perform a request.
+
+            :param signal_number: The OS signal number received.
+            :param stack_frame: The frame object at the point the
+                signal was received.
+            :return: ``None``.
+
+            If a request from another thread is pending, perform it;
+            otherwise, request to open or close the window.
+
+            """
+        if self._pending is not None:
+            self.checkpoint()
+        else:
+            self.request()
+
+    def checkpoint(self):
+        """ Perform any pending request, in the target thread.
+
+            :return: ``None``.
+
+            """
+        func = self._pending
+        if func is not None:
+            self._pending = None
+            func()
+
+    def stop(self):
+        """ Stop any timer, and close the window if possible.
+
+            :return: The filesystem path of the file written, or
+                ``None`` if the window was not closed.
+
+            The window can only be closed from the target thread; from
+            another thread, the window is left open.
+
+            """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not (self.is_active and self._is_target_thread()):
+            return None
+        self._close_window()
+
+        return self.last_path
+
+    def stats(self):
+        """ Get the metrics of the profile window.
+
+            :return: A mapping of metric name to value.
+
+            """
+        return {
+                'active': self.is_active,
+                'windows': self.window_count,
+                'last_path': self.last_path,
+                }
+
+    def _get_target_thread(self):
+        """ Get the thread to profile. """
+        thread = self.thread
+        if thread is None:
+            thread = threading.main_thread()
+
+        return thread
+
+    def _is_target_thread(self):
+        """ Determine whether the current thread is the target. """
+        if self.event_loop is not None:
+            thread_ident = self.event_loop_thread_ident
+        else:
+            thread_ident = self._get_target_thread().ident
+
+        return threading.current_thread().ident == thread_ident
+
+    def _can_pass_request(self):
+        """ Determine whether a request can reach the target thread. """
+        return (
+                self.event_loop is not None
+                or self.thread is not None
+                or self.signal_number is not None)
+
+    def _dispatch(self, func):
+        """ Call a function in the target thread. """
+        if self._is_target_thread():
+            func()
+        elif not self._can_pass_request():
+            error = RuntimeError(
+                    "No signal_number to pass the request"
+                    " to the main thread")
+            raise error
+        elif self.event_loop is not None:
+            self.event_loop.call_soon_threadsafe(func)
+        else:
+            self._pending = func
+            if self.thread is None:
+                os.kill(os.getpid(), self.signal_number)
+
+    def _request_close(self):
+        """ Request to close the window, at the end of the duration. """
+        if self._can_pass_request():
+            self._dispatch(self._close_window)
+        else:
+            self._pending = self._close_window
+
+    def _open_window(self):
+        """ Start profiling the current thread, for the duration. """
+        if self.is_active:
+            return
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        self._timer = threading.Timer(self.duration, self._request_close)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _close_window(self):
+        """ Stop profiling the current thread, and write the file. """
+        if not self.is_active:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        (profile, self.profile) = (self.profile, None)
+        profile.disable()
+
+        self.window_count += 1
+        file_name = "profile-{pid:d}-{time}-{count:d}.pstats".format(
+                pid=os.getpid(),
+                time=time.strftime("%Y%m%dT%H%M%S", time.gmtime()),
+                count=self.window_count)
+        path = os.path.join(self.directory, file_name)
+        profile.dump_stats(path)
+        self.last_path = path
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
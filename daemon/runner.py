@@ -21,16 +21,21 @@ from __future__ import (absolute_import, unicode_literals)
 
 import sys
 import os
-import signal
 import errno
 
-import lockfile
-
-from . import pidfile
+from ._lazyimport import LazyModule
 from .daemon import (basestring, unicode)
 from .daemon import DaemonContext
+from .daemon import make_default_signal_map
 from .daemon import _chain_exception_from_existing_exception_context
 
+# Commands such as ‘stop’ need few of these; import each on first use.
+control = LazyModule('daemon.control')
+json = LazyModule('json')
+lockfile = LazyModule('lockfile')
+pidfile = LazyModule('daemon.pidfile')
+signal = LazyModule('signal')
+
 try:
     # Python 3 standard library.
     ProcessLookupError
@@ -68,6 +73,10 @@ class DaemonRunnerStartFailureError(DaemonRunnerError, RuntimeError):
 class DaemonRunnerStopFailureError(DaemonRunnerError, RuntimeError):
     """ Raised when failure stopping DaemonRunner. """
 
+
+class DaemonRunnerControlFailureError(DaemonRunnerError, RuntimeError):
+    """ Raised when failure sending a control command to the daemon. """
+
 
 class DaemonRunner:
     """ Controller for a callable running in a separate background process.
@@ -78,6 +87,20 @@ class DaemonRunner:
         * 'stop': Exit the daemon process specified in the PID file.
         * 'restart': Stop, then start.
 
+        If the application specifies a control socket, these actions
+        send the corresponding command to the running daemon, and emit
+        the JSON result to `sys.stdout`:
+
+        * 'status', 'metrics', 'reload', 'dump-stacks', 'shutdown'.
+
+        * 'profile-start', 'profile-stop', if the application has a
+          `profiler`.
+
+        * 'profile-window', if the application has a `profile_window`.
+
+        * 'memory-snapshot', 'memory-disarm', if the application has
+          `memory_snapshots`.
+
         """
 
     start_message = "started with pid {pid:d}"
@@ -92,7 +115,9 @@ class DaemonRunner:
 
             * `stdin_path`, `stdout_path`, `stderr_path`: Filesystem paths
               to open and replace the existing `sys.stdin`, `sys.stdout`,
-              `sys.stderr`.
+              `sys.stderr`. The output files are opened in append mode,
+              and are reopened at the same paths when the daemon
+              receives ``signal.SIGHUP``.
 
             * `pidfile_path`: Absolute filesystem path to a file that will
               be used as the PID file for the daemon. If ``None``, no PID
@@ -104,21 +129,104 @@ class DaemonRunner:
             * `run`: Callable that will be invoked when the daemon is
               started.
 
+            The `app` argument may also have the following attributes:
+
+            * `pidfile_class`: The class of the runner's PID lock file,
+              called with the path and the timeout; for example,
+              `daemon.pidfile.FlockPIDLockFile`. If absent or ``None``,
+              `daemon.pidfile.TimeoutPIDLockFile` is used.
+
+            * `control_socket_path`: Absolute filesystem path for the
+              daemon's control socket. If absent or ``None``, no
+              control socket will be used.
+
+            * `output_buffering`: A `daemon.outputbuffer.OutputBuffering`
+              instance for block buffering of the output streams. If
+              absent or ``None``, the streams keep their buffering.
+
+            * `core_dump_policy`: A `daemon.coredump.CoreDumpPolicy`
+              instance bounding core dumps. If absent or ``None``, core
+              dumps are prevented.
+
+            * `crash_log`: A `daemon.crashlog.CrashLog` instance for
+              reporting fatal errors. If absent or ``None``, no such
+              report is written.
+
+            * `crash_buffer`: A `daemon.crashbuffer.CrashBuffer`
+              instance keeping recent output for examination after a
+              crash. If absent or ``None``, no such buffer is kept.
+
+            * `watchdog`: A `daemon.watchdog.StallWatchdog` instance
+              detecting stalls of the app's work. If absent or ``None``,
+              stalls are not detected.
+
+            * `profiler`: A `daemon.sampler.SamplingProfiler` instance,
+              switched on and off by the ``SIGUSR2`` signal or the
+              ``profile-start`` and ``profile-stop`` actions. If absent
+              or ``None``, no profiler is available.
+
+            * `gc_monitor`: A `daemon.gcmonitor.GCMonitor` instance to
+              tune and measure garbage collection. If absent or
+              ``None``, the collector is not changed.
+
+            * `fd_audit`: A `daemon.fdaudit.FdAudit` instance to audit
+              the open file descriptors. If absent or ``None``, file
+              descriptors are not audited.
+
+            * `profile_window`: A `daemon.profilewindow.ProfileWindow`
+              instance, requested by its signal or the
+              ``profile-window`` action. If absent or ``None``, no
+              profile window is available.
+
+            * `memory_snapshots`: A `daemon.memtrace.MemorySnapshots`
+              instance, requested by its signal or the
+              ``memory-snapshot`` action. If absent or ``None``, no
+              memory snapshots are available.
+
+            * `log_rotation`: A `daemon.logrotation.LogRotation`
+              instance for rotating the output files. If absent or
+              ``None``, the daemon will not rotate the files itself.
+
             """
         self.parse_args()
         self.app = app
         self.daemon_context = DaemonContext()
         self.daemon_context.stdin = open(app.stdin_path, 'rt')
-        self.daemon_context.stdout = open(app.stdout_path, 'w+t')
+        self.daemon_context.stdout = open(app.stdout_path, 'a+t')
         self.daemon_context.stderr = open(
-                app.stderr_path, 'w+t', buffering=0)
+                app.stderr_path, 'a+b', buffering=0)
+
+        signal_map = make_default_signal_map()
+        signal_map[signal.SIGHUP] = 'reopen_streams'
+        self.daemon_context.profiler = getattr(app, 'profiler', None)
+        if self.daemon_context.profiler is not None:
+            signal_map[signal.SIGUSR2] = 'toggle_profiler'
+        self.daemon_context.profile_window = getattr(
+                app, 'profile_window', None)
+        self.daemon_context.memory_snapshots = getattr(
+                app, 'memory_snapshots', None)
+        self.daemon_context.signal_map = signal_map
+        self.daemon_context.output_buffering = getattr(
+                app, 'output_buffering', None)
+        self.daemon_context.core_dump_policy = getattr(
+                app, 'core_dump_policy', None)
+        self.daemon_context.crash_log = getattr(app, 'crash_log', None)
+        self.daemon_context.crash_buffer = getattr(app, 'crash_buffer', None)
+        self.daemon_context.log_rotation = getattr(app, 'log_rotation', None)
+        self.daemon_context.watchdog = getattr(app, 'watchdog', None)
+        self.daemon_context.gc_monitor = getattr(app, 'gc_monitor', None)
+        self.daemon_context.fd_audit = getattr(app, 'fd_audit', None)
 
         self.pidfile = None
         if app.pidfile_path is not None:
             self.pidfile = make_pidlockfile(
-                    app.pidfile_path, app.pidfile_timeout)
+                    app.pidfile_path, app.pidfile_timeout,
+                    pidfile_class=getattr(app, 'pidfile_class', None))
         self.daemon_context.pidfile = self.pidfile
 
+        self.control_socket_path = getattr(app, 'control_socket_path', None)
+        self.daemon_context.control_socket_path = self.control_socket_path
+
     def _usage_exit(self, argv):
         """ Emit a usage message, then exit.
 
@@ -228,10 +336,47 @@ class DaemonRunner:
         self._stop()
         self._start()
 
+    def _send_control_command(self):
+        """ Send the action as a command to the daemon's control socket.
+
+            :return: ``None``.
+            :raises DaemonRunnerControlFailureError: If there is no
+                control socket, or the command fails.
+
+            """
+        if self.control_socket_path is None:
+            error = DaemonRunnerControlFailureError(
+                    "No control socket for action {action!r}".format(
+                        action=self.action))
+            raise error
+
+        try:
+            result = control.send_control_command(
+                    self.control_socket_path, self.action)
+        except (control.ControlError, EnvironmentError) as exc:
+            error = DaemonRunnerControlFailureError(
+                    "Failed to send {action!r} to {path!r}: {exc}".format(
+                        action=self.action, path=self.control_socket_path,
+                        exc=exc))
+            raise error
+
+        message = json.dumps(result, indent=4, sort_keys=True)
+        emit_message(message, stream=sys.stdout)
+
     action_funcs = {
             'start': _start,
             'stop': _stop,
             'restart': _restart,
+            'status': _send_control_command,
+            'metrics': _send_control_command,
+            'reload': _send_control_command,
+            'dump-stacks': _send_control_command,
+            'shutdown': _send_control_command,
+            'profile-start': _send_control_command,
+            'profile-stop': _send_control_command,
+            'profile-window': _send_control_command,
+            'memory-snapshot': _send_control_command,
+            'memory-disarm': _send_control_command,
             }
 
     def _get_action_func(self):
@@ -276,8 +421,17 @@ def emit_message(message, stream=None):
     stream.flush()
 
 
-def make_pidlockfile(path, acquire_timeout):
-    """ Make a PIDLockFile instance with the given filesystem path. """
+def make_pidlockfile(path, acquire_timeout, pidfile_class=None):
+    """ Make a PID lock file instance with the given filesystem path.
+
+        :param path: Absolute filesystem path to the PID file.
+        :param acquire_timeout: The default timeout to acquire the lock.
+        :param pidfile_class: The class of the PID lock file, or
+            ``None`` for `daemon.pidfile.TimeoutPIDLockFile`.
+        :return: The new PID lock file instance.
+        :raises ValueError: If `path` is not an absolute path.
+
+        """
     if not isinstance(path, basestring):
         error = ValueError("Not a filesystem path: {path!r}".format(
                 path=path))
@@ -286,7 +440,9 @@ def make_pidlockfile(path, acquire_timeout):
         error = ValueError("Not an absolute path: {path!r}".format(
                 path=path))
         raise error
-    lockfile = pidfile.TimeoutPIDLockFile(path, acquire_timeout)
+    if pidfile_class is None:
+        pidfile_class = pidfile.TimeoutPIDLockFile
+    lockfile = pidfile_class(path, acquire_timeout)
 
     return lockfile
 
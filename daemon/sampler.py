@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+# daemon/sampler.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Low-overhead sampling profiler for a running daemon.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import sys
+import threading
+import time
+
+__metaclass__ = type
+
+
+truncated_stack_label = "[truncated]"
+
+
+class SamplingProfiler:
+    """ Profiler which samples the stacks of all threads periodically.
+
+        A `SamplingProfiler` instance is the value for the `profiler`
+        option of `DaemonContext`, which can switch it on and off while
+        the daemon runs: by a signal mapped to ``'toggle_profiler'`` in
+        `signal_map`, or by the ``profile-start`` and ``profile-stop``
+        commands of the control socket.
+
+        While running, a background thread samples the current stack of
+        every other thread `rate` times per second, counting each
+        distinct stack. At most `max_stacks` distinct stacks are
+        counted; samples of further stacks count as
+        ``[truncated]``. When stopped, the profiler writes the counts
+        in the “collapsed stacks” format read by flame graph tools:
+        one line per stack, with the frames from outermost to
+        innermost separated by ``;``, then a space and the count.
+
+        """
+
+    def __init__(self, output_path, rate=100, max_stacks=10000):
+        """ Set up a new sampling profiler.
+
+            :param output_path: Filesystem path of the file to write
+                when the profiler stops. The path is formatted with the
+                fields `pid` (the process ID) and `time` (the time of
+                stopping, in seconds since the epoch), so each run
+                can write a separate file.
+            :param rate: Number of samples per second.
+            :param max_stacks: Maximum number of distinct stacks to
+                count.
+            :return: ``None``.
+
+            """
+        self.output_path = output_path
+        self.rate = rate
+        self.max_stacks = max_stacks
+
+        self.counts = {}
+        self.sample_count = 0
+        self.thread = None
+        self._stop_event = threading.Event()
+        self._labels = {}
+
+    @property
+    def is_running(self):
+        """ ``True`` if the profiler is sampling. """
+        return self.thread is not None
+
+    def start(self):
+        """ Start sampling, discarding any earlier samples.
+
+            :return: ``None``.
+
+            """
+        if self.is_running:
+            return
+        self.counts = {}
+        self.sample_count = 0
+        self._stop_event.clear()
+        self.thread = threading.Thread(
+                target=self._sample_periodically, name="daemon-sampler")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """ Stop sampling, and write the collapsed stacks file.
+
+            :return: The filesystem path of the file written, or
+                ``None`` if the profiler was not running.
+
+            """
+        if not self.is_running:
+            return None
+        self._stop_event.set()
+        self.thread.join()
+        self.thread = None
+
+        path = self.output_path.format(
+                pid=os.getpid(), time=int(time.time()))
+        self.write_collapsed_stacks(path)
+
+        return path
+
+    def toggle(self):
+        """ Start the profiler if stopped, or stop it if running.
+
+            :return: ``None``.
+
+            """
+        if self.is_running:
+            self.stop()
+        else:
+            self.start()
+
+    def stats(self):
+        """ Get the metrics of the profiler.
+
+            :return: A mapping of metric name to value.
+
+            """
+        return {
+                'running': self.is_running,
+                'samples': self.sample_count,
+                'stacks': len(self.counts),
+                }
+
+    def sample(self):
+        """ Count the current stack of every other thread.
+
+            :return: ``None``.
+
+            """
+        own_ident = threading.current_thread().ident
+        for (thread_ident, frame) in sys._current_frames().items():
+            if thread_ident == own_ident:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._get_label(frame.f_code))
+                frame = frame.f_back
+            key = tuple(stack)
+            if key in self.counts:
+                self.counts[key] += 1
+            elif len(self.counts) < self.max_stacks:
+                self.counts[key] = 1
+            else:
+                key = (truncated_stack_label,)
+                self.counts[key] = self.counts.get(key, 0) + 1
+        self.sample_count += 1
+
+    def write_collapsed_stacks(self, path):
+        """ Write the counted stacks in the collapsed stacks format.
+
+            :param path: Filesystem path of the file to write.
+            :return: ``None``.
+
+            """
+        with open(path, 'w') as outfile:
+            for (stack, count) in sorted(self.counts.items()):
+                outfile.write("{stack} {count:d}\n".format(
+                        stack=";".join(reversed(stack)), count=count))
+
+    def _get_label(self, code):
+        """ Get the label for the frames of a code object. """
+        label = self._labels.get(code)
+        if label is None:
+            label = "{name} ({filename}:{line:d})".format(
+                    name=code.co_name,
+                    filename=os.path.basename(code.co_filename),
+                    line=code.co_firstlineno).replace(";", ":")
+            self._labels[code] = label
+
+        return label
+
+    def _sample_periodically(self):
+        """ Take a sample at each interval, until stopped. """
+        interval = 1.0 / self.rate
+        next_time = time.time()
+        while True:
+            next_time += interval
+            delay = next_time - time.time()
+            if delay < 0:
+                # Sampling fell behind; skip the missed samples.
+                next_time = time.time()
+                delay = 0
+            if self._stop_event.wait(delay):
+                break
+            self.sample()
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
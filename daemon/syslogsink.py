@@ -0,0 +1,488 @@
+# -*- coding: utf-8 -*-
+
+# daemon/syslogsink.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Batched output to the system log, for streams and for logging.
+
+    A `SyslogSink` queues messages in memory and sends them as
+    datagrams to the local syslog socket from a background thread, so
+    that the code submitting a message never waits on the syslog
+    daemon. When the queue is full, further messages are discarded and
+    counted as dropped.
+
+    A `SyslogStream` is a stream object for the `stdout` or `stderr`
+    option of `DaemonContext`, sending each line written to the stream
+    as a message. A `SyslogHandler` is a `logging.Handler` sending each
+    log record as a message.
+
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import sys
+import collections
+import logging
+import logging.handlers
+import select
+import socket
+import threading
+import time
+
+__metaclass__ = type
+
+
+default_address = "/dev/log"
+default_priority = logging.handlers.SysLogHandler.LOG_INFO
+
+priority_by_level = [
+        (logging.CRITICAL, logging.handlers.SysLogHandler.LOG_CRIT),
+        (logging.ERROR, logging.handlers.SysLogHandler.LOG_ERR),
+        (logging.WARNING, logging.handlers.SysLogHandler.LOG_WARNING),
+        (logging.INFO, logging.handlers.SysLogHandler.LOG_INFO),
+        ]
+
+
+class SyslogSink:
+    """ Queue of messages sent in batches to the system log.
+
+        Messages submitted to the sink are held in a queue of at most
+        `queue_size` messages. A background thread sends the queued
+        messages each `flush_interval` seconds, or sooner when
+        `batch_size` messages are waiting.
+
+        The sink connects to the syslog socket when it is created, so
+        that the connection is made before the daemon changes its root
+        directory. The connection is kept when the sink stops, so that
+        the sink can start again; `close` closes it.
+
+        """
+
+    def __init__(
+            self,
+            address=default_address,
+            ident=None,
+            facility=logging.handlers.SysLogHandler.LOG_USER,
+            queue_size=10000,
+            batch_size=100,
+            flush_interval=0.05,
+            max_message_size=8192,
+            send_timeout=1.0):
+        """ Set up the parameters of a new syslog sink.
+
+            :param address: Filesystem path of the syslog datagram
+                socket.
+            :param ident: The program name to prefix to each message.
+                If ``None``, the base name of ``sys.argv[0]``.
+            :param facility: The syslog facility number.
+            :param queue_size: Maximum number of messages to hold.
+            :param batch_size: Number of waiting messages which triggers
+                sending before the end of the `flush_interval`.
+            :param flush_interval: Maximum seconds a message waits
+                before it is sent.
+            :param max_message_size: Size, in bytes, at which to
+                truncate each message, at a character boundary.
+            :param send_timeout: Seconds to wait for the syslog socket
+                to accept each message, before dropping it.
+            :return: ``None``.
+
+            """
+        self.address = address
+        if ident is None:
+            ident = os.path.basename(sys.argv[0]) or "python"
+        self.ident = ident
+        self.facility = facility
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_message_size = max_message_size
+        self.send_timeout = send_timeout
+
+        self.socket = None
+        self.thread = None
+        self.counters = {
+                'messages_sent': 0,
+                'messages_dropped': 0,
+                'send_errors': 0,
+                }
+        self._queue = collections.deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._users = 0
+
+        self._connect()
+
+    @property
+    def files_preserve(self):
+        """ The file descriptors to keep open for the sink. """
+        result = []
+        if self.socket is not None:
+            result.append(self.socket.fileno())
+
+        return result
+
+    def submit(self, message, priority=default_priority):
+        """ Submit a message to be sent to the system log.
+
+            :param message: The message text, as a text or byte string.
+            :param priority: The syslog priority number.
+            :return: ``True`` if the message was queued, ``False`` if
+                it was dropped because the queue is full.
+
+            """
+        return self._enqueue((priority, time.time(), message))
+
+    def _enqueue(self, item):
+        """ Add an item to the queue, unless the queue is full.
+
+            :param item: The arguments for `format_message`.
+            :return: ``True`` if the item was queued, ``False`` if it
+                was dropped because the queue is full.
+
+            """
+        with self._lock:
+            if len(self._queue) >= self.queue_size:
+                self.counters['messages_dropped'] += 1
+                return False
+            self._queue.append(item)
+            pending = len(self._queue)
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+        return True
+
+    def start(self):
+        """ Start the sending thread.
+
+            :return: ``None``.
+
+            The sink may be started by more than one user; the sending
+            thread runs until each user has called `stop`.
+
+            """
+        self._users += 1
+        if self.thread is not None:
+            return
+
+        self._connect()
+        self._stopping = False
+        self.thread = threading.Thread(
+                target=self._send_periodically, name="daemon-syslog")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """ Send the queued messages, and stop the sending thread. """
+        self._users = max(self._users - 1, 0)
+        if self._users or self.thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self.thread.join()
+        self.thread = None
+
+    def close(self):
+        """ Stop the sink, and close the connection to the system log. """
+        self._users = min(self._users, 1)
+        self.stop()
+        self._disconnect()
+
+    def stats(self):
+        """ Get the counters of the sink.
+
+            :return: A mapping of counter name to value.
+
+            """
+        with self._lock:
+            result = dict(self.counters)
+            result['messages_queued'] = len(self._queue)
+
+        return result
+
+    def format_message(self, priority, timestamp, message):
+        """ Format a message as a syslog datagram.
+
+            :param priority: The syslog priority number.
+            :param timestamp: The time of the message, in seconds since
+                the epoch.
+            :param message: The message text, as a text or byte string.
+            :return: The datagram, as a byte string.
+
+            """
+        if not isinstance(message, bytes):
+            message = message.encode('utf-8', 'replace')
+        header = "<{code:d}>{time} {ident}[{pid:d}]: ".format(
+                code=(self.facility << 3) | priority,
+                time=time.strftime(
+                    "%b %d %H:%M:%S", time.localtime(timestamp)),
+                ident=self.ident, pid=os.getpid())
+        datagram = header.encode('utf-8') + message.rstrip(b"\n")
+
+        return truncate_utf8(datagram, self.max_message_size)
+
+    def _connect(self):
+        """ Connect to the syslog socket, if not connected.
+
+            :return: ``True`` iff the sink is connected.
+
+            """
+        if self.socket is not None:
+            return True
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            sock.connect(self.address)
+        except socket.error:
+            sock.close()
+            return False
+        sock.settimeout(self.send_timeout)
+        self.socket = sock
+
+        return True
+
+    def _disconnect(self):
+        """ Close the connection to the syslog socket, if any. """
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+    def _reconnect(self):
+        """ Connect the existing socket to the syslog socket again.
+
+            :return: ``None``.
+
+            The socket is kept even if it cannot connect again, for
+            example because the daemon has since changed its root
+            directory; the next message is sent on it regardless.
+
+            """
+        try:
+            self.socket.connect(self.address)
+        except socket.error:
+            pass
+
+    def _take_batch(self):
+        """ Take all the queued messages from the queue. """
+        with self._lock:
+            batch = list(self._queue)
+            self._queue.clear()
+
+        return batch
+
+    def _count(self, name, amount=1):
+        """ Add an amount to one of the counters. """
+        with self._lock:
+            self.counters[name] += amount
+
+    def _send_batch(self, batch):
+        """ Send a batch of messages to the syslog socket.
+
+            :param batch: Sequence of items, each the arguments for
+                `format_message`.
+            :return: ``None``.
+
+            A message which the socket does not accept is dropped. If
+            the socket did not time out, the sink then connects the
+            socket again for the next message. If the sink has no
+            socket and cannot connect, the rest of the batch is
+            dropped.
+
+            """
+        for (index, item) in enumerate(batch):
+            if not self._connect():
+                self._count('send_errors')
+                self._count('messages_dropped', len(batch) - index)
+                return
+            datagram = self.format_message(*item)
+            try:
+                self._send_datagram(datagram)
+            except socket.timeout:
+                self._count('send_errors')
+                self._count('messages_dropped')
+                continue
+            except (socket.error, OSError):
+                self._count('send_errors')
+                self._count('messages_dropped')
+                self._reconnect()
+                continue
+            self._count('messages_sent')
+
+    def _send_datagram(self, datagram):
+        """ Send a datagram to the connected syslog socket. """
+        self.socket.send(datagram)
+
+    def _send_periodically(self):
+        """ Send queued messages each interval, until stopped. """
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            batch = self._take_batch()
+            if batch:
+                self._send_batch(batch)
+            if self._stopping and not self._queue:
+                break
+
+
+class SyslogHandler(logging.Handler):
+    """ Logging handler which submits each record to a `SyslogSink`.
+
+        The handler does not start the sink; start it with the sink's
+        `start` method, or as the sink of a `SyslogStream` of a
+        `DaemonContext`.
+
+        """
+
+    def __init__(self, sink, level=logging.NOTSET):
+        """ Set up a new handler.
+
+            :param sink: The `SyslogSink` for the log records.
+            :param level: The threshold level for the handler.
+            :return: ``None``.
+
+            """
+        super(SyslogHandler, self).__init__(level)
+        self.sink = sink
+
+    def emit(self, record):
+        """ Submit a log record to the sink. """
+        try:
+            message = self.format(record)
+            self.sink.submit(message, get_priority_for_level(record.levelno))
+        except Exception:
+            self.handleError(record)
+
+
+class SyslogStream:
+    """ Stream object which sends each line written to a `SyslogSink`.
+
+        The stream is the write end of a pipe; a background thread
+        reads lines from the pipe and submits each line to the sink,
+        with the stream's priority. The sink may be any `SyslogSink`,
+        including a `daemon.journal.JournalSink`.
+
+        """
+
+    def __init__(
+            self, sink, priority=default_priority, poll_interval=0.1):
+        """ Set up a new syslog stream.
+
+            :param sink: The `SyslogSink` for the lines of output.
+            :param priority: The syslog priority number for each line.
+            :param poll_interval: Maximum seconds between checks for a
+                request to stop.
+            :return: ``None``.
+
+            """
+        self.sink = sink
+        self.priority = priority
+        self.poll_interval = poll_interval
+        self.thread = None
+
+        (self.read_fd, self.write_fd) = os.pipe()
+        self._stop_event = threading.Event()
+
+    @property
+    def files_preserve(self):
+        """ The file descriptors to keep open for the stream. """
+        return [self.read_fd, self.write_fd] + self.sink.files_preserve
+
+    def fileno(self):
+        """ Get the file descriptor for writing to the stream. """
+        return self.write_fd
+
+    def start(self):
+        """ Start the sink, and the thread reading the stream. """
+        if self.thread is not None:
+            return
+        self.sink.start()
+        self._stop_event.clear()
+        self.thread = threading.Thread(
+                target=self._read_lines, name="daemon-syslog-stream")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """ Submit any remaining output, and stop the reading thread. """
+        if self.thread is None:
+            return
+        self._stop_event.set()
+        self.thread.join()
+        self.thread = None
+        self.sink.stop()
+
+    def stats(self):
+        """ Get the counters of the sink.
+
+            :return: A mapping of counter name to value.
+
+            """
+        return self.sink.stats()
+
+    def _read_lines(self):
+        """ Submit each line read from the pipe, until stopped. """
+        pending = b""
+        while True:
+            (readable, __, __) = select.select(
+                    [self.read_fd], [], [], self.poll_interval)
+            if not readable:
+                if self._stop_event.is_set():
+                    break
+                continue
+            data = os.read(self.read_fd, 64 * 1024)
+            if not data:
+                break
+            lines = (pending + data).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                self.sink.submit(line, self.priority)
+        if pending:
+            self.sink.submit(pending, self.priority)
+
+
+def truncate_utf8(data, size):
+    """ Truncate UTF-8 encoded data, without splitting a character.
+
+        :param data: The data, as a byte string.
+        :param size: Maximum size, in bytes, of the result.
+        :return: The data, truncated to at most `size` bytes.
+
+        If truncating at `size` would split a multi-byte character,
+        the data is truncated before the start of that character.
+
+        """
+    if len(data) <= size:
+        return data
+    end = size
+    while end > 0 and (bytearray(data[end:end + 1])[0] & 0xC0) == 0x80:
+        end -= 1
+
+    return data[:end]
+
+
+def get_priority_for_level(level):
+    """ Get the syslog priority for a logging level.
+
+        :param level: The logging level number.
+        :return: The syslog priority number.
+
+        """
+    for (threshold, priority) in priority_by_level:
+        if level >= threshold:
+            return priority
+
+    return logging.handlers.SysLogHandler.LOG_DEBUG
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
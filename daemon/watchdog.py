@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+
+# daemon/watchdog.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Detection of a daemon whose main work has stalled.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import sys
+import faulthandler
+import threading
+import time
+
+from .control import format_thread_stacks
+
+__metaclass__ = type
+
+
+clock = getattr(time, 'monotonic', time.time)
+
+
+class StallWatchdog:
+    """ Watchdog thread which reports when the daemon's work stalls.
+
+        A `StallWatchdog` instance is the value for the `watchdog`
+        option of `DaemonContext`. The daemon's main loop calls
+        `heartbeat` each time it makes progress; alternatively, for a
+        daemon running an `asyncio` event loop, `attach_event_loop`
+        makes the watchdog send heartbeats through the loop itself,
+        measuring the loop's lag as it does.
+
+        When no heartbeat arrives for more than `threshold` seconds,
+        the watchdog writes the stack of every thread to `output` once
+        for that stall, and records the stall in its metrics.
+
+        A thread holding the global interpreter lock without release
+        also stops the watchdog thread. If `native_timeout` is not
+        ``None``, `faulthandler` is set to dump the stacks from outside
+        the interpreter if the watchdog thread itself makes no progress
+        for that many seconds; this uses the process's single
+        `faulthandler.dump_traceback_later` timer.
+
+        """
+
+    def __init__(
+            self, threshold=10.0, check_interval=1.0, output=None,
+            native_timeout=None):
+        """ Set up a new watchdog.
+
+            :param threshold: Seconds without a heartbeat which count
+                as a stall.
+            :param check_interval: Seconds between checks.
+            :param output: The stream for stack dumps, or ``None`` for
+                the current `sys.stderr`.
+            :param native_timeout: Seconds without progress of the
+                watchdog thread after which `faulthandler` dumps the
+                stacks, or ``None`` to not use `faulthandler`.
+            :return: ``None``.
+
+            """
+        self.threshold = threshold
+        self.check_interval = check_interval
+        self.output = output
+        self.native_timeout = native_timeout
+
+        self.last_heartbeat = clock()
+        self.event_loop = None
+        self.thread = None
+        self._stop_event = threading.Event()
+        self._stall_since = None
+        self._probe_time = None
+
+        self.stall_count = 0
+        self.stall_seconds_total = 0.0
+        self.stall_seconds_max = 0.0
+        self.event_loop_lag = None
+        self.event_loop_lag_max = 0.0
+
+    def heartbeat(self):
+        """ Record that the daemon's work is making progress. """
+        self.last_heartbeat = clock()
+
+    def attach_event_loop(self, loop):
+        """ Send heartbeats through an event loop, measuring its lag.
+
+            :param loop: The `asyncio` event loop of the daemon.
+            :return: ``None``.
+
+            """
+        self.event_loop = loop
+
+    def start(self):
+        """ Start the watchdog thread. """
+        self.heartbeat()
+        self._stop_event.clear()
+        self.thread = threading.Thread(
+                target=self._watch, name="daemon-watchdog")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """ Stop the watchdog thread. """
+        if self.thread is None:
+            return
+        self._stop_event.set()
+        self.thread.join()
+        self.thread = None
+        if self.native_timeout is not None:
+            faulthandler.cancel_dump_traceback_later()
+
+    def stats(self):
+        """ Get the stall metrics of the watchdog.
+
+            :return: A mapping of metric name to value.
+
+            """
+        now = clock()
+        result = {
+                'stall_count': self.stall_count,
+                'stall_seconds_total': self.stall_seconds_total,
+                'stall_seconds_max': self.stall_seconds_max,
+                'heartbeat_age_seconds': now - self.last_heartbeat,
+                'stalled': self._stall_since is not None,
+                }
+        if self.event_loop is not None:
+            result['event_loop_lag_seconds'] = self.event_loop_lag
+            result['event_loop_lag_max_seconds'] = self.event_loop_lag_max
+
+        return result
+
+    def check(self):
+        """ Check for the start or end of a stall.
+
+            :return: ``None``.
+
+            """
+        now = clock()
+        if self.event_loop is not None:
+            self._probe_event_loop(now)
+
+        last_heartbeat = self.last_heartbeat
+        if self._stall_since is not None:
+            if last_heartbeat > self._stall_since:
+                self._record_stall(last_heartbeat - self._stall_since)
+                self._stall_since = None
+        elif now - last_heartbeat > self.threshold:
+            self._stall_since = last_heartbeat
+            self.stall_count += 1
+            self.dump_stacks(now - last_heartbeat)
+
+    def dump_stacks(self, stall_seconds):
+        """ Write the stack of every thread to the output stream.
+
+            :param stall_seconds: Seconds since the last heartbeat.
+            :return: ``None``.
+
+            """
+        output = self.output
+        if output is None:
+            output = sys.stderr
+        lines = [
+                "Stall detected: no heartbeat for {seconds:.1f} s;"
+                " stacks of all threads:".format(seconds=stall_seconds)]
+        for (description, stack) in sorted(format_thread_stacks().items()):
+            lines.append("Thread {description}:".format(
+                    description=description))
+            lines.extend(stack)
+        try:
+            output.write("\n".join(lines) + "\n")
+            output.flush()
+        except (IOError, OSError, ValueError):
+            pass
+
+    def _record_stall(self, duration):
+        """ Record the duration of a stall which has ended. """
+        self.stall_seconds_total += duration
+        self.stall_seconds_max = max(self.stall_seconds_max, duration)
+
+    def _probe_event_loop(self, now):
+        """ Schedule a heartbeat through the event loop. """
+        if self._probe_time is not None:
+            return
+        self._probe_time = now
+        try:
+            self.event_loop.call_soon_threadsafe(self._answer_probe)
+        except RuntimeError:
+            # The event loop is closed.
+            self._probe_time = None
+
+    def _answer_probe(self):
+        """ Record a heartbeat, and the lag of the event loop. """
+        lag = clock() - self._probe_time
+        self.event_loop_lag = lag
+        self.event_loop_lag_max = max(self.event_loop_lag_max, lag)
+        self._probe_time = None
+        self.heartbeat()
+
+    def _arm_native_dump(self):
+        """ Set `faulthandler` to dump stacks if this thread stops. """
+        output = self.output
+        if output is None:
+            output = sys.stderr
+        faulthandler.dump_traceback_later(
+                self.native_timeout, exit=False, file=output)
+
+    def _watch(self):
+        """ Check for stalls each interval, until stopped. """
+        while True:
+            if self.native_timeout is not None:
+                self._arm_native_dump()
+            if self._stop_event.wait(self.check_interval):
+                break
+            self.check()
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
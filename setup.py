@@ -76,6 +76,7 @@ setup(
             "setuptools",
             "docutils",
             "lockfile >=0.10",
+            "importlib_metadata; python_version < '3.8'",
             ],
 
         # PyPI metadata.
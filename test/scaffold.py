@@ -19,6 +19,7 @@ import unittest
 import doctest
 import logging
 import os
+import subprocess
 import sys
 import operator
 import textwrap
@@ -130,6 +131,39 @@ def format_function_signature(func):
     return signature_text
 
 
+def get_import_times(module_name):
+    """ Get the time to import each module, when importing a module.
+
+        :param module_name: The full name of the module to import.
+        :return: A mapping from full module name to a 2-tuple
+            (`self_us`, `cumulative_us`) of microseconds spent
+            importing the module, without and with its imports.
+
+        The module is imported by a new Python interpreter, with the
+        ``-X importtime`` option, from the top directory of the
+        package source.
+
+        """
+    top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+            [
+                sys.executable, "-X", "importtime",
+                "-c", "import {name}".format(name=module_name)],
+            cwd=top_dir,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True)
+    (__, output) = process.communicate()
+    import_times = {}
+    for line in output.splitlines():
+        fields = line.split(":", 1)[-1].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        (self_us, cumulative_us, name) = fields
+        import_times[name.strip()] = (int(self_us), int(cumulative_us))
+
+    return import_times
+
+
 class TestCase(testtools.testcase.TestCase):
     """ Test case behaviour. """
 
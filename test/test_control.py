@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_control.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘control’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import os.path
+import json
+import shutil
+import socket
+import tempfile
+
+import mock
+
+from . import scaffold
+
+import daemon.control
+
+
+class ModuleExceptions_TestCase(scaffold.Exception_TestCase):
+    """ Test cases for module exception classes. """
+
+    scenarios = scaffold.make_exception_scenarios([
+            ('daemon.control.ControlError', dict(
+                exc_type = daemon.control.ControlError,
+                min_args = 1,
+                types = [Exception],
+                )),
+            ('daemon.control.ControlCommandError', dict(
+                exc_type = daemon.control.ControlCommandError,
+                min_args = 1,
+                types = [daemon.control.ControlError, RuntimeError],
+                )),
+            ('daemon.control.ControlSocketInUseError', dict(
+                exc_type = daemon.control.ControlSocketInUseError,
+                min_args = 1,
+                types = [daemon.control.ControlError, OSError],
+                )),
+            ])
+
+
+def setup_control_socket_fixtures(testcase):
+    """ Set up common test fixtures for control socket test cases.
+
+        :param testcase: A ``TestCase`` instance to decorate.
+        :return: ``None``.
+
+        """
+    testcase.temp_dir = tempfile.mkdtemp()
+    testcase.addCleanup(shutil.rmtree, testcase.temp_dir)
+    testcase.socket_path = os.path.join(testcase.temp_dir, "control.sock")
+
+
+class decode_request_TestCase(scaffold.TestCase):
+    """ Test cases for ‘decode_request’ function. """
+
+    def test_returns_command_for_bare_name(self):
+        """ Should return a request with the bare command name. """
+        result = daemon.control.decode_request(b"status\r")
+        self.assertEqual({'command': "status"}, result)
+
+    def test_returns_json_request_items(self):
+        """ Should return the items of a JSON request. """
+        line = b'{"command": "metrics", "verbose": true}'
+        result = daemon.control.decode_request(line)
+        self.assertEqual({'command': "metrics", 'verbose': True}, result)
+
+    def test_raises_value_error_for_empty_request(self):
+        """ Should raise ValueError for an empty request. """
+        self.assertRaises(
+                ValueError,
+                daemon.control.decode_request, b"  ")
+
+    def test_raises_value_error_for_json_without_command(self):
+        """ Should raise ValueError for a JSON request with no command. """
+        self.assertRaises(
+                ValueError,
+                daemon.control.decode_request, b'{"verbose": true}')
+
+    def test_raises_value_error_for_json_command_not_string(self):
+        """ Should raise ValueError for a JSON command not a string. """
+        self.assertRaises(
+                ValueError,
+                daemon.control.decode_request, b'{"command": []}')
+
+
+class ControlServer_handle_request_TestCase(scaffold.TestCase):
+    """ Test cases for ‘ControlServer.handle_request’ method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(ControlServer_handle_request_TestCase, self).setUp()
+
+        self.test_instance = daemon.control.ControlServer("/foo/bar.sock")
+        self.test_result = {'spam': 1}
+        self.mock_func = mock.MagicMock(return_value=self.test_result)
+        self.test_instance.register("spam", self.mock_func)
+
+    def test_calls_registered_function_with_arguments(self):
+        """ Should call the registered function with request arguments. """
+        self.test_instance.handle_request(b'{"command": "spam", "eggs": 3}')
+        self.mock_func.assert_called_with(eggs=3)
+
+    def test_returns_result_from_function(self):
+        """ Should return the result from the registered function. """
+        expected_response = {
+                'command': "spam", 'ok': True, 'result': self.test_result}
+        response = self.test_instance.handle_request(b"spam")
+        self.assertEqual(expected_response, response)
+
+    def test_returns_error_for_unknown_command(self):
+        """ Should return an error response for an unknown command. """
+        response = self.test_instance.handle_request(b"b0gUs")
+        self.assertFalse(response['ok'])
+        self.assertIn("b0gUs", response['error'])
+
+    def test_returns_error_for_exception_from_function(self):
+        """ Should return an error response when the function raises. """
+        self.mock_func.side_effect = ValueError("Naughty")
+        response = self.test_instance.handle_request(b"spam")
+        self.assertFalse(response['ok'])
+        self.assertIn("Naughty", response['error'])
+
+    def test_returns_error_for_command_not_string(self):
+        """ Should return an error response for a command not a string. """
+        response = self.test_instance.handle_request(b'{"command": []}')
+        self.assertFalse(response['ok'])
+        self.assertIn("not a string", response['error'])
+
+
+class ControlServer_serve_TestCase(scaffold.TestCase):
+    """ Test cases for serving a ‘ControlServer’ on a real socket. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(ControlServer_serve_TestCase, self).setUp()
+
+        setup_control_socket_fixtures(self)
+        self.test_instance = daemon.control.ControlServer(self.socket_path)
+        self.test_instance.register("echo", lambda **kwargs: kwargs)
+        self.test_instance.start()
+        self.addCleanup(self.test_instance.stop)
+
+    def test_answers_command_from_client(self):
+        """ Should answer a command sent by the client function. """
+        result = daemon.control.send_control_command(
+                self.socket_path, "echo", spam=7)
+        self.assertEqual({'spam': 7}, result)
+
+    def test_answers_each_line_of_a_connection(self):
+        """ Should answer each request line on a single connection. """
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(client.close)
+        client.connect(self.socket_path)
+        client.sendall(b"echo\necho\n")
+        stream = client.makefile('rb')
+        self.addCleanup(stream.close)
+        responses = [json.loads(stream.readline().decode('utf-8'))
+                for __ in range(2)]
+        self.assertEqual([True, True], [item['ok'] for item in responses])
+
+    def test_answers_after_invalid_request(self):
+        """ Should keep answering after a request with an invalid command. """
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(client.close)
+        client.connect(self.socket_path)
+        client.sendall(b'{"command": {}}\n')
+        stream = client.makefile('rb')
+        self.addCleanup(stream.close)
+        response = json.loads(stream.readline().decode('utf-8'))
+        self.assertFalse(response['ok'])
+        result = daemon.control.send_control_command(
+                self.socket_path, "echo", spam=7)
+        self.assertEqual({'spam': 7}, result)
+
+    def test_disconnects_client_which_does_not_read(self):
+        """ Should disconnect a client which does not read responses. """
+        self.test_instance.send_timeout = 0.1
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(client.close)
+        client.connect(self.socket_path)
+        client.setblocking(False)
+        request = b"echo\n" * 4096
+        try:
+            for __ in range(1000):
+                client.send(request)
+        except socket.error:
+            # The buffers are full, as the server no longer reads.
+            pass
+        result = daemon.control.send_control_command(
+                self.socket_path, "echo", spam=7)
+        self.assertEqual({'spam': 7}, result)
+
+    def test_client_raises_command_error_on_failure(self):
+        """ Client should raise ControlCommandError on failure response. """
+        self.assertRaises(
+                daemon.control.ControlCommandError,
+                daemon.control.send_control_command,
+                self.socket_path, "b0gUs")
+
+    def test_calls_deferred_function_after_response(self):
+        """ Should call a deferred function after sending the response. """
+        mock_func = mock.MagicMock()
+        self.test_instance.register(
+                "later", lambda: self.test_instance.defer(mock_func))
+        daemon.control.send_control_command(self.socket_path, "later")
+        self.test_instance.stop()
+        mock_func.assert_called_with()
+
+    def test_stop_removes_socket_file(self):
+        """ Should remove the socket file when stopped. """
+        self.test_instance.stop()
+        self.assertFalse(os.path.exists(self.socket_path))
+
+
+class remove_stale_control_socket_TestCase(scaffold.TestCase):
+    """ Test cases for ‘remove_stale_control_socket’ function. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(remove_stale_control_socket_TestCase, self).setUp()
+
+        setup_control_socket_fixtures(self)
+
+    def test_removes_socket_with_no_listener(self):
+        """ Should remove a socket file with no listening process. """
+        leftover = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        leftover.bind(self.socket_path)
+        leftover.close()
+        daemon.control.remove_stale_control_socket(self.socket_path)
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_raises_error_if_socket_in_use(self):
+        """ Should raise ControlSocketInUseError if a process listens. """
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(listener.close)
+        listener.bind(self.socket_path)
+        listener.listen(1)
+        self.assertRaises(
+                daemon.control.ControlSocketInUseError,
+                daemon.control.remove_stale_control_socket, self.socket_path)
+
+
+class format_thread_stacks_TestCase(scaffold.TestCase):
+    """ Test cases for ‘format_thread_stacks’ function. """
+
+    def test_includes_current_function(self):
+        """ Should include the calling function in a stack. """
+        result = daemon.control.format_thread_stacks()
+        text = "\n".join(
+                line for lines in result.values() for line in lines)
+        self.assertIn("test_includes_current_function", text)
+
+
+class get_process_metrics_TestCase(scaffold.TestCase):
+    """ Test cases for ‘get_process_metrics’ function. """
+
+    def test_includes_process_id(self):
+        """ Should include the process ID. """
+        result = daemon.control.get_process_metrics()
+        self.assertEqual(os.getpid(), result['pid'])
+
+    def test_includes_cpu_times(self):
+        """ Should include the CPU times of the process. """
+        result = daemon.control.get_process_metrics()
+        self.assertIn('cpu_user_seconds', result)
+        self.assertIn('cpu_system_seconds', result)
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
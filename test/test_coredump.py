@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_coredump.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘coredump’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import os.path
+import resource
+import shutil
+import tempfile
+import time
+
+import mock
+
+from . import scaffold
+
+import daemon.coredump
+import daemon.daemon
+import daemon.osbackend
+
+
+class CoreDumpPolicy_TestCase(scaffold.TestCase):
+    """ Test cases for ‘CoreDumpPolicy’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(CoreDumpPolicy_TestCase, self).setUp()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.filter_path = os.path.join(self.temp_dir, "coredump_filter")
+        self.marker_path = os.path.join(self.temp_dir, "core.marker")
+
+        func_patcher_setrlimit = mock.patch.object(resource, "setrlimit")
+        self.mock_func_setrlimit = func_patcher_setrlimit.start()
+        self.addCleanup(func_patcher_setrlimit.stop)
+        self.test_hard_limit = resource.RLIM_INFINITY
+        func_patcher_getrlimit = mock.patch.object(
+                resource, "getrlimit",
+                side_effect=(lambda __: (0, self.test_hard_limit)))
+        func_patcher_getrlimit.start()
+        self.addCleanup(func_patcher_getrlimit.stop)
+        path_patcher = mock.patch.object(
+                daemon.coredump, "coredump_filter_path", self.filter_path)
+        path_patcher.start()
+        self.addCleanup(path_patcher.stop)
+
+        self.test_max_size = 256 * 1024 * 1024
+        self.test_instance = daemon.coredump.CoreDumpPolicy(
+                self.test_max_size, marker_path=self.marker_path,
+                min_interval=600)
+        self.addCleanup(self.test_instance.stop)
+
+    def test_sets_core_dump_size_limit(self):
+        """ Should set the soft core dump size limit to `max_size`. """
+        self.test_instance.start()
+        self.mock_func_setrlimit.assert_called_with(
+                resource.RLIMIT_CORE,
+                (self.test_max_size, self.test_hard_limit))
+
+    def test_clamps_core_dump_size_limit_to_hard_limit(self):
+        """ Should not set the soft limit above the hard limit. """
+        self.test_hard_limit = self.test_max_size // 2
+        self.test_instance.start()
+        self.mock_func_setrlimit.assert_called_with(
+                resource.RLIMIT_CORE,
+                (self.test_hard_limit, self.test_hard_limit))
+
+    def test_writes_coredump_filter(self):
+        """ Should write the mapping filter for core dumps. """
+        self.test_instance.start()
+        with open(self.filter_path) as filter_file:
+            self.assertEqual("0x31\n", filter_file.read())
+
+    def test_counts_error_writing_coredump_filter(self):
+        """ Should count a failure to write the filter. """
+        os.mkdir(self.filter_path)
+        self.test_instance.start()
+        self.assertEqual(1, self.test_instance.stats()['filter_errors'])
+
+    def test_ignores_missing_coredump_filter(self):
+        """ Should not count a filter the system does not have. """
+        missing_path = os.path.join(self.temp_dir, "missing", "filter")
+        with mock.patch.object(
+                daemon.coredump, "coredump_filter_path", missing_path):
+            self.test_instance.start()
+        self.assertEqual(0, self.test_instance.stats()['filter_errors'])
+
+    def test_opens_marker_file_when_created(self):
+        """ Should open the marker file before it is started. """
+        self.assertTrue(os.path.exists(self.marker_path))
+        self.assertEqual(
+                [self.test_instance.marker_fd],
+                self.test_instance.files_preserve)
+
+    def test_marks_marker_file_while_started(self):
+        """ Should write the marker file while started. """
+        self.test_instance.start()
+        self.assertTrue(self.test_instance.enabled)
+        self.assertGreater(os.path.getsize(self.marker_path), 0)
+        self.assertEqual(
+                [self.test_instance.marker_fd],
+                self.test_instance.files_preserve)
+
+    def test_empties_marker_file_when_stopped(self):
+        """ Should empty the marker file when stopped. """
+        self.test_instance.start()
+        self.test_instance.stop()
+        self.assertEqual(0, os.path.getsize(self.marker_path))
+
+    def test_disables_core_dumps_after_recent_unclean_stop(self):
+        """ Should disable core dumps after a recent unclean stop. """
+        with open(self.marker_path, 'w') as marker_file:
+            marker_file.write("Core dumps enabled at 0\n")
+        self.test_instance.start()
+        self.assertFalse(self.test_instance.enabled)
+        self.mock_func_setrlimit.assert_called_with(
+                resource.RLIMIT_CORE, (0, self.test_hard_limit))
+        self.assertFalse(os.path.exists(self.filter_path))
+
+    def test_disables_core_dumps_after_long_running_unclean_stop(self):
+        """ Should disable core dumps after a process which started
+            long ago stopped uncleanly.
+            """
+        with open(self.marker_path, 'w') as marker_file:
+            marker_file.write("Core dumps enabled at 0\n")
+        old_time = time.time() - 601
+        os.utime(self.marker_path, (old_time, old_time))
+        self.test_instance.start()
+        self.assertFalse(self.test_instance.enabled)
+        with open(self.marker_path) as marker_file:
+            self.assertTrue(
+                    marker_file.read().startswith("Unclean stop detected"))
+
+    def test_keeps_unclean_stop_record_when_disabled(self):
+        """ Should keep the record of an unclean stop when disabled. """
+        with open(self.marker_path, 'w') as marker_file:
+            marker_file.write("Unclean stop detected at 0\n")
+        self.test_instance.start()
+        self.test_instance.stop()
+        self.assertGreater(os.path.getsize(self.marker_path), 0)
+
+    def test_enables_core_dumps_after_old_unclean_stop(self):
+        """ Should enable core dumps after an old unclean stop. """
+        with open(self.marker_path, 'w') as marker_file:
+            marker_file.write("Unclean stop detected at 0\n")
+        old_time = time.time() - 601
+        os.utime(self.marker_path, (old_time, old_time))
+        self.test_instance.start()
+        self.assertTrue(self.test_instance.enabled)
+        with open(self.marker_path) as marker_file:
+            self.assertTrue(
+                    marker_file.read().startswith("Core dumps enabled"))
+
+    def test_sets_limit_through_os_backend(self):
+        """ Should set the limit through the operating system backend. """
+        fake_kernel = daemon.osbackend.FakeKernel(
+                rlimits={resource.RLIMIT_CORE: (0, self.test_max_size * 2)})
+        previous = daemon.daemon.set_os_backend(fake_kernel)
+        self.addCleanup(daemon.daemon.set_os_backend, previous)
+        self.test_instance.start()
+        self.assertEqual(
+                (self.test_max_size, self.test_max_size * 2),
+                fake_kernel.rlimits[resource.RLIMIT_CORE])
+        self.assertFalse(self.mock_func_setrlimit.called)
+
+    def test_raises_error_if_limit_refused(self):
+        """ Should raise DaemonOSEnvironmentError if limit refused. """
+        self.mock_func_setrlimit.side_effect = ValueError("Naughty")
+        self.assertRaises(
+                daemon.daemon.DaemonOSEnvironmentError,
+                self.test_instance.start)
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_crashbuffer.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘crashbuffer’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import io
+import os
+import os.path
+import logging
+import shutil
+import signal
+import sys
+import tempfile
+import time
+
+import mock
+
+from . import scaffold
+
+import daemon.crashbuffer
+
+
+def setup_crash_buffer_fixtures(testcase):
+    """ Set up common test fixtures for crash buffer test cases.
+
+        :param testcase: A ``TestCase`` instance to decorate.
+        :return: ``None``.
+
+        """
+    testcase.temp_dir = tempfile.mkdtemp()
+    testcase.addCleanup(shutil.rmtree, testcase.temp_dir)
+    testcase.buffer_path = os.path.join(testcase.temp_dir, "crash.buf")
+    testcase.dump_path = os.path.join(testcase.temp_dir, "crash.dump")
+
+
+def read_dump(path):
+    """ Get the header line and content of a dump file. """
+    with open(path, 'rb') as dump_file:
+        header = dump_file.readline()
+        content = dump_file.read()
+
+    return (header, content)
+
+
+def wait_for_dump(path, timeout=5.0):
+    """ Wait for a dump file to be written by another process. """
+    end_time = time.time() + timeout
+    while time.time() < end_time:
+        if os.path.exists(path) and read_dump(path)[1]:
+            break
+        time.sleep(0.01)
+
+
+class CrashBuffer_TestCase(scaffold.TestCase):
+    """ Test cases for ‘CrashBuffer’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(CrashBuffer_TestCase, self).setUp()
+
+        setup_crash_buffer_fixtures(self)
+        self.test_instance = daemon.crashbuffer.CrashBuffer(
+                size=16, path=self.buffer_path, dump_path=self.dump_path)
+
+    def test_reads_content_written(self):
+        """ Should read the content written, while not yet full. """
+        self.test_instance.write("spam")
+        self.test_instance.write(b"eggs")
+        self.assertEqual(b"spameggs", self.test_instance.read())
+
+    def test_keeps_most_recent_content_when_full(self):
+        """ Should keep only the most recent content, in order. """
+        for index in range(10):
+            self.test_instance.write("{index:d}abc".format(index=index))
+        self.assertEqual(b"6abc7abc8abc9abc", self.test_instance.read())
+
+    def test_keeps_end_of_oversize_write(self):
+        """ Should keep the end of a write larger than the buffer. """
+        self.test_instance.write("x" * 20 + "0123456789abcdef")
+        self.assertEqual(b"0123456789abcdef", self.test_instance.read())
+
+    def test_dumps_content_with_reason(self):
+        """ Should dump the content to `dump_path` with the reason. """
+        self.test_instance.write("beans")
+        self.test_instance.dump("Wibble")
+        (header, content) = read_dump(self.dump_path)
+        self.assertIn(b"Wibble", header)
+        self.assertEqual(b"beans", content)
+
+    def test_appends_each_dump(self):
+        """ Should append each dump, keeping the earlier dumps. """
+        self.test_instance.write("beans\n")
+        self.test_instance.dump("Wibble")
+        self.test_instance.write("spam\n")
+        self.test_instance.dump("Wobble")
+        with open(self.dump_path, 'rb') as dump_file:
+            lines = dump_file.read().splitlines()
+        self.assertIn(b"Wibble", lines[0])
+        self.assertEqual(b"beans", lines[1])
+        self.assertIn(b"Wobble", lines[2])
+        self.assertEqual([b"beans", b"spam"], lines[3:])
+
+    def test_writes_while_holding_lock(self):
+        """ Should write while the same thread holds the lock. """
+        with self.test_instance._lock:
+            self.test_instance.write("spam")
+        self.assertEqual(b"spam", self.test_instance.read())
+
+    def test_recovers_unclean_buffer_file(self):
+        """ Should dump a buffer file left unclean by a crash. """
+        self.test_instance.start()
+        self.addCleanup(self.test_instance.stop)
+        self.test_instance.write("last words")
+        daemon.crashbuffer.CrashBuffer(
+                size=16, path=self.buffer_path, dump_path=self.dump_path)
+        (header, content) = read_dump(self.dump_path)
+        self.assertIn(b"recovered", header)
+        self.assertEqual(b"last words", content)
+
+    def test_recovers_buffer_file_of_killed_process(self):
+        """ Should dump the buffer file of a process killed by signal. """
+        pid = os.fork()
+        if pid == 0:
+            try:
+                crash_buffer = daemon.crashbuffer.CrashBuffer(
+                        size=16, path=self.buffer_path)
+                crash_buffer.start()
+                crash_buffer.write("last words")
+                os.kill(os.getpid(), signal.SIGKILL)
+            finally:
+                os._exit(1)
+        (__, status) = os.waitpid(pid, 0)
+        self.assertTrue(os.WIFSIGNALED(status))
+        daemon.crashbuffer.CrashBuffer(
+                size=16, path=self.buffer_path, dump_path=self.dump_path)
+        (header, content) = read_dump(self.dump_path)
+        self.assertIn(b"recovered", header)
+        self.assertEqual(b"last words", content)
+
+    def test_watcher_dumps_buffer_of_killed_process(self):
+        """ Should dump the buffer when killed by a signal while started. """
+        pid = os.fork()
+        if pid == 0:
+            try:
+                crash_buffer = daemon.crashbuffer.CrashBuffer(
+                        size=16, dump_path=self.dump_path)
+                crash_buffer.start()
+                crash_buffer.write("last words")
+                os.kill(os.getpid(), signal.SIGKILL)
+            finally:
+                os._exit(1)
+        (__, status) = os.waitpid(pid, 0)
+        self.assertTrue(os.WIFSIGNALED(status))
+        wait_for_dump(self.dump_path)
+        (header, content) = read_dump(self.dump_path)
+        self.assertIn(b"without stopping", header)
+        self.assertIn("process {pid:d}".format(pid=pid).encode(), header)
+        self.assertEqual(b"last words", content)
+
+    def test_watcher_does_not_dump_stopped_buffer(self):
+        """ Should stop the watcher without a dump when stopped. """
+        self.test_instance.start()
+        self.test_instance.write("all is well")
+        watcher_pid = self.test_instance._watcher_pid
+        self.test_instance.stop()
+        self.assertIsNone(self.test_instance._watcher_pid)
+        self.assertRaises(OSError, os.kill, watcher_pid, 0)
+        self.assertFalse(os.path.exists(self.dump_path))
+
+    def test_does_not_recover_clean_buffer_file(self):
+        """ Should not dump a buffer file marked clean. """
+        self.test_instance.start()
+        self.test_instance.write("all is well")
+        self.test_instance.stop()
+        daemon.crashbuffer.CrashBuffer(
+                size=16, path=self.buffer_path, dump_path=self.dump_path)
+        self.assertFalse(os.path.exists(self.dump_path))
+
+    def test_mirrors_output_streams_while_started(self):
+        """ Should mirror the output streams while started. """
+        test_stream = io.StringIO()
+        with mock.patch.object(sys, "stdout", test_stream):
+            self.test_instance.start()
+            sys.stdout.write("spam\n")
+            self.test_instance.stop()
+            self.assertIs(test_stream, sys.stdout)
+        self.assertEqual("spam\n", test_stream.getvalue())
+        self.assertEqual(b"spam\n", self.test_instance.read())
+
+    def test_dumps_on_uncaught_exception(self):
+        """ Should dump the buffer with the uncaught exception. """
+        mock_hook = mock.MagicMock(name="excepthook")
+        with mock.patch.object(sys, "excepthook", mock_hook):
+            self.test_instance.start()
+            self.test_instance.stop()
+            try:
+                raise ValueError("Naughty")
+            except ValueError:
+                sys.excepthook(*sys.exc_info())
+        (header, content) = read_dump(self.dump_path)
+        self.assertIn(b"ValueError", header)
+        self.assertIn(b"Naughty", content)
+        mock_hook.assert_called_with(ValueError, mock.ANY, mock.ANY)
+
+
+class CrashBufferHandler_TestCase(scaffold.TestCase):
+    """ Test cases for ‘CrashBufferHandler’ class. """
+
+    def test_writes_formatted_record(self):
+        """ Should write each formatted log record to the buffer. """
+        crash_buffer = daemon.crashbuffer.CrashBuffer(size=1024)
+        instance = daemon.crashbuffer.CrashBufferHandler(crash_buffer)
+        test_record = logging.makeLogRecord(dict(msg="Wibble"))
+        instance.handle(test_record)
+        self.assertEqual(b"Wibble\n", crash_buffer.read())
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
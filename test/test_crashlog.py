@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_crashlog.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘crashlog’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import os.path
+import faulthandler
+import shutil
+import signal
+import tempfile
+import time
+
+from . import scaffold
+
+import daemon.crashlog
+
+
+def read_file(path):
+    """ Get the content of a file, as bytes. """
+    with open(path, 'rb') as infile:
+        content = infile.read()
+    return content
+
+
+class CrashLog_TestCase(scaffold.TestCase):
+    """ Test cases for ‘CrashLog’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(CrashLog_TestCase, self).setUp()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.log_path = os.path.join(self.temp_dir, "crash.log")
+        with open(self.log_path, 'wb') as log_file:
+            log_file.write(b"earlier report\n")
+
+        self.test_instance = daemon.crashlog.CrashLog(self.log_path)
+        self.addCleanup(os.close, self.test_instance.fd)
+        self.was_enabled = faulthandler.is_enabled()
+
+    def tearDown(self):
+        """ Tear down test fixtures. """
+        if self.was_enabled:
+            faulthandler.enable()
+        super(CrashLog_TestCase, self).tearDown()
+
+    def test_writes_header_after_existing_content(self):
+        """ Should write the header after the existing content. """
+        self.test_instance.start()
+        self.addCleanup(self.test_instance.stop)
+        content = read_file(self.log_path)
+        self.assertTrue(content.startswith(b"earlier report\n"))
+        header = content[len(b"earlier report\n"):]
+        self.assertEqual(daemon.crashlog.header_size, len(header))
+        expected_text = "process {pid:d}".format(pid=os.getpid())
+        self.assertIn(expected_text.encode('ascii'), header)
+
+    def test_enables_fault_handler(self):
+        """ Should enable the fatal error handler while started. """
+        self.test_instance.start()
+        self.assertTrue(faulthandler.is_enabled())
+        self.test_instance.stop()
+        self.assertFalse(faulthandler.is_enabled())
+
+    def test_stop_removes_header(self):
+        """ Should remove the header when stopped without a crash. """
+        self.test_instance.start()
+        self.test_instance.stop()
+        self.assertEqual(b"earlier report\n", read_file(self.log_path))
+
+    def test_refreshes_header(self):
+        """ Should update the header with the uptime. """
+        self.test_instance.refresh_interval = 0.01
+        self.test_instance.start()
+        self.addCleanup(self.test_instance.stop)
+        self.test_instance.start_time -= 3600
+        time.sleep(0.2)
+        self.assertIn(b"uptime 3600 s", read_file(self.log_path))
+
+    def test_reports_tracebacks_on_fatal_signal(self):
+        """ Should write the tracebacks when the process crashes. """
+        pid = os.fork()
+        if pid == 0:
+            try:
+                self.test_instance.start()
+                os.kill(os.getpid(), signal.SIGSEGV)
+            finally:
+                os._exit(1)
+        (__, status) = os.waitpid(pid, 0)
+        self.assertTrue(os.WIFSIGNALED(status))
+        content = read_file(self.log_path)
+        self.assertIn(b"Crash report for process", content)
+        self.assertIn(b"Fatal Python error", content)
+        self.assertIn(b"test_reports_tracebacks_on_fatal_signal", content)
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -17,6 +17,7 @@ from __future__ import (absolute_import, unicode_literals)
 
 import os
 import sys
+import atexit
 import pwd
 import tempfile
 import resource
@@ -38,6 +39,7 @@ from .test_pidfile import (
         )
 
 import daemon
+import daemon.control
 
 
 class ModuleExceptions_TestCase(scaffold.Exception_TestCase):
@@ -311,6 +313,107 @@ class DaemonContext_TestCase(DaemonContext_BaseTestCase):
         instance = daemon.daemon.DaemonContext(**args)
         self.assertEqual(expected_signal_map, instance.signal_map)
 
+    def test_has_specified_log_rotation(self):
+        """ Should have specified log_rotation option. """
+        args = dict(
+                log_rotation=object(),
+                )
+        expected_value = args['log_rotation']
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.log_rotation)
+
+    def test_has_specified_output_buffering(self):
+        """ Should have specified output_buffering option. """
+        args = dict(
+                output_buffering=object(),
+                )
+        expected_value = args['output_buffering']
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.output_buffering)
+
+    def test_has_default_output_buffering(self):
+        """ Should have default output_buffering option. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertIs(None, instance.output_buffering)
+
+    def test_has_default_core_dump_policy(self):
+        """ Should have default core_dump_policy option. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertIs(None, instance.core_dump_policy)
+
+    def test_has_default_watchdog(self):
+        """ Should have default watchdog option. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertIs(None, instance.watchdog)
+
+    def test_has_default_open_stages(self):
+        """ Should have the classic stages by default. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertEqual(
+                [stage.name for stage in daemon.daemon.make_open_stages()],
+                [stage.name for stage in instance.open_stages])
+
+    def test_has_default_open_timing_callback(self):
+        """ Should have default open_timing_callback option. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertIs(None, instance.open_timing_callback)
+
+    def test_has_default_fd_audit(self):
+        """ Should have default fd_audit option. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertIs(None, instance.fd_audit)
+
+    def test_has_default_gc_monitor(self):
+        """ Should have default gc_monitor option. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertIs(None, instance.gc_monitor)
+
+    def test_has_default_profiler(self):
+        """ Should have default profiler option. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertIs(None, instance.profiler)
+
+    def test_has_default_profile_window(self):
+        """ Should have default profile_window option. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertIs(None, instance.profile_window)
+
+    def test_has_default_memory_snapshots(self):
+        """ Should have default memory_snapshots option. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertIs(None, instance.memory_snapshots)
+
+    def test_has_default_crash_log(self):
+        """ Should have default crash_log option. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertIs(None, instance.crash_log)
+
+    def test_has_default_crash_buffer(self):
+        """ Should have default crash_buffer option. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertIs(None, instance.crash_buffer)
+
+    def test_has_default_log_rotation(self):
+        """ Should have default log_rotation option. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertIs(None, instance.log_rotation)
+
+    def test_has_specified_control_socket_path(self):
+        """ Should have specified control_socket_path option. """
+        args = dict(
+                control_socket_path=object(),
+                )
+        expected_path = args['control_socket_path']
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_path, instance.control_socket_path)
+
+    def test_has_default_control_socket_path(self):
+        """ Should have default control_socket_path option. """
+        args = dict()
+        expected_path = None
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_path, instance.control_socket_path)
+
 
 class DaemonContext_is_open_TestCase(DaemonContext_BaseTestCase):
     """ Test cases for DaemonContext.is_open property. """
@@ -438,6 +541,28 @@ class DaemonContext_open_TestCase(DaemonContext_BaseTestCase):
         instance.open()
         self.mock_module_daemon.prevent_core_dump.assert_called_with()
 
+    def test_starts_core_dump_policy_instead_of_preventing(self):
+        """ Should start the core dump policy, not prevent core dumps. """
+        instance = self.test_instance
+        instance.core_dump_policy = mock.MagicMock(name="core_dump_policy")
+        instance.open()
+        instance.core_dump_policy.start.assert_called_with()
+        self.assertFalse(self.mock_module_daemon.prevent_core_dump.called)
+
+    def test_starts_core_dump_policy_before_changing_root(self):
+        """ Should start the core dump policy before changing root. """
+        instance = self.test_instance
+        instance.chroot_directory = object()
+        instance.core_dump_policy = mock.MagicMock(name="core_dump_policy")
+        self.mock_module_daemon.attach_mock(
+                instance.core_dump_policy, 'core_dump_policy')
+        expected_calls = [
+                mock.call.core_dump_policy.start(),
+                mock.call.change_root_directory(mock.ANY),
+                ]
+        instance.open()
+        self.mock_module_daemon.assert_has_calls(expected_calls)
+
     def test_omits_prevent_core_dump_if_prevent_core_false(self):
         """ Should omit preventing core dumps if `prevent_core` is false. """
         instance = self.test_instance
@@ -544,6 +669,237 @@ class DaemonContext_open_TestCase(DaemonContext_BaseTestCase):
         self.mock_module_daemon.register_atexit_function.assert_called_with(
                 close_method)
 
+    def test_records_timing_of_each_step(self):
+        """ Should record the timing of each step performed. """
+        instance = self.test_instance
+        instance.chroot_directory = object()
+        instance.detach_process = True
+        instance.pidfile = self.mock_pidlockfile
+        expected_names = [
+                'change_root_directory',
+                'prevent_core_dump',
+                'change_file_creation_mask',
+                'change_working_directory',
+                'change_process_owner',
+                'detach_process_context',
+                'set_signal_handlers',
+                'start_stream_services',
+                'close_all_open_files',
+                'redirect_stream',
+                'enter_pidfile',
+                ]
+        instance.open()
+        self.assertEqual(
+                expected_names,
+                [timing.name for timing in instance.open_timings])
+        for timing in instance.open_timings:
+            self.assertGreaterEqual(timing.duration_ns, 0)
+
+    def test_omits_timing_of_steps_not_performed(self):
+        """ Should omit the timing of steps not performed. """
+        instance = self.test_instance
+        instance.detach_process = False
+        instance.prevent_core = False
+        instance.open()
+        names = [timing.name for timing in instance.open_timings]
+        self.assertNotIn('detach_process_context', names)
+        self.assertNotIn('prevent_core_dump', names)
+
+    def test_calls_open_timing_callback(self):
+        """ Should call the timing callback with the step timings. """
+        instance = self.test_instance
+        instance.open_timing_callback = mock.MagicMock()
+        instance.open()
+        instance.open_timing_callback.assert_called_with(
+                instance.open_timings)
+
+    def test_records_timing_of_failed_step(self):
+        """ Should record the timing of a step which fails. """
+        instance = self.test_instance
+        test_error = daemon.daemon.DaemonOSEnvironmentError("Naughty")
+        self.mock_module_daemon.change_process_owner.side_effect = (
+                test_error)
+        self.assertRaises(
+                daemon.daemon.DaemonOSEnvironmentError, instance.open)
+        self.assertEqual(
+                'change_process_owner', instance.open_timings[-1].name)
+
+    def test_performs_only_required_stages(self):
+        """ Should perform each required stage of `open_stages`. """
+        instance = self.test_instance
+        mock_action = mock.MagicMock()
+        instance.open_stages = daemon.daemon.OpenStages([
+                daemon.daemon.OpenStage('first', mock_action.first),
+                daemon.daemon.OpenStage(
+                    'skipped', mock_action.skipped, (lambda context: False)),
+                daemon.daemon.OpenStage('second', mock_action.second),
+                ])
+        instance.open()
+        self.assertEqual(
+                [mock.call.first(instance), mock.call.second(instance)],
+                mock_action.mock_calls)
+        self.assertEqual(
+                ['first', 'second'],
+                [timing.name for timing in instance.open_timings])
+        self.assertFalse(
+                self.mock_module_daemon.close_all_open_files.called)
+
+    def test_binds_control_socket_before_changing_root(self):
+        """ Should bind the control socket before changing root directory. """
+        instance = self.test_instance
+        instance.chroot_directory = object()
+        instance.control_socket_path = self.getUniqueString()
+        mock_server = mock.MagicMock(daemon.control.ControlServer)
+        self.mock_module_daemon.attach_mock(mock_server, 'control_server')
+        expected_calls = [
+                mock.call.control_server.bind(),
+                mock.call.change_root_directory(mock.ANY),
+                ]
+        with mock.patch.object(
+                daemon.daemon.DaemonContext, "_make_control_server",
+                return_value=mock_server):
+            instance.open()
+        self.mock_module_daemon.assert_has_calls(expected_calls)
+
+    def test_starts_control_server_after_entering_pidfile(self):
+        """ Should start serving the control socket after the PID file. """
+        instance = self.test_instance
+        instance.pidfile = self.mock_pidlockfile
+        instance.control_socket_path = self.getUniqueString()
+        mock_server = mock.MagicMock(daemon.control.ControlServer)
+        self.mock_module_daemon.attach_mock(
+                self.mock_pidlockfile, 'pidlockfile')
+        self.mock_module_daemon.attach_mock(mock_server, 'control_server')
+        expected_calls = [
+                mock.call.pidlockfile.__enter__(),
+                mock.call.control_server.start(),
+                ]
+        with mock.patch.object(
+                daemon.daemon.DaemonContext, "_make_control_server",
+                return_value=mock_server):
+            instance.open()
+        self.mock_module_daemon.assert_has_calls(expected_calls)
+
+    def test_starts_output_buffering_after_redirecting_streams(self):
+        """ Should start output buffering after redirecting streams. """
+        instance = self.test_instance
+        instance.output_buffering = mock.MagicMock(name="output_buffering")
+        self.mock_module_daemon.attach_mock(
+                instance.output_buffering, 'output_buffering')
+        expected_calls = [
+                mock.call.redirect_stream(sys.stderr, mock.ANY),
+                mock.call.output_buffering.start(),
+                ]
+        instance.open()
+        self.mock_module_daemon.assert_has_calls(expected_calls)
+        self.assertIn(instance.output_buffering, instance._services)
+
+    def test_starts_crash_log_after_setting_signal_handlers(self):
+        """ Should start the crash log after setting signal handlers. """
+        instance = self.test_instance
+        instance.crash_log = mock.MagicMock(name="crash_log")
+        self.mock_module_daemon.attach_mock(instance.crash_log, 'crash_log')
+        expected_calls = [
+                mock.call.set_signal_handlers(mock.ANY),
+                mock.call.crash_log.start(),
+                ]
+        instance.open()
+        self.mock_module_daemon.assert_has_calls(expected_calls)
+        self.assertEqual([instance.crash_log], instance._services)
+
+    def test_starts_watchdog_after_entering_pidfile(self):
+        """ Should start the watchdog after entering the PID file. """
+        instance = self.test_instance
+        instance.pidfile = self.mock_pidlockfile
+        instance.watchdog = mock.MagicMock(name="watchdog")
+        self.mock_module_daemon.attach_mock(
+                self.mock_pidlockfile, 'pidlockfile')
+        self.mock_module_daemon.attach_mock(instance.watchdog, 'watchdog')
+        expected_calls = [
+                mock.call.pidlockfile.__enter__(),
+                mock.call.watchdog.start(),
+                ]
+        instance.open()
+        self.mock_module_daemon.assert_has_calls(expected_calls)
+
+    def test_records_fd_audit_around_closing_files(self):
+        """ Should record the fd audit before and after closing files. """
+        instance = self.test_instance
+        instance.fd_audit = mock.MagicMock(name="fd_audit")
+        self.mock_module_daemon.attach_mock(instance.fd_audit, 'fd_audit')
+        expected_calls = [
+                mock.call.fd_audit.record_before_close(
+                    self.test_files_preserve_fds),
+                mock.call.close_all_open_files(
+                    exclude=self.test_files_preserve_fds),
+                mock.call.fd_audit.record_after_close(),
+                mock.call.redirect_stream(mock.ANY, mock.ANY),
+                ]
+        instance.open()
+        self.mock_module_daemon.assert_has_calls(expected_calls)
+        instance.fd_audit.start.assert_called_with()
+
+    def test_starts_gc_monitor_after_watchdog(self):
+        """ Should start the GC monitor after the watchdog. """
+        instance = self.test_instance
+        instance.watchdog = mock.MagicMock(name="watchdog")
+        instance.gc_monitor = mock.MagicMock(name="gc_monitor")
+        self.mock_module_daemon.attach_mock(instance.watchdog, 'watchdog')
+        self.mock_module_daemon.attach_mock(
+                instance.gc_monitor, 'gc_monitor')
+        expected_calls = [
+                mock.call.watchdog.start(),
+                mock.call.gc_monitor.start(),
+                ]
+        instance.open()
+        self.mock_module_daemon.assert_has_calls(expected_calls)
+        self.assertIn(instance.gc_monitor, instance._services)
+
+    def test_starts_crash_buffer_after_output_buffering(self):
+        """ Should start the crash buffer after output buffering. """
+        instance = self.test_instance
+        instance.output_buffering = mock.MagicMock(name="output_buffering")
+        instance.crash_buffer = mock.MagicMock(name="crash_buffer")
+        self.mock_module_daemon.attach_mock(
+                instance.output_buffering, 'output_buffering')
+        self.mock_module_daemon.attach_mock(
+                instance.crash_buffer, 'crash_buffer')
+        expected_calls = [
+                mock.call.output_buffering.start(),
+                mock.call.crash_buffer.start(),
+                ]
+        instance.open()
+        self.mock_module_daemon.assert_has_calls(expected_calls)
+
+    def test_starts_stream_services_before_closing_files(self):
+        """ Should start stream services before closing open files. """
+        instance = self.test_instance
+        instance.detach_process = True
+        expected_calls = [
+                mock.call.detach_process_context(),
+                mock.call.DaemonContext._make_signal_handler_map(),
+                mock.call.set_signal_handlers(mock.ANY),
+                mock.call.DaemonContext._start_stream_services(),
+                mock.call.DaemonContext._get_exclude_file_descriptors(),
+                mock.call.close_all_open_files(exclude=mock.ANY),
+                ]
+        with mock.patch.object(
+                daemon.daemon.DaemonContext,
+                "_start_stream_services") as mock_func:
+            self.mock_module_daemon.DaemonContext.attach_mock(
+                    mock_func, "_start_stream_services")
+            instance.open()
+        self.mock_module_daemon.assert_has_calls(expected_calls)
+
+    def test_omits_control_server_by_default(self):
+        """ Should not make a control server if no socket path. """
+        instance = self.test_instance
+        with mock.patch.object(
+                daemon.daemon.DaemonContext,
+                "_make_control_server") as mock_func:
+            instance.open()
+        self.assertFalse(mock_func.called)
+
 
 class DaemonContext_close_TestCase(DaemonContext_BaseTestCase):
     """ Test cases for DaemonContext.close method. """
@@ -582,6 +938,355 @@ class DaemonContext_close_TestCase(DaemonContext_BaseTestCase):
         instance.close()
         self.assertEqual(False, instance.is_open)
 
+    def test_stops_started_services_in_reverse_order(self):
+        """ Should stop started services in reverse order of starting. """
+        instance = self.test_instance
+        mock_services = mock.MagicMock()
+        instance._services = [mock_services.first, mock_services.second]
+        instance.close()
+        self.assertEqual(
+                [mock.call.second.stop(), mock.call.first.stop()],
+                mock_services.mock_calls)
+        self.assertEqual([], instance._services)
+
+    def test_stops_control_server(self):
+        """ Should stop the control server. """
+        instance = self.test_instance
+        mock_server = mock.MagicMock(daemon.control.ControlServer)
+        instance._control_server = mock_server
+        instance.close()
+        mock_server.stop.assert_called_with()
+        self.assertIs(None, instance._control_server)
+
+    def test_stops_profiler(self):
+        """ Should stop the profiler. """
+        instance = self.test_instance
+        instance.profiler = mock.MagicMock(name="profiler")
+        instance.close()
+        instance.profiler.stop.assert_called_with()
+
+    def test_stops_profile_window(self):
+        """ Should stop the profile window. """
+        instance = self.test_instance
+        instance.profile_window = mock.MagicMock(name="profile_window")
+        instance.close()
+        instance.profile_window.stop.assert_called_with()
+
+    def test_disarms_memory_snapshots(self):
+        """ Should disarm the memory snapshots. """
+        instance = self.test_instance
+        instance.memory_snapshots = mock.MagicMock(name="memory_snapshots")
+        instance.close()
+        instance.memory_snapshots.disarm.assert_called_with()
+
+
+class DaemonContext_start_stream_services_TestCase(
+        DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext._start_stream_services method. """
+
+    def test_starts_each_stream_with_start_method(self):
+        """ Should start each stream object that has a `start` method. """
+        instance = self.test_instance
+        instance.stdout = mock.MagicMock(name="stdout")
+        instance.stderr = mock.MagicMock(name="stderr")
+        instance._start_stream_services()
+        instance.stdout.start.assert_called_with()
+        instance.stderr.start.assert_called_with()
+        self.assertEqual(
+                [instance.stdout, instance.stderr], instance._services)
+
+    def test_starts_shared_stream_once(self):
+        """ Should start a stream object only once if shared. """
+        instance = self.test_instance
+        test_stream = mock.MagicMock(name="shared")
+        instance.stdout = test_stream
+        instance.stderr = test_stream
+        instance._start_stream_services()
+        self.assertEqual(1, test_stream.start.call_count)
+        self.assertEqual([test_stream], instance._services)
+
+    def test_ignores_streams_without_start_method(self):
+        """ Should ignore stream objects without a `start` method. """
+        instance = self.test_instance
+        instance._start_stream_services()
+        self.assertEqual([], instance._services)
+
+
+@mock.patch.object(daemon.daemon, "reopen_stream")
+class DaemonContext_reopen_streams_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext.reopen_streams method. """
+
+    def test_reopens_output_streams(self, mock_func_reopen_stream):
+        """ Should reopen the `stdout` and `stderr` streams. """
+        instance = self.test_instance
+        expected_calls = [
+                mock.call(sys.stdout, instance.stdout),
+                mock.call(sys.stderr, instance.stderr),
+                ]
+        instance.reopen_streams(signal.SIGHUP, None)
+        self.assertEqual(expected_calls, mock_func_reopen_stream.mock_calls)
+
+    def test_is_usable_as_signal_map_target(self, mock_func_reopen_stream):
+        """ Should be the signal handler for name ‘reopen_streams’. """
+        instance = self.test_instance
+        result = instance._make_signal_handler('reopen_streams')
+        self.assertEqual(instance.reopen_streams, result)
+
+
+class DaemonContext_toggle_profiler_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext.toggle_profiler method. """
+
+    def test_toggles_profiler(self):
+        """ Should toggle the profiler. """
+        instance = self.test_instance
+        instance.profiler = mock.MagicMock(name="profiler")
+        instance.toggle_profiler(signal.SIGUSR2, None)
+        instance.profiler.toggle.assert_called_with()
+
+    def test_ignores_missing_profiler(self):
+        """ Should do nothing if there is no profiler. """
+        instance = self.test_instance
+        instance.toggle_profiler(signal.SIGUSR2, None)
+
+    def test_is_usable_as_signal_map_target(self):
+        """ Should be the signal handler for name ‘toggle_profiler’. """
+        instance = self.test_instance
+        result = instance._make_signal_handler('toggle_profiler')
+        self.assertEqual(instance.toggle_profiler, result)
+
+
+class DaemonContext_request_profile_window_TestCase(
+        DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext.request_profile_window method. """
+
+    def test_passes_signal_to_profile_window(self):
+        """ Should pass the signal to the profile window handler. """
+        instance = self.test_instance
+        instance.profile_window = mock.MagicMock(name="profile_window")
+        test_frame = object()
+        instance.request_profile_window(signal.SIGPROF, test_frame)
+        instance.profile_window.handle_signal.assert_called_with(
+                signal.SIGPROF, test_frame)
+
+    def test_is_usable_as_signal_map_target(self):
+        """ Should be the handler for name ‘request_profile_window’. """
+        instance = self.test_instance
+        result = instance._make_signal_handler('request_profile_window')
+        self.assertEqual(instance.request_profile_window, result)
+
+
+class DaemonContext_take_memory_snapshot_TestCase(
+        DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext.take_memory_snapshot method. """
+
+    def test_passes_signal_to_memory_snapshots(self):
+        """ Should pass the signal to the memory snapshots handler. """
+        instance = self.test_instance
+        instance.memory_snapshots = mock.MagicMock(name="memory_snapshots")
+        instance.take_memory_snapshot(signal.SIGUSR1, None)
+        instance.memory_snapshots.handle_signal.assert_called_with(
+                signal.SIGUSR1, None)
+
+    def test_is_usable_as_signal_map_target(self):
+        """ Should be the handler for name ‘take_memory_snapshot’. """
+        instance = self.test_instance
+        result = instance._make_signal_handler('take_memory_snapshot')
+        self.assertEqual(instance.take_memory_snapshot, result)
+
+
+class DaemonContext_start_log_rotation_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext._start_log_rotation method. """
+
+    def test_adds_output_streams_then_starts(self):
+        """ Should add the output streams, then start the rotation. """
+        instance = self.test_instance
+        instance.log_rotation = mock.MagicMock(name="log_rotation")
+        expected_calls = [
+                mock.call.add_stream(sys.stdout, instance.stdout),
+                mock.call.add_stream(sys.stderr, instance.stderr),
+                mock.call.start(),
+                ]
+        instance._start_log_rotation()
+        self.assertEqual(expected_calls, instance.log_rotation.mock_calls)
+        self.assertEqual([instance.log_rotation], instance._services)
+
+
+class DaemonContext_get_metrics_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext.get_metrics method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(DaemonContext_get_metrics_TestCase, self).setUp()
+
+        self.test_process_metrics = {'pid': self.getUniqueInteger()}
+        func_patcher_get_process_metrics = mock.patch.object(
+                daemon.control, "get_process_metrics",
+                side_effect=(lambda: dict(self.test_process_metrics)))
+        func_patcher_get_process_metrics.start()
+        self.addCleanup(func_patcher_get_process_metrics.stop)
+
+    def test_includes_process_metrics(self):
+        """ Should include the process metrics. """
+        instance = self.test_instance
+        result = instance.get_metrics()
+        self.assertEqual(self.test_process_metrics['pid'], result['pid'])
+
+    def test_includes_stream_stats(self):
+        """ Should include stats from each stream with `stats` method. """
+        instance = self.test_instance
+        test_stats = {'bytes_dropped': 7}
+        instance.stderr = mock.MagicMock(name="stderr")
+        instance.stderr.stats.return_value = test_stats
+        result = instance.get_metrics()
+        self.assertEqual(test_stats, result['stderr'])
+        self.assertNotIn('stdout', result)
+
+    def test_includes_watchdog_stats(self):
+        """ Should include stats from the watchdog. """
+        instance = self.test_instance
+        test_stats = {'stall_count': 3}
+        instance.watchdog = mock.MagicMock(name="watchdog")
+        instance.watchdog.stats.return_value = test_stats
+        result = instance.get_metrics()
+        self.assertEqual(test_stats, result['watchdog'])
+
+    def test_includes_open_step_timings(self):
+        """ Should include the timings of the `open` steps. """
+        instance = self.test_instance
+        instance.open_timings = [
+                daemon.daemon.StepTiming('change_process_owner', 1500)]
+        result = instance.get_metrics()
+        self.assertEqual(
+                {'change_process_owner': 1500}, result['open_steps_ns'])
+
+    def test_includes_fd_audit_stats(self):
+        """ Should include stats from the fd audit. """
+        instance = self.test_instance
+        test_stats = {'fd_count': 12}
+        instance.fd_audit = mock.MagicMock(name="fd_audit")
+        instance.fd_audit.stats.return_value = test_stats
+        result = instance.get_metrics()
+        self.assertEqual(test_stats, result['fd_audit'])
+
+    def test_includes_gc_monitor_stats(self):
+        """ Should include stats from the GC monitor. """
+        instance = self.test_instance
+        test_stats = {'frozen': 9}
+        instance.gc_monitor = mock.MagicMock(name="gc_monitor")
+        instance.gc_monitor.stats.return_value = test_stats
+        result = instance.get_metrics()
+        self.assertEqual(test_stats, result['gc'])
+
+    def test_includes_profiler_stats(self):
+        """ Should include stats from the profiler. """
+        instance = self.test_instance
+        test_stats = {'samples': 5}
+        instance.profiler = mock.MagicMock(name="profiler")
+        instance.profiler.stats.return_value = test_stats
+        result = instance.get_metrics()
+        self.assertEqual(test_stats, result['profiler'])
+
+
+class DaemonContext_control_commands_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext control socket commands. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(DaemonContext_control_commands_TestCase, self).setUp()
+
+        self.test_instance.control_socket_path = self.getUniqueString()
+        self.test_server = self.test_instance._make_control_server()
+        self.test_instance._control_server = self.test_server
+
+        func_patcher_os_kill = mock.patch.object(os, "kill")
+        func_patcher_os_kill.start()
+        self.addCleanup(func_patcher_os_kill.stop)
+
+    def test_registers_expected_commands(self):
+        """ Should register each of the expected commands. """
+        expected_names = set([
+                'status', 'metrics', 'reload', 'dump-stacks', 'shutdown'])
+        self.assertEqual(expected_names, set(self.test_server.commands))
+
+    def test_status_includes_process_id(self):
+        """ Status command should include the process ID. """
+        response = self.test_server.handle_request(b"status")
+        self.assertEqual(os.getpid(), response['result']['pid'])
+
+    def test_reload_sends_sighup_if_mapped(self):
+        """ Reload command should send SIGHUP if mapped in signal map. """
+        self.test_instance.signal_map = {signal.SIGHUP: object()}
+        response = self.test_server.handle_request(b"reload")
+        self.assertTrue(response['ok'])
+        os.kill.assert_called_with(os.getpid(), signal.SIGHUP)
+
+    def test_reload_fails_if_sighup_not_mapped(self):
+        """ Reload command should fail if SIGHUP is not in signal map. """
+        self.test_instance.signal_map = {}
+        response = self.test_server.handle_request(b"reload")
+        self.assertFalse(response['ok'])
+        self.assertFalse(os.kill.called)
+
+    def test_shutdown_defers_terminate_signal(self):
+        """ Shutdown command should send SIGTERM after responding. """
+        response = self.test_server.handle_request(b"shutdown")
+        self.assertTrue(response['ok'])
+        self.assertFalse(os.kill.called)
+        self.test_server._run_deferred()
+        os.kill.assert_called_with(os.getpid(), signal.SIGTERM)
+
+
+class DaemonContext_profile_commands_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext control socket profile commands. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(DaemonContext_profile_commands_TestCase, self).setUp()
+
+        self.test_instance.control_socket_path = self.getUniqueString()
+        self.test_instance.profiler = mock.MagicMock(name="profiler")
+        self.test_server = self.test_instance._make_control_server()
+
+    def test_registers_profile_commands(self):
+        """ Should register the profile commands. """
+        self.assertIn('profile-start', self.test_server.commands)
+        self.assertIn('profile-stop', self.test_server.commands)
+
+    def test_profile_start_starts_profiler(self):
+        """ Profile start command should start the profiler. """
+        profiler = self.test_instance.profiler
+        profiler.stats.return_value = {'running': True}
+        response = self.test_server.handle_request(b"profile-start")
+        profiler.start.assert_called_with()
+        self.assertEqual({'running': True}, response['result'])
+
+    def test_profile_stop_responds_with_path(self):
+        """ Profile stop command should respond with the output path. """
+        profiler = self.test_instance.profiler
+        profiler.stop.return_value = "/tmp/profile.txt"
+        response = self.test_server.handle_request(b"profile-stop")
+        self.assertEqual({'path': "/tmp/profile.txt"}, response['result'])
+
+    def test_profile_window_requests_window(self):
+        """ Profile window command should request a window. """
+        self.test_instance.profile_window = mock.MagicMock(
+                name="profile_window", directory="/tmp", duration=5)
+        server = self.test_instance._make_control_server()
+        response = server.handle_request(b"profile-window")
+        self.test_instance.profile_window.request.assert_called_with()
+        self.assertEqual(
+                {'directory': "/tmp", 'duration': 5}, response['result'])
+
+    def test_memory_snapshot_responds_with_path(self):
+        """ Memory snapshot command should respond with the path. """
+        self.test_instance.memory_snapshots = mock.MagicMock(
+                name="memory_snapshots")
+        self.test_instance.memory_snapshots.request.return_value = "/tmp/m"
+        server = self.test_instance._make_control_server()
+        response = server.handle_request(b"memory-snapshot")
+        self.assertEqual({'path': "/tmp/m"}, response['result'])
+        self.assertIn('memory-disarm', server.commands)
+
 
 @mock.patch.object(daemon.daemon.DaemonContext, "open")
 class DaemonContext_context_manager_enter_TestCase(DaemonContext_BaseTestCase):
@@ -749,6 +1454,48 @@ class DaemonContext_get_exclude_file_descriptors_TestCase(
         result = instance._get_exclude_file_descriptors()
         self.assertEqual(expected_result, result)
 
+    def test_includes_control_socket(self):
+        """ Should include the control socket file descriptor. """
+        instance = self.test_instance
+        instance.files_preserve = None
+        test_fd = self.getUniqueInteger()
+        instance._control_server = mock.MagicMock(
+                daemon.control.ControlServer)
+        instance._control_server.fileno.return_value = test_fd
+        result = instance._get_exclude_file_descriptors()
+        self.assertIn(test_fd, result)
+
+    def test_includes_files_preserve_of_started_services(self):
+        """ Should include the `files_preserve` of started services. """
+        instance = self.test_instance
+        instance.files_preserve = None
+        test_fds = [self.getUniqueInteger(), self.getUniqueInteger()]
+        test_service = mock.MagicMock(name="service")
+        test_service.files_preserve = test_fds
+        instance._services = [test_service]
+        result = instance._get_exclude_file_descriptors()
+        self.assertTrue(set(test_fds).issubset(result))
+
+    def test_includes_files_preserve_of_fd_audit(self):
+        """ Should include the `files_preserve` of the fd audit. """
+        instance = self.test_instance
+        instance.files_preserve = None
+        test_fd = self.getUniqueInteger()
+        instance.fd_audit = mock.MagicMock(name="fd_audit")
+        instance.fd_audit.files_preserve = [test_fd]
+        result = instance._get_exclude_file_descriptors()
+        self.assertIn(test_fd, result)
+
+    def test_includes_files_preserve_of_pidfile(self):
+        """ Should include the `files_preserve` of the PID file. """
+        instance = self.test_instance
+        instance.files_preserve = None
+        test_fd = self.getUniqueInteger()
+        instance.pidfile = mock.MagicMock(name="pidfile")
+        instance.pidfile.files_preserve = [test_fd]
+        result = instance._get_exclude_file_descriptors()
+        self.assertIn(test_fd, result)
+
     def test_omits_none_streams(self):
         """ Should omit any stream attribute which is None. """
         instance = self.test_instance
@@ -846,7 +1593,144 @@ class DaemonContext_make_signal_handler_map_TestCase(
         result = instance._make_signal_handler_map()
         self.assertEqual(expected_result, result)
 
+    def test_adds_memory_snapshots_signal(self):
+        """ Should map the memory snapshots signal to its handler. """
+        instance = self.test_instance
+        test_signal = object()
+        instance.memory_snapshots = mock.MagicMock(name="memory_snapshots")
+        instance.memory_snapshots.signal_number = test_signal
+        self.test_signal_handlers['take_memory_snapshot'] = object()
+        result = instance._make_signal_handler_map()
+        self.assertEqual(
+                self.test_signal_handlers['take_memory_snapshot'],
+                result[test_signal])
+
+    def test_adds_profile_window_signal(self):
+        """ Should map the profile window signal to its handler. """
+        instance = self.test_instance
+        test_signal = object()
+        instance.profile_window = mock.MagicMock(name="profile_window")
+        instance.profile_window.signal_number = test_signal
+        self.test_signal_handlers['request_profile_window'] = object()
+        expected_result = dict(self.test_signal_handler_map)
+        expected_result[test_signal] = (
+                self.test_signal_handlers['request_profile_window'])
+        result = instance._make_signal_handler_map()
+        self.assertEqual(expected_result, result)
+
 
+class OpenStages_TestCase(scaffold.TestCase):
+    """ Test cases for OpenStages class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(OpenStages_TestCase, self).setUp()
+
+        self.test_instance = daemon.daemon.OpenStages(
+                daemon.daemon.OpenStage(name, None)
+                for name in ['alpha', 'beta', 'gamma'])
+        self.test_stage = daemon.daemon.OpenStage('delta', None)
+
+    def get_names(self):
+        """ Get the names of the test stages, in sequence. """
+        return [stage.name for stage in self.test_instance]
+
+    def test_inserts_stage_before_name(self):
+        """ Should insert a stage before the named stage. """
+        self.test_instance.insert_before('beta', self.test_stage)
+        self.assertEqual(
+                ['alpha', 'delta', 'beta', 'gamma'], self.get_names())
+
+    def test_inserts_stage_after_name(self):
+        """ Should insert a stage after the named stage. """
+        self.test_instance.insert_after('gamma', self.test_stage)
+        self.assertEqual(
+                ['alpha', 'beta', 'gamma', 'delta'], self.get_names())
+
+    def test_removes_named_stage(self):
+        """ Should remove the named stage. """
+        result = self.test_instance.remove_stage('beta')
+        self.assertEqual('beta', result.name)
+        self.assertEqual(['alpha', 'gamma'], self.get_names())
+
+    def test_replaces_named_stage(self):
+        """ Should replace the named stage. """
+        self.test_instance.replace_stage('alpha', self.test_stage)
+        self.assertEqual(['delta', 'beta', 'gamma'], self.get_names())
+
+    def test_moves_stage_after_name(self):
+        """ Should move the named stage after another. """
+        self.test_instance.move_after('alpha', 'gamma')
+        self.assertEqual(['beta', 'gamma', 'alpha'], self.get_names())
+
+    def test_moves_stage_before_name(self):
+        """ Should move the named stage before another. """
+        self.test_instance.move_before('gamma', 'alpha')
+        self.assertEqual(['gamma', 'alpha', 'beta'], self.get_names())
+
+    def test_raises_key_error_for_unknown_name(self):
+        """ Should raise KeyError for an unknown stage name. """
+        self.assertRaises(KeyError, self.test_instance.get_stage, 'bogus')
+
+
+class make_open_stages_TestCase(scaffold.TestCase):
+    """ Test cases for make_open_stages function. """
+
+    def get_names(self, preset):
+        """ Get the names of the stages of a preset. """
+        return [
+                stage.name
+                for stage in daemon.daemon.make_open_stages(preset)]
+
+    def test_returns_new_list_each_call(self):
+        """ Should return a new list of stages for each call. """
+        stages = daemon.daemon.make_open_stages()
+        stages.remove_stage('close_all_open_files')
+        self.assertIn('close_all_open_files', self.get_names('classic'))
+
+    def test_container_omits_detach_and_close_files(self):
+        """ Container preset should not detach, nor close files. """
+        names = self.get_names('container')
+        self.assertNotIn('detach_process_context', names)
+        self.assertNotIn('close_all_open_files', names)
+
+    def test_container_enters_pidfile_before_changing_owner(self):
+        """ Container preset should enter the PID file before the owner. """
+        names = self.get_names('container')
+        self.assertLess(
+                names.index('bind_control_socket'),
+                names.index('change_process_owner'))
+        self.assertLess(
+                names.index('enter_pidfile'),
+                names.index('change_process_owner'))
+
+    def test_container_changes_owner_before_starting_services(self):
+        """ Container preset should change owner before any service. """
+        names = self.get_names('container')
+        owner_index = names.index('change_process_owner')
+        for name in [
+                'start_crash_log', 'start_stream_services',
+                'start_output_buffering', 'start_crash_buffer',
+                'start_log_rotation', 'start_watchdog',
+                'start_gc_monitor', 'start_fd_audit',
+                'start_control_server']:
+            self.assertLess(owner_index, names.index(name))
+
+    def test_service_manager_omits_detach_and_close_files(self):
+        """ Service manager preset should not detach, nor close files. """
+        names = self.get_names('service-manager')
+        self.assertNotIn('detach_process_context', names)
+        self.assertNotIn('close_all_open_files', names)
+        self.assertLess(
+                names.index('change_process_owner'),
+                names.index('enter_pidfile'))
+
+    def test_raises_value_error_for_unknown_preset(self):
+        """ Should raise ValueError for an unknown preset. """
+        self.assertRaises(
+                ValueError, daemon.daemon.make_open_stages, 'bogus')
+
+
 try:
     FileNotFoundError
 except NameError:
@@ -1597,6 +2481,14 @@ class is_socket_TestCase(scaffold.TestCase):
         result = daemon.daemon.is_socket(test_fd)
         self.assertIs(result, expected_result)
 
+    def test_returns_false_if_fromfd_raises_not_socket_error(self):
+        """ Should return False if making the socket finds a non-socket. """
+        test_fd = 23
+        socket.fromfd.side_effect = self.fake_socket_error
+        expected_result = False
+        result = daemon.daemon.is_socket(test_fd)
+        self.assertIs(result, expected_result)
+
     def test_returns_false_if_stdin_socket_raises_error(self):
         """ Should return True if `stdin` is a socket and raises error. """
         test_fd = 23
@@ -1753,6 +2645,57 @@ class redirect_stream_TestCase(scaffold.TestCase):
         mock_func_os_dup2.assert_called_with(null_fileno, system_fileno)
 
 
+@mock.patch.object(os, "close")
+@mock.patch.object(os, "dup2")
+class reopen_stream_TestCase(scaffold.TestCase):
+    """ Test cases for reopen_stream function. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(reopen_stream_TestCase, self).setUp()
+
+        self.test_system_stream = FakeFileDescriptorStringIO()
+        self.test_target_stream = FakeFileDescriptorStringIO()
+        self.test_target_stream.name = tempfile.mktemp()
+        self.test_new_fd = self.getUniqueInteger()
+
+        func_patcher_os_open = mock.patch.object(
+                os, "open", return_value=self.test_new_fd)
+        self.mock_func_os_open = func_patcher_os_open.start()
+        self.addCleanup(func_patcher_os_open.stop)
+
+    def test_opens_target_path_for_append(
+            self, mock_func_os_dup2, mock_func_os_close):
+        """ Should open the target path for writing in append mode. """
+        expected_flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+        daemon.daemon.reopen_stream(
+                self.test_system_stream, self.test_target_stream)
+        self.mock_func_os_open.assert_called_with(
+                self.test_target_stream.name, expected_flags, mock.ANY)
+
+    def test_duplicates_new_file_over_both_streams(
+            self, mock_func_os_dup2, mock_func_os_close):
+        """ Should duplicate the new file over target and system streams. """
+        expected_calls = [
+                mock.call(self.test_new_fd, self.test_target_stream.fileno()),
+                mock.call(self.test_new_fd, self.test_system_stream.fileno()),
+                ]
+        result = daemon.daemon.reopen_stream(
+                self.test_system_stream, self.test_target_stream)
+        self.assertEqual(expected_calls, mock_func_os_dup2.mock_calls)
+        mock_func_os_close.assert_called_with(self.test_new_fd)
+        self.assertTrue(result)
+
+    def test_ignores_target_without_path(
+            self, mock_func_os_dup2, mock_func_os_close):
+        """ Should do nothing if the target has no filesystem path. """
+        self.test_target_stream.name = self.getUniqueInteger()
+        result = daemon.daemon.reopen_stream(
+                self.test_system_stream, self.test_target_stream)
+        self.assertFalse(self.mock_func_os_open.called)
+        self.assertFalse(result)
+
+
 class make_default_signal_map_TestCase(scaffold.TestCase):
     """ Test cases for make_default_signal_map function. """
 
@@ -1837,7 +2780,7 @@ class set_signal_handlers_TestCase(scaffold.TestCase):
         self.assertEquals(expected_calls, mock_func_signal_signal.mock_calls)
 
 
-@mock.patch.object(daemon.daemon.atexit, "register")
+@mock.patch.object(atexit, "register")
 class register_atexit_function_TestCase(scaffold.TestCase):
     """ Test cases for register_atexit_function function. """
 
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_fdaudit.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘fdaudit’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import io
+import os
+import shutil
+import tempfile
+
+from . import scaffold
+
+import daemon.fdaudit
+
+
+class describe_fd_TestCase(scaffold.TestCase):
+    """ Test cases for ‘describe_fd’ function. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(describe_fd_TestCase, self).setUp()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def test_describes_open_file(self):
+        """ Should describe the target, type, and flags of a file. """
+        path = os.path.join(self.temp_dir, "log")
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        self.addCleanup(os.close, fd)
+        info = daemon.fdaudit.describe_fd(fd)
+        self.assertEqual('file', info.type)
+        self.assertEqual(os.O_WRONLY, info.flags & os.O_ACCMODE)
+        self.assertTrue(info.flags & os.O_APPEND)
+        self.assertIn("O_APPEND", daemon.fdaudit.format_fd_info(info))
+        if info.target is not None:
+            self.assertEqual(path, info.target)
+
+    def test_describes_pipe(self):
+        """ Should describe the type of a pipe. """
+        (read_fd, write_fd) = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+        info = daemon.fdaudit.describe_fd(read_fd)
+        self.assertEqual('pipe', info.type)
+
+    def test_returns_none_for_closed_fd(self):
+        """ Should return ``None`` for a file descriptor not open. """
+        (read_fd, write_fd) = os.pipe()
+        os.close(read_fd)
+        os.close(write_fd)
+        self.assertIs(None, daemon.fdaudit.describe_fd(read_fd))
+
+
+class list_open_fds_TestCase(scaffold.TestCase):
+    """ Test cases for ‘list_open_fds’ function. """
+
+    def test_lists_new_fds_without_own_directory_fd(self):
+        """ Should list new file descriptors, not its own directory's. """
+        before = daemon.fdaudit.list_open_fds()
+        (read_fd, write_fd) = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+        after = daemon.fdaudit.list_open_fds()
+        self.assertEqual(
+                set([read_fd, write_fd]), set(after) - set(before))
+
+
+class FdAudit_TestCase(scaffold.TestCase):
+    """ Test cases for ‘FdAudit’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(FdAudit_TestCase, self).setUp()
+
+        self.test_output = io.StringIO()
+        self.test_instance = daemon.fdaudit.FdAudit(output=self.test_output)
+        self.addCleanup(self.test_instance.stop)
+
+    def make_pipe(self):
+        """ Make a pipe, closed at cleanup if still open. """
+        fds = os.pipe()
+        for fd in fds:
+            self.addCleanup(self.close_if_open, fd)
+        return fds
+
+    def close_if_open(self, fd):
+        """ Close a file descriptor if it is still open. """
+        if daemon.fdaudit.is_fd_open(fd):
+            os.close(fd)
+
+    def test_reports_closed_preserved_and_unexpected(self):
+        """ Should report the closed, preserved, and unexpected fds. """
+        (closed_fd, preserved_fd) = self.make_pipe()
+        (unexpected_fd, other_fd) = self.make_pipe()
+        self.test_instance.record_before_close([preserved_fd])
+        os.close(closed_fd)
+        os.close(other_fd)
+        self.test_instance.record_after_close()
+        report = self.test_instance.get_close_report()
+        self.assertEqual(
+                set([closed_fd, other_fd]),
+                set([closed_fd, other_fd]) & set(
+                    info.fd for info in report['closed']))
+        self.assertEqual(
+                [preserved_fd], [info.fd for info in report['preserved']])
+        self.assertIn(
+                unexpected_fd, [info.fd for info in report['unexpected']])
+
+        self.test_instance.start()
+        output = self.test_output.getvalue()
+        self.assertIn("File descriptors closed:", output)
+        self.assertIn("File descriptors preserved: 1", output)
+
+    def test_tracks_fd_count_growth(self):
+        """ Should track the growth of open fds, reporting new maximum. """
+        self.test_instance.start()
+        baseline_count = self.test_instance.fd_count
+        (read_fd, write_fd) = self.make_pipe()
+        self.test_instance.audit()
+        stats = self.test_instance.stats()
+        self.assertEqual(baseline_count + 2, stats['fd_count'])
+        self.assertEqual(2, stats['fd_growth'])
+        self.assertEqual(baseline_count + 2, stats['fd_count_max'])
+        output = self.test_output.getvalue()
+        self.assertIn("+2 since start", output)
+        self.assertIn("{fd:d} -> ".format(fd=read_fd), output)
+
+    def test_reports_growth_only_at_new_maximum(self):
+        """ Should report growth only when the count reaches a maximum. """
+        self.test_instance.start()
+        self.make_pipe()
+        self.test_instance.audit()
+        self.test_instance.audit()
+        self.assertEqual(
+                1, self.test_output.getvalue().count("since start"))
+
+    def test_audits_periodically_when_interval(self):
+        """ Should audit in a background thread if `interval`. """
+        self.test_instance.interval = 0.01
+        self.test_instance.start()
+        while self.test_instance.audit_count < 2:
+            self.test_instance._stop_event.wait(0.01)
+        self.test_instance.stop()
+        self.assertIs(None, self.test_instance.thread)
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
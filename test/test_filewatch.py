@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_filewatch.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘filewatch’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import errno
+import io
+import os
+import shutil
+import tempfile
+import threading
+
+import mock
+
+from . import scaffold
+
+import daemon.filewatch
+
+
+class wait_for_change_functions_TestCase(scaffold.TestCaseWithScenarios):
+    """ Test cases for the functions waiting for a file to change. """
+
+    scenarios = [
+            ('inotify', {
+                'wait_func_name': 'wait_for_change_inotify',
+                }),
+            ('polling', {
+                'wait_func_name': 'wait_for_change_polling',
+                }),
+            ('default', {
+                'wait_func_name': 'wait_for_change',
+                }),
+            ]
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(wait_for_change_functions_TestCase, self).setUp()
+
+        if (
+                self.wait_func_name == 'wait_for_change_inotify'
+                and daemon.filewatch.get_inotify_library() is None):
+            self.skipTest("No ‘inotify’ interface")
+        self.wait_func = getattr(daemon.filewatch, self.wait_func_name)
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.test_path = os.path.join(self.temp_dir, "test.pid")
+        with io.open(self.test_path, 'w') as outfile:
+            outfile.write("1\n")
+
+    def change_later(self, func, delay=0.05):
+        """ Call `func` in a thread, after `delay` seconds. """
+        timer = threading.Timer(delay, func)
+        timer.start()
+        self.addCleanup(timer.join)
+
+    def test_returns_true_if_no_file(self):
+        """ Should return ``True`` at once if the file does not exist. """
+        os.remove(self.test_path)
+        result = self.wait_func(self.test_path, 5)
+        self.assertIs(True, result)
+
+    def test_returns_false_if_timeout_passes(self):
+        """ Should return ``False`` if the file is unchanged. """
+        result = self.wait_func(self.test_path, 0.05)
+        self.assertIs(False, result)
+
+    def test_returns_true_when_file_removed(self):
+        """ Should return ``True`` once the file is removed. """
+        self.change_later(lambda: os.remove(self.test_path))
+        result = self.wait_func(self.test_path, 5)
+        self.assertIs(True, result)
+
+    def test_returns_true_when_file_removed_while_open(self):
+        """ Should return ``True`` once the file is removed, while open. """
+        infile = io.open(self.test_path, 'r')
+        self.addCleanup(infile.close)
+        self.change_later(lambda: os.remove(self.test_path))
+        result = self.wait_func(self.test_path, 5)
+        self.assertIs(True, result)
+
+    def test_returns_true_when_file_modified(self):
+        """ Should return ``True`` once the file is modified. """
+        def modify():
+            with io.open(self.test_path, 'a') as outfile:
+                outfile.write("2\n")
+
+        self.change_later(modify)
+        result = self.wait_func(self.test_path, 5)
+        self.assertIs(True, result)
+
+    def test_waits_without_timeout(self):
+        """ Should wait until the file changes, if timeout is ``None``. """
+        self.change_later(lambda: os.remove(self.test_path))
+        result = self.wait_func(self.test_path, None)
+        self.assertIs(True, result)
+
+
+class wait_for_change_TestCase(scaffold.TestCase):
+    """ Test cases for ‘wait_for_change’ function. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(wait_for_change_TestCase, self).setUp()
+
+        self.test_path = tempfile.mktemp()
+
+        for func_name in [
+                'get_inotify_library',
+                'wait_for_change_inotify',
+                'wait_for_change_polling']:
+            func_patcher = mock.patch.object(daemon.filewatch, func_name)
+            func_patcher.start()
+            self.addCleanup(func_patcher.stop)
+
+    def test_uses_inotify_if_available(self):
+        """ Should wait with ‘inotify’, if available. """
+        result = daemon.filewatch.wait_for_change(self.test_path, 5)
+        daemon.filewatch.wait_for_change_inotify.assert_called_with(
+                self.test_path, 5)
+        self.assertFalse(daemon.filewatch.wait_for_change_polling.called)
+        self.assertIs(
+                daemon.filewatch.wait_for_change_inotify.return_value,
+                result)
+
+    def test_polls_if_inotify_not_available(self):
+        """ Should poll, if ‘inotify’ is not available. """
+        daemon.filewatch.get_inotify_library.return_value = None
+        result = daemon.filewatch.wait_for_change(self.test_path, 5)
+        daemon.filewatch.wait_for_change_polling.assert_called_with(
+                self.test_path, 5)
+        self.assertFalse(daemon.filewatch.wait_for_change_inotify.called)
+        self.assertIs(
+                daemon.filewatch.wait_for_change_polling.return_value,
+                result)
+
+    def test_polls_if_inotify_limit_reached(self):
+        """ Should poll, if a limit of ‘inotify’ is reached. """
+        daemon.filewatch.wait_for_change_inotify.side_effect = OSError(
+                errno.ENOSPC, "No space left on device")
+        daemon.filewatch.wait_for_change(self.test_path, 5)
+        daemon.filewatch.wait_for_change_polling.assert_called_with(
+                self.test_path, 5)
+
+    def test_raises_other_inotify_error(self):
+        """ Should raise any other error of ‘inotify’. """
+        daemon.filewatch.wait_for_change_inotify.side_effect = OSError(
+                errno.EACCES, "Permission denied")
+        self.assertRaises(
+                OSError,
+                daemon.filewatch.wait_for_change, self.test_path, 5)
+
+
+class wait_for_change_polling_TestCase(scaffold.TestCase):
+    """ Test cases for ‘wait_for_change_polling’ function. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(wait_for_change_polling_TestCase, self).setUp()
+
+        self.test_path = tempfile.mktemp()
+
+        patcher_identity = mock.patch.object(
+                daemon.filewatch, "get_file_identity",
+                side_effect=[1, 1, 1, 1, 2])
+        self.mock_func_identity = patcher_identity.start()
+        self.addCleanup(patcher_identity.stop)
+
+        patcher_sleep = mock.patch.object(daemon.filewatch.time, "sleep")
+        self.mock_func_sleep = patcher_sleep.start()
+        self.addCleanup(patcher_sleep.stop)
+
+    def test_doubles_interval_up_to_maximum(self):
+        """ Should double the polling interval, up to the maximum. """
+        result = daemon.filewatch.wait_for_change_polling(
+                self.test_path, interval_min=0.01, interval_max=0.03)
+        self.assertIs(True, result)
+        expected_calls = [
+                mock.call(0.01), mock.call(0.02),
+                mock.call(0.03), mock.call(0.03)]
+        self.assertEqual(expected_calls, self.mock_func_sleep.mock_calls)
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
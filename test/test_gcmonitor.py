@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_gcmonitor.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘gcmonitor’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import gc
+
+import mock
+
+from . import scaffold
+
+import daemon.gcmonitor
+
+
+class PauseHistogram_TestCase(scaffold.TestCase):
+    """ Test cases for ‘PauseHistogram’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(PauseHistogram_TestCase, self).setUp()
+
+        self.test_instance = daemon.gcmonitor.PauseHistogram(
+                smallest=0.001, count=4)
+
+    def test_percentile_none_without_pauses(self):
+        """ Should have no percentile without pauses. """
+        self.assertIs(None, self.test_instance.percentile(50))
+
+    def test_percentiles_are_bucket_bounds(self):
+        """ Should give the bucket upper bound for each percentile. """
+        for __ in range(98):
+            self.test_instance.add(0.0015)
+        for __ in range(2):
+            self.test_instance.add(0.006)
+        self.assertEqual(0.002, self.test_instance.percentile(50))
+        self.assertEqual(0.006, self.test_instance.percentile(99))
+        self.assertEqual(0.006, self.test_instance.maximum)
+
+    def test_counts_long_pause_in_final_bucket(self):
+        """ Should count a pause beyond the bounds in the final bucket. """
+        self.test_instance.add(3.0)
+        self.assertEqual(1, self.test_instance.counts[-1])
+        self.assertEqual(3.0, self.test_instance.percentile(99))
+
+
+class GCMonitor_TestCase(scaffold.TestCase):
+    """ Test cases for ‘GCMonitor’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(GCMonitor_TestCase, self).setUp()
+
+        self.addCleanup(gc.set_threshold, *gc.get_threshold())
+        self.test_instance = daemon.gcmonitor.GCMonitor()
+        self.addCleanup(self.test_instance.stop)
+
+    def test_measures_each_collection(self):
+        """ Should measure each collection by generation. """
+        self.test_instance.start()
+        gc.collect(2)
+        gc.collect(0)
+        generations = self.test_instance.stats()['generations']
+        self.assertGreaterEqual(generations[2]['collections'], 1)
+        self.assertGreaterEqual(generations[0]['collections'], 1)
+        self.assertGreater(generations[2]['pause_seconds_max'], 0)
+        self.assertIsNot(None, generations[2]['pause_seconds_p99'])
+
+    def test_counts_objects_collected(self):
+        """ Should count the objects collected. """
+        self.test_instance.start()
+        cycle = []
+        cycle.append(cycle)
+        del cycle
+        gc.collect(2)
+        generations = self.test_instance.stats()['generations']
+        self.assertGreaterEqual(generations[2]['collected'], 1)
+
+    def test_stops_measuring(self):
+        """ Should stop measuring when stopped. """
+        self.test_instance.start()
+        self.test_instance.stop()
+        self.assertNotIn(self.test_instance.callback, gc.callbacks)
+        gc.collect()
+        generations = self.test_instance.stats()['generations']
+        self.assertEqual(0, generations[2]['collections'])
+
+    def test_sets_then_restores_thresholds(self):
+        """ Should set the thresholds, then restore them when stopped. """
+        previous_thresholds = gc.get_threshold()
+        self.test_instance.thresholds = (5000, 20, 20)
+        self.test_instance.start()
+        self.assertEqual((5000, 20, 20), gc.get_threshold())
+        self.assertEqual(
+                [5000, 20, 20], self.test_instance.stats()['thresholds'])
+        self.test_instance.stop()
+        self.assertEqual(previous_thresholds, gc.get_threshold())
+
+    def test_freezes_objects_if_specified(self):
+        """ Should freeze the tracked objects if `freeze` is true. """
+        self.test_instance.freeze = True
+        with mock.patch.object(gc, "freeze") as mock_func_freeze:
+            self.test_instance.start()
+        mock_func_freeze.assert_called_with()
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
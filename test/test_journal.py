@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_journal.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘journal’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import os.path
+import array
+import logging
+import shutil
+import socket
+import struct
+import tempfile
+import unittest
+
+from . import scaffold
+
+import daemon.journal
+
+
+def setup_journal_socket_fixtures(testcase):
+    """ Set up common test fixtures for journal socket test cases.
+
+        :param testcase: A ``TestCase`` instance to decorate.
+        :return: ``None``.
+
+        The `testcase` gets a datagram socket `journal_socket`, bound
+        at `journal_path`, standing in for the journal socket.
+
+        """
+    testcase.temp_dir = tempfile.mkdtemp()
+    testcase.addCleanup(shutil.rmtree, testcase.temp_dir)
+    testcase.journal_path = os.path.join(testcase.temp_dir, "socket")
+
+    testcase.journal_socket = socket.socket(
+            socket.AF_UNIX, socket.SOCK_DGRAM)
+    testcase.addCleanup(testcase.journal_socket.close)
+    testcase.journal_socket.bind(testcase.journal_path)
+    testcase.journal_socket.settimeout(5)
+
+
+def receive_entry(testcase):
+    """ Receive one journal entry at the journal socket.
+
+        :return: The entry payload, as a byte string.
+
+        An entry passed as a file descriptor is read from the file.
+
+        """
+    fd_size = array.array(str("i")).itemsize
+    (data, ancillary, __, __) = testcase.journal_socket.recvmsg(
+            65536, socket.CMSG_LEN(fd_size))
+    for (level, kind, cmsg_data) in ancillary:
+        if (level, kind) == (socket.SOL_SOCKET, socket.SCM_RIGHTS):
+            fds = array.array(str("i"))
+            fds.frombytes(cmsg_data[:fd_size])
+            with os.fdopen(fds[0], 'rb') as passed_file:
+                data = passed_file.read()
+
+    return data
+
+
+def decode_fields(data):
+    """ Decode the fields of a journal entry.
+
+        :param data: The entry payload, as a byte string.
+        :return: A mapping of field name to value, as text.
+
+        """
+    fields = {}
+    while data:
+        (line, separator, rest) = data.partition(b"\n")
+        if b"=" in line:
+            (name, __, value) = line.partition(b"=")
+            data = rest
+        else:
+            name = line
+            (size,) = struct.unpack(str("<Q"), rest[:8])
+            value = rest[8:8 + size]
+            data = rest[8 + size + 1:]
+        fields[name.decode('ascii')] = value.decode('utf-8')
+
+    return fields
+
+
+class JournalSink_TestCase(scaffold.TestCase):
+    """ Test cases for ‘JournalSink’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(JournalSink_TestCase, self).setUp()
+
+        setup_journal_socket_fixtures(self)
+        self.test_instance = daemon.journal.JournalSink(
+                address=self.journal_path, ident="spam",
+                flush_interval=0.01)
+        self.addCleanup(self.test_instance.close)
+
+    def test_sends_standard_fields(self):
+        """ Should send the message with its standard fields. """
+        self.test_instance.start()
+        self.addCleanup(self.test_instance.stop)
+        self.test_instance.submit("Lorem ipsum\n", 3)
+        fields = decode_fields(receive_entry(self))
+        expected_fields = {
+                'MESSAGE': "Lorem ipsum",
+                'PRIORITY': "3",
+                'SYSLOG_FACILITY': "1",
+                'SYSLOG_IDENTIFIER': "spam",
+                'SYSLOG_PID': "{pid:d}".format(pid=os.getpid()),
+                }
+        self.assertEqual(expected_fields, fields)
+
+    def test_sends_extra_fields(self):
+        """ Should send the extra fields submitted with the message. """
+        self.test_instance.start()
+        self.addCleanup(self.test_instance.stop)
+        self.test_instance.submit(
+                "Wibble", fields={'REQUEST_ID': 42, 'DETAIL': "a\nb"})
+        fields = decode_fields(receive_entry(self))
+        self.assertEqual("42", fields['REQUEST_ID'])
+        self.assertEqual("a\nb", fields['DETAIL'])
+
+    def test_raises_value_error_for_invalid_field_name(self):
+        """ Should raise ValueError for an invalid field name. """
+        self.assertRaises(
+                ValueError,
+                self.test_instance.submit, "Wibble", fields={'_PID': 1})
+
+    def test_raises_value_error_for_field_name_with_leading_digit(self):
+        """ Should raise ValueError for a field name with a leading digit.
+            """
+        self.assertRaises(
+                ValueError,
+                self.test_instance.submit, "Wibble", fields={'2FA': 1})
+
+    @unittest.skipUnless(
+            hasattr(os, 'memfd_create'), "requires sealed memory files")
+    def test_sends_large_message_as_memory_file(self):
+        """ Should send a message too large for a datagram as a file. """
+        self.test_instance.start()
+        self.addCleanup(self.test_instance.stop)
+        test_message = "x" * (4 * 1024 * 1024)
+        self.test_instance.submit(test_message)
+        fields = decode_fields(receive_entry(self))
+        self.assertEqual(test_message, fields['MESSAGE'])
+        self.assertEqual(1, self.test_instance.stats()['large_messages'])
+
+
+class JournalHandler_TestCase(scaffold.TestCase):
+    """ Test cases for ‘JournalHandler’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(JournalHandler_TestCase, self).setUp()
+
+        setup_journal_socket_fixtures(self)
+        self.test_sink = daemon.journal.JournalSink(
+                address=self.journal_path, flush_interval=0.01)
+        self.addCleanup(self.test_sink.close)
+        self.test_sink.start()
+        self.addCleanup(self.test_sink.stop)
+        self.test_instance = daemon.journal.JournalHandler(self.test_sink)
+
+    def test_sends_record_with_source_location(self):
+        """ Should send the log record with its source location. """
+        test_record = logging.makeLogRecord(dict(
+                name="spam", msg="Wibble",
+                levelno=logging.ERROR, levelname="ERROR",
+                pathname="/foo/bar.py", lineno=17, funcName="baz"))
+        self.test_instance.handle(test_record)
+        fields = decode_fields(receive_entry(self))
+        expected_fields = {
+                'MESSAGE': "Wibble", 'PRIORITY': "3",
+                'CODE_FILE': "/foo/bar.py", 'CODE_LINE': "17",
+                'CODE_FUNC': "baz", 'LOGGER': "spam",
+                }
+        for (name, value) in expected_fields.items():
+            self.assertEqual(value, fields[name])
+
+
+class encode_fields_TestCase(scaffold.TestCase):
+    """ Test cases for ‘encode_fields’ function. """
+
+    def test_encodes_simple_value_with_equals(self):
+        """ Should encode a value with no newline as ‘NAME=value’. """
+        result = daemon.journal.encode_fields([("SPAM", "eggs")])
+        self.assertEqual(b"SPAM=eggs\n", result)
+
+    def test_encodes_multiline_value_with_length(self):
+        """ Should encode a value with a newline with its length. """
+        result = daemon.journal.encode_fields([("SPAM", b"eggs\nbeans")])
+        expected_result = (
+                b"SPAM\n" + struct.pack(str("<Q"), 10) + b"eggs\nbeans\n")
+        self.assertEqual(expected_result, result)
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_lazyimport.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘_lazyimport’ private module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import sys
+import types
+
+import mock
+
+from . import scaffold
+
+import daemon._lazyimport
+
+
+class LazyModule_TestCase(scaffold.TestCase):
+    """ Test cases for ‘LazyModule’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(LazyModule_TestCase, self).setUp()
+
+        self.test_module_name = "daemon_test_lazy_b0gUs"
+        self.test_module = types.ModuleType(str(self.test_module_name))
+        self.test_module.answer = 42
+        self.mock_import = mock.MagicMock(side_effect=self.fake_import)
+        self.patch_import()
+
+        self.test_instance = daemon._lazyimport.LazyModule(
+                self.test_module_name)
+
+    def fake_import(self, name, *args, **kwargs):
+        """ Fake the behaviour of ‘__import__’ for the test module. """
+        sys.modules[name] = self.test_module
+        return self.test_module
+
+    def patch_import(self):
+        """ Patch ‘__import__’ and ‘sys.modules’ for the test module. """
+        builtins_name = 'builtins' if sys.version_info >= (3, 0) else (
+                '__builtin__')
+        patcher_import = mock.patch(
+                str("{name}.__import__".format(name=builtins_name)),
+                new=self.mock_import)
+        patcher_import.start()
+        self.addCleanup(patcher_import.stop)
+        patcher_modules = mock.patch.dict(sys.modules)
+        patcher_modules.start()
+        self.addCleanup(patcher_modules.stop)
+
+    def test_does_not_import_until_attribute_access(self):
+        """ Should not import the module until an attribute is accessed. """
+        self.assertFalse(self.mock_import.called)
+
+    def test_gets_attribute_of_module(self):
+        """ Should get the attribute from the module. """
+        self.assertEqual(42, self.test_instance.answer)
+        self.mock_import.assert_called_once_with(self.test_module_name)
+
+    def test_imports_module_only_once(self):
+        """ Should import the module only on first access. """
+        self.test_instance.answer
+        self.test_instance.answer
+        self.assertEqual(1, self.mock_import.call_count)
+
+    def test_sets_attribute_of_module(self):
+        """ Should set the attribute on the module. """
+        self.test_instance.answer = 17
+        self.assertEqual(17, self.test_module.answer)
+
+    def test_deletes_attribute_of_module(self):
+        """ Should delete the attribute from the module. """
+        del self.test_instance.answer
+        self.assertFalse(hasattr(self.test_module, 'answer'))
+
+    def test_sees_patched_attribute_of_module(self):
+        """ Should get an attribute as currently set on the module. """
+        with mock.patch.object(self.test_module, 'answer', new=6):
+            self.assertEqual(6, self.test_instance.answer)
+
+    def test_raises_attribute_error_for_missing_attribute(self):
+        """ Should raise AttributeError for an attribute not found. """
+        self.assertRaises(
+                AttributeError, getattr, self.test_instance, 'b0gUs')
+
+    def test_repr_includes_module_name(self):
+        """ Should have a representation including the module name. """
+        self.assertIn(self.test_module_name, repr(self.test_instance))
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_logrotation.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘logrotation’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import os.path
+import gzip
+import shutil
+import tempfile
+
+import mock
+
+from . import scaffold
+
+import daemon.logrotation
+
+
+def setup_log_file_fixtures(testcase):
+    """ Set up common test fixtures for log file test cases.
+
+        :param testcase: A ``TestCase`` instance to decorate.
+        :return: ``None``.
+
+        The `testcase` gets a target file object open at `log_path`,
+        and a separate system stream file object, each writing to the
+        same file as if redirected.
+
+        """
+    testcase.temp_dir = tempfile.mkdtemp()
+    testcase.addCleanup(shutil.rmtree, testcase.temp_dir)
+    testcase.log_path = os.path.join(testcase.temp_dir, "daemon.log")
+
+    testcase.target_stream = open(testcase.log_path, 'ab', buffering=0)
+    testcase.addCleanup(testcase.target_stream.close)
+    testcase.system_stream = os.fdopen(
+            os.dup(testcase.target_stream.fileno()), 'ab', 0)
+    testcase.addCleanup(testcase.system_stream.close)
+
+
+def read_file(path):
+    """ Get the content of a file, as bytes. """
+    with open(path, 'rb') as infile:
+        content = infile.read()
+    return content
+
+
+class LogRotation_TestCase(scaffold.TestCase):
+    """ Test cases for ‘LogRotation’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(LogRotation_TestCase, self).setUp()
+
+        setup_log_file_fixtures(self)
+        self.test_instance = daemon.logrotation.LogRotation(
+                max_bytes=10, backup_count=2)
+        self.test_instance.add_stream(self.system_stream, self.target_stream)
+
+    def test_ignores_stream_without_path(self):
+        """ Should ignore a stream whose file has no path. """
+        test_stream = mock.MagicMock(name="stream")
+        test_stream.name = 2
+        self.test_instance.add_stream(self.system_stream, test_stream)
+        self.assertEqual(
+                [self.log_path], list(self.test_instance.streams_by_path))
+
+    def test_rotation_not_due_when_small(self):
+        """ Should not be due for rotation while smaller than `max_bytes`. """
+        self.system_stream.write(b"spam")
+        self.assertFalse(self.test_instance.is_rotation_due(self.log_path))
+
+    def test_rotation_due_when_large(self):
+        """ Should be due for rotation when reaching `max_bytes`. """
+        self.system_stream.write(b"spam" * 5)
+        self.assertTrue(self.test_instance.is_rotation_due(self.log_path))
+
+    def test_rotation_due_after_interval(self):
+        """ Should be due for rotation after `interval` seconds. """
+        self.test_instance.max_bytes = None
+        self.test_instance.interval = 60
+        self.test_instance.started_times[self.log_path] -= 61
+        self.assertTrue(self.test_instance.is_rotation_due(self.log_path))
+
+    def test_rotate_moves_file_and_reopens_streams(self):
+        """ Should move the file to a backup and reopen at the path. """
+        self.system_stream.write(b"before\n")
+        self.test_instance.rotate(self.log_path)
+        self.system_stream.write(b"after\n")
+        self.target_stream.write(b"target\n")
+        self.assertEqual(
+                b"before\n",
+                read_file(daemon.logrotation.make_backup_path(
+                    self.log_path, 1)))
+        self.assertEqual(b"after\ntarget\n", read_file(self.log_path))
+
+    def test_rotate_compresses_backup(self):
+        """ Should compress the backup file when `compress` is true. """
+        self.test_instance.compress = True
+        self.system_stream.write(b"before\n")
+        self.test_instance.rotate(self.log_path)
+        self.test_instance.wait_for_compressors()
+        backup_path = daemon.logrotation.make_backup_path(self.log_path, 1)
+        self.assertFalse(os.path.exists(backup_path))
+        with gzip.open(backup_path + ".gz", 'rb') as compressed_file:
+            self.assertEqual(b"before\n", compressed_file.read())
+
+    def test_counts_error_compressing_backup(self):
+        """ Should count an error compressing the backup file. """
+        self.test_instance.compress = True
+        self.system_stream.write(b"before\n")
+        with mock.patch.object(
+                daemon.logrotation, "compress_file",
+                side_effect=OSError("Naughty")):
+            self.test_instance.rotate(self.log_path)
+            self.test_instance.wait_for_compressors()
+        self.assertEqual(1, self.test_instance.stats()['compress_errors'])
+
+    def test_check_rotation_counts_error_and_continues(self):
+        """ Should count an error rotating a file, and not raise it. """
+        self.system_stream.write(b"spam" * 5)
+        with mock.patch.object(
+                os, "rename", side_effect=OSError("Naughty")):
+            self.test_instance.check_rotation()
+        self.assertEqual(1, self.test_instance.stats()['rotation_errors'])
+        self.test_instance.check_rotation()
+        self.assertEqual(1, self.test_instance.stats()['rotations'])
+
+    def test_rotate_removes_file_when_no_backups(self):
+        """ Should remove the file when `backup_count` is zero. """
+        self.test_instance.backup_count = 0
+        self.system_stream.write(b"before\n")
+        self.test_instance.rotate(self.log_path)
+        self.assertEqual([os.path.basename(self.log_path)],
+                os.listdir(self.temp_dir))
+
+    def test_start_then_stop_watching(self):
+        """ Should start and stop the watching thread. """
+        self.test_instance.check_interval = 0.01
+        self.test_instance.start()
+        self.assertTrue(self.test_instance.thread.is_alive())
+        self.test_instance.stop()
+        self.assertIs(None, self.test_instance.thread)
+
+
+class shift_backup_files_TestCase(scaffold.TestCase):
+    """ Test cases for ‘shift_backup_files’ function. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(shift_backup_files_TestCase, self).setUp()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.log_path = os.path.join(self.temp_dir, "daemon.log")
+        for name in ["daemon.log.1", "daemon.log.2.gz", "daemon.log.3"]:
+            with open(os.path.join(self.temp_dir, name), 'wb') as outfile:
+                outfile.write(name.encode('ascii'))
+
+    def test_shifts_each_backup_and_removes_oldest(self):
+        """ Should shift each backup up by one, removing the oldest. """
+        daemon.logrotation.shift_backup_files(self.log_path, 3)
+        self.assertEqual(
+                ["daemon.log.2", "daemon.log.3.gz"],
+                sorted(os.listdir(self.temp_dir)))
+        self.assertEqual(
+                b"daemon.log.1",
+                read_file(os.path.join(self.temp_dir, "daemon.log.2")))
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_logshipper.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘logshipper’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import os.path
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import mock
+
+from . import scaffold
+
+import daemon.logshipper
+
+
+def check_shipper_exit(testcase, shipper):
+    """ Check the exit status of the stopped shipper process. """
+    testcase.assertEqual(0, shipper.exit_status)
+
+
+class LogShipper_TestCase(scaffold.TestCase):
+    """ Test cases for ‘LogShipper’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(LogShipper_TestCase, self).setUp()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.target_path = os.path.join(self.temp_dir, "output.log")
+
+    def test_raises_error_for_unknown_overflow_policy(self):
+        """ Should raise ValueError for an unknown overflow policy. """
+        self.assertRaises(
+                ValueError,
+                daemon.logshipper.LogShipper,
+                self.target_path, overflow="b0gUs")
+
+    def test_fileno_is_write_end_of_pipe(self):
+        """ Should have `fileno` for the write end of its pipe. """
+        instance = daemon.logshipper.LogShipper(self.target_path)
+        self.addCleanup(instance.stop)
+        self.assertEqual(instance.write_fd, instance.fileno())
+
+    def test_appends_to_existing_target_file(self):
+        """ Should append output after existing content of the target. """
+        with open(self.target_path, 'wb') as target_file:
+            target_file.write(b"earlier\n")
+        instance = daemon.logshipper.LogShipper(
+                self.target_path, batch_interval=0)
+        instance.start()
+        os.write(instance.fileno(), b"later\n")
+        instance.stop()
+        check_shipper_exit(self, instance)
+        with open(self.target_path, 'rb') as target_file:
+            content = target_file.read()
+        self.assertEqual(b"earlier\nlater\n", content)
+
+    def test_ships_all_output_with_block_policy(self):
+        """ Should ship all output to the target with ‘block’ policy. """
+        instance = daemon.logshipper.LogShipper(
+                self.target_path, overflow='block', batch_interval=0.001)
+        instance.start()
+        test_data = b"spam\n" * 50000
+        daemon.logshipper.write_all(instance.fileno(), test_data)
+        instance.stop()
+        check_shipper_exit(self, instance)
+        with open(self.target_path, 'rb') as target_file:
+            content = target_file.read()
+        self.assertEqual(test_data, content)
+        stats = instance.stats()
+        self.assertEqual(len(test_data), stats['bytes_written'])
+        self.assertEqual(0, stats['bytes_dropped'])
+
+    @unittest.skipUnless(hasattr(os, 'splice'), "requires ‘os.splice’")
+    def test_splices_output_to_target_path(self):
+        """ Should move output to a target path with ‘os.splice’. """
+        with open(self.target_path, 'wb') as target_file:
+            target_file.write(b"earlier\n")
+        instance = daemon.logshipper.LogShipper(
+                self.target_path, overflow='block', batch_interval=0)
+        instance.start()
+        test_data = b"beans\n" * 1000
+        daemon.logshipper.write_all(instance.fileno(), test_data)
+        instance.stop()
+        check_shipper_exit(self, instance)
+        self.assertEqual(len(test_data), instance.stats()['bytes_spliced'])
+        with open(self.target_path, 'rb') as target_file:
+            self.assertEqual(b"earlier\n" + test_data, target_file.read())
+
+    def test_ships_all_output_with_drop_policy(self):
+        """ Should ship all output to a fast target with ‘drop’ policy. """
+        instance = daemon.logshipper.LogShipper(
+                self.target_path, overflow='drop', batch_interval=0)
+        instance.start()
+        test_data = b"eggs\n" * 1000
+        daemon.logshipper.write_all(instance.fileno(), test_data)
+        instance.stop()
+        check_shipper_exit(self, instance)
+        with open(self.target_path, 'rb') as target_file:
+            content = target_file.read()
+        self.assertEqual(test_data, content)
+
+    def test_drops_output_when_target_stalls(self):
+        """ Should drop and count output when the target stalls. """
+        (target_read_fd, target_write_fd) = os.pipe()
+        target = os.fdopen(target_write_fd, 'wb')
+        instance = daemon.logshipper.LogShipper(
+                target, buffer_size=4096, overflow='drop', batch_interval=0)
+        target.close()
+        instance.start()
+        test_data = b"x" * (1024 * 1024)
+        daemon.logshipper.write_all(instance.fileno(), test_data)
+        received = []
+
+        def read_target():
+            while True:
+                data = os.read(target_read_fd, 65536)
+                if not data:
+                    break
+                received.append(data)
+
+        reader = threading.Thread(target=read_target)
+        reader.start()
+        instance.stop()
+        reader.join()
+        os.close(target_read_fd)
+        check_shipper_exit(self, instance)
+        stats = instance.stats()
+        self.assertGreater(stats['bytes_dropped'], 0)
+        self.assertEqual(
+                len(test_data),
+                stats['bytes_written'] + stats['bytes_dropped'])
+        self.assertEqual(
+                stats['bytes_written'], len(b"".join(received)))
+
+    def test_stop_kills_shipper_after_timeout(self):
+        """ Should kill and reap a shipper which does not exit in time. """
+        (target_read_fd, target_write_fd) = os.pipe()
+        self.addCleanup(os.close, target_read_fd)
+        target = os.fdopen(target_write_fd, 'wb')
+        instance = daemon.logshipper.LogShipper(
+                target, overflow='block', batch_interval=0,
+                stop_timeout=0.1)
+        target.close()
+        instance.start()
+        daemon.logshipper.write_all(instance.fileno(), b"x" * (256 * 1024))
+        instance.stop()
+        self.assertTrue(os.WIFSIGNALED(instance.exit_status))
+        self.assertRaises(OSError, os.waitpid, instance.pid, os.WNOHANG)
+
+    def test_start_is_idempotent(self):
+        """ Should start only one shipper process. """
+        instance = daemon.logshipper.LogShipper(self.target_path)
+        with mock.patch.object(os, "fork", return_value=23) as mock_fork:
+            instance.start()
+            instance.start()
+        self.assertEqual(1, mock_fork.call_count)
+
+
+class wait_for_batch_TestCase(scaffold.TestCase):
+    """ Test cases for ‘wait_for_batch’ function. """
+
+    def test_returns_when_pipe_is_full(self):
+        """ Should return at once when the pipe is full. """
+        (read_fd, write_fd) = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+        capacity = daemon.logshipper.get_pipe_capacity(read_fd)
+        os.write(write_fd, b"x" * capacity)
+        start_time = time.time()
+        result = daemon.logshipper.wait_for_batch(
+                read_fd, capacity * 16, batch_interval=60)
+        self.assertEqual(capacity, result)
+        self.assertLess(time.time() - start_time, 10)
+
+
+class set_pipe_size_TestCase(scaffold.TestCase):
+    """ Test cases for ‘set_pipe_size’ function. """
+
+    def test_ignores_refused_size(self):
+        """ Should ignore a refusal of the requested size. """
+        (read_fd, write_fd) = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+        daemon.logshipper.set_pipe_size(read_fd, 1024 * 1024 * 1024)
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
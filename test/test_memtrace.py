@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_memtrace.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘memtrace’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import io
+import os
+import os.path
+import shutil
+import tempfile
+import tracemalloc
+
+from . import scaffold
+
+import daemon.memtrace
+
+
+leaked_objects = []
+
+
+def leak_memory():
+    """ Allocate memory at a site the report can identify. """
+    leaked_objects.extend(bytearray(1024) for __ in range(100))
+
+
+class MemorySnapshots_TestCase(scaffold.TestCase):
+    """ Test cases for ‘MemorySnapshots’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(MemorySnapshots_TestCase, self).setUp()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.test_instance = daemon.memtrace.MemorySnapshots(
+                self.temp_dir, limit=5)
+        self.addCleanup(self.test_instance.disarm)
+        self.addCleanup(leaked_objects.__delitem__, slice(None))
+
+    def test_first_request_arms_tracing(self):
+        """ Should start tracing on the first request, writing nothing. """
+        result = self.test_instance.request()
+        self.assertIs(None, result)
+        self.assertTrue(self.test_instance.is_armed)
+        self.assertTrue(tracemalloc.is_tracing())
+        self.assertEqual([], os.listdir(self.temp_dir))
+
+    def test_disarm_stops_tracing(self):
+        """ Should stop tracing when disarmed. """
+        self.test_instance.arm()
+        self.test_instance.disarm()
+        self.assertFalse(self.test_instance.is_armed)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_disarm_keeps_tracing_started_elsewhere(self):
+        """ Should keep tracing which was started before arming. """
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        self.test_instance.arm()
+        self.test_instance.disarm()
+        self.assertFalse(self.test_instance.is_armed)
+        self.assertTrue(tracemalloc.is_tracing())
+
+    def test_writes_report_with_leaking_site(self):
+        """ Should write a report naming the leaking allocation site. """
+        self.test_instance.request()
+        leak_memory()
+        path = self.test_instance.request()
+        self.assertEqual(self.temp_dir, os.path.dirname(path))
+        self.assertIn(
+                "-{pid:d}-".format(pid=os.getpid()), os.path.basename(path))
+        with io.open(path, encoding='utf-8') as infile:
+            report = infile.read()
+        (top, changes) = report.split("changes since previous snapshot")
+        self.assertIn("test_memtrace.py", top)
+        self.assertIn("test_memtrace.py", changes)
+        self.assertEqual(1, self.test_instance.stats()['snapshots'])
+
+    def test_names_each_report_file_uniquely(self):
+        """ Should write each report to a new file, within a second. """
+        self.test_instance.request()
+        paths = [self.test_instance.request() for __ in range(3)]
+        self.assertEqual(3, len(set(paths)))
+        for path in paths:
+            self.assertTrue(os.path.exists(path))
+
+    def test_compares_to_previous_snapshot(self):
+        """ Should compare to the previous snapshot by default. """
+        self.test_instance.request()
+        leak_memory()
+        self.test_instance.request()
+        path = self.test_instance.request()
+        with io.open(path, encoding='utf-8') as infile:
+            report = infile.read()
+        changes = report.split("changes since previous snapshot")[1]
+        self.assertNotIn("test_memtrace.py", changes)
+
+    def test_compares_to_baseline_snapshot(self):
+        """ Should compare to the baseline snapshot if specified. """
+        self.test_instance.compare_to = 'baseline'
+        self.test_instance.request()
+        leak_memory()
+        self.test_instance.request()
+        path = self.test_instance.request()
+        with io.open(path, encoding='utf-8') as infile:
+            report = infile.read()
+        changes = report.split("changes since baseline snapshot")[1]
+        self.assertIn("test_memtrace.py", changes)
+
+    def test_rejects_unknown_comparison(self):
+        """ Should raise ValueError for an unknown `compare_to`. """
+        self.assertRaises(
+                ValueError,
+                daemon.memtrace.MemorySnapshots,
+                self.temp_dir, compare_to='bogus')
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
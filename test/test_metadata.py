@@ -27,12 +27,13 @@ except ImportError:
 import functools
 import collections
 import json
+import importlib
 
-import pkg_resources
 import mock
 import testtools.helpers
 import testtools.matchers
 import testscenarios
+import pkg_resources
 
 from . import scaffold
 from .scaffold import (basestring, unicode)
@@ -263,35 +264,28 @@ except NameError:
 
 version_info_filename = "version_info.json"
 
-def fake_func_has_metadata(testcase, resource_name):
-    """ Fake the behaviour of ‘pkg_resources.Distribution.has_metadata’. """
+metadata_library = metadata.get_metadata_library()
+
+
+def fake_func_read_text(testcase, resource_name):
+    """ Fake the behaviour of ‘Distribution.read_text’. """
     if (
             resource_name != testcase.version_info_filename
             or not hasattr(testcase, 'test_version_info')):
-        return False
-    return True
-
-
-def fake_func_get_metadata(testcase, resource_name):
-    """ Fake the behaviour of ‘pkg_resources.Distribution.get_metadata’. """
-    if not fake_func_has_metadata(testcase, resource_name):
-        error = FileNotFoundError(resource_name)
-        raise error
+        return None
     content = testcase.test_version_info
     return content
 
 
-def fake_func_get_distribution(testcase, distribution_name):
-    """ Fake the behaviour of ‘pkg_resources.get_distribution’. """
+def fake_func_distribution(testcase, distribution_name):
+    """ Fake the behaviour of ‘importlib.metadata.distribution’. """
     if distribution_name != metadata.distribution_name:
-        raise pkg_resources.DistributionNotFound
+        raise metadata_library.PackageNotFoundError(distribution_name)
     if hasattr(testcase, 'get_distribution_error'):
         raise testcase.get_distribution_error
     mock_distribution = testcase.mock_distribution
-    mock_distribution.has_metadata.side_effect = functools.partial(
-            fake_func_has_metadata, testcase)
-    mock_distribution.get_metadata.side_effect = functools.partial(
-            fake_func_get_metadata, testcase)
+    mock_distribution.read_text.side_effect = functools.partial(
+            fake_func_read_text, testcase)
     return mock_distribution
 
 
@@ -328,7 +322,8 @@ class get_distribution_version_info_TestCase(scaffold.TestCaseWithScenarios):
                 'expected_version_info': {'version': "1.0"},
                 }),
             ('not installed', {
-                'get_distribution_error': pkg_resources.DistributionNotFound(),
+                'get_distribution_error': (
+                    metadata_library.PackageNotFoundError("mock-dist")),
                 'expected_version_info': default_version_info,
                 }),
             ('no version_info', {
@@ -359,18 +354,18 @@ class get_distribution_version_info_TestCase(scaffold.TestCaseWithScenarios):
             self.expected_resource_name = version_info_filename
 
         self.mock_distribution = mock.MagicMock()
-        func_patcher_get_distribution = mock.patch.object(
-                pkg_resources, 'get_distribution')
-        func_patcher_get_distribution.start()
-        self.addCleanup(func_patcher_get_distribution.stop)
-        pkg_resources.get_distribution.side_effect = functools.partial(
-                fake_func_get_distribution, self)
+        func_patcher_distribution = mock.patch.object(
+                metadata_library, 'distribution')
+        func_patcher_distribution.start()
+        self.addCleanup(func_patcher_distribution.stop)
+        metadata_library.distribution.side_effect = functools.partial(
+                fake_func_distribution, self)
 
     def test_requests_installed_distribution(self):
         """ The package distribution should be retrieved. """
         expected_distribution_name = metadata.distribution_name
         version_info = metadata.get_distribution_version_info(**self.test_args)
-        pkg_resources.get_distribution.assert_called_with(
+        metadata_library.distribution.assert_called_with(
                 expected_distribution_name)
 
     def test_requests_specified_filename(self):
@@ -378,7 +373,7 @@ class get_distribution_version_info_TestCase(scaffold.TestCaseWithScenarios):
         if hasattr(self, 'get_distribution_error'):
             self.skipTest("No access to distribution")
         version_info = metadata.get_distribution_version_info(**self.test_args)
-        self.mock_distribution.has_metadata.assert_called_with(
+        self.mock_distribution.read_text.assert_called_with(
                 self.expected_resource_name)
 
     def test_result_matches_expected_items(self):
@@ -386,6 +381,125 @@ class get_distribution_version_info_TestCase(scaffold.TestCaseWithScenarios):
         version_info = metadata.get_distribution_version_info(**self.test_args)
         self.assertEqual(self.expected_version_info, version_info)
 
+
+class get_distribution_version_info_pkg_resources_TestCase(
+        scaffold.TestCase):
+    """ Test cases for ‘get_distribution_version_info’ without library. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(get_distribution_version_info_pkg_resources_TestCase,
+                self).setUp()
+
+        func_patcher_library = mock.patch.object(
+                metadata, 'get_metadata_library', return_value=None)
+        func_patcher_library.start()
+        self.addCleanup(func_patcher_library.stop)
+
+        self.mock_distribution = mock.MagicMock()
+        self.mock_distribution.get_metadata.return_value = json.dumps(
+                {'version': "1.0"})
+        func_patcher_distribution = mock.patch.object(
+                pkg_resources, 'get_distribution',
+                return_value=self.mock_distribution)
+        func_patcher_distribution.start()
+        self.addCleanup(func_patcher_distribution.stop)
+
+    def test_reads_version_info_with_pkg_resources(self):
+        """ Should read the version info with ‘pkg_resources’. """
+        version_info = metadata.get_distribution_version_info()
+        pkg_resources.get_distribution.assert_called_with(
+                metadata.distribution_name)
+        self.mock_distribution.get_metadata.assert_called_with(
+                version_info_filename)
+        self.assertEqual({'version': "1.0"}, version_info)
+
+    def test_returns_default_if_not_installed(self):
+        """ Should return the default version info if not installed. """
+        pkg_resources.get_distribution.side_effect = (
+                pkg_resources.DistributionNotFound())
+        version_info = metadata.get_distribution_version_info()
+        self.assertEqual("UNKNOWN", version_info['version'])
+
+
+class lazy_value_TestCase(scaffold.TestCase):
+    """ Test cases for module attributes computed on first access. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(lazy_value_TestCase, self).setUp()
+
+        self.test_module = importlib.import_module(metadata.__name__)
+        self.saved_namespace = dict(vars(self.test_module))
+        self.addCleanup(self.restore_namespace)
+        for name in metadata.lazy_value_factories:
+            vars(self.test_module).pop(name, None)
+
+        self.test_version_info = {
+                'release_date': "2015-06-01",
+                'version': "1.2",
+                'maintainer': "UNKNOWN",
+                }
+        func_patcher_get_version_info = mock.patch.object(
+                metadata, 'get_distribution_version_info',
+                return_value=self.test_version_info)
+        self.mock_get_version_info = func_patcher_get_version_info.start()
+        self.addCleanup(func_patcher_get_version_info.stop)
+        self.test_factories = dict(
+                metadata.lazy_value_factories,
+                version_info=self.mock_get_version_info)
+        func_patcher_factories = mock.patch.object(
+                metadata, 'lazy_value_factories', new=self.test_factories)
+        func_patcher_factories.start()
+        self.addCleanup(func_patcher_factories.stop)
+
+    def restore_namespace(self):
+        """ Restore the module namespace saved during set up. """
+        namespace = vars(self.test_module)
+        namespace.clear()
+        namespace.update(self.saved_namespace)
+
+    def test_does_not_read_distribution_until_accessed(self):
+        """ Should not read the distribution metadata until needed. """
+        self.assertEqual("Apache-2", metadata.license)
+        self.assertFalse(self.mock_get_version_info.called)
+
+    def test_computes_values_from_version_info(self):
+        """ Should compute the values from the version info. """
+        self.assertEqual("1.2", metadata.version_installed)
+        self.assertEqual("2015-06-01", metadata.build_date)
+        self.assertIn("2001–2015", metadata.copyright)
+
+    def test_reads_distribution_only_once(self):
+        """ Should read the distribution metadata only once. """
+        metadata.version_installed
+        metadata.build_date
+        metadata.version_info
+        self.mock_get_version_info.assert_called_once_with()
+
+    def test_raises_attribute_error_for_unknown_name(self):
+        """ Should raise AttributeError for an unknown attribute. """
+        self.assertRaises(AttributeError, getattr, metadata, "b0gUs")
+
+
+class import_time_TestCase(scaffold.TestCase):
+    """ Test cases for the time to import the package. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(import_time_TestCase, self).setUp()
+
+        if sys.version_info < (3, 7):
+            self.skipTest("Python option ‘-X importtime’ not supported")
+
+    def test_import_does_not_read_distribution_metadata(self):
+        """ Importing the package should not load metadata libraries. """
+        for module_name in ['daemon', 'daemon._metadata']:
+            import_times = scaffold.get_import_times(module_name)
+            self.assertIn(module_name, import_times)
+            for slow_module_name in ['pkg_resources', 'importlib.metadata']:
+                self.assertNotIn(slow_module_name, import_times)
+
 
 # Local variables:
 # coding: utf-8
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_osbackend.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘osbackend’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import atexit
+import errno
+import os
+import resource
+import signal
+import sys
+
+import mock
+
+from . import scaffold
+
+import daemon.daemon
+import daemon.osbackend
+
+
+class OSBackend_TestCase(scaffold.TestCase):
+    """ Test cases for ‘OSBackend’ class. """
+
+    def test_cannot_instantiate_without_implementation(self):
+        """ Should refuse to instantiate the abstract interface. """
+        self.assertRaises(TypeError, daemon.osbackend.OSBackend)
+
+
+class SystemBackend_TestCase(scaffold.TestCase):
+    """ Test cases for ‘SystemBackend’ class. """
+
+    def test_register_registers_function_for_atexit(self):
+        """ Should register the function with `atexit.register`. """
+        instance = daemon.osbackend.SystemBackend()
+        func = object()
+        with mock.patch.object(atexit, "register") as mock_func_register:
+            instance.register(func)
+        mock_func_register.assert_called_with(func)
+
+
+class FakeKernel_TestCase(scaffold.TestCase):
+    """ Test cases for ‘FakeKernel’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(FakeKernel_TestCase, self).setUp()
+
+        self.test_instance = daemon.osbackend.FakeKernel(
+                users={
+                    0: ("root", 0, [0]),
+                    1000: ("alice", 1000, [1000, 50]),
+                    })
+
+    def test_open_allocates_lowest_free_descriptor(self):
+        """ Should open a file at the lowest free file descriptor. """
+        self.test_instance.close(1)
+        fd = self.test_instance.open(os.devnull, os.O_RDWR)
+        self.assertEqual(1, fd)
+        self.assertEqual(os.devnull, self.test_instance.files[1].path)
+
+    def test_close_unopened_descriptor_raises_ebadf(self):
+        """ Should raise EBADF when closing an unopened descriptor. """
+        with self.assertRaises(OSError) as context:
+            self.test_instance.close(9)
+        self.assertEqual(errno.EBADF, context.exception.errno)
+
+    def test_dup2_replaces_descriptor(self):
+        """ Should make the second descriptor refer to the first's file. """
+        fd = self.test_instance.open("/var/log/foo", os.O_WRONLY)
+        self.test_instance.dup2(fd, 1)
+        self.assertEqual("/var/log/foo", self.test_instance.files[1].path)
+
+    def test_open_fails_beyond_soft_limit(self):
+        """ Should raise EMFILE beyond the open files soft limit. """
+        self.test_instance.rlimits[resource.RLIMIT_NOFILE] = (3, 3)
+        with self.assertRaises(OSError) as context:
+            self.test_instance.open(os.devnull, os.O_RDWR)
+        self.assertEqual(errno.EMFILE, context.exception.errno)
+
+    def test_unprivileged_cannot_change_uid(self):
+        """ Should raise EPERM when unprivileged changes user. """
+        self.test_instance.setuid(1000)
+        with self.assertRaises(OSError) as context:
+            self.test_instance.setuid(0)
+        self.assertEqual(errno.EPERM, context.exception.errno)
+
+    def test_initgroups_sets_supplementary_groups(self):
+        """ Should set the user's supplementary groups. """
+        self.test_instance.initgroups("alice", 1000)
+        self.assertEqual([50, 1000], self.test_instance.groups)
+        self.assertEqual(1000, self.test_instance.gid)
+
+    def test_getpwuid_raises_key_error_for_unknown_user(self):
+        """ Should raise KeyError for a user ID not in the database. """
+        self.assertRaises(KeyError, self.test_instance.getpwuid, 1234)
+
+    def test_unprivileged_cannot_raise_hard_limit(self):
+        """ Should raise ValueError when unprivileged raises hard limit. """
+        self.test_instance.uid = 1000
+        self.test_instance.setrlimit(resource.RLIMIT_NOFILE, (10, 100))
+        self.assertRaises(
+                ValueError,
+                self.test_instance.setrlimit,
+                resource.RLIMIT_NOFILE, (10, 200))
+
+    def test_fork_continues_as_child(self):
+        """ Should continue as the child, with a new process ID. """
+        result = self.test_instance.fork()
+        self.assertEqual(0, result)
+        self.assertEqual(1001, self.test_instance.pid)
+        self.assertEqual(1000, self.test_instance.getppid())
+
+    def test_setsid_fails_for_group_leader(self):
+        """ Should raise EPERM for a process group leader. """
+        self.test_instance.setsid()
+        with self.assertRaises(OSError) as context:
+            self.test_instance.setsid()
+        self.assertEqual(errno.EPERM, context.exception.errno)
+
+    def test_sends_signal_to_handler(self):
+        """ Should call the handler set for a signal. """
+        mock_handler = mock.MagicMock()
+        previous = self.test_instance.signal(signal.SIGTERM, mock_handler)
+        self.assertEqual(signal.SIG_DFL, previous)
+        self.test_instance.send_signal(signal.SIGTERM)
+        mock_handler.assert_called_with(signal.SIGTERM, None)
+
+    def test_reports_whether_file_is_socket(self):
+        """ Should report whether a file is a socket. """
+        previous = daemon.daemon.set_os_backend(self.test_instance)
+        self.addCleanup(daemon.daemon.set_os_backend, previous)
+        self.test_instance.files[3] = daemon.osbackend.FakeFile(
+                path=None, flags=os.O_RDWR, is_socket=True)
+        self.assertFalse(daemon.daemon.is_socket(0))
+        self.assertTrue(daemon.daemon.is_socket(3))
+
+
+class DaemonContext_open_FakeKernel_TestCase(scaffold.TestCase):
+    """ Test cases for DaemonContext.open with a fake kernel. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(DaemonContext_open_FakeKernel_TestCase, self).setUp()
+
+        self.fake_kernel = daemon.osbackend.FakeKernel(
+                open_fds=[0, 1, 2, 5, 7])
+        previous = daemon.daemon.set_os_backend(self.fake_kernel)
+        self.addCleanup(daemon.daemon.set_os_backend, previous)
+
+        for (name, fd) in [('stdin', 0), ('stdout', 1), ('stderr', 2)]:
+            fake_stream = mock.MagicMock(name=name)
+            fake_stream.fileno.return_value = fd
+            stream_patcher = mock.patch.object(sys, name, new=fake_stream)
+            stream_patcher.start()
+            self.addCleanup(stream_patcher.stop)
+
+        self.test_instance = daemon.daemon.DaemonContext(
+                working_directory="/srv/app", umask=0o027,
+                uid=1000, gid=1000, detach_process=True,
+                files_preserve=[5])
+
+    def test_becomes_daemon_in_fake_kernel(self):
+        """ Should change the fake kernel's process state. """
+        self.test_instance.open()
+        kernel = self.fake_kernel
+        self.assertEqual((1000, 1000), (kernel.uid, kernel.gid))
+        self.assertEqual("/srv/app", kernel.cwd)
+        self.assertEqual(0o027, kernel.mask)
+        self.assertEqual(2, kernel.fork_count)
+        self.assertEqual((0, 0), kernel.rlimits[resource.RLIMIT_CORE])
+        self.assertEqual(
+                self.test_instance.terminate,
+                kernel.signal_handlers[signal.SIGTERM])
+        self.assertEqual([self.test_instance.close], kernel.exit_functions)
+
+    def test_closes_files_except_preserved(self):
+        """ Should close all files except the preserved and standard. """
+        self.test_instance.open()
+        self.assertEqual([0, 1, 2, 5], sorted(self.fake_kernel.files))
+        for fd in [0, 1, 2]:
+            self.assertEqual(os.devnull, self.fake_kernel.files[fd].path)
+
+    def test_fails_to_change_owner_when_unprivileged(self):
+        """ Should fail to change the process owner when unprivileged. """
+        self.fake_kernel.uid = self.fake_kernel.gid = 500
+        self.assertRaises(
+                daemon.daemon.DaemonOSEnvironmentError,
+                self.test_instance.open)
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
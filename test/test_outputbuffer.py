@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_outputbuffer.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘outputbuffer’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import io
+import os
+import select
+import sys
+import threading
+import time
+
+import mock
+
+from . import scaffold
+
+import daemon.outputbuffer
+
+
+def setup_output_stream_fixtures(testcase):
+    """ Set up common test fixtures for output stream test cases.
+
+        :param testcase: A ``TestCase`` instance to decorate.
+        :return: ``None``.
+
+        The `testcase` gets line-buffered text streams `test_stdout`
+        and `test_stderr`, each writing to a pipe, in place of
+        `sys.stdout` and `sys.stderr`.
+
+        """
+    testcase.read_fds = {}
+    for name in ['stdout', 'stderr']:
+        (read_fd, write_fd) = os.pipe()
+        testcase.addCleanup(os.close, read_fd)
+        stream = io.open(
+                write_fd, 'w', buffering=1,
+                encoding='utf-8', errors='backslashreplace')
+        testcase.addCleanup(stream.close)
+        testcase.read_fds[name] = read_fd
+        setattr(testcase, "test_{name}".format(name=name), stream)
+
+        patcher = mock.patch.object(sys, name, stream)
+        patcher.start()
+        testcase.addCleanup(patcher.stop)
+
+
+def read_available(fd):
+    """ Read the bytes available without blocking from a pipe. """
+    content = b""
+    (readable, __, __) = select.select([fd], [], [], 0)
+    if readable:
+        content = os.read(fd, 65536)
+
+    return content
+
+
+class OutputBuffering_TestCase(scaffold.TestCase):
+    """ Test cases for ‘OutputBuffering’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(OutputBuffering_TestCase, self).setUp()
+
+        setup_output_stream_fixtures(self)
+        self.test_instance = daemon.outputbuffer.OutputBuffering(
+                flush_interval=60)
+        self.addCleanup(self.test_instance.stop)
+
+    def test_rebuilds_system_streams(self):
+        """ Should replace `sys.stdout` and `sys.stderr` when started. """
+        self.test_instance.start()
+        self.assertIsNot(self.test_stdout, sys.stdout)
+        self.assertIsNot(self.test_stderr, sys.stderr)
+        self.assertEqual(self.test_stdout.fileno(), sys.stdout.fileno())
+        self.assertEqual(self.test_stderr.fileno(), sys.stderr.fileno())
+
+    def test_keeps_stream_with_no_buffer_size(self):
+        """ Should keep a stream whose buffer size is ``None``. """
+        self.test_instance.stderr_buffer_size = None
+        self.test_instance.start()
+        self.assertIs(self.test_stderr, sys.stderr)
+
+    def test_buffers_lines_until_flushed(self):
+        """ Should hold complete lines in the buffer until flushed. """
+        self.test_instance.start()
+        sys.stdout.write("spam\n")
+        self.assertEqual(b"", read_available(self.read_fds['stdout']))
+        self.test_instance.flush()
+        self.assertEqual(b"spam\n", read_available(self.read_fds['stdout']))
+
+    def test_flushes_periodically(self):
+        """ Should flush the streams every `flush_interval` seconds. """
+        self.test_instance.flush_interval = 0.01
+        self.test_instance.start()
+        sys.stderr.write("eggs\n")
+        time.sleep(0.2)
+        self.assertEqual(b"eggs\n", read_available(self.read_fds['stderr']))
+
+    def test_flushes_when_stopped(self):
+        """ Should flush the streams when stopped. """
+        self.test_instance.start()
+        sys.stdout.write("beans\n")
+        self.test_instance.stop()
+        self.assertIs(None, self.test_instance.thread)
+        self.assertEqual(b"beans\n", read_available(self.read_fds['stdout']))
+
+    def test_restores_system_streams_when_stopped(self):
+        """ Should restore the original system streams when stopped. """
+        self.test_instance.start()
+        self.test_instance.stop()
+        self.assertIs(self.test_stdout, sys.stdout)
+        self.assertIs(self.test_stderr, sys.stderr)
+
+    def test_keeps_all_output_written_while_flushing(self):
+        """ Should keep all output written by threads while flushing. """
+        self.test_instance.flush_interval = 0.001
+        self.test_instance.start()
+        lines = ["{index:d}\n".format(index=index) for index in range(500)]
+
+        def write_lines():
+            for line in lines:
+                sys.stdout.write(line)
+
+        writers = [threading.Thread(target=write_lines) for __ in range(4)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        self.test_instance.stop()
+        output = b""
+        while True:
+            content = read_available(self.read_fds['stdout'])
+            if not content:
+                break
+            output += content
+        expected_lines = [line.encode('ascii') for line in lines * 4]
+        self.assertEqual(
+                sorted(expected_lines), sorted(output.splitlines(True)))
+
+
+class rebuild_stream_TestCase(scaffold.TestCase):
+    """ Test cases for ‘rebuild_stream’ function. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(rebuild_stream_TestCase, self).setUp()
+
+        setup_output_stream_fixtures(self)
+
+    def test_flushes_existing_stream(self):
+        """ Should flush pending output of the existing stream. """
+        self.test_stdout.write("spam")
+        daemon.outputbuffer.rebuild_stream(self.test_stdout, 4096)
+        self.assertEqual(b"spam", read_available(self.read_fds['stdout']))
+
+    def test_keeps_encoding_and_errors(self):
+        """ Should keep the encoding and error handling of the stream. """
+        result = daemon.outputbuffer.rebuild_stream(self.test_stdout, 4096)
+        self.assertEqual(self.test_stdout.encoding, result.encoding)
+        self.assertEqual(self.test_stdout.errors, result.errors)
+
+    def test_does_not_close_file_descriptor(self):
+        """ Should not close the file descriptor when the result closes. """
+        result = daemon.outputbuffer.rebuild_stream(self.test_stdout, 4096)
+        result.close()
+        self.test_stdout.write("eggs\n")
+        self.assertEqual(b"eggs\n", read_available(self.read_fds['stdout']))
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -27,12 +27,17 @@ import tempfile
 import io
 import errno
 import functools
+import shutil
+import signal
+import threading
 
 import mock
 import lockfile
 
 from . import scaffold
 
+import daemon.fdaudit
+import daemon.filewatch
 import daemon.pidfile
 
 
@@ -459,6 +464,287 @@ class TimeoutPIDLockFile_TestCase(scaffold.TestCase):
         instance.acquire()
         mock_func_acquire.assert_called_with(instance, expected_timeout)
 
+
+class TimeoutPIDLockFile_wait_TestCase(scaffold.TestCase):
+    """ Test cases for ‘TimeoutPIDLockFile’ waiting to acquire. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(TimeoutPIDLockFile_wait_TestCase, self).setUp()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.pidfile_path = os.path.join(self.temp_dir, "test.pid")
+
+        self.holder_instance = daemon.pidfile.TimeoutPIDLockFile(
+                self.pidfile_path)
+        self.holder_instance.acquire()
+        self.addCleanup(self.release_if_locked, self.holder_instance)
+        self.test_instance = daemon.pidfile.TimeoutPIDLockFile(
+                self.pidfile_path)
+        self.addCleanup(self.release_if_locked, self.test_instance)
+
+    def release_if_locked(self, instance):
+        """ Release the lock, if held by `instance`. """
+        if instance.i_am_locking():
+            instance.release()
+
+    def test_acquires_when_released(self):
+        """ Should acquire the lock once the holder releases it. """
+        timer = threading.Timer(0.05, self.holder_instance.release)
+        timer.start()
+        self.addCleanup(timer.join)
+        instance = self.test_instance
+        instance.acquire(5)
+        self.assertTrue(instance.i_am_locking())
+
+    def test_waits_for_change_of_pid_file(self):
+        """ Should wait for the PID file to change, with the timeout. """
+        instance = self.test_instance
+        test_timeout = 5
+
+        def release(path, timeout):
+            self.holder_instance.release()
+            return True
+
+        with mock.patch.object(
+                daemon.filewatch, "wait_for_change",
+                side_effect=release) as mock_func_wait:
+            instance.acquire(test_timeout)
+        (path, timeout) = mock_func_wait.call_args[0]
+        self.assertEqual(self.pidfile_path, path)
+        self.assertGreater(timeout, 0)
+        self.assertLessEqual(timeout, test_timeout)
+        self.assertTrue(instance.i_am_locking())
+
+    def test_raises_lock_timeout_when_timeout_passes(self):
+        """ Should raise LockTimeout if locked until the timeout. """
+        instance = self.test_instance
+        self.assertRaises(lockfile.LockTimeout, instance.acquire, 0.05)
+
+    def test_raises_already_locked_if_timeout_zero(self):
+        """ Should raise AlreadyLocked if locked and timeout is zero. """
+        instance = self.test_instance
+        self.assertRaises(lockfile.AlreadyLocked, instance.acquire, 0)
+
+    def test_raises_already_locked_if_timeout_none(self):
+        """ Should raise AlreadyLocked at once if timeout is ``None``. """
+        instance = self.test_instance
+        with mock.patch.object(
+                daemon.filewatch, "wait_for_change") as mock_func_wait:
+            self.assertRaises(lockfile.AlreadyLocked, instance.acquire)
+        self.assertFalse(mock_func_wait.called)
+
+
+class FlockPIDLockFile_TestCase(scaffold.TestCase):
+    """ Test cases for ‘FlockPIDLockFile’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(FlockPIDLockFile_TestCase, self).setUp()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.pidfile_path = os.path.join(self.temp_dir, "test.pid")
+
+        self.test_instance = self.make_pidfile()
+        self.other_instance = self.make_pidfile()
+
+    def make_pidfile(self, acquire_timeout=None):
+        """ Make a PID file instance for the test path. """
+        instance = daemon.pidfile.FlockPIDLockFile(
+                self.pidfile_path, acquire_timeout)
+        self.addCleanup(self.release_if_locked, instance)
+        return instance
+
+    def release_if_locked(self, instance):
+        """ Release the lock, if held by `instance`. """
+        if instance.files_preserve:
+            instance.release()
+
+    def release_later(self, instance, delay=0.05):
+        """ Release the lock in a thread, after `delay` seconds. """
+        timer = threading.Timer(delay, instance.release)
+        timer.start()
+        self.addCleanup(timer.join)
+
+    def test_acquire_writes_current_pid(self):
+        """ Should write the current PID to the PID file. """
+        instance = self.test_instance
+        instance.acquire()
+        expected_pid = os.getpid()
+        self.assertEqual(expected_pid, instance.read_pid())
+
+    def test_acquire_holds_lock(self):
+        """ Should hold the lock once acquired. """
+        instance = self.test_instance
+        instance.acquire()
+        self.assertTrue(instance.is_locked())
+        self.assertTrue(instance.i_am_locking())
+        self.assertTrue(self.other_instance.is_locked())
+        self.assertFalse(self.other_instance.i_am_locking())
+
+    def test_files_preserve_has_locked_file_descriptor(self):
+        """ Should have the file descriptor in `files_preserve`. """
+        instance = self.test_instance
+        self.assertEqual([], instance.files_preserve)
+        instance.acquire()
+        (fd,) = instance.files_preserve
+        self.assertEqual(
+                os.stat(self.pidfile_path).st_ino, os.fstat(fd).st_ino)
+
+    def test_acquire_raises_already_locked_if_timeout_zero(self):
+        """ Should raise AlreadyLocked if locked and timeout is zero. """
+        self.other_instance.acquire()
+        instance = self.test_instance
+        self.assertRaises(lockfile.AlreadyLocked, instance.acquire, 0)
+
+    def test_acquire_raises_already_locked_if_held_by_instance(self):
+        """ Should raise AlreadyLocked if this instance holds the lock. """
+        instance = self.test_instance
+        instance.acquire()
+        self.assertRaises(lockfile.AlreadyLocked, instance.acquire, 0)
+
+    def test_acquire_raises_lock_timeout_when_timeout_passes(self):
+        """ Should raise LockTimeout if locked until the timeout. """
+        self.other_instance.acquire()
+        instance = self.test_instance
+        self.assertRaises(lockfile.LockTimeout, instance.acquire, 0.05)
+        self.assertEqual(
+                signal.SIG_DFL, signal.getsignal(signal.SIGALRM))
+        self.assertEqual(
+                (0.0, 0.0), signal.getitimer(signal.ITIMER_REAL))
+
+    def test_acquire_raises_lock_timeout_in_other_thread(self):
+        """ Should raise LockTimeout, when called in another thread. """
+        self.other_instance.acquire()
+        instance = self.test_instance
+        errors = []
+
+        def acquire():
+            try:
+                instance.acquire(0.05)
+            except lockfile.LockTimeout as exc:
+                errors.append(exc)
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        thread.join()
+        self.assertEqual(1, len(errors))
+
+    def test_acquire_uses_stored_timeout_by_default(self):
+        """ Should use the stored timeout by default. """
+        self.other_instance.acquire()
+        instance = self.make_pidfile(acquire_timeout=0)
+        self.assertRaises(lockfile.AlreadyLocked, instance.acquire)
+
+    def test_acquire_waits_for_release(self):
+        """ Should acquire the lock once another releases it. """
+        self.other_instance.acquire()
+        self.release_later(self.other_instance)
+        instance = self.test_instance
+        instance.acquire(5)
+        self.assertTrue(instance.i_am_locking())
+        self.assertEqual(os.getpid(), instance.read_pid())
+
+    def test_acquire_raises_already_locked_if_timeout_none(self):
+        """ Should raise AlreadyLocked at once, if timeout is ``None``. """
+        self.other_instance.acquire()
+        instance = self.test_instance
+        self.assertRaises(lockfile.AlreadyLocked, instance.acquire)
+
+    def test_acquire_keeps_existing_alarm_handler(self):
+        """ Should not replace an existing ‘SIGALRM’ handler. """
+        calls = []
+
+        def test_handler(signal_number, stack_frame):
+            calls.append(signal_number)
+
+        previous_handler = signal.signal(signal.SIGALRM, test_handler)
+        self.addCleanup(signal.signal, signal.SIGALRM, previous_handler)
+        self.other_instance.acquire()
+        instance = self.test_instance
+        self.assertRaises(lockfile.LockTimeout, instance.acquire, 0.05)
+        self.assertIs(test_handler, signal.getsignal(signal.SIGALRM))
+        self.assertEqual([], calls)
+
+    def test_acquire_closes_file_on_error(self):
+        """ Should close the opened file if locking fails. """
+        instance = self.test_instance
+        open_fds = set(daemon.fdaudit.list_open_fds())
+        with mock.patch.object(
+                daemon.pidfile.FlockPIDLockFile, "_is_current",
+                side_effect=OSError(errno.EIO, "I/O error")):
+            self.assertRaises(OSError, instance.acquire, 0)
+        self.assertEqual(open_fds, set(daemon.fdaudit.list_open_fds()))
+        self.other_instance.acquire()
+        self.assertRaises(lockfile.AlreadyLocked, instance.acquire, 0)
+        self.assertEqual(
+                open_fds | set(self.other_instance.files_preserve),
+                set(daemon.fdaudit.list_open_fds()))
+
+    def test_acquire_takes_over_unlocked_pid_file(self):
+        """ Should acquire a PID file left by an exited process. """
+        self.other_instance.acquire()
+        # The kernel releases the lock of a process that exits.
+        (fd,) = self.other_instance.files_preserve
+        os.close(fd)
+        self.other_instance._fd = None
+        instance = self.test_instance
+        instance.acquire(0)
+        self.assertTrue(instance.i_am_locking())
+
+    def test_release_removes_pid_file(self):
+        """ Should remove the PID file, and release the lock. """
+        instance = self.test_instance
+        instance.acquire()
+        instance.release()
+        self.assertFalse(os.path.exists(self.pidfile_path))
+        self.assertFalse(instance.is_locked())
+        self.assertEqual([], instance.files_preserve)
+
+    def test_release_raises_not_locked_if_not_held(self):
+        """ Should raise NotLocked if this instance holds no lock. """
+        instance = self.test_instance
+        self.assertRaises(lockfile.NotLocked, instance.release)
+
+    def test_release_raises_not_my_lock_if_replaced(self):
+        """ Should raise NotMyLock if the PID file was replaced. """
+        instance = self.test_instance
+        instance.acquire()
+        os.remove(self.pidfile_path)
+        self.assertRaises(lockfile.NotMyLock, instance.release)
+        self.assertEqual([], instance.files_preserve)
+
+    def test_is_locked_false_if_no_pid_file(self):
+        """ Should not be locked if there is no PID file. """
+        instance = self.test_instance
+        self.assertFalse(instance.is_locked())
+
+    def test_break_lock_leaves_locked_pid_file(self):
+        """ Should not remove a PID file which is locked. """
+        self.other_instance.acquire()
+        instance = self.test_instance
+        instance.break_lock()
+        self.assertTrue(os.path.exists(self.pidfile_path))
+        self.assertTrue(self.other_instance.i_am_locking())
+
+    def test_break_lock_removes_unlocked_pid_file(self):
+        """ Should remove a PID file which is not locked. """
+        with io.open(self.pidfile_path, 'w') as pidfile:
+            pidfile.write("{pid:d}\n".format(pid=self.getUniqueInteger()))
+        instance = self.test_instance
+        instance.break_lock()
+        self.assertFalse(os.path.exists(self.pidfile_path))
+
+    def test_context_manager_acquires_and_releases(self):
+        """ Should acquire on enter, and release on exit. """
+        instance = self.test_instance
+        with instance as context:
+            self.assertIs(instance, context)
+            self.assertTrue(instance.i_am_locking())
+        self.assertFalse(instance.is_locked())
+
 
 # Local variables:
 # coding: utf-8
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_profilewindow.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘profilewindow’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import os.path
+import pstats
+import shutil
+import signal
+import tempfile
+import threading
+
+import mock
+
+from . import scaffold
+
+import daemon.profilewindow
+
+
+def function_to_count():
+    """ A function whose calls the profiler counts. """
+
+
+class ProfileWindow_TestCase(scaffold.TestCase):
+    """ Test cases for ‘ProfileWindow’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(ProfileWindow_TestCase, self).setUp()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.test_instance = daemon.profilewindow.ProfileWindow(
+                self.temp_dir, duration=60)
+        self.addCleanup(self.test_instance.stop)
+
+    def test_writes_exact_call_counts(self):
+        """ Should write the exact call counts of the window. """
+        self.test_instance.request()
+        self.assertTrue(self.test_instance.is_active)
+        for __ in range(7):
+            function_to_count()
+        self.test_instance.request()
+        self.assertFalse(self.test_instance.is_active)
+
+        path = self.test_instance.last_path
+        self.assertEqual(self.temp_dir, os.path.dirname(path))
+        self.assertIn(
+                "-{pid:d}-".format(pid=os.getpid()),
+                os.path.basename(path))
+        self.assertTrue(path.endswith(".pstats"))
+        stats = pstats.Stats(path)
+        (call_count,) = [
+                value[1] for (key, value) in stats.stats.items()
+                if key[2] == "function_to_count"]
+        self.assertEqual(7, call_count)
+
+    def test_closes_window_after_duration(self):
+        """ Should close the window when the duration ends. """
+        self.test_instance.duration = 0.01
+        self.test_instance.request()
+        self.test_instance._timer.join()
+        self.test_instance.checkpoint()
+        self.assertFalse(self.test_instance.is_active)
+        self.assertEqual(1, self.test_instance.stats()['windows'])
+
+    def test_passes_request_to_main_thread_by_signal(self):
+        """ Should send the signal to pass a request to the main thread. """
+        self.test_instance.signal_number = signal.SIGPROF
+        with mock.patch.object(os, "kill") as mock_func_kill:
+            thread = threading.Thread(target=self.test_instance.request)
+            thread.start()
+            thread.join()
+        mock_func_kill.assert_called_with(os.getpid(), signal.SIGPROF)
+        self.assertFalse(self.test_instance.is_active)
+        self.test_instance.handle_signal(signal.SIGPROF, None)
+        self.assertTrue(self.test_instance.is_active)
+
+    def test_rejects_request_to_main_thread_without_signal(self):
+        """ Should reject a request for the main thread, without a signal.
+            """
+        errors = []
+
+        def request():
+            try:
+                self.test_instance.request()
+            except RuntimeError as exc:
+                errors.append(exc)
+
+        with mock.patch.object(os, "kill") as mock_func_kill:
+            thread = threading.Thread(target=request)
+            thread.start()
+            thread.join()
+        self.assertEqual(1, len(errors))
+        self.assertFalse(mock_func_kill.called)
+        self.test_instance.checkpoint()
+        self.assertFalse(self.test_instance.is_active)
+
+    def test_opens_window_in_chosen_thread_at_checkpoint(self):
+        """ Should open the window in the chosen thread at a checkpoint. """
+        checkpoint_event = threading.Event()
+        done_event = threading.Event()
+        results = []
+
+        def run_thread():
+            checkpoint_event.wait()
+            self.test_instance.checkpoint()
+            results.append(self.test_instance.is_active)
+            self.test_instance.stop()
+            done_event.set()
+
+        thread = threading.Thread(target=run_thread)
+        self.test_instance.thread = thread
+        thread.start()
+        self.test_instance.request()
+        self.assertFalse(self.test_instance.is_active)
+        checkpoint_event.set()
+        done_event.wait()
+        thread.join()
+        self.assertEqual([True], results)
+        self.assertIsNot(None, self.test_instance.last_path)
+
+    def test_names_each_window_file_uniquely(self):
+        """ Should write each window to a new file, within a second. """
+        paths = []
+        for __ in range(3):
+            self.test_instance.request()
+            self.test_instance.request()
+            paths.append(self.test_instance.last_path)
+        self.assertEqual(3, len(set(paths)))
+        for path in paths:
+            self.assertTrue(os.path.exists(path))
+
+    def test_passes_request_through_event_loop(self):
+        """ Should pass a request through an attached event loop. """
+        mock_loop = mock.MagicMock(name="loop")
+        self.test_instance.attach_event_loop(mock_loop)
+        self.test_instance.request()
+        mock_loop.call_soon_threadsafe.assert_called_with(
+                self.test_instance._open_window)
+
+    def test_records_thread_running_event_loop(self):
+        """ Should record the thread running the attached event loop. """
+        mock_loop = mock.MagicMock(name="loop")
+        self.test_instance.attach_event_loop(mock_loop)
+        self.assertIs(None, self.test_instance.event_loop_thread_ident)
+        (callback,) = mock_loop.call_soon_threadsafe.call_args[0]
+        thread = threading.Thread(target=callback)
+        thread.start()
+        thread.join()
+        self.assertEqual(
+                thread.ident, self.test_instance.event_loop_thread_ident)
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -48,6 +48,7 @@ from .test_daemon import (
 import daemon.daemon
 import daemon.runner
 import daemon.pidfile
+import daemon.control
 
 
 class ModuleExceptions_TestCase(scaffold.Exception_TestCase):
@@ -74,6 +75,11 @@ class ModuleExceptions_TestCase(scaffold.Exception_TestCase):
                 min_args = 1,
                 types = [daemon.runner.DaemonRunnerError, RuntimeError],
                 )),
+            ('daemon.runner.DaemonRunnerControlFailureError', dict(
+                exc_type = daemon.runner.DaemonRunnerControlFailureError,
+                min_args = 1,
+                types = [daemon.runner.DaemonRunnerError, RuntimeError],
+                )),
             ])
 
 
@@ -298,6 +304,16 @@ class DaemonRunner_TestCase(DaemonRunner_BaseTestCase):
         daemon.pidfile.TimeoutPIDLockFile.assert_called_with(
                 pidfile_path, pidfile_timeout)
 
+    def test_creates_lock_with_specified_class(self):
+        """ Should create the lock with the app's ‘pidfile_class’. """
+        pidfile_class = mock.MagicMock(name="pidfile_class")
+        self.test_app.pidfile_class = pidfile_class
+        instance = daemon.runner.DaemonRunner(self.test_app)
+        pidfile_class.assert_called_with(
+                self.scenario['pidfile_path'],
+                self.scenario['pidfile_timeout'])
+        self.assertIs(pidfile_class.return_value, instance.pidfile)
+
     def test_has_created_pidfile(self):
         """ Should have new PID lock file as `pidfile` attribute. """
         expected_pidfile = self.mock_runner_lockfile
@@ -334,7 +350,7 @@ class DaemonRunner_TestCase(DaemonRunner_BaseTestCase):
 
     def test_daemon_context_has_stdout_in_append_mode(self):
         """ DaemonContext component should open stdout file for append. """
-        expected_mode = 'w+t'
+        expected_mode = 'a+t'
         daemon_context = self.test_instance.daemon_context
         self.assertIn(expected_mode, daemon_context.stdout.mode)
 
@@ -347,7 +363,7 @@ class DaemonRunner_TestCase(DaemonRunner_BaseTestCase):
 
     def test_daemon_context_has_stderr_in_append_mode(self):
         """ DaemonContext component should open stderr file for append. """
-        expected_mode = 'w+t'
+        expected_mode = 'a+b'
         daemon_context = self.test_instance.daemon_context
         self.assertIn(expected_mode, daemon_context.stderr.mode)
 
@@ -358,6 +374,107 @@ class DaemonRunner_TestCase(DaemonRunner_BaseTestCase):
         self.assertEqual(
                 expected_buffering, daemon_context.stderr.buffering)
 
+    def test_daemon_context_reopens_streams_on_sighup(self):
+        """ DaemonContext component should reopen streams on SIGHUP. """
+        expected_target = 'reopen_streams'
+        daemon_context = self.test_instance.daemon_context
+        self.assertEqual(
+                expected_target, daemon_context.signal_map[signal.SIGHUP])
+
+    def test_daemon_context_has_default_signals_in_signal_map(self):
+        """ DaemonContext component should keep the default signal map. """
+        daemon_context = self.test_instance.daemon_context
+        self.assertEqual(
+                'terminate', daemon_context.signal_map[signal.SIGTERM])
+
+    def test_daemon_context_has_specified_log_rotation(self):
+        """ DaemonContext component should have app's log rotation. """
+        self.test_app.log_rotation = object()
+        instance = daemon.runner.DaemonRunner(self.test_app)
+        self.assertIs(
+                self.test_app.log_rotation,
+                instance.daemon_context.log_rotation)
+
+    def test_daemon_context_has_specified_output_buffering(self):
+        """ DaemonContext component should have app's output buffering. """
+        self.test_app.output_buffering = object()
+        instance = daemon.runner.DaemonRunner(self.test_app)
+        self.assertIs(
+                self.test_app.output_buffering,
+                instance.daemon_context.output_buffering)
+
+    def test_daemon_context_has_specified_core_dump_policy(self):
+        """ DaemonContext component should have app's core dump policy. """
+        self.test_app.core_dump_policy = object()
+        instance = daemon.runner.DaemonRunner(self.test_app)
+        self.assertIs(
+                self.test_app.core_dump_policy,
+                instance.daemon_context.core_dump_policy)
+
+    def test_daemon_context_has_specified_watchdog(self):
+        """ DaemonContext component should have app's watchdog. """
+        self.test_app.watchdog = object()
+        instance = daemon.runner.DaemonRunner(self.test_app)
+        self.assertIs(self.test_app.watchdog, instance.daemon_context.watchdog)
+
+    def test_daemon_context_has_specified_profiler(self):
+        """ DaemonContext component should have app's profiler. """
+        self.test_app.profiler = object()
+        instance = daemon.runner.DaemonRunner(self.test_app)
+        self.assertIs(self.test_app.profiler, instance.daemon_context.profiler)
+        self.assertEqual(
+                'toggle_profiler',
+                instance.daemon_context.signal_map[signal.SIGUSR2])
+
+    def test_daemon_context_has_specified_profile_window(self):
+        """ DaemonContext component should have app's profile window. """
+        self.test_app.profile_window = object()
+        instance = daemon.runner.DaemonRunner(self.test_app)
+        self.assertIs(
+                self.test_app.profile_window,
+                instance.daemon_context.profile_window)
+
+    def test_daemon_context_has_specified_memory_snapshots(self):
+        """ DaemonContext component should have app's memory snapshots. """
+        self.test_app.memory_snapshots = object()
+        instance = daemon.runner.DaemonRunner(self.test_app)
+        self.assertIs(
+                self.test_app.memory_snapshots,
+                instance.daemon_context.memory_snapshots)
+
+    def test_daemon_context_has_specified_fd_audit(self):
+        """ DaemonContext component should have app's fd audit. """
+        self.test_app.fd_audit = object()
+        instance = daemon.runner.DaemonRunner(self.test_app)
+        self.assertIs(self.test_app.fd_audit, instance.daemon_context.fd_audit)
+
+    def test_daemon_context_has_specified_gc_monitor(self):
+        """ DaemonContext component should have app's GC monitor. """
+        self.test_app.gc_monitor = object()
+        instance = daemon.runner.DaemonRunner(self.test_app)
+        self.assertIs(
+                self.test_app.gc_monitor, instance.daemon_context.gc_monitor)
+
+    def test_daemon_context_has_specified_crash_log(self):
+        """ DaemonContext component should have app's crash log. """
+        self.test_app.crash_log = object()
+        instance = daemon.runner.DaemonRunner(self.test_app)
+        self.assertIs(
+                self.test_app.crash_log, instance.daemon_context.crash_log)
+
+    def test_daemon_context_has_specified_crash_buffer(self):
+        """ DaemonContext component should have app's crash buffer. """
+        self.test_app.crash_buffer = object()
+        instance = daemon.runner.DaemonRunner(self.test_app)
+        self.assertIs(
+                self.test_app.crash_buffer,
+                instance.daemon_context.crash_buffer)
+
+    def test_daemon_context_has_no_log_rotation_by_default(self):
+        """ DaemonContext component should have no log rotation. """
+        daemon_context = self.test_instance.daemon_context
+        self.assertIs(None, daemon_context.log_rotation)
+
 
 class DaemonRunner_usage_exit_TestCase(DaemonRunner_BaseTestCase):
     """ Test cases for DaemonRunner.usage_exit method. """
@@ -604,6 +721,65 @@ class DaemonRunner_do_action_restart_TestCase(DaemonRunner_BaseTestCase):
         mock_func_daemonrunner_stop.assert_called_with()
 
 
+@mock.patch.object(daemon.control, "send_control_command")
+class DaemonRunner_do_action_control_TestCase(DaemonRunner_BaseTestCase):
+    """ Test cases for DaemonRunner.do_action method, control actions. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(DaemonRunner_do_action_control_TestCase, self).setUp()
+
+        self.test_socket_path = tempfile.mktemp()
+        self.test_instance.control_socket_path = self.test_socket_path
+
+        patcher_stdout = mock.patch.object(
+                sys, "stdout",
+                new=FakeFileDescriptorStringIO())
+        self.fake_stdout = patcher_stdout.start()
+        self.addCleanup(patcher_stdout.stop)
+
+    def test_sends_action_as_command(self, mock_func_send_control_command):
+        """ Should send each control action as a command. """
+        instance = self.test_instance
+        mock_func_send_control_command.return_value = {}
+        for action in [
+                'status', 'metrics', 'reload', 'dump-stacks', 'shutdown']:
+            instance.action = action
+            instance.do_action()
+            mock_func_send_control_command.assert_called_with(
+                    self.test_socket_path, action)
+
+    def test_emits_result_to_stdout(self, mock_func_send_control_command):
+        """ Should emit the command result as JSON to stdout. """
+        instance = self.test_instance
+        instance.action = 'status'
+        mock_func_send_control_command.return_value = {'pid': 23}
+        instance.do_action()
+        self.assertIn('"pid": 23', self.fake_stdout.getvalue())
+
+    def test_raises_error_if_no_control_socket(
+            self, mock_func_send_control_command):
+        """ Should raise error if there is no control socket path. """
+        instance = self.test_instance
+        instance.action = 'status'
+        instance.control_socket_path = None
+        self.assertRaises(
+                daemon.runner.DaemonRunnerControlFailureError,
+                instance.do_action)
+
+    def test_raises_error_if_command_fails(
+            self, mock_func_send_control_command):
+        """ Should raise error if sending the command fails. """
+        instance = self.test_instance
+        instance.action = 'reload'
+        mock_func_send_control_command.side_effect = (
+                daemon.control.ControlCommandError("No handler"))
+        exc = self.assertRaises(
+                daemon.runner.DaemonRunnerControlFailureError,
+                instance.do_action)
+        self.assertIn("No handler", unicode(exc))
+
+
 @mock.patch.object(sys, "stderr")
 class emit_message_TestCase(scaffold.TestCase):
     """ Test cases for ‘emit_message’ function. """
@@ -667,6 +843,30 @@ class is_pidfile_stale_TestCase(scaffold.TestCase):
         result = daemon.runner.is_pidfile_stale(self.test_pidfile)
         self.assertEqual(expected_result, result)
 
+
+class import_time_TestCase(scaffold.TestCase):
+    """ Test cases for the modules imported with the runner module. """
+
+    deferred_module_names = [
+            'json', 'lockfile', 'select', 'signal', 'socket', 'threading',
+            'traceback']
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(import_time_TestCase, self).setUp()
+
+        if sys.version_info < (3, 7):
+            self.skipTest("Python option ‘-X importtime’ not supported")
+
+    def test_defers_modules_not_needed_for_every_command(self):
+        """ Should not import modules until first used. """
+        startup_module_names = set(scaffold.get_import_times('os'))
+        import_times = scaffold.get_import_times('daemon.runner')
+        self.assertIn('daemon.runner', import_times)
+        imported_module_names = set(import_times) - startup_module_names
+        for module_name in self.deferred_module_names:
+            self.assertNotIn(module_name, imported_module_names)
+
 
 # Local variables:
 # coding: utf-8
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_sampler.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘sampler’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import os.path
+import shutil
+import tempfile
+import threading
+
+from . import scaffold
+
+import daemon.sampler
+
+
+def wait_in_known_function(event):
+    """ Wait for the event, in a function the profiler can identify. """
+    event.wait()
+
+
+class SamplingProfiler_TestCase(scaffold.TestCase):
+    """ Test cases for ‘SamplingProfiler’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(SamplingProfiler_TestCase, self).setUp()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.test_output_path = os.path.join(
+                self.temp_dir, "profile-{pid}.txt")
+        self.test_instance = daemon.sampler.SamplingProfiler(
+                self.test_output_path, rate=200)
+        self.addCleanup(self.test_instance.stop)
+
+        self.release_event = threading.Event()
+        self.addCleanup(self.release_event.set)
+        self.test_thread = threading.Thread(
+                target=wait_in_known_function, args=(self.release_event,))
+        self.test_thread.start()
+
+    def test_counts_stack_of_other_thread(self):
+        """ Should count the stack of another thread. """
+        self.test_instance.sample()
+        self.test_instance.sample()
+        self.assertEqual(2, self.test_instance.sample_count)
+        counts = [
+                count for (stack, count) in self.test_instance.counts.items()
+                if stack[0].startswith("wait ")
+                and any(
+                    label.startswith("wait_in_known_function ")
+                    for label in stack)]
+        self.assertEqual([2], counts)
+
+    def test_counts_excess_stacks_as_truncated(self):
+        """ Should count stacks beyond `max_stacks` as truncated. """
+        self.test_instance.max_stacks = 0
+        self.test_instance.sample()
+        self.assertEqual(
+                [(daemon.sampler.truncated_stack_label,)],
+                list(self.test_instance.counts))
+
+    def test_writes_collapsed_stacks_when_stopped(self):
+        """ Should write the collapsed stacks file when stopped. """
+        self.test_instance.start()
+        self.assertTrue(self.test_instance.is_running)
+        while self.test_instance.sample_count < 3:
+            self.release_event.wait(0.01)
+        path = self.test_instance.stop()
+        self.assertEqual(
+                self.test_output_path.format(pid=os.getpid()), path)
+        with open(path) as infile:
+            lines = infile.read().splitlines()
+        self.assertTrue(any(
+                "wait_in_known_function (test_sampler.py:" in line
+                for line in lines))
+        for line in lines:
+            (stack, count) = line.rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+
+    def test_stop_returns_none_if_not_running(self):
+        """ Should return ``None`` from `stop` if not running. """
+        self.assertIs(None, self.test_instance.stop())
+
+    def test_toggle_starts_then_stops(self):
+        """ Should start when toggled, then stop when toggled again. """
+        self.test_instance.toggle()
+        self.assertTrue(self.test_instance.stats()['running'])
+        self.test_instance.toggle()
+        self.assertFalse(self.test_instance.stats()['running'])
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
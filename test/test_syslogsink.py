@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_syslogsink.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘syslogsink’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import os
+import os.path
+import logging
+import logging.handlers
+import shutil
+import socket
+import tempfile
+
+from . import scaffold
+
+import daemon.syslogsink
+
+
+def setup_syslog_socket_fixtures(testcase):
+    """ Set up common test fixtures for syslog socket test cases.
+
+        :param testcase: A ``TestCase`` instance to decorate.
+        :return: ``None``.
+
+        The `testcase` gets a datagram socket `syslog_socket`, bound at
+        `syslog_path`, standing in for the system log socket.
+
+        """
+    testcase.temp_dir = tempfile.mkdtemp()
+    testcase.addCleanup(shutil.rmtree, testcase.temp_dir)
+    testcase.syslog_path = os.path.join(testcase.temp_dir, "log")
+
+    testcase.syslog_socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    testcase.addCleanup(testcase.syslog_socket.close)
+    testcase.syslog_socket.bind(testcase.syslog_path)
+    testcase.syslog_socket.settimeout(5)
+
+
+def receive_datagrams(testcase, count):
+    """ Receive a number of datagrams at the syslog socket. """
+    result = [testcase.syslog_socket.recv(65536) for __ in range(count)]
+    return result
+
+
+class SyslogSink_TestCase(scaffold.TestCase):
+    """ Test cases for ‘SyslogSink’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(SyslogSink_TestCase, self).setUp()
+
+        setup_syslog_socket_fixtures(self)
+        self.test_instance = daemon.syslogsink.SyslogSink(
+                address=self.syslog_path, ident="spam",
+                flush_interval=0.01)
+        self.addCleanup(self.test_instance.close)
+
+    def test_connects_when_created(self):
+        """ Should connect to the syslog socket when created. """
+        self.assertIsNot(None, self.test_instance.socket)
+        self.assertEqual(
+                [self.test_instance.socket.fileno()],
+                self.test_instance.files_preserve)
+
+    def test_sends_after_socket_path_is_gone(self):
+        """ Should send on the socket connected before the path is gone. """
+        os.unlink(self.syslog_path)
+        self.test_instance.submit("Lorem ipsum")
+        self.test_instance.start()
+        self.test_instance.stop()
+        (datagram,) = receive_datagrams(self, 1)
+        self.assertTrue(datagram.endswith(b"Lorem ipsum"))
+
+    def test_sends_message_with_header(self):
+        """ Should send a datagram with priority, ident, and PID. """
+        self.test_instance.start()
+        self.addCleanup(self.test_instance.stop)
+        self.test_instance.submit(
+                "Lorem ipsum", logging.handlers.SysLogHandler.LOG_ERR)
+        (datagram,) = receive_datagrams(self, 1)
+        self.assertTrue(datagram.startswith(b"<11>"))
+        expected_suffix = "spam[{pid:d}]: Lorem ipsum".format(
+                pid=os.getpid()).encode('utf-8')
+        self.assertTrue(datagram.endswith(expected_suffix))
+
+    def test_sends_queued_messages_in_order(self):
+        """ Should send all the queued messages in order. """
+        for index in range(8):
+            self.test_instance.submit("message {index:d}".format(index=index))
+        self.test_instance.start()
+        self.test_instance.stop()
+        datagrams = receive_datagrams(self, 8)
+        self.assertTrue(datagrams[0].endswith(b"message 0"))
+        self.assertTrue(datagrams[-1].endswith(b"message 7"))
+        self.assertEqual(8, self.test_instance.stats()['messages_sent'])
+
+    def test_drops_messages_when_queue_full(self):
+        """ Should drop and count messages when the queue is full. """
+        self.test_instance.queue_size = 3
+        results = [self.test_instance.submit("eggs") for __ in range(5)]
+        self.assertEqual([True, True, True, False, False], results)
+        stats = self.test_instance.stats()
+        self.assertEqual(2, stats['messages_dropped'])
+        self.assertEqual(3, stats['messages_queued'])
+
+    def test_drops_messages_when_no_syslog_socket(self):
+        """ Should drop and count messages when it cannot connect. """
+        test_instance = daemon.syslogsink.SyslogSink(
+                address=os.path.join(self.temp_dir, "b0gUs"),
+                flush_interval=0.01)
+        test_instance.submit("beans")
+        test_instance.start()
+        test_instance.stop()
+        stats = test_instance.stats()
+        self.assertEqual(1, stats['messages_dropped'])
+        self.assertEqual(1, stats['send_errors'])
+
+    def test_truncates_long_message(self):
+        """ Should truncate a message to `max_message_size` bytes. """
+        self.test_instance.max_message_size = 100
+        result = self.test_instance.format_message(
+                6, 0, "x" * 1000)
+        self.assertEqual(100, len(result))
+
+    def test_truncates_long_message_at_character_boundary(self):
+        """ Should not split a multi-byte character when truncating. """
+        self.test_instance.max_message_size = 100
+        result = self.test_instance.format_message(
+                6, 0, "\N{EURO SIGN}" * 100)
+        self.assertLessEqual(len(result), 100)
+        self.assertTrue(result.endswith("\N{EURO SIGN}".encode('utf-8')))
+        result.decode('utf-8')
+
+    def test_keeps_running_until_each_user_stops(self):
+        """ Should keep sending until each user has stopped the sink. """
+        self.test_instance.start()
+        self.test_instance.start()
+        self.test_instance.stop()
+        self.assertIsNot(None, self.test_instance.thread)
+        self.test_instance.stop()
+        self.assertIs(None, self.test_instance.thread)
+
+    def test_preserves_socket_file_descriptor(self):
+        """ Should list the connected socket in `files_preserve`. """
+        self.test_instance.start()
+        self.addCleanup(self.test_instance.stop)
+        self.assertEqual(
+                [self.test_instance.socket.fileno()],
+                self.test_instance.files_preserve)
+
+
+class SyslogHandler_TestCase(scaffold.TestCase):
+    """ Test cases for ‘SyslogHandler’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(SyslogHandler_TestCase, self).setUp()
+
+        setup_syslog_socket_fixtures(self)
+        self.test_sink = daemon.syslogsink.SyslogSink(
+                address=self.syslog_path, flush_interval=0.01)
+        self.addCleanup(self.test_sink.close)
+        self.test_sink.start()
+        self.addCleanup(self.test_sink.stop)
+
+        self.test_instance = daemon.syslogsink.SyslogHandler(self.test_sink)
+
+    def test_sends_log_record_with_priority(self):
+        """ Should send the log record with the priority for its level. """
+        test_record = logging.makeLogRecord(dict(
+                msg="Wibble", levelno=logging.WARNING, levelname="WARNING"))
+        self.test_instance.handle(test_record)
+        (datagram,) = receive_datagrams(self, 1)
+        self.assertTrue(datagram.startswith(b"<12>"))
+        self.assertTrue(datagram.endswith(b"Wibble"))
+
+
+class SyslogStream_TestCase(scaffold.TestCase):
+    """ Test cases for ‘SyslogStream’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(SyslogStream_TestCase, self).setUp()
+
+        setup_syslog_socket_fixtures(self)
+        self.test_sink = daemon.syslogsink.SyslogSink(
+                address=self.syslog_path, flush_interval=0.01)
+        self.addCleanup(self.test_sink.close)
+        self.test_instance = daemon.syslogsink.SyslogStream(
+                self.test_sink, poll_interval=0.01)
+        self.addCleanup(os.close, self.test_instance.read_fd)
+        self.addCleanup(os.close, self.test_instance.write_fd)
+
+    def test_sends_each_line_written(self):
+        """ Should send each line written to the stream. """
+        self.test_instance.start()
+        os.write(self.test_instance.fileno(), b"spam\neggs\nbea")
+        os.write(self.test_instance.fileno(), b"ns")
+        self.test_instance.stop()
+        datagrams = receive_datagrams(self, 3)
+        self.assertEqual(
+                [b"spam", b"eggs", b"beans"],
+                [datagram.split(b": ", 1)[1] for datagram in datagrams])
+
+    def test_stop_stops_sink(self):
+        """ Should stop the sink when stopped. """
+        self.test_instance.start()
+        self.test_instance.stop()
+        self.assertIs(None, self.test_sink.thread)
+
+    def test_preserves_pipe_and_socket(self):
+        """ Should list its pipe and the sink socket in `files_preserve`. """
+        self.test_instance.start()
+        self.addCleanup(self.test_instance.stop)
+        expected_fds = [
+                self.test_instance.read_fd, self.test_instance.write_fd,
+                self.test_sink.socket.fileno()]
+        self.assertEqual(expected_fds, self.test_instance.files_preserve)
+
+
+class truncate_utf8_TestCase(scaffold.TestCase):
+    """ Test cases for ‘truncate_utf8’ function. """
+
+    def test_keeps_data_within_size(self):
+        """ Should return data within the size unchanged. """
+        result = daemon.syslogsink.truncate_utf8(b"spam", 4)
+        self.assertEqual(b"spam", result)
+
+    def test_truncates_before_split_character(self):
+        """ Should truncate before a character which would be split. """
+        test_data = "a\N{EURO SIGN}b".encode('utf-8')
+        for size in [2, 3]:
+            result = daemon.syslogsink.truncate_utf8(test_data, size)
+            self.assertEqual(b"a", result)
+        result = daemon.syslogsink.truncate_utf8(test_data, 4)
+        self.assertEqual("a\N{EURO SIGN}".encode('utf-8'), result)
+
+
+class get_priority_for_level_TestCase(scaffold.TestCase):
+    """ Test cases for ‘get_priority_for_level’ function. """
+
+    def test_maps_logging_levels(self):
+        """ Should map each logging level to a syslog priority. """
+        expected_priorities = [
+                (logging.CRITICAL, 2), (logging.ERROR, 3),
+                (logging.WARNING, 4), (logging.INFO, 6),
+                (logging.DEBUG, 7)]
+        for (level, expected_priority) in expected_priorities:
+            self.assertEqual(
+                    expected_priority,
+                    daemon.syslogsink.get_priority_for_level(level))
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
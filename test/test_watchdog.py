@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# test/test_watchdog.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+""" Unit test for ‘watchdog’ module.
+    """
+
+from __future__ import (absolute_import, unicode_literals)
+
+import io
+import faulthandler
+
+import mock
+
+from . import scaffold
+
+import daemon.watchdog
+
+
+class StallWatchdog_TestCase(scaffold.TestCase):
+    """ Test cases for ‘StallWatchdog’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(StallWatchdog_TestCase, self).setUp()
+
+        self.test_time = 1000.0
+        func_patcher_clock = mock.patch.object(
+                daemon.watchdog, "clock", side_effect=lambda: self.test_time)
+        func_patcher_clock.start()
+        self.addCleanup(func_patcher_clock.stop)
+
+        self.test_output = io.StringIO()
+        self.test_instance = daemon.watchdog.StallWatchdog(
+                threshold=10, output=self.test_output)
+
+    def test_no_stall_while_heartbeats_arrive(self):
+        """ Should detect no stall while heartbeats arrive in time. """
+        for __ in range(5):
+            self.test_time += 5
+            self.test_instance.heartbeat()
+            self.test_instance.check()
+        self.assertEqual(0, self.test_instance.stall_count)
+        self.assertEqual("", self.test_output.getvalue())
+
+    def test_dumps_stacks_once_per_stall(self):
+        """ Should dump the thread stacks once for each stall. """
+        self.test_instance.heartbeat()
+        for __ in range(3):
+            self.test_time += 11
+            self.test_instance.check()
+        self.assertEqual(1, self.test_instance.stall_count)
+        output = self.test_output.getvalue()
+        self.assertEqual(1, output.count("Stall detected"))
+        self.assertIn("test_dumps_stacks_once_per_stall", output)
+
+    def test_records_stall_duration_when_stall_ends(self):
+        """ Should record the duration of a stall when it ends. """
+        self.test_instance.heartbeat()
+        self.test_time += 15
+        self.test_instance.check()
+        self.assertTrue(self.test_instance.stats()['stalled'])
+        self.test_time += 5
+        self.test_instance.heartbeat()
+        self.test_instance.check()
+        stats = self.test_instance.stats()
+        self.assertFalse(stats['stalled'])
+        self.assertEqual(20, stats['stall_seconds_total'])
+        self.assertEqual(20, stats['stall_seconds_max'])
+
+    def test_sends_heartbeat_through_event_loop(self):
+        """ Should send a heartbeat through an attached event loop. """
+        mock_loop = mock.MagicMock(name="loop")
+        self.test_instance.attach_event_loop(mock_loop)
+        self.test_instance.check()
+        (callback,) = mock_loop.call_soon_threadsafe.call_args[0]
+        self.test_time += 2
+        callback()
+        stats = self.test_instance.stats()
+        self.assertEqual(2, stats['event_loop_lag_seconds'])
+        self.assertEqual(0, stats['heartbeat_age_seconds'])
+
+    def test_start_then_stop_watching(self):
+        """ Should start and stop the watchdog thread. """
+        self.test_instance.check_interval = 0.01
+        self.test_instance.start()
+        self.assertTrue(self.test_instance.thread.is_alive())
+        self.test_instance.stop()
+        self.assertIs(None, self.test_instance.thread)
+
+    def test_arms_native_dump_while_watching(self):
+        """ Should arm the `faulthandler` timer if `native_timeout`. """
+        self.test_instance.native_timeout = 30
+        self.test_instance.check_interval = 0.01
+        with mock.patch.object(
+                faulthandler, "dump_traceback_later") as mock_arm:
+            with mock.patch.object(
+                    faulthandler,
+                    "cancel_dump_traceback_later") as mock_cancel:
+                self.test_instance.start()
+                self.test_instance.stop()
+        mock_arm.assert_called_with(
+                30, exit=False, file=self.test_output)
+        mock_cancel.assert_called_with()
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -23,6 +23,7 @@ import contextlib
 import collections
 import textwrap
 import json
+import shutil
 import tempfile
 import distutils.dist
 import distutils.cmd
@@ -911,6 +912,154 @@ class get_latest_version_TestCase(
         self.assertDictEqual(self.expected_result, result)
 
 
+class get_newest_changelog_entry_TestCase(
+        testscenarios.WithScenarios, testtools.TestCase):
+    """ Test cases for ‘get_newest_changelog_entry’ function. """
+
+    newest_entry = textwrap.dedent("""\
+            Version 1.0
+            ===========
+
+            :Released: 2009-01-01
+            :Maintainer: Foo Bar <foo.bar@example.org>
+
+            * Lorem ipsum dolor sit amet.
+
+
+            """)
+
+    older_entries = textwrap.dedent("""\
+            Version 0.8
+            ===========
+
+            :Released: 2004-01-01
+            :Maintainer: Foo Bar <foo.bar@example.org>
+
+            * Donec venenatis nisl aliquam ipsum.
+
+
+            Version 0.7.2
+            =============
+
+            :Released: 2001-01-01
+            :Maintainer: Foo Bar <foo.bar@example.org>
+
+            * Pellentesque elementum mollis finibus.
+            """)
+
+    scenarios = [
+            ('single entry', {
+                'test_input': newest_entry,
+                'expected_result': newest_entry,
+                }),
+            ('multiple entries', {
+                'test_input': newest_entry + older_entries,
+                'expected_result': newest_entry,
+                }),
+            ('no entries', {
+                'test_input': "",
+                'expected_result': "",
+                }),
+            ]
+
+    def test_returns_expected_result(self):
+        """ Should return the text of the newest entry. """
+        result = version.get_newest_changelog_entry(self.test_input)
+        self.assertEqual(self.expected_result, result)
+
+    def test_parses_to_newest_version_info(self):
+        """ Should give the same newest version info as the whole text. """
+        entry_json = version.changelog_to_version_info_collection(
+                io.StringIO(version.get_newest_changelog_entry(
+                    self.test_input)))
+        all_json = version.changelog_to_version_info_collection(
+                io.StringIO(self.test_input))
+        self.assertEqual(
+                version.get_latest_version(json.loads(all_json.decode())),
+                version.get_latest_version(json.loads(entry_json.decode())))
+
+
+class get_cached_version_info_TestCase(testtools.TestCase):
+    """ Test cases for ‘get_cached_version_info’ function. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super(get_cached_version_info_TestCase, self).setUp()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.changelog_path = os.path.join(self.temp_dir, "ChangeLog")
+        self.write_changelog("Version 1.0\n===========\n")
+        self.cache_path = os.path.join(
+                self.temp_dir, "build", version.version_info_cache_filename)
+
+        self.fake_version_info = collections.OrderedDict([
+                ('release_date', "2009-01-01"), ('version', "1.0"),
+                ('maintainer', None), ('body', None),
+                ])
+        func_patcher_generate = mock.patch.object(
+                version, "generate_version_info_from_changelog",
+                return_value=self.fake_version_info)
+        self.mock_generate = func_patcher_generate.start()
+        self.addCleanup(func_patcher_generate.stop)
+
+    def write_changelog(self, text):
+        """ Write the test changelog document. """
+        with io.open(self.changelog_path, 'wt', encoding="utf-8") as outfile:
+            outfile.write(text)
+
+    def test_generates_without_cache(self):
+        """ Should generate the version info if no cache path. """
+        result = version.get_cached_version_info(self.changelog_path)
+        self.assertEqual(self.fake_version_info, result)
+        self.mock_generate.assert_called_with(self.changelog_path, False)
+        self.assertFalse(os.path.exists(self.cache_path))
+
+    def test_writes_cache_then_reuses_it(self):
+        """ Should reuse the cache while the changelog is unchanged. """
+        first_result = version.get_cached_version_info(
+                self.changelog_path, self.cache_path)
+        second_result = version.get_cached_version_info(
+                self.changelog_path, self.cache_path)
+        self.assertEqual(1, self.mock_generate.call_count)
+        self.assertEqual(first_result, second_result)
+        self.assertEqual(
+                list(self.fake_version_info.keys()),
+                list(second_result.keys()))
+
+    def test_regenerates_when_changelog_changed(self):
+        """ Should generate the version info if the changelog changed. """
+        version.get_cached_version_info(self.changelog_path, self.cache_path)
+        self.write_changelog("Version 1.1\n===========\n")
+        version.get_cached_version_info(self.changelog_path, self.cache_path)
+        self.assertEqual(2, self.mock_generate.call_count)
+
+    def test_regenerates_when_mode_changed(self):
+        """ Should generate the version info for a different mode. """
+        version.get_cached_version_info(self.changelog_path, self.cache_path)
+        version.get_cached_version_info(
+                self.changelog_path, self.cache_path, incremental=True)
+        self.assertEqual(2, self.mock_generate.call_count)
+        self.mock_generate.assert_called_with(self.changelog_path, True)
+
+    def test_regenerates_when_forced(self):
+        """ Should generate the version info if `force` is true. """
+        version.get_cached_version_info(self.changelog_path, self.cache_path)
+        version.get_cached_version_info(
+                self.changelog_path, self.cache_path, force=True)
+        self.assertEqual(2, self.mock_generate.call_count)
+
+    def test_regenerates_when_cache_corrupt(self):
+        """ Should generate the version info if the cache is unreadable. """
+        os.makedirs(os.path.dirname(self.cache_path))
+        with io.open(self.cache_path, 'wt', encoding="utf-8") as outfile:
+            outfile.write("b0gUs")
+        result = version.get_cached_version_info(
+                self.changelog_path, self.cache_path)
+        self.assertEqual(self.fake_version_info, result)
+        self.assertEqual(1, self.mock_generate.call_count)
+
+
 @mock.patch.object(json, "dumps", side_effect=json.dumps)
 class serialise_version_info_from_mapping_TestCase(
         testscenarios.WithScenarios, testtools.TestCase):
@@ -1090,6 +1239,18 @@ class WriteVersionInfoCommand_user_options_TestCase(
         result = self.commandline_parser.has_option(expected_option_name)
         self.assertTrue(result)
 
+    def test_has_option_cache_path(self):
+        """ Should have a ‘cache-path’ option. """
+        expected_option_name = "cache-path="
+        result = self.commandline_parser.has_option(expected_option_name)
+        self.assertTrue(result)
+
+    def test_has_option_incremental(self):
+        """ Should have an ‘incremental’ option. """
+        expected_option_name = "incremental"
+        result = self.commandline_parser.has_option(expected_option_name)
+        self.assertTrue(result)
+
 
 class WriteVersionInfoCommand_initialize_options_TestCase(
         WriteVersionInfoCommand_BaseTestCase):
@@ -1122,6 +1283,16 @@ class WriteVersionInfoCommand_initialize_options_TestCase(
         instance = version.WriteVersionInfoCommand(self.test_distribution)
         self.assertIs(instance.outfile_path, None)
 
+    def test_sets_cache_path_to_none(self):
+        """ Should set ‘cache_path’ attribute to ``None``. """
+        instance = version.WriteVersionInfoCommand(self.test_distribution)
+        self.assertIs(instance.cache_path, None)
+
+    def test_sets_incremental_to_false(self):
+        """ Should set ‘incremental’ attribute to ``False``. """
+        instance = version.WriteVersionInfoCommand(self.test_distribution)
+        self.assertIs(instance.incremental, False)
+
 
 class WriteVersionInfoCommand_finalize_options_TestCase(
         WriteVersionInfoCommand_BaseTestCase):
@@ -1198,6 +1369,22 @@ class WriteVersionInfoCommand_finalize_options_TestCase(
         expected_outfile_path = prior_outfile_path
         self.assertEqual(expected_outfile_path, self.test_instance.outfile_path)
 
+    def test_sets_cache_path_to_default_in_build_directory(self):
+        """ Should set ‘cache_path’ to a file in the build directory. """
+        self.test_instance.build_base = self.getUniqueString()
+        self.test_instance.finalize_options()
+        expected_cache_path = os.path.join(
+                self.test_instance.build_base,
+                version.version_info_cache_filename)
+        self.assertEqual(expected_cache_path, self.test_instance.cache_path)
+
+    def test_leaves_cache_path_if_already_set(self):
+        """ Should leave ‘cache_path’ attribute set. """
+        prior_cache_path = self.getUniqueString()
+        self.test_instance.cache_path = prior_cache_path
+        self.test_instance.finalize_options()
+        self.assertEqual(prior_cache_path, self.test_instance.cache_path)
+
 
 class has_changelog_TestCase(
         testscenarios.WithScenarios, testtools.TestCase):
@@ -1272,7 +1459,7 @@ class has_changelog_TestCase(
         self.assertEqual(self.expected_result, result)
 
 
-@mock.patch.object(version, 'generate_version_info_from_changelog')
+@mock.patch.object(version, 'get_cached_version_info')
 @mock.patch.object(version, 'serialise_version_info_from_mapping')
 @mock.patch.object(version.EggInfoCommand, "write_file")
 class WriteVersionInfoCommand_run_TestCase(
@@ -1292,6 +1479,10 @@ class WriteVersionInfoCommand_run_TestCase(
         self.fake_outfile_path = self.getUniqueString()
         self.test_instance.outfile_path = self.fake_outfile_path
 
+        self.fake_cache_path = self.getUniqueString()
+        self.test_instance.cache_path = self.fake_cache_path
+        self.test_instance.force = None
+
     def test_returns_none(
             self,
             mock_func_egg_info_write_file,
@@ -1310,7 +1501,8 @@ class WriteVersionInfoCommand_run_TestCase(
         self.test_instance.run()
         expected_changelog_path = self.test_instance.changelog_path
         mock_func_generate_version_info.assert_called_with(
-                expected_changelog_path)
+                expected_changelog_path, cache_path=self.fake_cache_path,
+                incremental=False, force=None)
 
     def test_serialises_version_info_from_mapping(
             self,
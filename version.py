@@ -33,6 +33,7 @@ import sys
 import os
 import io
 import errno
+import hashlib
 import json
 import datetime
 import textwrap
@@ -421,11 +422,36 @@ except AttributeError:
     lru_cache = lambda maxsize=None, typed=False: lambda func: func
 
 
+changelog_title_regex = re.compile(
+        r"^[^\s.].*\n=+[ \t]*$", flags=re.MULTILINE)
+
+def get_newest_changelog_entry(text):
+    """ Get the text of the newest entry in the changelog document.
+
+        :param text: The text of the changelog document.
+        :return: The text of the document up to the title of its second
+            entry; or the whole text if there is only one entry.
+
+        The entries of the ‘ChangeLog’ document are in order from
+        newest to oldest, so the first entry is the newest.
+
+        """
+    titles = changelog_title_regex.finditer(text)
+    next(titles, None)
+    second_title = next(titles, None)
+    if second_title is None:
+        return text
+
+    return text[:second_title.start()]
+
+
 @lru_cache(maxsize=128)
-def generate_version_info_from_changelog(infile_path):
+def generate_version_info_from_changelog(infile_path, incremental=False):
     """ Get the version info for the latest version in the changelog.
 
         :param infile_path: Filesystem path to the input changelog file.
+        :param incremental: If true, parse only the newest entry of
+            the changelog, instead of the whole document.
         :return: The generated version info mapping; or ``None`` if the
             file cannot be read.
 
@@ -437,6 +463,8 @@ def generate_version_info_from_changelog(infile_path):
     versions_all_json = None
     try:
         with io.open(infile_path, 'rt', encoding="utf-8") as infile:
+            if incremental:
+                infile = io.StringIO(get_newest_changelog_entry(infile.read()))
             versions_all_json = changelog_to_version_info_collection(infile)
     except EnvironmentError:
         # If we can't read the input file, leave the collection empty.
@@ -470,6 +498,116 @@ def get_latest_version(versions):
     return version_info
 
 
+version_info_cache_format = 1
+
+def get_changelog_digest(infile_path, incremental=False):
+    """ Get the digest identifying the version info of a changelog.
+
+        :param infile_path: Filesystem path to the input changelog file.
+        :param incremental: If true, the version info is generated from
+            only the newest entry of the changelog.
+        :return: The hexadecimal SHA-256 digest of the changelog content
+            and the generation mode; or ``None`` if the file cannot be
+            read.
+
+        """
+    digest = hashlib.sha256()
+    digest.update("version-info-cache {format:d} {mode}\n".format(
+            format=version_info_cache_format,
+            mode=("incremental" if incremental else "full")).encode('utf-8'))
+    try:
+        with io.open(infile_path, 'rb') as infile:
+            digest.update(infile.read())
+    except EnvironmentError:
+        return None
+
+    return digest.hexdigest()
+
+
+def read_version_info_cache(cache_path, digest):
+    """ Read the cached version info, if it matches the digest.
+
+        :param cache_path: Filesystem path to the version info cache.
+        :param digest: The changelog digest, from `get_changelog_digest`.
+        :return: The cached version info mapping; or ``None`` if the
+            cache cannot be read, or is for a different digest.
+
+        """
+    try:
+        with io.open(cache_path, 'rt', encoding="utf-8") as infile:
+            cache = json.load(
+                    infile, object_pairs_hook=collections.OrderedDict)
+    except (EnvironmentError, ValueError):
+        return None
+
+    if not isinstance(cache, dict) or cache.get('digest') != digest:
+        return None
+
+    return cache.get('version_info')
+
+
+def write_version_info_cache(cache_path, digest, version_info):
+    """ Write the version info to the cache.
+
+        :param cache_path: Filesystem path to the version info cache.
+        :param digest: The changelog digest, from `get_changelog_digest`.
+        :param version_info: The version info mapping to cache.
+        :return: ``None``.
+
+        The cache is replaced atomically, so concurrent builds read
+        either the old or the new content. The cache is optional, so
+        an error writing it is ignored.
+
+        """
+    cache = collections.OrderedDict([
+            ('digest', digest),
+            ('version_info', version_info),
+            ])
+    temp_path = "{path}.{pid:d}.tmp".format(path=cache_path, pid=os.getpid())
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        with io.open(temp_path, 'wt', encoding="utf-8") as outfile:
+            outfile.write(unicode(json.dumps(cache, indent=4)))
+        os.rename(temp_path, cache_path)
+    except EnvironmentError:
+        pass
+
+
+def get_cached_version_info(
+        infile_path, cache_path=None, incremental=False, force=False):
+    """ Get the version info for the latest version, through a cache.
+
+        :param infile_path: Filesystem path to the input changelog file.
+        :param cache_path: Filesystem path to the version info cache,
+            or ``None`` to not use a cache.
+        :param incremental: If true, parse only the newest entry of
+            the changelog, instead of the whole document.
+        :param force: If true, generate the version info even if the
+            cache matches, then update the cache.
+        :return: The version info mapping.
+
+        The cache is keyed by the digest of the changelog content, so
+        it is reused only while the changelog is unchanged.
+
+        """
+    digest = None
+    if cache_path is not None:
+        digest = get_changelog_digest(infile_path, incremental)
+    if digest is not None and not force:
+        version_info = read_version_info_cache(cache_path, digest)
+        if version_info is not None:
+            return version_info
+
+    version_info = generate_version_info_from_changelog(
+            infile_path, incremental)
+    if digest is not None:
+        write_version_info_cache(cache_path, digest, version_info)
+
+    return version_info
+
+
 def serialise_version_info_from_mapping(version_info):
     """ Generate the version info serialised data.
 
@@ -527,6 +665,7 @@ class EggInfoCommand(setuptools.command.egg_info.egg_info, object):
 
 
 version_info_filename = "version_info.json"
+version_info_cache_filename = "version_info_cache.json"
 
 class WriteVersionInfoCommand(EggInfoCommand, object):
     """ Setuptools command to serialise version info metadata. """
@@ -536,19 +675,29 @@ class WriteVersionInfoCommand(EggInfoCommand, object):
              "Filesystem path to the changelog document."),
             ("outfile-path=", None,
              "Filesystem path to the version info file."),
+            ("cache-path=", None,
+             "Filesystem path to the version info cache."),
+            ("incremental", None,
+             "Parse only the newest entry of the changelog."),
             ] + EggInfoCommand.user_options)
 
+    boolean_options = ['incremental'] + EggInfoCommand.boolean_options
+
     def initialize_options(self):
         """ Initialise command options to defaults. """
         super(WriteVersionInfoCommand, self).initialize_options()
         self.changelog_path = None
         self.outfile_path = None
+        self.cache_path = None
+        self.incremental = False
+        self.build_base = None
 
     def finalize_options(self):
         """ Finalise command options before execution. """
         self.set_undefined_options(
                 'build',
-                ('force', 'force'))
+                ('force', 'force'),
+                ('build_base', 'build_base'))
 
         super(WriteVersionInfoCommand, self).finalize_options()
 
@@ -559,9 +708,15 @@ class WriteVersionInfoCommand(EggInfoCommand, object):
             egg_dir = self.egg_info
             self.outfile_path = os.path.join(egg_dir, version_info_filename)
 
+        if self.cache_path is None:
+            self.cache_path = os.path.join(
+                    self.build_base, version_info_cache_filename)
+
     def run(self):
         """ Execute this command. """
-        version_info = generate_version_info_from_changelog(self.changelog_path)
+        version_info = get_cached_version_info(
+                self.changelog_path, cache_path=self.cache_path,
+                incremental=self.incremental, force=self.force)
         content = serialise_version_info_from_mapping(version_info)
         self.write_file("version info", self.outfile_path, content)
 